@@ -10,23 +10,51 @@ from qgis.PyQt.QtWidgets import QApplication
 from qgis.PyQt.QtCore import QTimer
 from PyQt5.QtCore import QVariant
 from qgis.PyQt import uic
-from qgis.PyQt.QtCore import Qt, QSettings, QDate, QTimer, QEventLoop
+from qgis.PyQt.QtCore import Qt, QSettings, QDate, QTimer
 from qgis.PyQt.QtWidgets import (QAction, QDialog, QMessageBox, 
                                QVBoxLayout, QHBoxLayout, QLabel, 
                                QLineEdit, QPushButton, QComboBox, QCheckBox,
                                QDateEdit, QProgressBar, QFileDialog,
                                QInputDialog, QWidget, QGroupBox, QGridLayout,
                                QSpinBox, QDoubleSpinBox, QSizePolicy, QRadioButton,
-                               QToolButton)
+                               QToolButton, QDialogButtonBox)
 from qgis.PyQt.QtGui import QIcon
 from PyQt5.QtGui import QColor
 from qgis.core import (QgsProject, QgsRasterLayer, QgsCoordinateReferenceSystem,
                       QgsCoordinateTransform, QgsRectangle, QgsContrastEnhancement, 
                       QgsMultiBandColorRenderer, QgsMapLayer, QgsVectorLayer,
                       QgsCategorizedSymbolRenderer, QgsRendererCategory, 
-                      QgsFillSymbol, QgsSymbol, QgsSingleSymbolRenderer, QgsWkbTypes)
+                      QgsFillSymbol, QgsSymbol, QgsSingleSymbolRenderer, QgsWkbTypes,
+                      QgsGeometry, QgsApplication, Qgis, QgsVectorLayerFeatureSource)
+from qgis.gui import QgsMapLayerComboBox
+from qgis.core import QgsMapLayerProxyModel
 from qgis.utils import iface
 import requests
+from .coverage import solve_layer_coverage
+from .aoi import layer_aoi_geometry, search_geometry
+from .search_layers import FootprintLayers
+from .scene_loader import SceneLoadTask, write_item_wms_xml
+from .core.alert_filters import AlertQuery
+from .alert_store import (AlertStore, local_filter, SIMPLIFIED_LEVELS,
+                          FULL_GEOMETRY_MIN_SCALE)
+from .alert_stats import aggregate_layer, aggregate_wfs, write_csv, plot_monthly
+from .alert_vector_tiles import AlertTileCache, TILE_LAYER_NAME
+from .alert_export import (available_formats, export_layer, export_wfs, write_stream,
+                           FORMAT_FLATGEOBUF, FORMAT_PARQUET, FORMAT_EXTENSIONS)
+from .alert_chips import AlertChipJob, FORMAT_PNG, FORMAT_GEOTIFF
+from .core.planet import PlanetClient, bbox_geometry, search_filter, search_payload
+from .core.tiles import (month_range, monthly_mosaic_id, mosaic_xyz_uri, index_mosaic_ids,
+                         index_xyz_uri, mosaic_wms_xml)
+from .core.indices import proc_param, color_ramp
+from .core.sccon_wfs import WfsService, WfsError, WfsAuthError, split_bbox
+from .processing_provider import BrasilMaisProvider, PROVIDER_ID
+from .telemetry import Telemetry, TelemetryDock, default_log_path
+from .profiling import Profiler, ProfileDialog, profiled
+from .core.profiling import span, timed, PHASE_LAYERS, PHASE_STYLE
+from .jobs import (JobManager, JobHistoryDock, JobHistoryDialog, JobCanceled, SERVICE_PLANET_TILES,
+                   SERVICE_PLANET_API, SERVICE_SCCON, SERVICE_LOCAL)
+from .layer_registry import (LayerRegistry, ROLE_FOOTPRINTS, ROLE_SCENE,
+                             ROLE_MOSAIC, ROLE_INDEX_MOSAIC, ROLE_ALERTS)
 try:
     # Tentativa para versões mais recentes da biblioteca
     import planet
@@ -48,26 +76,86 @@ plugin_path = os.path.dirname(__file__)
 FORM_CLASS, _ = uic.loadUiType(os.path.join(plugin_path, 'planet_plugin_dialog.ui'))
 MIN_YEAR = 2016
 
+# Acima deste número de alertas a camada é carregada sob demanda (por extensão)
+DEFAULT_ALERT_HIT_THRESHOLD = 50000
+
+# Intervalo (s) entre os mosaicos de uma série, para não sobrecarregar o servidor de tiles
+MOSAIC_REQUEST_INTERVAL = 0.6
+
+# Cores dos tipos de alerta conhecidos
+ALERT_TYPE_COLORS = {
+    "Cicatriz de Queimadas": QColor(255, 0, 0, 128),  # Vermelho
+    "Desmatamento - Corte Raso": QColor(255, 165, 0, 128),  # Laranja
+    "Desmatamento - Degradacao": QColor(255, 255, 0, 128),  # Amarelo
+    "Desmatamento - Degradacao - Corte Seletivo": QColor(0, 255, 0, 128),  # Verde
+    "BLOW_DOWN": QColor(128, 0, 128, 128),  # Roxo
+    "LANDSLIDES": QColor(165, 42, 42, 128),  # Marrom
+    "SELECTIVE_EXTRACTION": QColor(0, 128, 128, 128),  # Ciano
+    "DEGRADATION_PROCESS": QColor(0, 0, 255, 128),  # Azul
+    "NULL": QColor(128, 128, 128, 128)  # Cinza para valores NULL
+}
+
+
+def alert_type_color(valor):
+    """Retorna a cor de um tipo de alerta (estável entre sessões para tipos não previstos)"""
+    if valor in ALERT_TYPE_COLORS:
+        return ALERT_TYPE_COLORS[valor]
+    import zlib
+    seed = zlib.crc32(str(valor).encode('utf-8'))
+    return QColor(seed & 0xFF, (seed >> 8) & 0xFF, (seed >> 16) & 0xFF, 128)
+
+
+def alert_fill_symbol(cor):
+    """Cria o símbolo de preenchimento usado pelos alertas"""
+    return QgsFillSymbol.createSimple({
+        'color': f'{cor.red()},{cor.green()},{cor.blue()},{cor.alpha()}',
+        'outline_color': f'{cor.red()},{cor.green()},{cor.blue()},255',
+        'outline_width': '0.5'
+    })
+
+
+def alert_category(valor):
+    """Cria a categoria do renderizador para um tipo de alerta"""
+    symbol = alert_fill_symbol(alert_type_color(valor))
+    # Lidar com o caso especial de NULL
+    if valor == "NULL":
+        return QgsRendererCategory(QVariant(), symbol, "NULL/Vazio")
+    return QgsRendererCategory(valor, symbol, str(valor))
+
+
 class PlanetPlugin:
     """Plugin QGIS para acesso a imagens da Planet Labs"""
     
     def __init__(self, iface):
+        # Sob o qgis_process, iface é None e apenas initProcessing é chamado:
+        # a barra de ferramentas, os painéis e a validação da API Key ficam em initGui
         self.iface = iface
         self.actions = []
         self.menu = 'Catalog Prog. Brasil Mais - SCCON/Planet'
-        self.toolbar = self.iface.addToolBar('Brasil Mais')  #Nome da barra de ferramentas
-        self.toolbar.setObjectName('BrasilMais') #Nome do objeto
+        self.toolbar = None
         
         # Inicializar API client com None
         self.client = None
+        self.is_api_key_valid = False
         
         # Configurações
         self.settings = QSettings()
         
-        # Tentar carregar e validar a API Key automaticamente
+        # Registro das camadas criadas pelo plugin (gravado no projeto)
+        self.layer_registry = LayerRegistry()
+        
+        # Jobs em segundo plano (fila por serviço e histórico)
+        self.jobs = JobManager()
+        self.jobs_dock = None
+        self.provider = None
+        
+        # Telemetria de rede e modo de perfilamento, criados em initGui
+        self.telemetry = None
+        self.telemetry_dock = None
+        self.profiler = None
+        
+        # API Key salva, validada em initGui
         self.api_key = self.settings.value("planet_plugin/api_key", "")
-        if self.api_key:
-            self.validate_api_key_silently(self.api_key)
         
     def add_action(self, icon_path, text, callback, enabled_flag=True,
                   add_to_menu=True, add_to_toolbar=True, status_tip=None,
@@ -95,15 +183,73 @@ class PlanetPlugin:
         
         return action
         
+    def initProcessing(self):
+        """Registra o provedor Processing (também usado pelo qgis_process)"""
+        if self.provider is not None:
+            return
+        self.provider = BrasilMaisProvider()
+        QgsApplication.processingRegistry().addProvider(self.provider)
+        
     def initGui(self):
         """Inicializar a interface gráfica do plugin"""
         
+        self.initProcessing()
+        
+        self.toolbar = self.iface.addToolBar('Brasil Mais')  #Nome da barra de ferramentas
+        self.toolbar.setObjectName('BrasilMais') #Nome do objeto
+        
+        # Modo de perfilamento das ações do diálogo
+        self.profiler = Profiler(self.settings, self.iface)
+        
+        # Tentar validar a API Key salva automaticamente
+        if self.api_key:
+            self.validate_api_key_silently(self.api_key)
+        
         icon_path = os.path.join(plugin_path, 'icon.png')
         self.add_action(
             icon_path,
             text="Brasil MAIS Plugin",
             callback=self.run,
             parent=self.iface.mainWindow())
+        
+        # Painel com o histórico de tarefas, inicialmente oculto
+        self.jobs_dock = JobHistoryDock(self.jobs, self.iface.mainWindow())
+        self.iface.addDockWidget(Qt.BottomDockWidgetArea, self.jobs_dock)
+        self.jobs_dock.hide()
+        self.add_action(
+            icon_path,
+            text="Tarefas Brasil MAIS",
+            callback=self.show_jobs,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow())
+        self.add_action(
+            icon_path,
+            text="Lote de áreas de interesse...",
+            callback=self.run_batch,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow())
+        
+        # Telemetria das requisições de rede: painel, inicialmente oculto, e log JSONL opcional
+        self.telemetry = Telemetry()
+        self.telemetry.watch_url(self.settings.value("sccon_plugin/url", ""))
+        self.telemetry.start()
+        if self.settings.value("brmais/telemetry_log", False, type=bool):
+            self.telemetry.set_log_path(default_log_path())
+        self.telemetry_dock = TelemetryDock(self.telemetry, self.settings, self.iface.mainWindow())
+        self.iface.addDockWidget(Qt.BottomDockWidgetArea, self.telemetry_dock)
+        self.telemetry_dock.hide()
+        self.add_action(
+            icon_path,
+            text="Telemetria de rede Brasil MAIS",
+            callback=self.show_telemetry,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow())
+        self.add_action(
+            icon_path,
+            text="Perfilamento Brasil MAIS...",
+            callback=self.show_profiling,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow())
             
     def unload(self):
         """Remover o plugin da interface"""
@@ -112,7 +258,48 @@ class PlanetPlugin:
             self.iface.removePluginMenu(self.menu, action)
             self.iface.removeToolBarIcon(action)
             
-        del self.toolbar
+        self.jobs.cancel_all()
+        if self.profiler is not None:
+            self.profiler.finish()
+        if self.provider is not None:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+            self.provider = None
+        if self.jobs_dock is not None:
+            self.iface.removeDockWidget(self.jobs_dock)
+            self.jobs_dock.deleteLater()
+            self.jobs_dock = None
+        if self.telemetry is not None:
+            self.telemetry.stop()
+        if self.telemetry_dock is not None:
+            self.iface.removeDockWidget(self.telemetry_dock)
+            self.telemetry_dock.deleteLater()
+            self.telemetry_dock = None
+        
+        self.layer_registry.disconnect()
+        if self.toolbar is not None:
+            self.toolbar.deleteLater()
+            self.toolbar = None
+        
+    def run_batch(self):
+        """Abre o algoritmo Processing de pesquisa, cobertura e alertas por AOI"""
+        import processing
+        processing.execAlgorithmDialog(f"{PROVIDER_ID}:batchaois")
+        
+    def show_jobs(self):
+        """Exibe o painel de tarefas em segundo plano"""
+        if self.jobs_dock is not None:
+            self.jobs_dock.show()
+            self.jobs_dock.raise_()
+        
+    def show_telemetry(self):
+        """Exibe o painel de telemetria de rede"""
+        if self.telemetry_dock is not None:
+            self.telemetry_dock.show()
+            self.telemetry_dock.raise_()
+        
+    def show_profiling(self):
+        """Ativa o modo de perfilamento e exibe os resumos gravados"""
+        ProfileDialog(self.profiler, self.iface.mainWindow()).exec_()
         
     def run(self):
         """Executar o plugin"""
@@ -151,25 +338,16 @@ class PlanetPlugin:
     def validate_api_key_silently(self, api_key):
         """Validar API Key sem mostrar diálogos"""
         try:
-            response = requests.get(
-                'https://api.planet.com/basemaps/v1/mosaics',
-                auth=(api_key, '')
-            )
-            
-            if response.status_code == 200:
-                self.is_api_key_valid = True
-                if HAS_PLANET_API:
-                    self.client = api.ClientV1(api_key=api_key)
-                else:
-                    self.client = CustomPlanetClient(api_key)
-                return True
-            else:
-                self.is_api_key_valid = False
-                return False
-                
+            self.is_api_key_valid = PlanetClient(api_key).validate()
         except Exception:
             self.is_api_key_valid = False
-            return False
+        
+        if self.is_api_key_valid:
+            if HAS_PLANET_API:
+                self.client = api.ClientV1(api_key=api_key)
+            else:
+                self.client = PlanetClient(api_key)
+        return self.is_api_key_valid
             
 
 class PlanetPluginDialog(QDialog, FORM_CLASS):
@@ -192,6 +370,10 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
 
     def setup_ui(self):
         """Configurar interface inicial"""
+        # Botão para acompanhar e cancelar as tarefas em segundo plano
+        self.jobsButton = self.button_box.addButton("Tarefas...", QDialogButtonBox.ActionRole)
+        self.jobsButton.clicked.connect(self.show_jobs)
+        
         # Desativar abas até que a API seja validada
         self.tabWidget.setTabEnabled(1, False)  # Mosaicos mensais
         self.tabWidget.setTabEnabled(2, False)  # Imagens diárias
@@ -234,6 +416,22 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
         self.dailyEndDateEdit.setMaximumDate(current_date)
         self.dailyEndDateEdit.setMinimumDate(QDate(min_year, 1, 1))  # Mesma data mínima
         
+        # Área de interesse da pesquisa diária a partir de uma camada de polígonos
+        self.dailyAoiLayerCheckBox = QCheckBox("Usar feições selecionadas da camada:")
+        self.dailyAoiLayerCombo = QgsMapLayerComboBox()
+        self.dailyAoiLayerCombo.setFilters(QgsMapLayerProxyModel.PolygonLayer)
+        self.dailyAoiLayerCombo.setToolTip(
+            "Pesquisa pelos polígonos selecionados (ou, sem seleção, por todos) em vez do retângulo"
+        )
+        self.dailyAoiLayerCombo.setEnabled(False)
+        self.dailyAoiLayerCheckBox.toggled.connect(self.dailyAoiLayerCombo.setEnabled)
+        self.dailyAoiLayerCheckBox.toggled.connect(lambda checked: self.bboxLineEdit.setEnabled(not checked))
+        self.dailyAoiLayerCheckBox.toggled.connect(lambda checked: self.currentExtentButton.setEnabled(not checked))
+        aoi_layout = QHBoxLayout()
+        aoi_layout.addWidget(self.dailyAoiLayerCheckBox)
+        aoi_layout.addWidget(self.dailyAoiLayerCombo, 1)
+        self.verticalLayout_4.insertLayout(2, aoi_layout)
+        
         # Configurar a aba de índices espectrais
         self.indexComboBox.addItems(["NDVI", "NDWI", "MSAVI2", "VARI", "MTVI2", "CIR"])
         
@@ -344,15 +542,115 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
         
         self.filters_layout.addWidget(self.alertsFiltersWidget, 2, 0, 1, 2)
         
+        # Recorte espacial da consulta de alertas
+        self.filters_layout.addWidget(QLabel("Área de interesse:"), 3, 0)
+        self.alertAoiCombo = QComboBox()
+        self.alertAoiCombo.addItems([
+            "Sem recorte espacial",
+            "Extensão atual do mapa",
+            "Camada de polígonos"
+        ])
+        self.filters_layout.addWidget(self.alertAoiCombo, 3, 1)
+        
+        self.alertAoiLayerCombo = QgsMapLayerComboBox()
+        self.alertAoiLayerCombo.setFilters(QgsMapLayerProxyModel.PolygonLayer)
+        self.alertAoiLayerCombo.setToolTip("Usa as feições selecionadas da camada ou, sem seleção, todas as feições")
+        self.alertAoiLayerCombo.setEnabled(False)
+        self.filters_layout.addWidget(self.alertAoiLayerCombo, 4, 1)
+        self.alertAoiCombo.currentIndexChanged.connect(
+            lambda index: self.alertAoiLayerCombo.setEnabled(index == 2)
+        )
+        
+        # Limite de alertas para o download completo (contagem prévia com resultType=hits)
+        self.filters_layout.addWidget(QLabel("Limite para download completo:"), 5, 0)
+        self.alertHitThresholdSpin = QSpinBox()
+        self.alertHitThresholdSpin.setRange(1000, 1000000)
+        self.alertHitThresholdSpin.setSingleStep(1000)
+        self.alertHitThresholdSpin.setValue(int(self.plugin.settings.value(
+            "sccon_plugin/hit_threshold", DEFAULT_ALERT_HIT_THRESHOLD)))
+        self.alertHitThresholdSpin.setToolTip(
+            "Acima deste número de alertas a camada é carregada sob demanda, conforme a extensão do mapa"
+        )
+        self.alertHitThresholdSpin.valueChanged.connect(
+            lambda value: self.plugin.settings.setValue("sccon_plugin/hit_threshold", value)
+        )
+        self.filters_layout.addWidget(self.alertHitThresholdSpin, 5, 1)
+        
         self.filtersGroup.setLayout(self.filters_layout)
         sccon_layout.addWidget(self.filtersGroup)
 
+        # Grupo da base local de alertas (GeoPackage sincronizado de forma incremental)
+        self.localStoreGroup = QGroupBox("Base Local de Alertas")
+        self.localStoreGroup.setEnabled(False)
+        local_store_layout = QGridLayout()
+        
+        self.useLocalStoreCheck = QCheckBox("Consultar a base local (sincroniza apenas os alertas novos)")
+        local_store_layout.addWidget(self.useLocalStoreCheck, 0, 0, 1, 2)
+        
+        self.localStoreLabel = QLabel()
+        local_store_layout.addWidget(self.localStoreLabel, 1, 0)
+        self.syncLocalStoreBtn = QPushButton("Sincronizar Base Local")
+        local_store_layout.addWidget(self.syncLocalStoreBtn, 1, 1)
+        self.syncLocalStoreBtn.clicked.connect(lambda: self.sync_local_store())
+        
+        # Cache de tiles vetoriais (MBTiles) para visualização em escalas pequenas
+        self.updateTilesCheck = QCheckBox("Atualizar os tiles vetoriais após sincronizar")
+        self.updateTilesCheck.setChecked(True)
+        local_store_layout.addWidget(self.updateTilesCheck, 2, 0)
+        self.loadAlertTilesBtn = QPushButton("Carregar Tiles Vetoriais")
+        self.loadAlertTilesBtn.setToolTip("Gera o cache na primeira vez; depois regenera só os tiles com alertas novos")
+        local_store_layout.addWidget(self.loadAlertTilesBtn, 2, 1)
+        self.loadAlertTilesBtn.clicked.connect(lambda: self.update_alert_tiles(load_layer=True))
+        
+        self.localStoreGroup.setLayout(local_store_layout)
+        sccon_layout.addWidget(self.localStoreGroup)
+        self.alert_store = AlertStore(simplified=True)
+        self.update_local_store_label()
+        
         # Botão para carregar dados
         self.loadScconDataBtn = QPushButton("Carregar Alertas")
         self.loadScconDataBtn.setEnabled(False)
         sccon_layout.addWidget(self.loadScconDataBtn)
         self.loadScconDataBtn.clicked.connect(self.load_sccon_data)
         
+        # Estatísticas por tipo e mês (opcionalmente por unidade administrativa)
+        stats_layout = QHBoxLayout()
+        stats_layout.addWidget(QLabel("Agrupar também por:"))
+        self.statsAdminFieldEdit = QLineEdit()
+        self.statsAdminFieldEdit.setPlaceholderText("campo da unidade administrativa (opcional, ex.: municipio)")
+        stats_layout.addWidget(self.statsAdminFieldEdit)
+        self.alertStatsBtn = QPushButton("Estatísticas dos Alertas")
+        self.alertStatsBtn.setEnabled(False)
+        stats_layout.addWidget(self.alertStatsBtn)
+        self.alertStatsBtn.clicked.connect(self.compute_alert_stats)
+        sccon_layout.addLayout(stats_layout)
+        
+        # Exportação em fluxo (FlatGeobuf / GeoParquet) dos alertas dos filtros atuais
+        self.exportAlertsBtn = QPushButton("Exportar Alertas (FlatGeobuf/GeoParquet)")
+        self.exportAlertsBtn.setEnabled(False)
+        sccon_layout.addWidget(self.exportAlertsBtn)
+        self.exportAlertsBtn.clicked.connect(self.export_alerts)
+        
+        # Recortes antes/depois dos alertas selecionados sobre os mosaicos mensais
+        chips_layout = QHBoxLayout()
+        chips_layout.addWidget(QLabel("Formato dos recortes:"))
+        self.alertChipFormatCombo = QComboBox()
+        self.alertChipFormatCombo.addItem("PNG", FORMAT_PNG)
+        self.alertChipFormatCombo.addItem("GeoTIFF (PNG + GeoTIFF)", FORMAT_GEOTIFF)
+        self.alertChipFormatCombo.setToolTip("GeoTIFF grava também uma cópia georreferenciada de cada recorte (GDAL)")
+        self.alertChipFormatCombo.setCurrentIndex(max(0, self.alertChipFormatCombo.findData(
+            self.plugin.settings.value("sccon_plugin/chip_format", FORMAT_PNG))))
+        self.alertChipFormatCombo.currentIndexChanged.connect(
+            lambda index: self.plugin.settings.setValue(
+                "sccon_plugin/chip_format", self.alertChipFormatCombo.itemData(index))
+        )
+        chips_layout.addWidget(self.alertChipFormatCombo)
+        self.alertChipsBtn = QPushButton("Gerar Recortes Antes/Depois dos Alertas Selecionados")
+        self.alertChipsBtn.setToolTip("Usa a seleção da camada de alertas ativa e os mosaicos mensais da Planet")
+        chips_layout.addWidget(self.alertChipsBtn)
+        self.alertChipsBtn.clicked.connect(self.generate_alert_chips)
+        sccon_layout.addLayout(chips_layout)
+        
         # Configurações salvas
         if hasattr(self.plugin, 'sccon_url') and self.plugin.sccon_url:
             self.scconUrlEdit.setText(self.plugin.sccon_url)
@@ -402,13 +700,8 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
             return
             
         try:
-            # Usar autenticação básica em vez de parâmetro de consulta
-            response = requests.get(
-                'https://api.planet.com/basemaps/v1/mosaics',
-                auth=(api_key, '')  # API Key como nome de usuário, senha vazia
-            )
-            
-            if response.status_code == 200:
+            client = PlanetClient(api_key)
+            if client.validate():
                 registration_msg = ""
                 if self.registerCheckBox.isChecked():
                     registration_msg = " e será salva para usos futuros"
@@ -419,25 +712,21 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
                 )
                 
                 self.is_api_key_valid = True
-                self.client = api.ClientV1(api_key=api_key) if HAS_PLANET_API else None
+                self.client = api.ClientV1(api_key=api_key) if HAS_PLANET_API else client
                 self.tabWidget.setTabEnabled(1, True)
                 self.tabWidget.setTabEnabled(2, True)
                 self.tabWidget.setTabEnabled(3, True)
             else:
-                QMessageBox.warning(
-                    self, "Erro", 
-                    f"Falha na autenticação. Código de status: {response.status_code}. Mensagem: {response.text}"
-                )
+                QMessageBox.warning(self, "Erro", "Falha na autenticação: a API Key foi recusada pela Planet.")
                 self.is_api_key_valid = False
                 
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao validar API Key: {str(e)}")
             self.is_api_key_valid = False
 
+    @profiled
     def connect_to_sccon(self):
         """Testa a conexão com os serviços SCCON"""
-        from qgis.core import QgsVectorLayer  # Importação explícita para evitar erro
-        
         print("Tentando conectar ao SCCON...")
         url = self.scconUrlEdit.text().strip()
         username = self.scconUserEdit.text().strip()
@@ -447,98 +736,100 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
             QMessageBox.warning(self, "Erro", "Por favor, informe a URL do serviço.")
             return
                 
-        self.progressBar.setValue(30)
-        QApplication.processEvents()
-        
-        try:
-            # Verificar se a URL termina com '/'
-            if not url.endswith('/'):
-                url += '/'
-                
-            # Detectar o tipo de serviço a partir da URL
-            service_type = self.detect_service_type(url)
-            
-            # Adicionar parâmetros WFS apropriados se necessário
-            if 'alerts/wfs' not in url and 'wfs' not in url:
-                if 'alerts' in url.lower():
-                    url += 'wfs'
-                elif 'basemaps' in url.lower():
-                    url += 'wfs'
-                elif 'buildings' in url.lower():
-                    url += 'wfs'
-                elif 'roads' in url.lower():
-                    url += 'wfs'
-                    
-            # Adicionar parâmetro userToken se URL não contiver
-            if 'userToken=' not in url:
-                url += '?userToken=' + username
+        # Verificar se a URL termina com '/'
+        if not url.endswith('/'):
+            url += '/'
+            
+        # Detectar o tipo de serviço a partir da URL
+        service_type = self.detect_service_type(url)
+        
+        # Adicionar parâmetros WFS apropriados se necessário
+        if 'alerts/wfs' not in url and 'wfs' not in url:
+            if 'alerts' in url.lower():
+                url += 'wfs'
+            elif 'basemaps' in url.lower():
+                url += 'wfs'
+            elif 'buildings' in url.lower():
+                url += 'wfs'
+            elif 'roads' in url.lower():
+                url += 'wfs'
                 
-            # Criar a string de conexão WFS exatamente como o QGIS faz
-            typename = self.get_typename_for_service(service_type)
-            datasource = f"pagingEnabled='true' restrictToRequestBBOX='1' srsname='EPSG:4326' typename='{typename}' url='{url}' username='{username}' password='{password}' version='1.1.0'"
-            
-            # Armazenar URL processada
-            self.processed_url = url
-            
-            # Criar a camada de teste
-            temp_layer = QgsVectorLayer(datasource, "Teste Conexão SCCON", "WFS")
+        # Adicionar parâmetro userToken se URL não contiver
+        if 'userToken=' not in url:
+            url += '?userToken=' + username
             
-            self.progressBar.setValue(70)
-            QApplication.processEvents()
+        typename = self.get_typename_for_service(service_type)
+        
+        # Armazenar URL processada
+        self.processed_url = url
+        
+        def probe(context):
+            # Uma única requisição GetCapabilities autenticada (resultado fica em cache)
+            return WfsService(url, username, password, typename).probe()
+        
+        def probed(exception, caps=None):
+            self.connectScconBtn.setEnabled(True)
+            self.progressBar.setRange(0, 100)
+            self.progressBar.setValue(0)
+            self.progressBar.setFormat("%p%")
             
-            if temp_layer.isValid():
-                print("Camada WFS válida criada com sucesso")
-                
-                # Verificar se consegue acessar dados
-                try:
-                    # Tentar contar features (irá falhar se a conexão não estiver realmente funcionando)
-                    count = 0
-                    for _ in temp_layer.getFeatures():
-                        count += 1
-                        if count >= 3:  # Limite para não carregar demais
-                            break
-                    
-                    print(f"Conseguiu acessar {count} features")
-                    QMessageBox.information(self, "Sucesso", f"Conexão com o serviço SCCON ({service_type}) estabelecida com sucesso!")
-                    
-                    # Salvar credenciais se solicitado
-                    if self.scconSaveAuth.isChecked():
-                        self.plugin.settings.setValue("sccon_plugin/url", url)
-                        self.plugin.settings.setValue("sccon_plugin/username", username)
-                        self.plugin.settings.setValue("sccon_plugin/password", password)
-                    else:
-                        self.plugin.settings.remove("sccon_plugin/url")
-                        self.plugin.settings.remove("sccon_plugin/username")
-                        self.plugin.settings.remove("sccon_plugin/password")
-                    
-                    # Marcar conexão como bem-sucedida
-                    self.is_connection_successful = True
-                    
-                    # Atualizar filtros com base no serviço detectado
-                    self.update_sccon_filters(service_type)
-                    
-                    # Habilitar controles para filtros e carregamento
-                    self.filtersGroup.setEnabled(True)
-                    self.loadScconDataBtn.setEnabled(True)
-                    
-                except Exception as inner_e:
-                    print(f"Camada válida, mas erro ao acessar dados: {str(inner_e)}")
-                    QMessageBox.warning(self, "Aviso", f"Conexão estabelecida, mas erro ao verificar dados: {str(inner_e)}")
-            else:
-                error_msg = temp_layer.error().message() if hasattr(temp_layer, 'error') else "Erro desconhecido"
-                print(f"Erro na criação da camada: {error_msg}")
+            if isinstance(exception, JobCanceled):
+                return
+            if isinstance(exception, WfsAuthError):
                 QMessageBox.warning(
                     self, "Erro", 
-                    f"Não foi possível conectar ao serviço. Verifique suas credenciais e URL.\nErro: {error_msg}"
+                    f"Não foi possível conectar ao serviço. Verifique suas credenciais e URL.\nErro: {str(exception)}"
                 )
-                    
-            self.progressBar.setValue(0)
-                
-        except Exception as e:
-            self.progressBar.setValue(0)
-            QMessageBox.critical(self, "Erro", f"Erro ao conectar: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
+                return
+            if isinstance(exception, (WfsError, requests.RequestException)):
+                print(f"Erro ao testar a conexão: {str(exception)}")
+                QMessageBox.warning(
+                    self, "Erro", 
+                    f"Não foi possível conectar ao serviço. Verifique suas credenciais e URL.\nErro: {str(exception)}"
+                )
+                return
+            if exception is not None:
+                QMessageBox.critical(self, "Erro", f"Erro ao conectar: {str(exception)}")
+                return
+            
+            print(f"Capabilities: versão {caps['version']}, {len(caps['feature_types'])} typenames")
+            QMessageBox.information(self, "Sucesso", f"Conexão com o serviço SCCON ({service_type}) estabelecida com sucesso!")
+            
+            # Salvar credenciais se solicitado
+            if self.scconSaveAuth.isChecked():
+                self.plugin.settings.setValue("sccon_plugin/url", url)
+                self.plugin.settings.setValue("sccon_plugin/username", username)
+                self.plugin.settings.setValue("sccon_plugin/password", password)
+            else:
+                self.plugin.settings.remove("sccon_plugin/url")
+                self.plugin.settings.remove("sccon_plugin/username")
+                self.plugin.settings.remove("sccon_plugin/password")
+            
+            # Marcar conexão como bem-sucedida
+            self.is_connection_successful = True
+            self.plugin.telemetry.watch_url(url)
+            
+            # Atualizar filtros com base no serviço detectado
+            self.update_sccon_filters(service_type)
+            
+            # Habilitar controles para filtros e carregamento
+            self.filtersGroup.setEnabled(True)
+            self.localStoreGroup.setEnabled(True)
+            self.loadScconDataBtn.setEnabled(True)
+            self.alertStatsBtn.setEnabled(True)
+            self.exportAlertsBtn.setEnabled(True)
+        
+        self.connectScconBtn.setEnabled(False)
+        self.progressBar.setRange(0, 0)
+        self.progressBar.setFormat("Conectando ao SCCON...")
+        self.plugin.jobs.submit("Conectando ao SCCON", probe, SERVICE_SCCON, on_finished=probed)
+
+    def show_jobs(self):
+        """Abre (sem bloquear o diálogo) a lista de tarefas em segundo plano"""
+        if getattr(self, 'jobs_dialog', None) is None:
+            self.jobs_dialog = JobHistoryDialog(self.plugin.jobs, self)
+        self.jobs_dialog.show()
+        self.jobs_dialog.raise_()
 
     def detect_service_type(self, url):
         """Detecta o tipo de serviço a partir da URL - sempre retorna alertas"""
@@ -554,35 +845,24 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
         self.alertsFiltersWidget.setVisible(True)
         self.loadScconDataBtn.setText("Carregar Alertas")
 
+    @profiled
     def load_sccon_data(self):
         """Carrega dados do serviço SCCON - apenas alertas"""
         url = self.scconUrlEdit.text().strip()
-        username = self.scconUserEdit.text().strip()
-        password = self.scconPassEdit.text().strip()
         
         if not url:
             QMessageBox.warning(self, "Erro", "URL do serviço não encontrada. Por favor, conecte-se primeiro.")
             return
         
         try:
-            # Definições sempre para alertas
-            typename = "alerts"
-            
             # Obter valores dos filtros
             date_start = self.startDateEdit.date().toString("yyyy-MM-dd")
             date_end = self.endDateEdit.date().toString("yyyy-MM-dd")
             area_min = self.areaMinSpin.value()
             alert_type = self.alertTypeCombo.currentText()
             
-            # Construir SQL apenas com filtros básicos
-            filters = f"area_ha > {area_min}"
-            
-            if date_start and date_end:
-                filters += f" AND dat_depois BETWEEN '{date_start}' AND '{date_end}'"
-                
-            # Adicionar filtro de tipo se não for "Todos"
-            if alert_type != "Todos":
-                filters += f" AND tipo = '{alert_type}'"
+            # Filtros enviados ao servidor (OGC Filter ou CQL, com valores escapados)
+            query = AlertQuery(area_min, date_start, date_end, alert_type)
                 
             layer_name = f"Alertas SCCON"
             if date_start and date_end:
@@ -592,63 +872,57 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
             if alert_type != "Todos":
                 layer_name += f" - {alert_type}"
             
-            # Iniciar progresso
-            self.progressBar.setValue(20)
-            QApplication.processEvents()
-            
-            # Construir SQL
-            sql = ""
-            if filters:
-                sql = f"SELECT * FROM {typename} WHERE {filters}"
-            
-            print(f"SQL Filter: {sql}")
-            
-            # Datasource
-            datasource = (
-                f"pagingEnabled='true' "
-                f"srsname='EPSG:4326' "
-                f"typename='{typename}' "
-                f"url='{url}' "
-                f"username='{username}' "
-                f"password='{password}' "
-            )
-            
-            # Adicionar filtro SQL se existir
-            if sql:
-                datasource += f"sql={sql}"
-            
-            self.progressBar.setValue(60)
-            QApplication.processEvents()
-            
-            # Criar camada
-            layer = QgsVectorLayer(datasource, layer_name, "WFS")
-            
-            self.progressBar.setValue(80)
-            QApplication.processEvents()
+            layer_params = {
+                "date_start": date_start,
+                "date_end": date_end,
+                "area_min": area_min,
+                "alert_type": alert_type,
+            }
             
-            if layer.isValid():
-                # Adicionar ao projeto
-                QgsProject.instance().addMapLayer(layer)
-                
-                # Aplicar estilo para alertas
-                self.apply_alert_style(layer, self.alertTypeCombo.currentText())
-                
-                self.progressBar.setValue(100)
-                QMessageBox.information(
-                    self, "Sucesso", 
-                    f"Camada '{layer_name}' carregada com sucesso!\n"
-                    f"Número de feições: {layer.featureCount()}"
-                )
-            else:
-                error_msg = layer.error().message() if hasattr(layer, 'error') else "Erro desconhecido"
-                self.progressBar.setValue(0)
-                QMessageBox.warning(
-                    self, "Erro", 
-                    f"Não foi possível carregar os dados. Erro: {error_msg}"
+            # Recorte espacial (extensão do mapa ou camada de polígonos)
+            aoi = self._alert_aoi()
+            if aoi is False:
+                return
+            aoi_bbox, aoi_geom = aoi if aoi else (None, None)
+            if aoi_bbox:
+                layer_params["bbox"] = list(aoi_bbox)
+            
+            # Consultar a base local, sincronizando antes apenas os alertas novos
+            if self.useLocalStoreCheck.isChecked():
+                filter_args = (date_start, date_end, area_min, alert_type, aoi_bbox)
+                self.sync_local_store(
+                    on_synced=lambda: self._load_local_alerts(filter_args, layer_name, layer_params)
                 )
+                return
             
-            # Resetar progresso após 2 segundos
-            QTimer.singleShot(2000, lambda: self.progressBar.setValue(0))
+            print(f"Filtro: {query.to_cql()}")
+            
+            # Baixar as páginas do WFS em paralelo para um GeoPackage temporário
+            service = self.sccon_service()
+            store = AlertStore(os.path.join(
+                tempfile.gettempdir(), f"alertas_sccon_{datetime.now().strftime('%Y%m%d_%H%M%S')}.gpkg"
+            ))
+            
+            # Com área de interesse: dividir em blocos consultados em paralelo com filtro BBOX
+            tiles = None
+            feature_filter = None
+            if aoi_bbox:
+                tiles = split_bbox(aoi_bbox)
+                if aoi_geom is not None:
+                    tiles = [t for t in tiles if aoi_geom.intersects(QgsRectangle(*t))]
+                    engine = QgsGeometry.createGeometryEngine(aoi_geom.constGet())
+                    engine.prepareGeometry()
+                    feature_filter = lambda f: engine.intersects(f.geometry().constGet())
+                print(f"Consulta dividida em {len(tiles)} blocos")
+            
+            # Contagem prévia: acima do limite, carregar sob demanda ou refinar os filtros
+            count_query = query.with_bbox(aoi_bbox) if aoi_bbox else query
+            self._preflight_alerts(
+                service, count_query,
+                on_accepted=lambda: self._download_alerts(service, query, store, layer_name, layer_params,
+                                                          tiles=tiles, feature_filter=feature_filter),
+                on_lazy=lambda total: self._load_lazy_alerts(count_query, layer_name, layer_params, total)
+            )
             
         except Exception as e:
             self.progressBar.setValue(0)
@@ -656,276 +930,944 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
             import traceback
             print(traceback.format_exc())
 
-    def apply_grid_style(self, layer):
-        """Aplica estilo à camada de grade de imagens"""
-        from qgis.core import QgsSymbol, QgsSingleSymbolRenderer
-        
-        # Criar um estilo simples para a grade
-        symbol = QgsSymbol.defaultSymbol(layer.geometryType())
-        symbol.setColor(QColor(0, 0, 255, 50))  # Azul semitransparente
-        symbol.symbolLayer(0).setStrokeColor(QColor(0, 0, 255))
-        symbol.symbolLayer(0).setStrokeWidth(0.5)
-        
-        renderer = QgsSingleSymbolRenderer(symbol)
-        layer.setRenderer(renderer)
-        layer.triggerRepaint()
+    def sccon_service(self):
+        """Cria o cliente WFS do serviço SCCON a partir dos campos da aba"""
+        # Preferir a URL já processada na conexão (capabilities em cache)
+        url = getattr(self, 'processed_url', None) or self.scconUrlEdit.text().strip()
+        return WfsService(
+            url,
+            self.scconUserEdit.text().strip(),
+            self.scconPassEdit.text().strip(),
+            # CQL_FILTER só quando configurado: o GetCapabilities não o anuncia
+            use_cql=self.plugin.settings.value("sccon_plugin/use_cql", False, type=bool)
+        )
 
+    def _alert_aoi(self):
+        """Retorna o recorte espacial escolhido como (bbox, geometria) em EPSG:4326
 
-    def apply_buildings_style(self, layer):
-        """Aplica estilo à camada de edificações"""
-        from qgis.core import QgsSymbol, QgsSingleSymbolRenderer
+        Retorna None quando não há recorte e False quando a escolha é inválida.
+        """
+        option = self.alertAoiCombo.currentIndex()
+        if option == 0:
+            return None
+        
+        if option == 1:
+            return self._canvas_bbox(), None
+        
+        aoi_layer = self.alertAoiLayerCombo.currentLayer()
+        if aoi_layer is None:
+            QMessageBox.warning(self, "Erro", "Escolha uma camada de polígonos para a área de interesse.")
+            return False
         
-        # Criar um estilo para edificações
-        symbol = QgsSymbol.defaultSymbol(layer.geometryType())
-        symbol.setColor(QColor(255, 165, 0, 150))  # Laranja semitransparente
-        symbol.symbolLayer(0).setStrokeColor(QColor(139, 69, 19))  # Marrom para contorno
-        symbol.symbolLayer(0).setStrokeWidth(0.5)
+        # Mesma AOI das pesquisas de imagens (feições selecionadas ou todas, em EPSG:4326)
+        aoi_geom = layer_aoi_geometry(aoi_layer)
+        if aoi_geom is None:
+            QMessageBox.warning(self, "Erro", "A camada escolhida não possui polígonos.")
+            return False
         
-        renderer = QgsSingleSymbolRenderer(symbol)
-        layer.setRenderer(renderer)
-        layer.triggerRepaint()
+        extent = aoi_geom.boundingBox()
+        return (extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()), aoi_geom
 
+    def _canvas_bbox(self):
+        """Extensão atual do mapa como (xmin, ymin, xmax, ymax) em EPSG:4326"""
+        target_crs = QgsCoordinateReferenceSystem("EPSG:4326")
+        canvas = self.iface.mapCanvas()
+        extent = canvas.extent()
+        source_crs = canvas.mapSettings().destinationCrs()
+        if source_crs != target_crs:
+            transform = QgsCoordinateTransform(source_crs, target_crs, QgsProject.instance())
+            extent = transform.transformBoundingBox(extent)
+        return extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()
 
-    def apply_roads_style(self, layer):
-        """Aplica estilo à camada de estradas"""
-        from qgis.core import QgsSymbol, QgsSingleSymbolRenderer
-        
-        # Criar um estilo para estradas
-        symbol = QgsSymbol.defaultSymbol(layer.geometryType())
-        
-        # Estilo depende do tipo de geometria (linha ou polígono)
-        if layer.geometryType() == QgsWkbTypes.LineGeometry:
-            symbol.setColor(QColor(255, 0, 0))  # Vermelho
-            symbol.symbolLayer(0).setWidth(1.5)  # Linha mais larga
-        else:  # Polígono
-            symbol.setColor(QColor(255, 0, 0, 100))  # Vermelho semitransparente
-            symbol.symbolLayer(0).setStrokeColor(QColor(255, 0, 0))
-            symbol.symbolLayer(0).setStrokeWidth(0.8)
-        
-        renderer = QgsSingleSymbolRenderer(symbol)
-        layer.setRenderer(renderer)
-        layer.triggerRepaint()
+    def _preflight_alerts(self, service, query, on_accepted, on_lazy):
+        """Conta os alertas no servidor (resultType=hits) antes de baixá-los
 
-    def apply_alert_style(self, layer, alert_type):
-        """Aplica estilo à camada de alertas com suporte a todos os tipos encontrados"""
-        # Verificar campos disponíveis na camada
-        fields = [field.name() for field in layer.fields()]
+        Até o limite configurado chama on_accepted(); acima dele pergunta se a
+        camada deve ser carregada sob demanda (on_lazy(total)) ou se os filtros
+        serão refinados.
+        """
+        if getattr(self, 'alert_download_task', None) is not None:
+            QMessageBox.information(self, "Aguarde", "Um carregamento de alertas já está em andamento.")
+            return
         
-        # Tentar encontrar o campo tipo, caso insensível
-        tipo_field_name = None
-        for field in fields:
-            if field.lower() == "tipo":
-                tipo_field_name = field
-                break
+        def count(task):
+            params, _ = service.filter_params(query)
+            return service.hits(params)
         
-        # Se o tipo não for "Todos" ou o campo tipo não existir, usar estilo simples
-        if alert_type != "Todos" or not tipo_field_name:
-            # Cor padrão: vermelho semitransparente
-            color = QColor(255, 0, 0, 128)
-            
-            if alert_type == "Cicatriz de Queimadas":
-                color = QColor(255, 0, 0, 128)  # Vermelho
-            elif alert_type == "Desmatamento - Corte Raso":
-                color = QColor(255, 165, 0, 128)  # Laranja
-            elif alert_type == "Desmatamento - Degradacao":
-                color = QColor(255, 255, 0, 128)  # Amarelo
-            elif alert_type == "Desmatamento - Degradacao - Corte Seletivo":
-                color = QColor(0, 255, 0, 128)  # Verde
-            
-            symbol = QgsFillSymbol.createSimple({
-                'color': f'{color.red()},{color.green()},{color.blue()},{color.alpha()}',
-                'outline_color': f'{color.red()},{color.green()},{color.blue()},255',
-                'outline_width': '0.5'
-            })
-            renderer = QgsSingleSymbolRenderer(symbol)
-        else:
-            # Estilo categorizado para "Todos"
-            categorized = QgsCategorizedSymbolRenderer(tipo_field_name)
+        def counted(exception, total=None):
+            self.alert_download_task = None
+            self.loadScconDataBtn.setEnabled(True)
+            self.progressBar.setFormat("%p%")
+            self.progressBar.setRange(0, 100)
+            self.progressBar.setValue(0)
             
-            # Definir cores para tipos conhecidos
-            cores = {
-                "Cicatriz de Queimadas": QColor(255, 0, 0, 128),  # Vermelho
-                "Desmatamento - Corte Raso": QColor(255, 165, 0, 128),  # Laranja
-                "Desmatamento - Degradacao": QColor(255, 255, 0, 128),  # Amarelo
-                "Desmatamento - Degradacao - Corte Seletivo": QColor(0, 255, 0, 128),  # Verde
-                "BLOW_DOWN": QColor(128, 0, 128, 128),  # Roxo
-                "LANDSLIDES": QColor(165, 42, 42, 128),  # Marrom
-                "SELECTIVE_EXTRACTION": QColor(0, 128, 128, 128),  # Ciano
-                "DEGRADATION_PROCESS": QColor(0, 0, 255, 128),  # Azul
-                "NULL": QColor(128, 128, 128, 128)  # Cinza para valores NULL
-            }
+            if isinstance(exception, JobCanceled):
+                return
+            if exception is not None:
+                QMessageBox.critical(self, "Erro", f"Erro ao contar os alertas: {str(exception)}")
+                return
             
-            # Coletar valores únicos do campo tipo
-            valores_unicos = set()
-            for feature in layer.getFeatures():
-                valor = feature[tipo_field_name]
-                # Tratar valores NULL especialmente
-                if valor is None or valor == "NULL" or valor == "":
-                    valores_unicos.add("NULL")
-                else:
-                    valores_unicos.add(valor)
+            print(f"Contagem prévia: {total} alertas")
+            if total == 0:
+                QMessageBox.information(self, "Informação", "Nenhum alerta encontrado com os filtros especificados.")
+                return
             
-            # Adicionar categorias para cada valor único
-            for valor in valores_unicos:
-                # Se o valor está no nosso dicionário de cores predefinidas
-                if valor in cores:
-                    cor = cores[valor]
-                else:
-                    # Para valores não previstos, gerar cor aleatória
-                    import random
-                    r, g, b = random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)
-                    cor = QColor(r, g, b, 128)
-                
-                # Criar símbolo para o valor
-                symbol = QgsFillSymbol.createSimple({
-                    'color': f'{cor.red()},{cor.green()},{cor.blue()},{cor.alpha()}',
-                    'outline_color': f'{cor.red()},{cor.green()},{cor.blue()},255',
-                    'outline_width': '0.5'
-                })
-                
-                # Lidar com o caso especial de NULL
-                if valor == "NULL":
-                    # Para valores NULL, precisamos criar uma categoria especial
-                    categoria = QgsRendererCategory(QVariant(), symbol, "NULL/Vazio")
-                else:
-                    categoria = QgsRendererCategory(valor, symbol, str(valor))
-                
-                categorized.addCategory(categoria)
+            threshold = self.alertHitThresholdSpin.value()
+            if total <= threshold:
+                on_accepted()
+                return
             
-            renderer = categorized
+            box = QMessageBox(self)
+            box.setIcon(QMessageBox.Warning)
+            box.setWindowTitle("Muitos alertas")
+            box.setText(
+                f"Os filtros retornam {total} alertas, acima do limite de {threshold} para o download completo."
+            )
+            box.setInformativeText(
+                "Carregar sob demanda busca no servidor apenas os alertas da extensão visível do mapa.\n"
+                "Para baixar todos, refine os filtros (datas, área mínima, tipo ou área de interesse)."
+            )
+            lazy_button = box.addButton("Carregar sob demanda", QMessageBox.AcceptRole)
+            box.addButton("Refinar filtros", QMessageBox.RejectRole)
+            box.exec_()
+            if box.clickedButton() == lazy_button:
+                on_lazy(total)
         
-        # Aplicar renderer
-        layer.setRenderer(renderer)
-        layer.triggerRepaint()
+        self.loadScconDataBtn.setEnabled(False)
+        self.progressBar.setRange(0, 0)
+        self.progressBar.setFormat("Contando alertas...")
+        self.alert_download_task = self.plugin.jobs.submit(
+            "Contando alertas SCCON", count, SERVICE_SCCON, on_finished=counted
+        )
 
-    def load_monthly_mosaic(self):
-        """Carrega mosaicos mensais para um período de datas selecionado"""
-        try:
-            if not self.is_api_key_valid:
-                QMessageBox.warning(self, "Erro", "Valide sua API Key primeiro")
-                return
+    def _load_lazy_alerts(self, query, layer_name, layer_params, total):
+        """Adiciona os alertas como camada WFS carregada conforme a extensão do mapa"""
+        url = getattr(self, 'processed_url', None) or self.scconUrlEdit.text().strip()
+        datasource = self.build_sccon_datasource(
+            url,
+            self.scconUserEdit.text().strip(),
+            self.scconPassEdit.text().strip(),
+            restrict_to_extent=True
+        )
+        
+        with span(PHASE_LAYERS):
+            layer = QgsVectorLayer(datasource, layer_name + " (sob demanda)", "WFS")
+        if not layer.isValid():
+            QMessageBox.warning(self, "Erro", "Não foi possível criar a camada WFS de alertas.")
+            return
+        
+        # O provedor WFS converte a expressão em filtro OGC enviado ao servidor
+        expression = query.to_expression()
+        if expression and not layer.setSubsetString(expression):
+            QMessageBox.warning(self, "Erro", "O filtro dos alertas não foi aceito pela camada WFS.")
+            return
+        
+        with span(PHASE_LAYERS):
+            QgsProject.instance().addMapLayer(layer)
+            self.plugin.layer_registry.register(
+                layer, ROLE_ALERTS, params=dict(layer_params, source="wfs_lazy", hits=total)
+            )
+        # Sem descoberta de tipos: exigiria percorrer todos os alertas do servidor
+        self.apply_alert_style(layer, layer_params["alert_type"], discover_types=False)
+        
+        # Não usar featureCount(): no WFS ele pode forçar o download de todas as feições
+        QMessageBox.information(
+            self, "Sucesso",
+            f"Camada '{layer.name()}' carregada sob demanda.\n"
+            f"Alertas no servidor: {total}\n"
+            f"Apenas os alertas da extensão visível são baixados."
+        )
 
-            # Obter datas selecionadas
-            start_date = self.monthlyStartDateEdit.date().toPyDate()
-            
-            # Configurar data final com base no checkbox
-            if self.endDateCheckBox.isChecked():
-                end_date = self.monthlyEndDateEdit.date().toPyDate()
-            else:
-                # Se não usar data final, definir como data atual
-                end_date = QDate.currentDate().toPyDate()
+    def _download_alerts(self, service, query, store, layer_name, layer_params,
+                         tiles=None, feature_filter=None):
+        """Baixa os alertas em segundo plano para o GeoPackage e adiciona a camada ao projeto"""
+        if getattr(self, 'alert_download_task', None) is not None:
+            QMessageBox.information(self, "Aguarde", "Um carregamento de alertas já está em andamento.")
+            return
+        
+        def run_download(task):
+            return store.download(service, query, feedback=task, tiles=tiles,
+                                  feature_filter=feature_filter)
+        
+        def download_finished(exception, result=None):
+            self.alert_download_task = None
+            self.loadScconDataBtn.setEnabled(True)
+            self.progressBar.setFormat("%p%")
             
-            # Verificar se a data de início é anterior à data de fim
-            if start_date > end_date:
-                QMessageBox.warning(self, "Erro", "A data inicial deve ser anterior à data final")
+            if isinstance(exception, JobCanceled):
+                return
+            if exception is not None:
+                self.progressBar.setValue(0)
+                QMessageBox.critical(self, "Erro", f"Erro ao carregar dados: {str(exception)}")
                 return
             
-            # Calcular o número de meses no intervalo
-            start_year, start_month = start_date.year, start_date.month
-            end_year, end_month = end_date.year, end_date.month
-            total_months = (end_year - start_year) * 12 + (end_month - start_month) + 1
-            
-            # Obter API Key
-            api_key = self.apiKeyLineEdit.text().strip()
+            if not store.exists():
+                self.progressBar.setValue(0)
+                QMessageBox.information(self, "Informação", "Nenhum alerta encontrado com os filtros especificados.")
+                return
             
-            # Inicializar contador para mosaicos carregados
-            loaded_count = 0
-            failed_count = 0
+            with span(PHASE_LAYERS):
+                layer = store.layer(layer_name)
+            if not layer.isValid():
+                self.progressBar.setValue(0)
+                QMessageBox.warning(self, "Erro", "Não foi possível abrir os alertas baixados.")
+                return
             
-            # Calcular o número de meses no intervalo
-            start_year, start_month = start_date.year, start_date.month
-            end_year, end_month = end_date.year, end_date.month
-            total_months = (end_year - start_year) * 12 + (end_month - start_month) + 1
+            with span(PHASE_LAYERS):
+                QgsProject.instance().addMapLayer(layer)
+                self.plugin.layer_registry.register(
+                    layer, ROLE_ALERTS, params=dict(layer_params, source="download", store_path=store.path)
+                )
+            self.apply_alert_style(layer, layer_params["alert_type"])
             
-            self.progressBar.setMaximum(total_months * 100)  # 100% para cada mês
-            progress_step = 0
+            self.progressBar.setValue(100)
+            QMessageBox.information(
+                self, "Sucesso", 
+                f"Camada '{layer_name}' carregada com sucesso!\n"
+                f"Número de feições: {result['new'] + result['updated']}"
+            )
+            QTimer.singleShot(2000, lambda: self.progressBar.setValue(0))
+        
+        self.loadScconDataBtn.setEnabled(False)
+        self.progressBar.setValue(0)
+        self.progressBar.setFormat("Baixando alertas... %p%")
+        self.alert_download_task = self.plugin.jobs.submit(
+            "Baixando alertas SCCON", run_download, SERVICE_SCCON, on_finished=download_finished
+        )
+        self.alert_download_task.progressChanged.connect(
+            lambda value: self.progressBar.setValue(int(value))
+        )
+
+    def build_sccon_datasource(self, url, username, password, typename="alerts", restrict_to_extent=False):
+        """Monta o datasource WFS do serviço SCCON (sem filtro SQL)
+
+        Com restrict_to_extent, o provedor busca apenas as feições da extensão exibida.
+        """
+        datasource = (
+            f"pagingEnabled='true' "
+            f"srsname='EPSG:4326' "
+            f"typename='{typename}' "
+            f"url='{url}' "
+            f"username='{username}' "
+            f"password='{password}' "
+            f"version='1.1.0' "
+        )
+        if restrict_to_extent:
+            datasource += "restrictToRequestBBOX='1' "
+        return datasource
 
-            # NOVO: Criar um grupo para os mosaicos
-            root = QgsProject.instance().layerTreeRoot()
-            group_name = f"Planet Monthly Mosaics ({start_date.strftime('%m/%Y')} - {end_date.strftime('%m/%Y')})"
-            group = root.insertGroup(0, group_name)  # Inserir no topo da lista
+    def update_local_store_label(self):
+        """Atualiza a situação da base local exibida na aba SCCON"""
+        hwm = self.alert_store.high_water_mark()
+        if hwm:
+            self.localStoreLabel.setText(f"Alertas até {hwm} (sincronizado em {self.alert_store.last_sync()})")
+        else:
+            self.localStoreLabel.setText("Base local ainda não sincronizada")
+
+    def sync_local_store(self, on_synced=None):
+        """Sincroniza a base local em segundo plano, baixando apenas os alertas novos ou alterados"""
+        url = self.scconUrlEdit.text().strip()
+        
+        if not url:
+            QMessageBox.warning(self, "Erro", "URL do serviço não encontrada. Por favor, conecte-se primeiro.")
+            return
+        
+        if getattr(self, 'store_sync_task', None) is not None:
+            QMessageBox.information(self, "Aguarde", "Uma sincronização da base local já está em andamento.")
+            return
+        
+        service = self.sccon_service()
+        store = self.alert_store
+        
+        def run_sync(task):
+            return store.sync(service, feedback=task)
+        
+        def sync_finished(exception, result=None):
+            self.store_sync_task = None
+            self.syncLocalStoreBtn.setEnabled(True)
+            self.progressBar.setFormat("%p%")
+            self.progressBar.setValue(0)
+            self.update_local_store_label()
             
-            # Iterar pelos meses no intervalo
-            current_year, current_month = start_year, start_month
+            if isinstance(exception, JobCanceled):
+                return
+            if exception is not None:
+                QMessageBox.critical(self, "Erro", f"Erro ao sincronizar a base local: {str(exception)}")
+                return
             
-            while (current_year < end_year) or (current_year == end_year and current_month <= end_month):
-                # Atualizar a barra de progresso
-                progress_base = progress_step * 100
-                self.progressBar.setValue(progress_base + 10)
-                QApplication.processEvents()
-                
-                # Montar o ID do mosaico para o mês atual
-                mosaic_id = f"global_monthly_{current_year}_{current_month:02d}_mosaic"
-                print(f"Procurando mosaico com ID: {mosaic_id}")
-                
-                # Montar a URL para XYZ Tiles
-                xyz_url = (
-                    f"type=xyz&url=https://tiles.planet.com/basemaps/v1/"
-                    f"planet-tiles/{mosaic_id}/gmap/{{z}}/{{x}}/{{y}}.png"
-                    f"?api_key={api_key}"
-                    f"&zmin=0&zmax=18"
+            print(f"Sincronização concluída: {result}")
+            if (self.updateTilesCheck.isChecked() and (result['new'] or result['updated'])
+                    and AlertTileCache(store).exists()):
+                self.update_alert_tiles()
+            if on_synced:
+                on_synced()
+            else:
+                QMessageBox.information(
+                    self, "Sucesso",
+                    f"Base local sincronizada.\n"
+                    f"Alertas novos: {result['new']}\n"
+                    f"Alertas atualizados: {result['updated']}"
                 )
-                
-                # Atualizar progresso
-                self.progressBar.setValue(progress_base + 40)
-                QApplication.processEvents()
-                
-                # Nome da camada (ex.: "December 2024")
-                import calendar
-                month_name = calendar.month_name[current_month]  # Nome do mês em inglês
-                layer_name = f"{month_name} {current_year}"
-                
-                # Criar camada
-                layer = QgsRasterLayer(xyz_url, layer_name, "wms")
-                
-                # Atualizar progresso
-                self.progressBar.setValue(progress_base + 70)
-                QApplication.processEvents()
-                
-                if layer.isValid():
-                    # NOVO: Adicionar a camada ao grupo em vez de diretamente ao projeto
-                    QgsProject.instance().addMapLayer(layer, False)  # False = não adicionar à legenda
-                    group.addLayer(layer)  # Adicionar ao grupo
-                    
-                    loaded_count += 1
-                    print(f"Mosaico carregado com sucesso: {layer_name}")
-                else:
-                    failed_count += 1
-                    error_msg = layer.error().message() if hasattr(layer, 'error') else "Erro desconhecido"
-                    print(f"Falha ao carregar mosaico {mosaic_id}: {error_msg}")
-                
-                # Atualizar progresso
-                self.progressBar.setValue(progress_base + 100)
-                QApplication.processEvents()
-                
-                # Avançar para o próximo mês
-                progress_step += 1
-                if current_month == 12:
-                    current_month = 1
-                    current_year += 1
-                else:
-                    current_month += 1
-                    
-                # Adicionar um intervalo entre o carregamento dos mosaicos
-                if (current_year < end_year) or (current_year == end_year and current_month <= end_month):
-                    # Mostrar mensagem de espera
-                    self.progressBar.setFormat(f"Carregando mosaicos... ({loaded_count + failed_count}/{total_months})")
-                    QApplication.processEvents()
-                    
-                    # Criar um timer para aguardar antes de carregar o próximo mosaico
-                    timer = QTimer()
-                    timer.setSingleShot(True)
-                    timer.start(600)  # Esperar 600 ms
-                    
-                    # Esperar o timer terminar - isso pausa a execução sem congelar a interface
-                    loop = QEventLoop()
-                    timer.timeout.connect(loop.quit)
-                    loop.exec_()
-                    
-                    # Restaurar o formato original da barra de progresso
-                    self.progressBar.setFormat("%p%")
+        
+        self.syncLocalStoreBtn.setEnabled(False)
+        self.progressBar.setFormat("Sincronizando base local... %p%")
+        self.store_sync_task = self.plugin.jobs.submit(
+            "Sincronizando alertas SCCON", run_sync, SERVICE_SCCON, on_finished=sync_finished
+        )
+        self.store_sync_task.progressChanged.connect(
+            lambda value: self.progressBar.setValue(int(value))
+        )
+
+    def update_alert_tiles(self, load_layer=False):
+        """Gera ou atualiza em segundo plano o cache de tiles vetoriais da base local"""
+        if not self.alert_store.exists():
+            QMessageBox.warning(self, "Erro", "A base local ainda não foi sincronizada.")
+            return
+        if getattr(self, 'alert_tiles_task', None) is not None:
+            QMessageBox.information(self, "Aguarde", "O cache de tiles vetoriais já está sendo atualizado.")
+            return
+        
+        cache = AlertTileCache(self.alert_store)
+        
+        def run_update(task):
+            return cache.update(task)
+        
+        def update_finished(exception, result=None):
+            self.alert_tiles_task = None
+            self.loadAlertTilesBtn.setEnabled(True)
+            self.progressBar.setFormat("%p%")
+            self.progressBar.setValue(0)
+            
+            if isinstance(exception, JobCanceled):
+                return
+            if exception is not None:
+                QMessageBox.critical(self, "Erro", f"Erro ao gerar os tiles vetoriais: {str(exception)}")
+                return
+            if result is not None:
+                print(f"Cache de tiles vetoriais: {result}")
+            if load_layer and cache.exists():
+                self._load_alert_tiles(cache)
+        
+        self.loadAlertTilesBtn.setEnabled(False)
+        self.progressBar.setFormat("Gerando tiles vetoriais... %p%")
+        self.alert_tiles_task = self.plugin.jobs.submit(
+            "Tiles vetoriais dos alertas SCCON", run_update, SERVICE_LOCAL, on_finished=update_finished
+        )
+        self.alert_tiles_task.progressChanged.connect(
+            lambda value: self.progressBar.setValue(int(value))
+        )
+
+    def _load_alert_tiles(self, cache):
+        """Adiciona ao projeto a camada de tiles vetoriais dos alertas"""
+        layer = cache.layer()
+        if not layer.isValid():
+            QMessageBox.warning(self, "Erro", "Não foi possível abrir o cache de tiles vetoriais.")
+            return
+        
+        self.apply_alert_tile_style(layer)
+        QgsProject.instance().addMapLayer(layer)
+        self.plugin.layer_registry.register(
+            layer, ROLE_ALERTS, params={"source": "vector_tiles", "tiles_path": cache.path}
+        )
+
+    @timed(PHASE_STYLE)
+    def apply_alert_tile_style(self, layer):
+        """Aplica aos tiles vetoriais as mesmas cores por tipo de apply_alert_style"""
+        from qgis.core import QgsVectorTileBasicRenderer, QgsVectorTileBasicRendererStyle
+        
+        styles = []
+        known = []
+        for valor, color in ALERT_TYPE_COLORS.items():
+            if valor == "NULL":
+                continue
+            literal = "'" + valor.replace("'", "''") + "'"
+            known.append(literal)
+            style = QgsVectorTileBasicRendererStyle(valor, TILE_LAYER_NAME, QgsWkbTypes.PolygonGeometry)
+            style.setFilterExpression(f'"tipo" = {literal}')
+            style.setSymbol(alert_fill_symbol(color))
+            styles.append(style)
+        
+        # Demais tipos e valores nulos
+        others = QgsVectorTileBasicRendererStyle("Outros", TILE_LAYER_NAME, QgsWkbTypes.PolygonGeometry)
+        others.setFilterExpression(f'"tipo" IS NULL OR "tipo" NOT IN ({", ".join(known)})')
+        others.setSymbol(alert_fill_symbol(QColor(128, 128, 128, 128)))
+        styles.append(others)
+        
+        renderer = QgsVectorTileBasicRenderer()
+        renderer.setStyles(styles)
+        layer.setRenderer(renderer)
+        layer.triggerRepaint()
+
+    def _load_local_alerts(self, filter_args, layer_name, layer_params):
+        """Adiciona ao projeto os alertas da base local que atendem aos filtros
+
+        Com as tabelas simplificadas disponíveis, a geometria completa é desenhada
+        apenas em escalas grandes e os níveis simplificados nas escalas menores.
+        """
+        layer = self.alert_store.layer(layer_name + " (base local)", local_filter(*filter_args))
+        if not layer.isValid():
+            QMessageBox.warning(self, "Erro", "Não foi possível abrir a base local de alertas.")
+            return
+        
+        layer_params = dict(layer_params, source="local_store", store_path=self.alert_store.path)
+        
+        if not self.alert_store.has_simplified():
+            QgsProject.instance().addMapLayer(layer)
+        else:
+            project = QgsProject.instance()
+            group = project.layerTreeRoot().insertGroup(0, layer_name + " (base local)")
+            
+            # Geometria completa: camada de identificação e análise
+            layer.setScaleBasedVisibility(True)
+            layer.setMinimumScale(FULL_GEOMETRY_MIN_SCALE)
+            layer.setMaximumScale(0)
+            project.addMapLayer(layer, False)
+            group.addLayer(layer)
+            
+            for table, _, min_scale, max_scale in SIMPLIFIED_LEVELS:
+                level = self.alert_store.simplified_layer(
+                    table, f"{layer_name} (simplificado 1:{max_scale})",
+                    local_filter(*filter_args, table=table)
+                )
+                if not level.isValid():
+                    print(f"Tabela simplificada {table} indisponível")
+                    continue
+                level.setScaleBasedVisibility(True)
+                level.setMinimumScale(min_scale)
+                level.setMaximumScale(max_scale)
+                # Apenas para desenho: identificação fica com a geometria completa
+                level.setFlags(level.flags() & ~QgsMapLayer.Identifiable)
+                project.addMapLayer(level, False)
+                group.addLayer(level)
+                self.apply_alert_style(level, layer_params["alert_type"])
+                self.plugin.layer_registry.register(
+                    level, ROLE_ALERTS, params=dict(layer_params, simplified_table=table)
+                )
+        
+        self.plugin.layer_registry.register(layer, ROLE_ALERTS, params=layer_params)
+        self.apply_alert_style(layer, layer_params["alert_type"])
+        
+        QMessageBox.information(
+            self, "Sucesso",
+            f"Camada '{layer.name()}' carregada da base local!\n"
+            f"Número de feições: {layer.featureCount()}"
+        )
+
+    def _export_path(self, title, default_name):
+        """Pergunta o arquivo de saída (FlatGeobuf ou GeoParquet) de uma exportação"""
+        formats = available_formats()
+        if not formats:
+            QMessageBox.warning(self, "Erro", "O GDAL desta instalação não suporta FlatGeobuf nem GeoParquet.")
+            return None
+        filters = {
+            FORMAT_FLATGEOBUF: "FlatGeobuf (*.fgb)",
+            FORMAT_PARQUET: "GeoParquet (*.parquet)",
+        }
+        path, selected = QFileDialog.getSaveFileName(
+            self, title, default_name, ";;".join(filters[name] for name in formats)
+        )
+        if not path:
+            return None
+        for name in formats:
+            if selected == filters[name] and not path.lower().endswith(FORMAT_EXTENSIONS[name]):
+                path += FORMAT_EXTENSIONS[name]
+        return path
+
+    def _run_export(self, description, run_export, path, service=SERVICE_LOCAL):
+        """Executa uma exportação em segundo plano e informa o resultado"""
+        if getattr(self, 'export_task', None) is not None:
+            QMessageBox.information(self, "Aguarde", "Uma exportação já está em andamento.")
+            return
+        
+        def export_finished(exception, written=None):
+            self.export_task = None
+            self.progressBar.setFormat("%p%")
+            self.progressBar.setValue(0)
+            if isinstance(exception, JobCanceled):
+                return
+            if exception is not None:
+                QMessageBox.critical(self, "Erro", f"Erro na exportação: {str(exception)}")
+                return
+            QMessageBox.information(self, "Sucesso", f"{written} feições exportadas para:\n{path}")
+        
+        self.progressBar.setFormat("Exportando... %p%")
+        self.export_task = self.plugin.jobs.submit(description, run_export, service, on_finished=export_finished)
+        self.export_task.progressChanged.connect(
+            lambda value: self.progressBar.setValue(int(value))
+        )
+
+    @profiled
+    def export_alerts(self):
+        """Exporta em fluxo os alertas dos filtros atuais (WFS ou base local)"""
+        date_start = self.startDateEdit.date().toString("yyyy-MM-dd")
+        date_end = self.endDateEdit.date().toString("yyyy-MM-dd")
+        area_min = self.areaMinSpin.value()
+        alert_type = self.alertTypeCombo.currentText()
+        
+        aoi = self._alert_aoi()
+        if aoi is False:
+            return
+        aoi_bbox = aoi[0] if aoi else None
+        
+        path = self._export_path("Exportar alertas", f"alertas_sccon_{date_start}_{date_end}")
+        if not path:
+            return
+        
+        if self.useLocalStoreCheck.isChecked():
+            if not self.alert_store.exists():
+                QMessageBox.warning(self, "Erro", "A base local ainda não foi sincronizada.")
+                return
+            layer = self.alert_store.layer(
+                "alertas_exportacao", local_filter(date_start, date_end, area_min, alert_type, aoi_bbox)
+            )
+            # Fonte criada na thread principal e lida em fluxo na thread da tarefa
+            source = QgsVectorLayerFeatureSource(layer)
+            fields, wkb_type, crs, total = layer.fields(), layer.wkbType(), layer.crs(), layer.featureCount()
+            
+            def run_export(task):
+                return export_layer(source, fields, wkb_type, crs, path, feedback=task, total=total)
+            service_name = SERVICE_LOCAL
+        else:
+            service = self.sccon_service()
+            query = AlertQuery(area_min, date_start, date_end, alert_type, bbox=aoi_bbox)
+            
+            def run_export(task):
+                return export_wfs(service, query, path, feedback=task)
+            service_name = SERVICE_SCCON
+        
+        self._run_export("Exportando alertas SCCON", run_export, path, service_name)
+
+    @profiled
+    def export_footprints(self):
+        """Exporta os footprints da última pesquisa de imagens diárias"""
+        layers = self.plugin.layer_registry.layers(ROLE_FOOTPRINTS)
+        if not layers:
+            QMessageBox.warning(self, "Erro", "Nenhuma camada de footprints encontrada. Faça uma pesquisa primeiro.")
+            return
+        
+        path = self._export_path("Exportar footprints", "footprints_planet")
+        if not path:
+            return
+        
+        # Fontes das camadas criadas na thread principal e lidas em fluxo na thread da tarefa
+        sources = [QgsVectorLayerFeatureSource(layer) for layer in layers]
+        fields, wkb_type, crs = layers[0].fields(), layers[0].wkbType(), layers[0].crs()
+        
+        def run_export(task):
+            features = (feature for source in sources for feature in source.getFeatures())
+            return write_stream(path, fields, wkb_type, crs, features, feedback=task)
+        
+        self._run_export("Exportando footprints", run_export, path)
+
+    @profiled
+    def compute_alert_stats(self):
+        """Calcula em segundo plano a área e o número de alertas por tipo e mês"""
+        if getattr(self, 'alert_stats_task', None) is not None:
+            QMessageBox.information(self, "Aguarde", "O cálculo de estatísticas já está em andamento.")
+            return
+        
+        date_start = self.startDateEdit.date().toString("yyyy-MM-dd")
+        date_end = self.endDateEdit.date().toString("yyyy-MM-dd")
+        area_min = self.areaMinSpin.value()
+        alert_type = self.alertTypeCombo.currentText()
+        admin_field = self.statsAdminFieldEdit.text().strip() or None
+        
+        aoi = self._alert_aoi()
+        if aoi is False:
+            return
+        aoi_bbox = aoi[0] if aoi else None
+        
+        if self.useLocalStoreCheck.isChecked():
+            # Base local: leitura apenas dos atributos, com os filtros aplicados no SQLite
+            if not self.alert_store.exists():
+                QMessageBox.warning(self, "Erro", "A base local ainda não foi sincronizada.")
+                return
+            layer = self.alert_store.layer(
+                "alertas_estatisticas", local_filter(date_start, date_end, area_min, alert_type, aoi_bbox)
+            )
+            total = layer.featureCount()
+            # Fonte criada na thread principal e lida na thread da tarefa
+            layer_source, fields = QgsVectorLayerFeatureSource(layer), layer.fields()
+            
+            def run_stats(task):
+                return aggregate_layer(layer_source, fields, admin_field, feedback=task, total=total)
+            source = "base local"
+            service_name = SERVICE_LOCAL
+        else:
+            # WFS: páginas baixadas em paralelo, sem geometria
+            service = self.sccon_service()
+            query = AlertQuery(area_min, date_start, date_end, alert_type, bbox=aoi_bbox)
+            
+            def run_stats(task):
+                return aggregate_wfs(service, query, admin_field, feedback=task)
+            source = "serviço WFS"
+            service_name = SERVICE_SCCON
+        
+        def stats_finished(exception, aggregator=None):
+            self.alert_stats_task = None
+            self.alertStatsBtn.setEnabled(True)
+            self.progressBar.setFormat("%p%")
+            self.progressBar.setValue(0)
+            
+            if isinstance(exception, JobCanceled):
+                return
+            if exception is not None:
+                QMessageBox.critical(self, "Erro", f"Erro ao calcular as estatísticas: {str(exception)}")
+                return
+            if aggregator is None:
+                return
+            if not aggregator.total:
+                QMessageBox.information(self, "Informação", "Nenhum alerta encontrado com os filtros especificados.")
+                return
+            
+            self.show_alert_stats(aggregator, f"Estatísticas dos alertas ({source}) {date_start} a {date_end}")
+        
+        self.alertStatsBtn.setEnabled(False)
+        self.progressBar.setFormat("Calculando estatísticas... %p%")
+        self.alert_stats_task = self.plugin.jobs.submit(
+            "Estatísticas de alertas SCCON", run_stats, service_name, on_finished=stats_finished
+        )
+        self.alert_stats_task.progressChanged.connect(
+            lambda value: self.progressBar.setValue(int(value))
+        )
+
+    @profiled
+    def generate_alert_chips(self):
+        """Gera recortes antes/depois dos alertas selecionados na camada ativa"""
+        from .alert_store import DATE_FIELD, date_text
+        
+        job = getattr(self, 'alert_chip_job', None)
+        if job is not None:
+            # Segundo clique cancela a geração em andamento
+            job.cancel()
+            return
+        
+        if not self.is_api_key_valid:
+            QMessageBox.warning(self, "Erro", "Valide sua API Key primeiro")
+            return
+        
+        layer = self.iface.activeLayer()
+        if not isinstance(layer, QgsVectorLayer) or layer.fields().indexOf(DATE_FIELD) < 0:
+            QMessageBox.warning(self, "Erro", f"Ative uma camada de alertas (com o campo '{DATE_FIELD}').")
+            return
+        if not layer.selectedFeatureCount():
+            QMessageBox.warning(self, "Erro", "Selecione os alertas para os quais gerar os recortes.")
+            return
+        
+        output_dir = QFileDialog.getExistingDirectory(self, "Pasta de saída dos recortes")
+        if not output_dir:
+            return
+        
+        target_crs = QgsCoordinateReferenceSystem("EPSG:3857")
+        transform = QgsCoordinateTransform(layer.crs(), target_crs, QgsProject.instance())
+        fields = layer.fields()
+        
+        alerts = []
+        skipped = 0
+        for feature in layer.getSelectedFeatures():
+            date = date_text(feature[DATE_FIELD])
+            if not feature.hasGeometry() or not date:
+                skipped += 1
+                continue
+            geometry = QgsGeometry(feature.geometry())
+            geometry.transform(transform)
+            alerts.append({
+                "id": feature.id(),
+                "tipo": feature["tipo"] if fields.indexOf("tipo") >= 0 else "",
+                "date": date,
+                "area": float(feature["area_ha"] or 0) if fields.indexOf("area_ha") >= 0 else 0.0,
+                "geometry": geometry,
+            })
+        if skipped:
+            print(f"{skipped} alertas sem geometria ou data ignorados")
+        if not alerts:
+            QMessageBox.warning(self, "Erro", "Nenhum alerta selecionado possui geometria e data.")
+            return
+        
+        job = AlertChipJob(alerts, self.apiKeyLineEdit.text().strip(), output_dir,
+                           image_format=self.alertChipFormatCombo.currentData(), parent=self)
+        renders = job.plan()
+        print(f"{len(alerts)} alertas agrupados em {renders} renderizações")
+        
+        def update_progress(done, total):
+            self.progressBar.setValue(int(100 * done / total) if total else 0)
+        
+        def chips_finished():
+            self.alert_chip_job = None
+            self.alertChipsBtn.setText("Gerar Recortes Antes/Depois dos Alertas Selecionados")
+            self.progressBar.setFormat("%p%")
+            self.progressBar.setValue(0)
+            
+            message = (f"Recortes gerados para {len(job.chips)} de {len(alerts)} alertas.\n"
+                       f"Renderizações: {renders}")
+            if job.failures:
+                message += f"\nFalhas: {len(job.failures)} (ver console)"
+                for failure in job.failures:
+                    print(f"Falha no recorte do alerta {failure[0]} ({failure[1]}): {failure[2]}")
+            if job.canceled:
+                message += "\nGeração cancelada pelo usuário."
+            if job.chips:
+                message += f"\n\nÍndice: {job.index_path}"
+            QMessageBox.information(self, "Recortes de alertas", message)
+        
+        job.progressChanged.connect(update_progress)
+        job.finished.connect(chips_finished)
+        self.alert_chip_job = job
+        self.alertChipsBtn.setText("Cancelar Geração de Recortes")
+        self.progressBar.setFormat("Gerando recortes... %p%")
+        job.start()
+
+    def show_alert_stats(self, aggregator, title):
+        """Exibe o resumo das estatísticas em tabela, com gráfico quando disponível"""
+        from qgis.PyQt.QtWidgets import QTableWidget, QTableWidgetItem
+        from qgis.PyQt.QtGui import QPixmap
+        
+        rows = aggregator.rows()
+        by_admin = aggregator.by_admin
+        
+        dialog = QDialog(self)
+        dialog.setWindowTitle(title)
+        dialog.resize(900, 700)
+        layout = QVBoxLayout(dialog)
+        
+        total_area = sum(row["area_ha"] for row in rows)
+        layout.addWidget(QLabel(f"{aggregator.total} alertas, {total_area:.2f} ha em {len(rows)} grupos"))
+        
+        colors = {tipo: (c.red(), c.green(), c.blue()) for tipo, c in ALERT_TYPE_COLORS.items()}
+        chart_path = plot_monthly(
+            aggregator, os.path.join(tempfile.gettempdir(), "alertas_sccon_estatisticas.png"), colors
+        )
+        if chart_path:
+            chart = QLabel()
+            chart.setPixmap(QPixmap(chart_path))
+            chart.setAlignment(Qt.AlignCenter)
+            layout.addWidget(chart)
+        
+        headers = ["Mês", "Tipo"] + (["Unidade"] if by_admin else []) + ["Alertas", "Área (ha)"]
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        for i, row in enumerate(rows):
+            values = [row["mes"], row["tipo"]] + ([row["unidade"]] if by_admin else [])
+            values += [str(row["alertas"]), f"{row['area_ha']:.2f}"]
+            for j, value in enumerate(values):
+                table.setItem(i, j, QTableWidgetItem(value))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+        
+        buttons = QHBoxLayout()
+        export_btn = QPushButton("Exportar CSV")
+        close_btn = QPushButton("Fechar")
+        buttons.addWidget(export_btn)
+        buttons.addStretch()
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+        
+        def export_csv():
+            path, _ = QFileDialog.getSaveFileName(dialog, "Exportar estatísticas", "", "CSV (*.csv)")
+            if path:
+                write_csv(rows, path, by_admin)
+                QMessageBox.information(dialog, "Sucesso", f"Estatísticas exportadas para {path}")
+        
+        export_btn.clicked.connect(export_csv)
+        close_btn.clicked.connect(dialog.accept)
+        dialog.exec_()
+
+    @timed(PHASE_STYLE)
+    def apply_grid_style(self, layer):
+        """Aplica estilo à camada de grade de imagens"""
+        from qgis.core import QgsSymbol, QgsSingleSymbolRenderer
+        
+        # Criar um estilo simples para a grade
+        symbol = QgsSymbol.defaultSymbol(layer.geometryType())
+        symbol.setColor(QColor(0, 0, 255, 50))  # Azul semitransparente
+        symbol.symbolLayer(0).setStrokeColor(QColor(0, 0, 255))
+        symbol.symbolLayer(0).setStrokeWidth(0.5)
+        
+        renderer = QgsSingleSymbolRenderer(symbol)
+        layer.setRenderer(renderer)
+        layer.triggerRepaint()
+
+
+    @timed(PHASE_STYLE)
+    def apply_buildings_style(self, layer):
+        """Aplica estilo à camada de edificações"""
+        from qgis.core import QgsSymbol, QgsSingleSymbolRenderer
+        
+        # Criar um estilo para edificações
+        symbol = QgsSymbol.defaultSymbol(layer.geometryType())
+        symbol.setColor(QColor(255, 165, 0, 150))  # Laranja semitransparente
+        symbol.symbolLayer(0).setStrokeColor(QColor(139, 69, 19))  # Marrom para contorno
+        symbol.symbolLayer(0).setStrokeWidth(0.5)
+        
+        renderer = QgsSingleSymbolRenderer(symbol)
+        layer.setRenderer(renderer)
+        layer.triggerRepaint()
+
+
+    @timed(PHASE_STYLE)
+    def apply_roads_style(self, layer):
+        """Aplica estilo à camada de estradas"""
+        from qgis.core import QgsSymbol, QgsSingleSymbolRenderer
+        
+        # Criar um estilo para estradas
+        symbol = QgsSymbol.defaultSymbol(layer.geometryType())
+        
+        # Estilo depende do tipo de geometria (linha ou polígono)
+        if layer.geometryType() == QgsWkbTypes.LineGeometry:
+            symbol.setColor(QColor(255, 0, 0))  # Vermelho
+            symbol.symbolLayer(0).setWidth(1.5)  # Linha mais larga
+        else:  # Polígono
+            symbol.setColor(QColor(255, 0, 0, 100))  # Vermelho semitransparente
+            symbol.symbolLayer(0).setStrokeColor(QColor(255, 0, 0))
+            symbol.symbolLayer(0).setStrokeWidth(0.8)
+        
+        renderer = QgsSingleSymbolRenderer(symbol)
+        layer.setRenderer(renderer)
+        layer.triggerRepaint()
+
+    @profiled
+    @timed(PHASE_STYLE)
+    def apply_alert_style(self, layer, alert_type, discover_types=True):
+        """Aplica estilo à camada de alertas com suporte a todos os tipos encontrados"""
+        # Verificar campos disponíveis na camada
+        fields = [field.name() for field in layer.fields()]
+        
+        # Tentar encontrar o campo tipo, caso insensível
+        tipo_field_name = None
+        for field in fields:
+            if field.lower() == "tipo":
+                tipo_field_name = field
+                break
+        
+        # Se o tipo não for "Todos" ou o campo tipo não existir, usar estilo simples
+        if alert_type != "Todos" or not tipo_field_name:
+            # Cor padrão: vermelho semitransparente
+            color = ALERT_TYPE_COLORS.get(alert_type, QColor(255, 0, 0, 128))
+            renderer = QgsSingleSymbolRenderer(alert_fill_symbol(color))
+        else:
+            # Estilo categorizado para "Todos"
+            categorized = QgsCategorizedSymbolRenderer(tipo_field_name)
+            
+            if layer.providerType().lower() == "wfs":
+                # No WFS, não percorrer as feições antes de desenhar: usar a tabela de tipos
+                # conhecidos e descobrir os demais valores em segundo plano
+                valores_unicos = set(ALERT_TYPE_COLORS.keys())
+            else:
+                # Nos demais provedores os valores distintos são obtidos na fonte (ex.: SELECT DISTINCT)
+                field_index = layer.fields().indexOf(tipo_field_name)
+                valores_unicos = {
+                    "NULL" if valor is None or valor == "NULL" or valor == "" or valor == QVariant() else valor
+                    for valor in layer.uniqueValues(field_index)
+                }
             
-            # Mostrar resultados
+            # Adicionar categorias para cada valor único
+            for valor in sorted(valores_unicos, key=str):
+                categorized.addCategory(alert_category(valor))
+            
+            # Categoria para os demais valores, enquanto não forem descobertos
+            categorized.addCategory(
+                QgsRendererCategory("", alert_fill_symbol(QColor(128, 128, 128, 128)), "Outros")
+            )
+            
+            renderer = categorized
+        
+        # Aplicar renderer
+        layer.setRenderer(renderer)
+        layer.triggerRepaint()
+        
+        if (discover_types and alert_type == "Todos" and tipo_field_name
+                and layer.providerType().lower() == "wfs"):
+            self._discover_alert_categories(layer, tipo_field_name)
+
+    def _discover_alert_categories(self, layer, tipo_field_name):
+        """Descobre em segundo plano os tipos de alerta não previstos e os adiciona à legenda
+
+        Os tipos são pedidos ao WFS da camada apenas com o atributo "tipo"
+        (propertyName, sem geometria) e com os filtros da consulta que criou a
+        camada; sem filtros registrados, a consulta é limitada à extensão do mapa.
+        """
+        from qgis.core import QgsDataSourceUri
+        
+        uri = QgsDataSourceUri(layer.source())
+        service = WfsService(uri.param("url"), uri.username(), uri.password(),
+                             uri.param("typename") or "alerts",
+                             use_cql=self.plugin.settings.value("sccon_plugin/use_cql", False, type=bool))
+        params = self.plugin.layer_registry.params(layer.id())
+        query = AlertQuery(params.get("area_min"), params.get("date_start"), params.get("date_end"),
+                           params.get("alert_type"), bbox=params.get("bbox"))
+        if not query.predicates():
+            query = AlertQuery(bbox=self._canvas_bbox())
+        layer_id = layer.id()
+        
+        def collect(task):
+            valores = service.distinct_values(tipo_field_name, query, is_canceled=task.isCanceled)
+            if task.isCanceled():
+                return None
+            return {"NULL" if valor is None or valor == "NULL" or valor == "" else valor
+                    for valor in valores}
+        
+        def add_new_categories(exception, valores=None):
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if exception is not None or not valores or layer is None:
+                return
+            renderer = layer.renderer()
+            if not isinstance(renderer, QgsCategorizedSymbolRenderer):
+                return
+            
+            conhecidos = set()
+            for cat in renderer.categories():
+                valor = cat.value()
+                conhecidos.add("NULL" if valor is None or valor == QVariant() else str(valor))
+            novos = [v for v in valores if str(v) not in conhecidos]
+            for valor in sorted(novos, key=str):
+                renderer.addCategory(alert_category(valor))
+            if novos:
+                print(f"Novos tipos de alerta adicionados à legenda: {novos}")
+                layer.triggerRepaint()
+                self.iface.layerTreeView().refreshLayerSymbology(layer_id)
+        
+        # Manter referência para a tarefa não ser coletada
+        self.alert_category_task = self.plugin.jobs.submit(
+            "Identificando tipos de alerta", collect, SERVICE_SCCON, on_finished=add_new_categories
+        )
+
+    @profiled
+    def load_monthly_mosaic(self):
+        """Carrega mosaicos mensais para um período de datas selecionado"""
+        if not self.is_api_key_valid:
+            QMessageBox.warning(self, "Erro", "Valide sua API Key primeiro")
+            return
+
+        # Obter datas selecionadas
+        start_date = self.monthlyStartDateEdit.date().toPyDate()
+        
+        # Configurar data final com base no checkbox
+        if self.endDateCheckBox.isChecked():
+            end_date = self.monthlyEndDateEdit.date().toPyDate()
+        else:
+            # Se não usar data final, definir como data atual
+            end_date = QDate.currentDate().toPyDate()
+        
+        # Verificar se a data de início é anterior à data de fim
+        if start_date > end_date:
+            QMessageBox.warning(self, "Erro", "A data inicial deve ser anterior à data final")
+            return
+        
+        # Obter API Key
+        api_key = self.apiKeyLineEdit.text().strip()
+        
+        import calendar
+        specs = []
+        for year, month in month_range(start_date, end_date):
+            mosaic_id = monthly_mosaic_id(year, month)
+            specs.append({
+                # Nome da camada (ex.: "December 2024")
+                "layer_name": f"{calendar.month_name[month]} {year}",
+                "candidates": [(mosaic_id, mosaic_xyz_uri(mosaic_id, api_key))],
+                "params": {"year": year, "month": month},
+            })
+        
+        def loaded(loaded_count, failed_count):
             if loaded_count > 0:
                 QMessageBox.information(
                     self, "Sucesso",
@@ -938,59 +1880,82 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
                     f"Nenhum mosaico pôde ser carregado para o período selecionado.\n"
                     "Verifique se os mosaicos estão disponíveis na sua conta Planet Labs."
                 )
-            
-            # Resetar a barra de progresso após 2 segundos
-            self.progressBar.setValue(0)
+        
+        group_name = f"Planet Monthly Mosaics ({start_date.strftime('%m/%Y')} - {end_date.strftime('%m/%Y')})"
+        self._run_mosaic_job("Carregando mosaicos mensais", group_name, specs, ROLE_MOSAIC, loaded)
+
+    def _run_mosaic_job(self, description, group_name, specs, role, on_loaded, configure=None):
+        """Cria em segundo plano as camadas de uma série de mosaicos e as adiciona em um grupo
+
+        Cada item de specs tem 'layer_name', 'params' e 'candidates', uma lista de
+        (mosaic_id, uri) tentados em ordem até um deles gerar uma camada válida.
+        """
+        main_thread = QgsApplication.instance().thread()
+        
+        def build_layers(context):
+            loaded, failed = [], []
+            for i, (spec, step) in enumerate(context.steps(specs)):
+                context.set_stage(spec["layer_name"])
+                # Intervalo entre os mosaicos para não sobrecarregar o servidor de tiles
+                if i:
+                    context.wait(MOSAIC_REQUEST_INTERVAL)
+                for mosaic_id, uri in spec["candidates"]:
+                    print(f"Procurando mosaico com ID: {mosaic_id}")
+                    with span(PHASE_LAYERS):
+                        layer = QgsRasterLayer(uri, spec["layer_name"], "wms")
+                    if layer.isValid():
+                        layer.moveToThread(main_thread)
+                        loaded.append((spec, mosaic_id, layer))
+                        break
+                    error_msg = layer.error().message() if hasattr(layer, 'error') else "Erro desconhecido"
+                    print(f"Falha ao carregar mosaico {mosaic_id}: {error_msg}")
+                else:
+                    failed.append(spec)
+                step.setProgress(100)
+            return loaded, failed
+        
+        def layers_built(exception, result=None):
             self.progressBar.setFormat("%p%")
-            
-        except Exception as e:
             self.progressBar.setValue(0)
-            self.progressBar.setFormat("%p%")
-            QMessageBox.critical(
-                self, "Erro",
-                f"Erro ao carregar mosaicos mensais: {str(e)}\n\n"
-                "Verifique o console do QGIS (Plugins > Python Console) para mais detalhes."
-            )
-            import traceback
-            print("*** ERRO AO CARREGAR MOSAICOS ***")
-            print(traceback.format_exc())
+            if isinstance(exception, JobCanceled):
+                return
+            if exception is not None:
+                QMessageBox.critical(self, "Erro", f"Erro ao carregar mosaicos: {str(exception)}")
+                return
+            
+            loaded, failed = result
+            if loaded:
+                root = QgsProject.instance().layerTreeRoot()
+                group = root.insertGroup(0, group_name)  # Inserir no topo da lista
+                with span(PHASE_LAYERS):
+                    QgsProject.instance().addMapLayers([layer for _, _, layer in loaded], False)
+                for spec, mosaic_id, layer in loaded:
+                    group.addLayer(layer)
+                    self.plugin.layer_registry.register(
+                        layer, role, params=dict(spec["params"], mosaic_id=mosaic_id)
+                    )
+                    if configure:
+                        configure(layer)
+                    print(f"Mosaico carregado com sucesso: {layer.name()}")
+            on_loaded(len(loaded), len(failed))
+        
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setValue(0)
+        self.progressBar.setFormat(f"{description}... %p%")
+        task = self.plugin.jobs.submit(description, build_layers, SERVICE_PLANET_TILES,
+                                       on_finished=layers_built)
+        task.progressChanged.connect(lambda value: self.progressBar.setValue(int(value)))
 
     def create_wms_xml(self, mosaic_id, api_key):
         """Cria um arquivo XML de configuração GDAL_WMS para acessar os tiles da Planet"""
-        xml = f"""<GDAL_WMS>
-            <Service name="TMS">
-                <ServerUrl>https://tiles.planet.com/basemaps/v1/planet-tiles/{mosaic_id}/gmap/${{z}}/${{x}}/${{inverted_y}}.png?api_key={api_key}</ServerUrl>
-            </Service>
-            <DataWindow>
-                <UpperLeftX>-20037508.34</UpperLeftX>
-                <UpperLeftY>20037508.34</UpperLeftY>
-                <LowerRightX>20037508.34</LowerRightX>
-                <LowerRightY>-20037508.34</LowerRightY>
-                <TileLevel>18</TileLevel>
-                <TileCountX>1</TileCountX>
-                <TileCountY>1</TileCountY>
-                <YOrigin>top</YOrigin>
-            </DataWindow>
-            <Projection>EPSG:3857</Projection>
-            <BlockSizeX>256</BlockSizeX>
-            <BlockSizeY>256</BlockSizeY>
-            <BandsCount>3</BandsCount>
-            <DataType>Byte</DataType>
-            <ZeroBlockHttpCodes>400,404,403,500,503</ZeroBlockHttpCodes>
-            <ZeroBlockOnServerException>true</ZeroBlockOnServerException>
-            <Timeout>5</Timeout>
-            <MaxConnections>10</MaxConnections>
-            <Cache/>
-        </GDAL_WMS>"""
-        
         # Salvar em um arquivo temporário
-        import tempfile
         temp_file = tempfile.NamedTemporaryFile(suffix='.xml', delete=False)
-        temp_file.write(xml.encode('utf-8'))
+        temp_file.write(mosaic_wms_xml(mosaic_id, api_key).encode('utf-8'))
         temp_file.close()
         
         return temp_file.name
 
+    @timed(PHASE_STYLE)
     def configure_raster_rendering(self, layer):
         """Configurar a renderização do raster para melhor visualização"""
         if not layer.isValid():
@@ -1056,6 +2021,7 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
         bbox_text = f"{extent.xMinimum():.6f},{extent.yMinimum():.6f},{extent.xMaximum():.6f},{extent.yMaximum():.6f}"
         self.bboxLineEdit.setText(bbox_text)
     
+    @profiled
     def search_daily_images(self):
         """Pesquisar imagens diárias na área de interesse e criar camadas vetoriais separadas por data"""
         if not self.is_api_key_valid:
@@ -1064,20 +2030,38 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
             
         try:
             # Obter parâmetros da pesquisa
-            bbox_text = self.bboxLineEdit.text().strip()
-            if not bbox_text:
-                QMessageBox.warning(self, "Erro", "Por favor, defina uma área de interesse")
-                return
-                
-            # Converter bbox para coordenadas
-            try:
-                min_lon, min_lat, max_lon, max_lat = map(float, bbox_text.split(','))
-            except:
-                QMessageBox.warning(
-                    self, "Erro", 
-                    "Formato inválido para bbox. Use: min_lon,min_lat,max_lon,max_lat"
-                )
-                return
+            aoi_geom = None
+            if self.dailyAoiLayerCheckBox.isChecked():
+                # Polígonos de uma camada, reprojetados e simplificados para a API
+                aoi_layer = self.dailyAoiLayerCombo.currentLayer()
+                if aoi_layer is None:
+                    QMessageBox.warning(self, "Erro", "Escolha uma camada de polígonos para a área de interesse.")
+                    return
+                aoi_geom = layer_aoi_geometry(aoi_layer)
+                if aoi_geom is None:
+                    QMessageBox.warning(self, "Erro", "A camada escolhida não possui polígonos.")
+                    return
+                extent = aoi_geom.boundingBox()
+                min_lon, min_lat, max_lon, max_lat = (extent.xMinimum(), extent.yMinimum(),
+                                                      extent.xMaximum(), extent.yMaximum())
+                self.bboxLineEdit.setText(f"{min_lon:.6f},{min_lat:.6f},{max_lon:.6f},{max_lat:.6f}")
+                geometry = search_geometry(aoi_geom)
+            else:
+                bbox_text = self.bboxLineEdit.text().strip()
+                if not bbox_text:
+                    QMessageBox.warning(self, "Erro", "Por favor, defina uma área de interesse")
+                    return
+                    
+                # Converter bbox para coordenadas
+                try:
+                    min_lon, min_lat, max_lon, max_lat = map(float, bbox_text.split(','))
+                except:
+                    QMessageBox.warning(
+                        self, "Erro", 
+                        "Formato inválido para bbox. Use: min_lon,min_lat,max_lon,max_lat"
+                    )
+                    return
+                geometry = bbox_geometry((min_lon, min_lat, max_lon, max_lat))
                 
             # Obter datas
             start_date = self.dailyStartDateEdit.date().toPyDate()
@@ -1098,320 +2082,82 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
             elif "< 50%" in cloud_text:
                 cloud_percent = 50
                     
-            # Mostrar barra de progresso
-            self.progressBar.setValue(10)
-            QApplication.processEvents()
-            
             # Obter API key
             api_key = self.apiKeyLineEdit.text().strip()
             
-            # Construir filtros
-            start_date_str = start_date.strftime("%Y-%m-%dT00:00:00Z")
-            end_date_str = end_date.strftime("%Y-%m-%dT23:59:59Z")
-            
-            # Construir geometria GeoJSON para o filtro
-            geometry = {
-                "type": "Polygon",
-                "coordinates": [[
-                    [min_lon, min_lat],
-                    [max_lon, min_lat],
-                    [max_lon, max_lat],
-                    [min_lon, max_lat],
-                    [min_lon, min_lat]
-                ]]
-            }
-            
-            # Construir filtros como objetos JSON
-            filter_json = {
-                "type": "AndFilter",
-                "config": [
-                    {
-                        "type": "GeometryFilter",
-                        "field_name": "geometry",
-                        "config": geometry
-                    },
-                    {
-                        "type": "DateRangeFilter",
-                        "field_name": "acquired",
-                        "config": {
-                            "gte": start_date_str,
-                            "lte": end_date_str
-                        }
-                    },
-                    {
-                        "type": "RangeFilter",
-                        "field_name": "cloud_cover",
-                        "config": {
-                            "lt": cloud_percent / 100.0
-                        }
-                    }
-                ]
-            }
-            
-            # Payload para a requisição
-            payload = {
-                "item_types": ["PSScene"],
-                "filter": filter_json
-            }
+            # Filtro de geometria, período e nuvens e payload da quick-search
+            filter_json = search_filter(geometry, start_date, end_date, cloud_percent)
+            payload = search_payload(filter_json)
+            client = PlanetClient(api_key)
+            
+            # Grupo e parâmetros das camadas de footprints (uma por data)
+            search_dates = f"{start_date.strftime('%d-%m-%Y')}_{end_date.strftime('%d-%m-%Y')}"
+            group_name = f"Planet_Imagens_{search_dates}_nuvens-{cloud_percent}pct"
+            bbox = (min_lon, min_lat, max_lon, max_lat)
+            layers = FootprintLayers(self.plugin.layer_registry, group_name, {
+                "bbox": list(bbox),
+                "aoi_wkt": aoi_geom.asWkt(6) if aoi_geom is not None else None,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "cloud_percent": cloud_percent,
+                "group": group_name,
+            })
             
-            # Atualizar barra de progresso
-            self.progressBar.setValue(30)
-            QApplication.processEvents()
+            def search(context):
+                # Requisições HTTP fora da thread da interface; cada página é
+                # publicada assim que chega, para ser desenhada no mapa
+                pages = 0
+                for page in client.iter_search_pages(payload, is_canceled=context.isCanceled):
+                    pages += 1
+                    context.publish(page)
+                return pages
             
-            # Fazer a requisição HTTP
-            try:
-                headers = {"Content-Type": "application/json"}
-                response = requests.post(
-                    "https://api.planet.com/data/v1/quick-search",
-                    auth=(api_key, ''),
-                    headers=headers,
-                    json=payload
+            def page_arrived(features):
+                try:
+                    layers.add_page(features)
+                except Exception as e:
+                    print(f"Erro ao acrescentar página da pesquisa: {str(e)}")
+                    return
+                self.progressBar.setFormat(
+                    f"{layers.scene_count} cenas em {len(layers.layers)} datas (pesquisando...)"
                 )
+            
+            def searched(exception, pages=None):
+                self.loadDailyButton.setEnabled(True)
+                self.progressBar.setRange(0, 100)
+                self.progressBar.setFormat("%p%")
+                self.progressBar.setValue(0)
+                if layers.layers:
+                    self._daily_search_finished(layers, bbox, aoi_geom)
                 
-                self.progressBar.setValue(50)
-                QApplication.processEvents()
-                
-                if response.status_code == 200:
-                    results = response.json()
-                    features = results.get('features', [])
-                    
-                    # Verificar se temos resultados
-                    if not features:
-                        QMessageBox.information(
-                            self, "Informação", 
-                            "Nenhuma imagem encontrada com os critérios especificados"
-                        )
-                        self.progressBar.setValue(0)
-                        return
-                    
-                    # Organizar features por data
-                    from collections import defaultdict
-                    features_by_date = defaultdict(list)
-                    
-                    for feature in features:
-                        properties = feature.get('properties', {})
-                        acquired = properties.get('acquired', '')
-                        
-                        # Extrair apenas a data (sem a hora)
-                        if 'T' in acquired:
-                            date_only = acquired.split('T')[0]
-                        else:
-                            date_only = acquired
-                            
-                        # Adicionar a feature ao dicionário agrupado por data
-                        features_by_date[date_only].append(feature)
-                    
-                    # Criar uma camada vetorial para cada data
-                    from qgis.core import (QgsVectorLayer, QgsFeature, QgsGeometry, 
-                                    QgsField, QgsFields, QgsProject, QgsWkbTypes,
-                                    QgsPointXY, QgsMapLayer)
-                    from PyQt5.QtCore import QVariant
-                    
-                    # Definir campos comuns para todas as camadas
-                    fields = QgsFields()
-                    fields.append(QgsField("id", QVariant.String))
-                    fields.append(QgsField("hora", QVariant.String))
-                    fields.append(QgsField("nuvens", QVariant.Double))
-                    fields.append(QgsField("item_id", QVariant.String))
-                    
-                    # Lista para armazenar os IDs das camadas criadas
-                    layer_ids = []
-                    
-                    # Criar um grupo para organizar as camadas
-                    root = QgsProject.instance().layerTreeRoot()
-                    search_dates = f"{start_date.strftime('%d-%m-%Y')}_{end_date.strftime('%d-%m-%Y')}"
-                    cloud_info = f"nuvens-{cloud_percent}pct"
-                    group_name = f"Planet_Imagens_{search_dates}_{cloud_info}"
-                    group = root.insertGroup(0, group_name)
-                    
-                    # Contador de progresso
-                    total_dates = len(features_by_date)
-                    date_count = 0
-                    
-                    # Para cada data, criar uma camada separada
-                    for date_str, date_features in sorted(features_by_date.items()):
-                        date_count += 1
-                        progress = 50 + int(40 * (date_count / total_dates))
-                        self.progressBar.setValue(progress)
-                        self.progressBar.setFormat(f"Processando data {date_count}/{total_dates}...")
-                        QApplication.processEvents()
-                        
-                        # Formatar a data para exibição amigável (YYYY-MM-DD para DD/MM/YYYY)
-                        try:
-                            display_date = datetime.strptime(date_str, '%Y-%m-%d').strftime('%d/%m/%Y')
-                        except:
-                            display_date = date_str
-                        
-                        # Nome da camada para esta data
-                        layer_name = f"Planet_Imagens_{display_date}"
-                        
-                        # Criar camada temporária em memória
-                        layer = QgsVectorLayer("Polygon?crs=EPSG:4326", layer_name, "memory")
-                        provider = layer.dataProvider()
-                        provider.addAttributes(fields.toList())
-                        layer.updateFields()
-                        
-                        # Adicionar features à camada
-                        feature_count = 0
-                        for feature in date_features:
-                            feature_count += 1
-                            item_id = feature.get('id', '')
-                            properties = feature.get('properties', {})
-                            acquired = properties.get('acquired', '')
-                            cloud = properties.get('cloud_cover', 0) * 100.0
-                            
-                            # Extrair hora da aquisição
-                            time_str = ""
-                            if 'T' in acquired and len(acquired.split('T')) > 1:
-                                time_part = acquired.split('T')[1]
-                                if 'Z' in time_part:
-                                    time_str = time_part.split('Z')[0][:5]  # Formato HH:MM
-                                else:
-                                    time_str = time_part[:5]
-                            
-                            # Extrair geometria da imagem
-                            geom = feature.get('geometry', {})
-                            
-                            try:
-                                # Criar feature
-                                qgs_feat = QgsFeature()
-                                
-                                # Converter GeoJSON para QgsGeometry
-                                coords = geom.get('coordinates', [])
-                                if geom.get('type') == 'Polygon' and coords:
-                                    qgs_geom = QgsGeometry.fromPolygonXY([[QgsPointXY(pt[0], pt[1]) for pt in coords[0]]])
-                                else:
-                                    # Fallback para bbox
-                                    bbox = properties.get('bbox', [0, 0, 0, 0])
-                                    if len(bbox) == 4:
-                                        x_min, y_min, x_max, y_max = bbox
-                                        qgs_geom = QgsGeometry.fromPolygonXY([[
-                                            QgsPointXY(x_min, y_min),
-                                            QgsPointXY(x_max, y_min),
-                                            QgsPointXY(x_max, y_max),
-                                            QgsPointXY(x_min, y_max),
-                                            QgsPointXY(x_min, y_min)
-                                        ]])
-                                    else:
-                                        # Se não houver geometria ou bbox válidas, pular esta feature
-                                        print(f"Sem geometria válida para a imagem {item_id}")
-                                        continue
-                                
-                                qgs_feat.setGeometry(qgs_geom)
-                                
-                                # Definir atributos
-                                qgs_feat.setAttributes([
-                                    f"Imagem-{feature_count}",
-                                    time_str,
-                                    cloud,
-                                    item_id
-                                ])
-                                
-                                # Adicionar feature à camada
-                                provider.addFeature(qgs_feat)
-                            except Exception as e:
-                                print(f"Erro ao adicionar feature: {str(e)}")
-                                continue
-                        
-                        # Atualizar a camada
-                        layer.updateExtents()
-                        
-                        # Configurar estilo da camada para melhor visualização
-                        from qgis.core import QgsFillSymbol
-                        symbol = QgsFillSymbol.createSimple({
-                            'color': '255,0,0,30',  # Vermelho semitransparente
-                            'outline_color': '255,0,0,255',
-                            'outline_width': '0.5'
-                        })
-                        layer.renderer().setSymbol(symbol)
-                        
-                        # Adicionar camada ao projeto dentro do grupo
-                        QgsProject.instance().addMapLayer(layer, False)
-                        group.addLayer(layer)
-                        
-                        # Guardar o ID da camada
-                        layer_ids.append(layer.id())
-                    
-                    # Armazenar todos os IDs das camadas criadas para uso posterior
-                    self.daily_images_layer_ids = layer_ids
-                    
-                    # Atualizar barra de progresso
-                    self.progressBar.setValue(100)
-                    self.progressBar.setFormat("%p%")
-                    QApplication.processEvents()
-                    
-                    # Adicionar botão para carregar imagens selecionadas
-                    if hasattr(self, 'loadSelectedButton'):
-                        # Se o botão já existe, apenas garantir que está visível e habilitado
-                        self.loadSelectedButton.setVisible(True)
-                        self.loadSelectedButton.setEnabled(True)
-                    else:
-                        # Criar o botão se não existir
-                        self.loadSelectedButton = QPushButton("Carregar Imagens Selecionadas")
-                        self.loadSelectedButton.clicked.connect(self.load_selected_daily_images)
-                        
-                        # Adicionar ao layout da aba de imagens diárias
-                        try:
-                            # Adicionar abaixo do botão de pesquisa
-                            if hasattr(self, 'loadDailyButton') and self.loadDailyButton.parent():
-                                parent_layout = self.loadDailyButton.parent().layout()
-                                if parent_layout:
-                                    index = parent_layout.indexOf(self.loadDailyButton)
-                                    parent_layout.insertWidget(index + 1, self.loadSelectedButton)
-                                else:
-                                    # Caso não consiga identificar o layout, criar um layout para o botão
-                                    container = QWidget()
-                                    layout = QVBoxLayout(container)
-                                    layout.addWidget(self.loadSelectedButton)
-                                    # Adicionar o container em algum lugar da interface
-                                    self.tabWidget.findChild(QWidget, "dailyTab").layout().addWidget(container)
-                            else:
-                                # Último recurso: adicionar ao layout da aba
-                                self.tabWidget.findChild(QWidget, "dailyTab").layout().addWidget(self.loadSelectedButton)
-                        except Exception as e:
-                            print(f"Erro ao adicionar botão: {str(e)}")
-                            try:
-                                # Tente adicionar o botão ao layout principal como último recurso
-                                if hasattr(self, 'layout'):
-                                    self.layout().addWidget(self.loadSelectedButton)
-                            except:
-                                pass  # Último recurso falhou
-                    
-                    # Exibir mensagem de sucesso com instruções
-                    QMessageBox.information(
-                        self, "Sucesso", 
-                        f"Foram encontradas imagens em {total_dates} dias diferentes.\n\n"
-                        f"Cada dia foi carregado como uma camada separada no grupo '{group_name}'.\n\n"
-                        "Para carregar imagens:\n"
-                        "1. Selecione uma ou mais camadas no painel de camadas\n"
-                        "2. Selecione os polígonos desejados, utilizando a ferramenta de seleção de feições\n"
-                        "3. Clique no botão 'Carregar Imagens Selecionadas'"
+                message_bar = self.iface.messageBar()
+                if isinstance(exception, JobCanceled):
+                    message_bar.pushMessage(
+                        "Pesquisa cancelada", f"{layers.scene_count} cenas carregadas até o cancelamento.",
+                        level=Qgis.Warning, duration=8
+                    )
+                elif exception is not None:
+                    QMessageBox.warning(self, "Erro", f"Erro na busca: {str(exception)}")
+                elif not layers.scene_count:
+                    message_bar.pushMessage(
+                        "Pesquisa concluída", "Nenhuma imagem encontrada com os critérios especificados.",
+                        level=Qgis.Info, duration=8
                     )
                 else:
-                    # Imprimir detalhes do erro para debug
-                    print(f"Erro na API: {response.status_code}")
-                    print(f"Conteúdo da resposta: {response.text}")
-                    
-                    QMessageBox.warning(
-                        self, "Erro", 
-                        f"Erro na busca: {response.status_code} - {response.text}"
+                    message_bar.pushMessage(
+                        "Pesquisa concluída",
+                        f"{layers.scene_count} cenas em {len(layers.layers)} datas no grupo '{group_name}'. "
+                        "Selecione os footprints (ou use 'Selecionar Cobertura Mínima da Área') e "
+                        "clique em 'Carregar Imagens Selecionadas'.",
+                        level=Qgis.Success, duration=10
                     )
-            except Exception as e:
-                QMessageBox.critical(
-                    self, "Erro", 
-                    f"Erro ao fazer a requisição: {str(e)}"
-                )
-                import traceback
-                print(traceback.format_exc())
             
-            # Resetar progresso
-            QTimer.singleShot(2000, lambda: self.progressBar.setValue(0))
+            self.loadDailyButton.setEnabled(False)
+            self.progressBar.setRange(0, 0)
+            self.progressBar.setFormat("Pesquisando imagens...")
+            self.plugin.jobs.submit("Pesquisando imagens diárias", search, SERVICE_PLANET_API,
+                                    on_finished=searched, on_partial=page_arrived)
             
-        except Exception as e:
-            self.progressBar.setValue(0)
-            QMessageBox.critical(self, "Erro", f"Erro ao pesquisar imagens diárias: {str(e)}")
-            QTimer.singleShot(2000, lambda: self.progressBar.setValue(0))
-
         except Exception as e:
             self.progressBar.setValue(0)
             self.progressBar.setFormat("%p%")
@@ -1420,37 +2166,191 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
             print("*** ERRO AO PESQUISAR IMAGENS DIÁRIAS ***")
             print(traceback.format_exc())
 
+    def _daily_search_finished(self, layers, bbox, aoi_geom=None):
+        """Guarda as camadas da pesquisa concluída e exibe os botões de seleção e carga
+
+        :param layers: FootprintLayers preenchido durante a pesquisa
+        :param aoi_geom: polígono pesquisado (EPSG:4326), quando a área não é o retângulo bbox
+        """
+        # Armazenar todos os IDs das camadas criadas para uso posterior
+        self.daily_images_layer_ids = layers.layer_ids
+        self.daily_search_bbox = bbox
+        self.daily_search_geometry = aoi_geom
+        
+        # Adicionar botão para carregar imagens selecionadas
+        if hasattr(self, 'loadSelectedButton'):
+            # Se o botão já existe, apenas garantir que está visível e habilitado
+            self.loadSelectedButton.setVisible(True)
+            self.loadSelectedButton.setEnabled(True)
+            self.coverageButton.setVisible(True)
+            self.coverageButton.setEnabled(True)
+            self.exportFootprintsButton.setVisible(True)
+            self.exportFootprintsButton.setEnabled(True)
+        else:
+            # Criar o botão se não existir
+            self.loadSelectedButton = QPushButton("Carregar Imagens Selecionadas")
+            self.loadSelectedButton.clicked.connect(self.load_selected_daily_images)
+            
+            # Botão para selecionar automaticamente a cobertura mínima da AOI
+            self.coverageButton = QPushButton("Selecionar Cobertura Mínima da Área")
+            self.coverageButton.clicked.connect(self.select_minimal_coverage)
+            
+            # Botão para exportar os footprints (FlatGeobuf/GeoParquet)
+            self.exportFootprintsButton = QPushButton("Exportar Footprints")
+            self.exportFootprintsButton.clicked.connect(self.export_footprints)
+            
+            # Adicionar ao layout da aba de imagens diárias
+            try:
+                # Adicionar abaixo do botão de pesquisa
+                if hasattr(self, 'loadDailyButton') and self.loadDailyButton.parent():
+                    parent_layout = self.loadDailyButton.parent().layout()
+                    if parent_layout:
+                        index = parent_layout.indexOf(self.loadDailyButton)
+                        parent_layout.insertWidget(index + 1, self.coverageButton)
+                        parent_layout.insertWidget(index + 2, self.loadSelectedButton)
+                        parent_layout.insertWidget(index + 3, self.exportFootprintsButton)
+                    else:
+                        # Caso não consiga identificar o layout, criar um layout para o botão
+                        container = QWidget()
+                        layout = QVBoxLayout(container)
+                        layout.addWidget(self.coverageButton)
+                        layout.addWidget(self.loadSelectedButton)
+                        layout.addWidget(self.exportFootprintsButton)
+                        # Adicionar o container em algum lugar da interface
+                        self.tabWidget.findChild(QWidget, "dailyTab").layout().addWidget(container)
+                else:
+                    # Último recurso: adicionar ao layout da aba
+                    daily_layout = self.tabWidget.findChild(QWidget, "dailyTab").layout()
+                    daily_layout.addWidget(self.coverageButton)
+                    daily_layout.addWidget(self.loadSelectedButton)
+                    daily_layout.addWidget(self.exportFootprintsButton)
+            except Exception as e:
+                print(f"Erro ao adicionar botão: {str(e)}")
+                try:
+                    # Tente adicionar o botão ao layout principal como último recurso
+                    if hasattr(self, 'layout'):
+                        self.layout().addWidget(self.loadSelectedButton)
+                except:
+                    pass  # Último recurso falhou
+
+    @profiled
+    def select_minimal_coverage(self):
+        """Seleciona, para cada data, o menor conjunto de cenas que cobre a área pesquisada"""
+        if getattr(self, 'coverage_task', None) is not None:
+            QMessageBox.information(self, "Aguarde", "O cálculo de cobertura já está em andamento.")
+            return
+        
+        bbox = getattr(self, 'daily_search_bbox', None)
+        layer_ids = getattr(self, 'daily_images_layer_ids', [])
+        if not bbox or not layer_ids:
+            QMessageBox.warning(self, "Erro", "Faça uma pesquisa de imagens diárias primeiro.")
+            return
+        
+        aoi_geom = getattr(self, 'daily_search_geometry', None)
+        if aoi_geom is None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            aoi_geom = QgsGeometry.fromRect(QgsRectangle(min_lon, min_lat, max_lon, max_lat))
+        aoi_geom = QgsGeometry(aoi_geom)
+        
+        # Fontes criadas na thread principal e lidas na thread da tarefa
+        inputs = []
+        for layer_id in layer_ids:
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if layer is None:
+                continue
+            inputs.append((layer_id, layer.name(), QgsVectorLayerFeatureSource(layer), layer.fields()))
+        if not inputs:
+            QMessageBox.warning(self, "Erro", "As camadas da pesquisa de imagens diárias não estão mais no projeto.")
+            return
+        
+        def solve(task):
+            results = []
+            for (layer_id, name, source, fields), step in task.steps(inputs):
+                step.set_stage(f"Calculando cobertura de {name}")
+                result = solve_layer_coverage(source, fields, aoi_geom, feedback=step)
+                print(f"Cobertura {name}: {result}")
+                results.append((layer_id, name, result))
+            # Cancelada no meio: nenhuma seleção parcial
+            return None if task.isCanceled() else results
+        
+        def coverage_finished(exception, results=None):
+            self.coverage_task = None
+            self.coverageButton.setEnabled(True)
+            self.progressBar.setFormat("%p%")
+            self.progressBar.setValue(0)
+            
+            if isinstance(exception, JobCanceled):
+                return
+            if exception is not None:
+                QMessageBox.critical(self, "Erro", f"Erro ao calcular a cobertura: {str(exception)}")
+                return
+            if not results:
+                return
+            
+            summary = []
+            total_selected = 0
+            for layer_id, name, result in results:
+                layer = QgsProject.instance().mapLayer(layer_id)
+                if layer is None:
+                    continue
+                layer.selectByIds(result["feature_ids"])
+                total_selected += len(result["feature_ids"])
+                
+                date_label = name.replace("Planet_Imagens_", "")
+                summary.append(
+                    f"{date_label}: {result['covered_pct']:.1f}% da área com "
+                    f"{len(result['feature_ids'])} de {result['candidates']} cenas"
+                )
+            
+            QMessageBox.information(
+                self, "Cobertura da Área",
+                f"Foram selecionadas {total_selected} cenas no total.\n\n"
+                + "\n".join(summary) +
+                "\n\nClique em 'Carregar Imagens Selecionadas' para carregar apenas essas cenas."
+            )
+        
+        self.coverageButton.setEnabled(False)
+        self.progressBar.setFormat("Calculando cobertura... %p%")
+        self.coverage_task = self.plugin.jobs.submit(
+            "Cobertura mínima da área", solve, SERVICE_LOCAL, on_finished=coverage_finished
+        )
+        self.coverage_task.progressChanged.connect(
+            lambda value: self.progressBar.setValue(int(value))
+        )
+
+    @profiled
     def load_selected_daily_images(self):
         """Carrega as imagens diárias selecionadas nas diferentes camadas de polígonos"""
+        # Um segundo clique durante o carregamento cancela a tarefa em andamento
+        if getattr(self, 'scene_load_task', None) is not None:
+            self.plugin.jobs.cancel(self.scene_load_task)
+            return
+        
         try:
-            # Verificar camadas disponíveis
+            registry = self.plugin.layer_registry
+            
+            # Verificar camadas de footprints registradas pelo plugin
             selected_features = []
-            layers_with_selection = []
             
             # Verificar a camada ativa primeiro
             active_layer = iface.activeLayer()
-            if active_layer and active_layer.name().startswith("Planet_Imagens_") and active_layer.type() == QgsMapLayer.VectorLayer:
+            if active_layer and registry.role(active_layer.id()) == ROLE_FOOTPRINTS:
                 if active_layer.selectedFeatureCount() > 0:
                     print(f"Camada ativa encontrada com seleção: {active_layer.name()}")
                     print(f"Número de feições selecionadas: {active_layer.selectedFeatureCount()}")
                     
-                    # Armazenar a camada e suas features selecionadas como par
-                    features = active_layer.selectedFeatures()
-                    selected_features.extend(features)
-                    
-                    # Armazenar a associação entre features e camada
-                    layers_with_selection.append(active_layer)
+                    # Armazenar cada feature junto com a camada de origem
+                    for feature in active_layer.selectedFeatures():
+                        selected_features.append((active_layer, feature))
             
-            # Se não encontrou na camada ativa, procurar em outras camadas
+            # Se não encontrou na camada ativa, procurar nas outras camadas de footprints
             if not selected_features:
-                for lyr in QgsProject.instance().mapLayers().values():
-                    if lyr != active_layer and lyr.name().startswith("Planet_Imagens_") and lyr.type() == QgsMapLayer.VectorLayer:
-                        if lyr.selectedFeatureCount() > 0:
-                            print(f"Camada adicional com seleção: {lyr.name()}")
-                            print(f"Número de feições selecionadas: {lyr.selectedFeatureCount()}")
-                            features = lyr.selectedFeatures()
-                            selected_features.extend(features)
-                            layers_with_selection.append(lyr)
+                for lyr in registry.layers(ROLE_FOOTPRINTS):
+                    if lyr != active_layer and lyr.selectedFeatureCount() > 0:
+                        print(f"Camada adicional com seleção: {lyr.name()}")
+                        print(f"Número de feições selecionadas: {lyr.selectedFeatureCount()}")
+                        for feature in lyr.selectedFeatures():
+                            selected_features.append((lyr, feature))
             
             # Se ainda não encontrou features selecionadas
             if not selected_features:
@@ -1460,122 +2360,65 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
                 )
                 return
             
-            # Iniciar barra de progresso
-            self.progressBar.setValue(10)
-            QApplication.processEvents()
-            
             # Obter API Key
             api_key = self.apiKeyLineEdit.text().strip()
             
-            # Contador de imagens carregadas com sucesso
-            success_count = 0
             total_count = len(selected_features)
-            
             print(f"Total de features selecionadas: {total_count}")
             
-            # Processar cada feature selecionada
-            for i, feature in enumerate(selected_features):
-                try:
-                    # Extrair ID da imagem do campo item_id
-                    if 'item_id' not in [field.name() for field in feature.fields()]:
-                        print(f"Feature {i+1}: Campo 'item_id' não encontrado")
-                        continue
-                    
-                    full_item_id = feature.attribute('item_id')
-                    if not full_item_id:
-                        print(f"Feature {i+1}: Campo 'item_id' está vazio")
-                        continue
-                    
-                    print(f"Feature {i+1}: ID completo: {full_item_id}")
-                    
-                    # Usar o ID completo em vez de processá-lo
-                    item_id = full_item_id  # Usar o ID completo
-                    print(f"Usando ID completo: {item_id}")
-                    
-                    # Obter data a partir da camada a que esta feature pertence
-                    date_str = ""
-                    # Use a camada salva na lista layers_with_selection
-                    for layer in layers_with_selection:
-                        # Obter o nome da camada que tem a formatação Planet_Imagens_DD/MM/YYYY
-                        layer_name = layer.name()
-                        if layer_name.startswith("Planet_Imagens_"):
-                            # Extrair a data do nome da camada
-                            parts = layer_name.split("_")
-                            if len(parts) > 2:
-                                date_str = parts[2]
-                                break
-                    
-                    # Informações adicionais para o nome da camada
-                    hora_str = ""
-                    if 'hora' in [field.name() for field in feature.fields()]:
-                        hora_str = feature.attribute('hora')
-                    
-                    # Atualizar progresso
-                    progress = 10 + int(90 * ((i+1) / total_count))
-                    self.progressBar.setValue(progress)
-                    self.progressBar.setFormat(f"Carregando imagem {i+1} de {total_count}...")
-                    QApplication.processEvents()
-                    
-                    # URL que comprovadamente funciona
-                    url = f"type=xyz&url=https://tiles.planet.com/data/v1/PSScene/{item_id}/{{z}}/{{x}}/{{y}}.png?api_key={api_key}"
-                    print(f"Tentando URL: {url.split('?')[0]}")
-                    
-                    # Nome da camada
-                    layer_name = f"{date_str} {hora_str} (ID: {item_id})"
-                    
-                    # Criar camada
-                    raster_layer = QgsRasterLayer(url, layer_name, "wms")
-                    
-                    if raster_layer.isValid():
-                        QgsProject.instance().addMapLayer(raster_layer)
-                        success_count += 1
-                        success = True
-                        print(f"Sucesso com a URL: {layer_name}")
-                    else:
-                        error_msg = raster_layer.error().message() if hasattr(raster_layer, 'error') else "Erro desconhecido"
-                        print(f"Falha com a URL: {error_msg}")
-                        
-                        # Tentar com abordagem XML para casos de timeout
-                        print("Tentando abordagem XML com timeout aumentado...")
-                        xml_file = self.create_wms_xml_for_item(item_id, api_key)
-                        raster_layer_xml = QgsRasterLayer(xml_file, layer_name + " (XML)", "gdal")
-                        
-                        if raster_layer_xml.isValid():
-                            QgsProject.instance().addMapLayer(raster_layer_xml)
-                            success_count += 1
-                            success = True
-                            print(f"Sucesso com abordagem XML: {layer_name}")
-                        else:
-                            xml_error = raster_layer_xml.error().message() if hasattr(raster_layer_xml, 'error') else "Erro desconhecido"
-                            print(f"Falha com abordagem XML: {xml_error}")
-                            print(f"Todas as tentativas falharam para a imagem {item_id}")
-                    
-                except Exception as e:
-                    print(f"Erro ao processar imagem {i+1}/{total_count}: {str(e)}")
-                    import traceback
-                    print(traceback.format_exc())
-            
-            # Finalizar progresso
-            self.progressBar.setValue(100)
-            self.progressBar.setFormat("%p%")
-            QApplication.processEvents()
+            # Montar a lista de cenas a carregar
+            scenes = []
+            for i, (source_layer, feature) in enumerate(selected_features):
+                # Extrair ID da imagem do campo item_id
+                if 'item_id' not in [field.name() for field in feature.fields()]:
+                    print(f"Feature {i+1}: Campo 'item_id' não encontrado")
+                    continue
+                
+                item_id = feature.attribute('item_id')
+                if not item_id:
+                    print(f"Feature {i+1}: Campo 'item_id' está vazio")
+                    continue
+                
+                # Obter data e hora da própria cena, a partir do registro
+                metadata = registry.feature_metadata(source_layer.id(), item_id)
+                date_str = metadata.get("display_date", "")
+                if not date_str:
+                    date_str = registry.params(source_layer.id()).get("date", "")
+                
+                hora_str = metadata.get("hora", "")
+                if not hora_str and 'hora' in [field.name() for field in feature.fields()]:
+                    hora_str = feature.attribute('hora')
+                
+                scenes.append({
+                    "item_id": item_id,
+                    "layer_name": f"{date_str} {hora_str} (ID: {item_id})",
+                    "date": metadata.get("date", date_str),
+                    "footprint_layer_id": source_layer.id(),
+                })
             
-            # Mostrar mensagem de resultado
-            if success_count > 0:
-                QMessageBox.information(
-                    self, "Sucesso", 
-                    f"Foram carregadas {success_count} de {total_count} imagens selecionadas."
-                )
-            else:
+            if not scenes:
                 QMessageBox.warning(
-                    self, "Erro", 
-                    "Não foi possível carregar nenhuma das imagens selecionadas.\n\n"
-                    "Verificar no Console do Python (Plugins > Console do Python) os detalhes do erro.\n\n"
-                    "Obs: Pode ser necessário ajustar o formato do ID ou URL da API Planet."
+                    self, "Erro",
+                    "Nenhuma das feições selecionadas possui um 'item_id' válido."
                 )
+                return
             
-            # Resetar progresso após 2 segundos
-            QTimer.singleShot(2000, lambda: self.progressBar.setValue(0))
+            # Iniciar barra de progresso
+            self.progressBar.setValue(0)
+            self.progressBar.setFormat(f"Carregando {len(scenes)} imagens...")
+            QApplication.processEvents()
+            
+            # Criar as camadas em paralelo, fora da thread da interface
+            group_name = f"Planet_Cenas_{datetime.now().strftime('%d-%m-%Y_%H%M%S')}"
+            self.scene_load_task = SceneLoadTask(
+                scenes, api_key, group_name,
+                on_finished=self._on_selected_images_loaded
+            )
+            self.scene_load_task.progressChanged.connect(
+                lambda value: self.progressBar.setValue(int(value))
+            )
+            self.loadSelectedButton.setText("Cancelar Carregamento")
+            self.plugin.jobs.submit_task(self.scene_load_task, SERVICE_PLANET_TILES)
             
         except Exception as e:
             self.progressBar.setValue(0)
@@ -1585,204 +2428,93 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
             print("*** ERRO AO CARREGAR IMAGENS SELECIONADAS ***")
             print(traceback.format_exc())
 
-
+    def _on_selected_images_loaded(self, task):
+        """Mostra o relatório final do carregamento das imagens selecionadas"""
+        self.scene_load_task = None
+        self.loadSelectedButton.setText("Carregar Imagens Selecionadas")
+        
+        for scene, layer in task.loaded:
+            self.plugin.layer_registry.register(layer, ROLE_SCENE, params=scene)
+        self.progressBar.setValue(100)
+        self.progressBar.setFormat("%p%")
+        
+        success_count = len(task.layers)
+        total_count = len(task.scenes)
+        
+        details = ""
+        if task.failures:
+            failed_ids = "\n".join(item_id for item_id, _ in task.failures[:10])
+            if len(task.failures) > 10:
+                failed_ids += f"\n... e mais {len(task.failures) - 10}"
+            details = f"\n\nImagens com falha:\n{failed_ids}"
+        
+        if task.was_canceled:
+            QMessageBox.warning(
+                self, "Cancelado",
+                f"Carregamento cancelado. Foram carregadas {success_count} de {total_count} imagens."
+                f"{details}"
+            )
+        elif success_count > 0:
+            QMessageBox.information(
+                self, "Sucesso", 
+                f"Foram carregadas {success_count} de {total_count} imagens selecionadas "
+                f"no grupo '{task.group_name}'.{details}"
+            )
+        else:
+            QMessageBox.warning(
+                self, "Erro", 
+                "Não foi possível carregar nenhuma das imagens selecionadas.\n\n"
+                "Verificar no Console do Python (Plugins > Console do Python) os detalhes do erro.\n\n"
+                "Obs: Pode ser necessário ajustar o formato do ID ou URL da API Planet."
+            )
+        
+        # Resetar progresso após 2 segundos
+        QTimer.singleShot(2000, lambda: self.progressBar.setValue(0))
 
     # Adicionar esta função na classe
     def create_wms_xml_for_item(self, item_id, api_key):
         """Criar configuração XML para acessar uma imagem específica com timeout aumentado"""
-        xml = f"""<GDAL_WMS>
-            <Service name="TMS">
-                <ServerUrl>https://tiles.planet.com/data/v1/PSScene/{item_id}/${{z}}/${{x}}/${{inverted_y}}.png?api_key={api_key}</ServerUrl>
-            </Service>
-            <DataWindow>
-                <UpperLeftX>-20037508.34</UpperLeftX>
-                <UpperLeftY>20037508.34</UpperLeftY>
-                <LowerRightX>20037508.34</LowerRightX>
-                <LowerRightY>-20037508.34</LowerRightY>
-                <TileLevel>18</TileLevel>
-                <TileCountX>1</TileCountX>
-                <TileCountY>1</TileCountY>
-                <YOrigin>top</YOrigin>
-            </DataWindow>
-            <Projection>EPSG:3857</Projection>
-            <BlockSizeX>256</BlockSizeX>
-            <BlockSizeY>256</BlockSizeY>
-            <BandsCount>3</BandsCount>
-            <DataType>Byte</DataType>
-            <ZeroBlockHttpCodes>400,404,403,500,503</ZeroBlockHttpCodes>
-            <ZeroBlockOnServerException>true</ZeroBlockOnServerException>
-            <Timeout>120</Timeout>
-            <MaxConnections>10</MaxConnections>
-            <Cache/>
-        </GDAL_WMS>"""
-        
-        # Salvar em arquivo temporário
-        import tempfile
-        temp_file = tempfile.NamedTemporaryFile(suffix='.xml', delete=False)
-        temp_file.write(xml.encode('utf-8'))
-        temp_file.close()
-        
-        return temp_file.name
+        return write_item_wms_xml(item_id, api_key)
 
+    @profiled
     def load_spectral_index_mosaic(self):
         """Carrega mosaicos com o índice espectral selecionado para um período"""
         if not self.is_api_key_valid:
             QMessageBox.warning(self, "Erro", "Por favor, valide sua API Key primeiro")
             return
             
-        try:
-            # Obter datas selecionadas
-            start_date = self.indexStartDateEdit.date().toPyDate()
-            
-            # Configurar data final com base no checkbox
-            if self.indexEndDateCheckBox.isChecked():
-                end_date = self.indexEndDateEdit.date().toPyDate()
-            else:
-                # Se não usar data final, carregar apenas o mês inicial
-                end_date = start_date
-            
-            # Verificar se a data de início é anterior à data de fim
-            if start_date > end_date:
-                QMessageBox.warning(self, "Erro", "A data inicial deve ser anterior à data final")
-                return
-            
-            # Obter o índice selecionado
-            selected_index = self.indexComboBox.currentText()
-            proc_param = self.get_proc_param_for_index(selected_index)
-            
-            # Mostrar barra de progresso
-            self.progressBar.setValue(10)
-            QApplication.processEvents()
-            
-            # API Key
-            api_key = self.apiKeyLineEdit.text().strip()
-            
-            # Calcular o número de meses no intervalo
-            start_year, start_month = start_date.year, start_date.month
-            end_year, end_month = end_date.year, end_date.month
-            total_months = (end_year - start_year) * 12 + (end_month - start_month) + 1
-            
-            self.progressBar.setMaximum(total_months * 100)  # 100% para cada mês
-            progress_step = 0
-            
-            # NOVO: Criar um grupo para os mosaicos de índices
-            root = QgsProject.instance().layerTreeRoot()
-            group_name = f"Planet {selected_index} ({start_date.strftime('%m/%Y')} - {end_date.strftime('%m/%Y')})"
-            group = root.insertGroup(0, group_name)  # Inserir no topo da lista
-            
-            # Inicializar contadores de sucesso/falha
-            loaded_count = 0
-            failed_count = 0
-            
-            # Iterar pelos meses no intervalo
-            current_year, current_month = start_year, start_month
-            
-            while (current_year < end_year) or (current_year == end_year and current_month <= end_month):
-                # Atualizar a barra de progresso
-                progress_base = progress_step * 100
-                self.progressBar.setValue(progress_base + 10)
-                self.progressBar.setFormat(f"Carregando {selected_index} {current_month:02d}/{current_year}...")
-                QApplication.processEvents()
-                
-                # Formatar data para o mosaico
-                date_str = f"{current_year}-{current_month:02d}"
-                
-                # Formato específico para os mosaicos
-                mosaic_name = f"planet_medres_normalized_analytic_{date_str}_mosaic"
-                
-                # Log para debug
-                print(f"Tentando carregar mosaico {selected_index}: {mosaic_name}")
-                
-                # Atualizar barra de progresso
-                self.progressBar.setValue(progress_base + 40)
-                QApplication.processEvents()
-                
-                # Montar a URL para visualização XYZ com processamento do índice selecionado
-                layer_uri = (
-                    f"type=xyz&"
-                    f"url=https://tiles.planet.com/basemaps/v1/planet-tiles/{mosaic_name}/gmap/{{z}}/{{x}}/{{y}}.png?proc={proc_param}&"
-                    f"username={api_key}&"
-                    f"password=&"
-                    f"zmin=0&"
-                    f"zmax=18"
-                )
-                
-                # Adicionar camada ao QGIS
-                layer_name = f"Planet {selected_index} {date_str}"
-                layer = QgsRasterLayer(layer_uri, layer_name, "wms")
-                
-                try_alternative = False
-                
-                if layer.isValid():
-                    # Adicionar ao grupo do projeto
-                    QgsProject.instance().addMapLayer(layer, False)  # False = não adicionar à legenda
-                    group.addLayer(layer)  # Adicionar ao grupo
-                    
-                    # Aplicar renderização específica para o índice
-                    self._configure_index_rendering(layer, selected_index)
-                    
-                    loaded_count += 1
-                    print(f"Mosaico {selected_index} carregado com sucesso: {layer_name}")
-                else:
-                    try_alternative = True
-                    
-                # Se a primeira tentativa falhou, tentar formato alternativo
-                if try_alternative:
-                    # Tentar formato alternativo com underscores em vez de hífens
-                    alt_mosaic_name = f"planet_medres_normalized_analytic_{current_year}_{current_month:02d}_mosaic"
-                    
-                    alt_layer_uri = (
-                        f"type=xyz&"
-                        f"url=https://tiles.planet.com/basemaps/v1/planet-tiles/{alt_mosaic_name}/gmap/{{z}}/{{x}}/{{y}}.png?proc={proc_param}&"
-                        f"username={api_key}&"
-                        f"password=&"
-                        f"zmin=0&"
-                        f"zmax=18"
-                    )
-                    
-                    alt_layer = QgsRasterLayer(alt_layer_uri, layer_name, "wms")
-                    
-                    if alt_layer.isValid():
-                        QgsProject.instance().addMapLayer(alt_layer, False)
-                        group.addLayer(alt_layer)
-                        
-                        # Aplicar renderização específica para o índice
-                        self._configure_index_rendering(alt_layer, selected_index)
-                        
-                        loaded_count += 1
-                        print(f"Mosaico {selected_index} carregado com formato alternativo: {layer_name}")
-                    else:
-                        failed_count += 1
-                        print(f"Falha ao carregar mosaico {selected_index} para {date_str}")
-                
-                # Atualizar progresso
-                self.progressBar.setValue(progress_base + 100)
-                QApplication.processEvents()
-                
-                # Avançar para o próximo mês
-                progress_step += 1
-                if current_month == 12:
-                    current_month = 1
-                    current_year += 1
-                else:
-                    current_month += 1
-                    
-                # Adicionar um pequeno intervalo entre o carregamento dos mosaicos
-                if (current_year < end_year) or (current_year == end_year and current_month <= end_month):
-                    # Criar um timer para aguardar antes de carregar o próximo mosaico
-                    timer = QTimer()
-                    timer.setSingleShot(True)
-                    timer.start(600)  # Esperar 600 ms
-                    
-                    # Esperar o timer terminar - isso pausa a execução sem congelar a interface
-                    loop = QEventLoop()
-                    timer.timeout.connect(loop.quit)
-                    loop.exec_()
-            
-            # Resetar formato da barra de progresso
-            self.progressBar.setFormat("%p%")
-            
-            # Mostrar mensagem de resultado
+        # Obter datas selecionadas
+        start_date = self.indexStartDateEdit.date().toPyDate()
+        
+        # Configurar data final com base no checkbox
+        if self.indexEndDateCheckBox.isChecked():
+            end_date = self.indexEndDateEdit.date().toPyDate()
+        else:
+            # Se não usar data final, carregar apenas o mês inicial
+            end_date = start_date
+        
+        # Verificar se a data de início é anterior à data de fim
+        if start_date > end_date:
+            QMessageBox.warning(self, "Erro", "A data inicial deve ser anterior à data final")
+            return
+        
+        # Obter o índice selecionado
+        selected_index = self.indexComboBox.currentText()
+        proc = self.get_proc_param_for_index(selected_index)
+        
+        # API Key
+        api_key = self.apiKeyLineEdit.text().strip()
+        
+        specs = []
+        for year, month in month_range(start_date, end_date):
+            specs.append({
+                "layer_name": f"Planet {selected_index} {year}-{month:02d}",
+                "candidates": [(name, index_xyz_uri(name, proc, api_key))
+                               for name in index_mosaic_ids(year, month)],
+                "params": {"index": selected_index, "date": f"{year}-{month:02d}"},
+            })
+        
+        def loaded(loaded_count, failed_count):
             if loaded_count > 0:
                 QMessageBox.information(
                     self, "Sucesso",
@@ -1795,30 +2527,18 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
                     f"Nenhum mosaico de {selected_index} pôde ser carregado para o período selecionado.\n"
                     "Verifique se os mosaicos estão disponíveis na sua conta Planet Labs."
                 )
-            
-            # Resetar a barra de progresso após 2 segundos
-            QTimer.singleShot(2000, lambda: self.progressBar.setValue(0))
-            
-        except Exception as e:
-            self.progressBar.setValue(0)
-            self.progressBar.setFormat("%p%")
-            QMessageBox.critical(self, "Erro", f"Erro ao carregar mosaicos de {selected_index}: {str(e)}")
-            import traceback
-            print(f"*** ERRO AO CARREGAR MOSAICOS {selected_index} ***")
-            print(traceback.format_exc())
+        
+        group_name = f"Planet {selected_index} ({start_date.strftime('%m/%Y')} - {end_date.strftime('%m/%Y')})"
+        self._run_mosaic_job(
+            f"Carregando mosaicos {selected_index}", group_name, specs, ROLE_INDEX_MOSAIC, loaded,
+            configure=lambda layer: self._configure_index_rendering(layer, selected_index)
+        )
 
     def get_proc_param_for_index(self, index_name):
         """Retorna o parâmetro de processamento para o índice selecionado"""
-        index_map = {
-            "NDVI": "ndvi",
-            "NDWI": "ndwi",
-            "MSAVI2": "msavi2",
-            "VARI": "vari",
-            "MTVI2": "mtvi2",
-            "CIR": "cir"
-        }
-        return index_map.get(index_name, "ndvi")  # Default para ndvi se não encontrado
+        return proc_param(index_name)
 
+    @timed(PHASE_STYLE)
     def _configure_index_rendering(self, layer, index_name):
         """Configura a renderização do índice com paleta de cores adequada"""
         from qgis.core import (QgsRasterShader, QgsColorRampShader, 
@@ -1826,78 +2546,17 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
         from qgis.PyQt.QtGui import QColor
         
         shader = QgsRasterShader()
-        color_ramp = QgsColorRampShader()
-        color_ramp.setColorRampType(QgsColorRampShader.Interpolated)
-        
-        # Selecionar esquema de cores adequado ao índice
-        if index_name == "NDVI":
-            items = [
-                QgsColorRampShader.ColorRampItem(-1, QColor(0, 0, 128), 'Água/Sombra'),
-                QgsColorRampShader.ColorRampItem(-0.5, QColor(0, 0, 255), 'Água'),
-                QgsColorRampShader.ColorRampItem(0, QColor(128, 128, 128), 'Nuvem/Solo'),
-                QgsColorRampShader.ColorRampItem(0.2, QColor(240, 240, 170), 'Solo/Urbano'),
-                QgsColorRampShader.ColorRampItem(0.4, QColor(150, 200, 0), 'Vegetação esparsa'),
-                QgsColorRampShader.ColorRampItem(0.6, QColor(50, 180, 50), 'Vegetação moderada'),
-                QgsColorRampShader.ColorRampItem(0.8, QColor(0, 100, 0), 'Vegetação densa'),
-                QgsColorRampShader.ColorRampItem(1.0, QColor(0, 50, 0), 'Vegetação muito densa')
-            ]
-        elif index_name == "NDWI":
-            items = [
-                QgsColorRampShader.ColorRampItem(-1, QColor(240, 240, 170), 'Vegetação densa'),
-                QgsColorRampShader.ColorRampItem(-0.5, QColor(190, 210, 255), 'Vegetação/Solo úmido'),
-                QgsColorRampShader.ColorRampItem(0, QColor(120, 170, 255), 'Umidade moderada'),
-                QgsColorRampShader.ColorRampItem(0.3, QColor(30, 90, 180), 'Água rasa'),
-                QgsColorRampShader.ColorRampItem(0.5, QColor(0, 0, 128), 'Água profunda'),
-                QgsColorRampShader.ColorRampItem(1.0, QColor(0, 0, 0), 'Água muito profunda')
-            ]
-        elif index_name == "MSAVI2":
-            items = [
-                QgsColorRampShader.ColorRampItem(-1, QColor(128, 128, 128), 'Não vegetação'),
-                QgsColorRampShader.ColorRampItem(0, QColor(210, 180, 140), 'Solo exposto'),
-                QgsColorRampShader.ColorRampItem(0.2, QColor(230, 230, 120), 'Vegetação muito esparsa'),
-                QgsColorRampShader.ColorRampItem(0.4, QColor(173, 223, 107), 'Vegetação esparsa'),
-                QgsColorRampShader.ColorRampItem(0.6, QColor(63, 191, 63), 'Vegetação moderada'),
-                QgsColorRampShader.ColorRampItem(0.8, QColor(0, 128, 0), 'Vegetação densa'),
-                QgsColorRampShader.ColorRampItem(1.0, QColor(0, 64, 0), 'Vegetação muito densa')
-            ]
-        elif index_name == "VARI":
-            items = [
-                QgsColorRampShader.ColorRampItem(-1, QColor(0, 0, 100), 'Valor mínimo'),
-                QgsColorRampShader.ColorRampItem(-0.5, QColor(140, 140, 140), 'Não vegetação/Sombra'),
-                QgsColorRampShader.ColorRampItem(0, QColor(200, 200, 160), 'Solo exposto'),
-                QgsColorRampShader.ColorRampItem(0.2, QColor(245, 245, 122), 'Vegetação estressada'),
-                QgsColorRampShader.ColorRampItem(0.4, QColor(170, 240, 110), 'Vegetação moderada'),
-                QgsColorRampShader.ColorRampItem(0.6, QColor(50, 220, 50), 'Vegetação saudável'),
-                QgsColorRampShader.ColorRampItem(1.0, QColor(0, 180, 0), 'Vegetação muito saudável')
-            ]
-        elif index_name == "MTVI2":
-            items = [
-                QgsColorRampShader.ColorRampItem(0, QColor(128, 128, 128), 'Não vegetação'),
-                QgsColorRampShader.ColorRampItem(0.2, QColor(200, 200, 100), 'Vegetação mínima'),
-                QgsColorRampShader.ColorRampItem(0.4, QColor(160, 220, 60), 'Vegetação esparsa'),
-                QgsColorRampShader.ColorRampItem(0.6, QColor(80, 200, 40), 'Vegetação moderada'),
-                QgsColorRampShader.ColorRampItem(0.8, QColor(20, 160, 20), 'Vegetação densa'),
-                QgsColorRampShader.ColorRampItem(1.0, QColor(0, 100, 0), 'Vegetação muito densa')
-            ]
-        elif index_name == "CIR":
-            # Para CIR, que é uma composição de bandas, usar uma paleta que destaque vegetação em vermelho
-            items = [
-                QgsColorRampShader.ColorRampItem(-1, QColor(0, 0, 0), 'Valor mínimo'),
-                QgsColorRampShader.ColorRampItem(0, QColor(0, 0, 128), 'Água'),
-                QgsColorRampShader.ColorRampItem(0.3, QColor(128, 128, 128), 'Urbano/Solo'),
-                QgsColorRampShader.ColorRampItem(0.6, QColor(200, 100, 100), 'Vegetação esparsa'),
-                QgsColorRampShader.ColorRampItem(1.0, QColor(255, 0, 0), 'Vegetação densa')
-            ]
-        else:
-            # Esquema padrão grayscale para índices não reconhecidos
-            items = [
-                QgsColorRampShader.ColorRampItem(-1, QColor(0, 0, 0), 'Mínimo'),
-                QgsColorRampShader.ColorRampItem(0, QColor(128, 128, 128), 'Médio'),
-                QgsColorRampShader.ColorRampItem(1, QColor(255, 255, 255), 'Máximo')
-            ]
+        ramp_shader = QgsColorRampShader()
+        ramp_shader.setColorRampType(QgsColorRampShader.Interpolated)
+        
+        # Esquema de cores adequado ao índice
+        items = [
+            QgsColorRampShader.ColorRampItem(value, QColor(*rgb), label)
+            for value, rgb, label in color_ramp(index_name)
+        ]
         
-        color_ramp.setColorRampItemList(items)
-        shader.setRasterShaderFunction(color_ramp)
+        ramp_shader.setColorRampItemList(items)
+        shader.setRasterShaderFunction(ramp_shader)
         
         # Criar o renderer
         renderer = QgsSingleBandPseudoColorRenderer(layer.dataProvider(), 1, shader)
@@ -1932,7 +2591,7 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
     def setup_custom_client(self, api_key):
         """Setup a custom API client if the Planet API library is not available"""
         # This is a placeholder for custom implementation if needed
-        self.client = CustomPlanetClient(api_key)
+        self.client = PlanetClient(api_key)
     
     def clear_saved_api_key(self):
         """Limpar API Key salva nas configurações"""
@@ -1948,131 +2607,3 @@ class PlanetPluginDialog(QDialog, FORM_CLASS):
         self.tabWidget.setTabEnabled(3, False)
         
         QMessageBox.information(self, "Informação", "A API Key salva foi removida com sucesso.")
-        
-class CustomPlanetClient:
-    """Wrapper simples para requisições diretas à API quando a biblioteca planet não está disponível"""
-    def __init__(self, api_key):
-        self.api_key = api_key
-        self.base_url = "https://api.planet.com/data/v1"
-        self.basemaps_url = "https://api.planet.com/basemaps/v1"
-        self.headers = {"Authorization": f"api-key {api_key}"}
-        
-    def get_mosaics(self):
-        """Retorna um objeto que permite iterar sobre mosaicos disponíveis"""
-        return MosaicIterator(self)
-        
-    def get_mosaics_quads(self, mosaic_id):
-        """Retorna um objeto que permite iterar sobre quadrantes de um mosaico"""
-        return QuadIterator(self, mosaic_id)
-        
-    def quick_search(self, query_filter, item_types):
-        """Realiza uma busca rápida por itens (imagens) com os filtros especificados"""
-        return ItemSearchResult(self, query_filter, item_types)
-        
-    def get_item(self, item_type, item_id):
-        """Retorna um item específico pelo tipo e ID"""
-        return ItemGetter(self, item_type, item_id)
-
-class MosaicIterator:
-    """Iterador para mosaicos"""
-    def __init__(self, client):
-        self.client = client
-        self.url = f"{client.basemaps_url}/mosaics"  # Usando a URL do basemaps
-        
-    def iterate(self):
-        """Itera sobre os mosaicos disponíveis"""
-        response = requests.get(
-            self.url, 
-            auth=(self.client.api_key, '')  # Usar o método auth que funcionou no teste
-        )
-        if response.status_code == 200:
-            mosaics = response.json().get('mosaics', [])
-            for mosaic in mosaics:
-                yield mosaic
-        else:
-            # Em caso de erro, retornar lista vazia
-            yield from []
-
-class QuadIterator:
-    """Iterador para quadrantes de um mosaico"""
-    def __init__(self, client, mosaic_id):
-        self.client = client
-        self.mosaic_id = mosaic_id
-        self.url = f"{client.base_url}/mosaics/{mosaic_id}/quads"
-        
-    def iterate(self):
-        """Itera sobre os quadrantes de um mosaico"""
-        response = requests.get(self.url, headers=self.client.headers)
-        if response.status_code == 200:
-            quads = response.json().get('items', [])
-            for quad in quads:
-                yield quad
-        else:
-            # Em caso de erro, retornar lista vazia
-            yield from []
-
-class ItemSearchResult:
-    """Resultado de busca por itens"""
-    def __init__(self, client, query_filter, item_types):
-        self.client = client
-        self.query_filter = query_filter
-        self.item_types = item_types
-        self.url = f"{client.base_url}/quick-search"
-        
-    def items_iter(self, limit=100):
-        """Itera sobre os itens encontrados na busca"""
-        # Converter filtros para o formato da API
-        filter_dict = self._convert_filter(self.query_filter)
-        
-        payload = {
-            "item_types": self.item_types,
-            "filter": filter_dict,
-            "_page_size": min(limit, 100)  # Planet limita a 100 itens por página
-        }
-        
-        response = requests.post(self.url, headers=self.client.headers, json=payload)
-        if response.status_code == 200:
-            items = response.json().get('features', [])
-            for item in items:
-                # Converter para o formato esperado pela aplicação
-                yield {
-                    'id': item.get('id'),
-                    'properties': item.get('properties', {})
-                }
-        else:
-            # Em caso de erro, retornar lista vazia
-            yield from []
-            
-    def _convert_filter(self, filter_obj):
-        """Converte objeto de filtro para o formato JSON esperado pela API"""
-        # Esta é uma implementação simplificada
-        # Você precisará adaptá-la para os filtros específicos que usa
-        if hasattr(filter_obj, 'get_config'):
-            return filter_obj.get_config()
-        
-        # Implementação básica para os tipos de filtros que você usa
-        # Isso é um esboço - precisará ser adaptado para seus filtros específicos
-        return {
-            "type": "AndFilter",
-            "config": [
-                {"type": "GeometryFilter", "field_name": "geometry", "config": {}},
-                {"type": "DateRangeFilter", "field_name": "acquired", "config": {}},
-                {"type": "RangeFilter", "field_name": "cloud_cover", "config": {}}
-            ]
-        }
-
-class ItemGetter:
-    """Obtém informações de um item específico"""
-    def __init__(self, client, item_type, item_id):
-        self.client = client
-        self.item_type = item_type
-        self.item_id = item_id
-        self.url = f"{client.base_url}/item-types/{item_type}/items/{item_id}"
-        
-    def get(self):
-        """Obtém os detalhes do item"""
-        response = requests.get(self.url, headers=self.client.headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Erro ao obter item: {response.status_code} - {response.text}")
\ No newline at end of file
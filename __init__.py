@@ -12,5 +12,5 @@ def classFactory(iface):
     :param iface: Interface QGIS
     :type iface: QgsInterface
     """
-    from .planet_plugin import PlanetPlugin
+    from .Prog_BRMAIS_plugin import PlanetPlugin
     return PlanetPlugin(iface)
\ No newline at end of file
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Recortes (chips) antes/depois dos alertas sobre os mosaicos mensais da Planet.
+
+Para cada alerta são usados o mosaico global_monthly_* do mês anterior a
+'dat_depois' e o do mês seguinte. Alertas próximos que usam o mesmo mosaico
+são agrupados e renderizados juntos (QgsMapRendererParallelJob) em uma única
+imagem, da qual os recortes são extraídos, de modo que os tiles sejam baixados
+uma única vez. Várias renderizações correm ao mesmo tempo, até um limite.
+"""
+import os
+import html
+from collections import defaultdict
+
+from qgis.PyQt.QtCore import QObject, QRect, QSize, pyqtSignal
+from qgis.PyQt.QtGui import QColor
+from qgis.core import (QgsFeature, QgsFillSymbol, QgsGeometry, QgsMapRendererParallelJob,
+                       QgsMapSettings, QgsCoordinateReferenceSystem,
+                       QgsRasterLayer, QgsRectangle, QgsSingleSymbolRenderer,
+                       QgsVectorLayer)
+
+from .core.tiles import before_after_mosaics, mosaic_xyz_uri
+
+# Tamanho do recorte em pixels e resolução (m/pixel) próxima à dos mosaicos mensais
+DEFAULT_CHIP_SIZE = 512
+DEFAULT_RESOLUTION = 4.77
+
+# Lado da célula de agrupamento, em número de recortes
+CLUSTER_CELLS = 4
+
+# Renderizações simultâneas
+DEFAULT_MAX_JOBS = 4
+
+FORMAT_PNG = "png"
+FORMAT_GEOTIFF = "tif"
+
+CHIP_CRS = "EPSG:3857"
+
+
+def write_world_file(path, extent, width, height):
+    """Grava o world file (.pgw/.tfw) de uma imagem"""
+    res_x = extent.width() / width
+    res_y = extent.height() / height
+    with open(path, "w") as f:
+        f.write(f"{res_x}\n0\n0\n{-res_y}\n"
+                f"{extent.xMinimum() + res_x / 2}\n{extent.yMaximum() - res_y / 2}\n")
+
+
+class AlertChipJob(QObject):
+    """Gera os recortes antes/depois de um conjunto de alertas"""
+
+    progressChanged = pyqtSignal(int, int)
+    finished = pyqtSignal()
+
+    def __init__(self, alerts, api_key, output_dir, chip_size=DEFAULT_CHIP_SIZE,
+                 resolution=DEFAULT_RESOLUTION, max_jobs=DEFAULT_MAX_JOBS,
+                 image_format=FORMAT_PNG, parent=None):
+        """
+        :param alerts: lista de dicionários com 'id', 'tipo', 'date' ('yyyy-MM-dd'),
+                       'area' e 'geometry' (QgsGeometry em EPSG:3857)
+        """
+        super().__init__(parent)
+        self.alerts = alerts
+        self.api_key = api_key
+        self.output_dir = output_dir
+        self.chip_size = chip_size
+        self.resolution = resolution
+        self.max_jobs = max_jobs
+        self.image_format = image_format
+
+        self.chips = defaultdict(dict)
+        self.failures = []
+        self.canceled = False
+
+        self._renders = []
+        self._queue = []
+        self._running = {}
+        self._done = 0
+        self._total = 0
+        self._finished = False
+        self._mosaic_layers = {}
+        self._outline_layer = None
+
+    def _chip_extent(self, geometry):
+        """Extensão do recorte: tamanho fixo centrado no alerta, ampliada se o alerta não couber"""
+        bbox = geometry.boundingBox()
+        center = bbox.center()
+        side = self.chip_size * self.resolution
+        grown = max(bbox.width(), bbox.height()) * 1.1
+        individual = grown > side
+        side = max(side, grown)
+        half = side / 2
+        return QgsRectangle(center.x() - half, center.y() - half,
+                            center.x() + half, center.y() + half), individual
+
+    def plan(self):
+        """Agrupa os recortes por mosaico e vizinhança em renderizações"""
+        clusters = defaultdict(list)
+        cell = self.chip_size * self.resolution * CLUSTER_CELLS
+
+        for alert in self.alerts:
+            extent, individual = self._chip_extent(alert["geometry"])
+            before, after = before_after_mosaics(alert["date"])
+            for side, mosaic_id in (("antes", before), ("depois", after)):
+                chip = (alert, side, extent)
+                if individual:
+                    # Alertas maiores que o recorte padrão têm resolução própria
+                    self._renders.append((mosaic_id, extent, [chip]))
+                    continue
+                center = extent.center()
+                key = (mosaic_id, int(center.x() // cell), int(center.y() // cell))
+                clusters[key].append(chip)
+
+        for (mosaic_id, _, _), chips in clusters.items():
+            extent = QgsRectangle(chips[0][2])
+            for chip in chips[1:]:
+                extent.combineExtentWith(chip[2])
+            self._renders.append((mosaic_id, extent, chips))
+        return len(self._renders)
+
+    def start(self):
+        """Prepara as camadas e inicia as primeiras renderizações"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        if not self._renders:
+            self.plan()
+        self._outline_layer = self._create_outline_layer()
+        self._total = len(self._renders)
+        self._queue = list(self._renders)
+        self._start_next()
+
+    def cancel(self):
+        self.canceled = True
+        for job in list(self._running):
+            job.cancelWithoutBlocking()
+
+    def _create_outline_layer(self):
+        """Camada em memória com o contorno dos alertas, desenhada sobre o mosaico"""
+        layer = QgsVectorLayer(f"MultiPolygon?crs={CHIP_CRS}", "alertas_recortes", "memory")
+        features = []
+        for alert in self.alerts:
+            geometry = QgsGeometry(alert["geometry"])
+            geometry.convertToMultiType()
+            feature = QgsFeature()
+            feature.setGeometry(geometry)
+            features.append(feature)
+        layer.dataProvider().addFeatures(features)
+        symbol = QgsFillSymbol.createSimple({
+            'color': '0,0,0,0',
+            'outline_color': '255,255,0,255',
+            'outline_width': '0.6'
+        })
+        layer.setRenderer(QgsSingleSymbolRenderer(symbol))
+        return layer
+
+    def _mosaic_layer(self, mosaic_id):
+        """Camada XYZ do mosaico, criada uma vez e reaproveitada"""
+        if mosaic_id not in self._mosaic_layers:
+            self._mosaic_layers[mosaic_id] = QgsRasterLayer(
+                mosaic_xyz_uri(mosaic_id, self.api_key), mosaic_id, "wms"
+            )
+        return self._mosaic_layers[mosaic_id]
+
+    def _start_next(self):
+        while self._queue and len(self._running) < self.max_jobs and not self.canceled:
+            render = self._queue.pop(0)
+            mosaic_id, extent, chips = render
+            layer = self._mosaic_layer(mosaic_id)
+            if not layer.isValid():
+                self._fail(chips, f"mosaico {mosaic_id} indisponível")
+                continue
+
+            resolution = extent.width() / self.chip_size if len(chips) == 1 else self.resolution
+            size = QSize(max(1, round(extent.width() / resolution)),
+                         max(1, round(extent.height() / resolution)))
+
+            settings = QgsMapSettings()
+            settings.setDestinationCrs(QgsCoordinateReferenceSystem(CHIP_CRS))
+            settings.setLayers([self._outline_layer, layer])
+            settings.setOutputSize(size)
+            settings.setExtent(extent)
+            settings.setBackgroundColor(QColor(255, 255, 255))
+
+            job = QgsMapRendererParallelJob(settings)
+            self._running[job] = render
+            job.finished.connect(lambda job=job: self._on_rendered(job))
+            job.start()
+
+        if not self._running and (not self._queue or self.canceled):
+            self._finish()
+
+    def _on_rendered(self, job):
+        render = self._running.pop(job)
+        mosaic_id, extent, chips = render
+
+        if not self.canceled:
+            image = job.renderedImage()
+            # A extensão renderizada pode ter sido ajustada à proporção da imagem
+            visible = job.mapSettings().visibleExtent()
+            resolution = job.mapSettings().mapUnitsPerPixel()
+            for alert, side, chip_extent in chips:
+                x = round((chip_extent.xMinimum() - visible.xMinimum()) / resolution)
+                y = round((visible.yMaximum() - chip_extent.yMaximum()) / resolution)
+                width = round(chip_extent.width() / resolution)
+                chip_image = image.copy(QRect(x, y, width, width))
+                if chip_image.width() != self.chip_size:
+                    chip_image = chip_image.scaled(self.chip_size, self.chip_size)
+                try:
+                    self.chips[alert["id"]][side] = self._save_chip(alert, side, mosaic_id,
+                                                                    chip_image, chip_extent)
+                except Exception as e:
+                    self.failures.append((alert["id"], side, str(e)))
+
+        self._done += 1
+        self.progressChanged.emit(self._done, self._total)
+        self._start_next()
+
+    def _save_chip(self, alert, side, mosaic_id, image, extent):
+        """Grava um recorte georreferenciado e retorna o nome do arquivo"""
+        base = f"alerta_{alert['id']}_{side}"
+        png_path = os.path.join(self.output_dir, base + ".png")
+        if not image.save(png_path, "PNG"):
+            raise Exception(f"não foi possível gravar {png_path}")
+        write_world_file(os.path.join(self.output_dir, base + ".pgw"),
+                         extent, image.width(), image.height())
+
+        if self.image_format == FORMAT_GEOTIFF:
+            from osgeo import gdal
+            tif_path = os.path.join(self.output_dir, base + ".tif")
+            gdal.Translate(tif_path, png_path, outputSRS=CHIP_CRS)
+            return {"file": base + ".png", "geotiff": base + ".tif", "mosaic": mosaic_id}
+        return {"file": base + ".png", "mosaic": mosaic_id}
+
+    def _fail(self, chips, reason):
+        for alert, side, _ in chips:
+            self.failures.append((alert["id"], side, reason))
+        self._done += 1
+        self.progressChanged.emit(self._done, self._total)
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self.chips:
+            self.write_index()
+        self.finished.emit()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.output_dir, "index.html")
+
+    def write_index(self):
+        """Grava o índice HTML com os pares antes/depois de cada alerta"""
+        rows = []
+        for alert in self.alerts:
+            chips = self.chips.get(alert["id"])
+            if not chips:
+                continue
+            cells = []
+            for side in ("antes", "depois"):
+                chip = chips.get(side)
+                if chip:
+                    cells.append(
+                        f'<td><img src="{html.escape(chip["file"])}" width="256" height="256" loading="lazy">'
+                        f'<br><small>{html.escape(chip["mosaic"])}</small></td>'
+                    )
+                else:
+                    cells.append("<td>-</td>")
+            rows.append(
+                f"<tr><td>{html.escape(str(alert['id']))}</td><td>{html.escape(str(alert['tipo']))}</td>"
+                f"<td>{html.escape(alert['date'])}</td><td>{alert['area']:.2f}</td>{''.join(cells)}</tr>"
+            )
+
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            f.write(
+                "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                "<title>Alertas - antes e depois</title>"
+                "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+                "td,th{border:1px solid #ccc;padding:4px;text-align:center}</style></head><body>\n"
+                f"<h2>Alertas - antes e depois ({len(rows)} alertas)</h2>\n"
+                "<table><tr><th>Alerta</th><th>Tipo</th><th>Data</th><th>Área (ha)</th>"
+                "<th>Antes</th><th>Depois</th></tr>\n"
+                + "\n".join(rows) +
+                "\n</table></body></html>\n"
+            )
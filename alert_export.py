@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Exportação em fluxo de alertas e footprints para FlatGeobuf ou GeoParquet.
+
+As feições são lidas página a página do WFS, ou em sequência de uma camada
+(base local, footprints), e gravadas em lotes de tamanho fixo, sem carregar
+o conjunto inteiro na memória.
+"""
+import itertools
+
+from qgis.core import (QgsCoordinateReferenceSystem, QgsCoordinateTransformContext,
+                       QgsVectorFileWriter, QgsWkbTypes)
+
+from .core.alert_filters import AlertQuery
+from .alert_store import geojson_fields, geojson_features
+
+FORMAT_FLATGEOBUF = "FlatGeobuf"
+FORMAT_PARQUET = "Parquet"
+
+# Extensão de arquivo e opções de camada de cada formato
+FORMAT_EXTENSIONS = {FORMAT_FLATGEOBUF: ".fgb", FORMAT_PARQUET: ".parquet"}
+FORMAT_LAYER_OPTIONS = {
+    FORMAT_FLATGEOBUF: ["SPATIAL_INDEX=YES"],
+    FORMAT_PARQUET: ["GEOMETRY_ENCODING=WKB", "COMPRESSION=SNAPPY"],
+}
+
+# Feições gravadas por lote (também o tamanho dos row groups no Parquet)
+CHUNK_SIZE = 5000
+
+
+def available_formats():
+    """Formatos de exportação suportados pelo GDAL desta instalação"""
+    from osgeo import ogr
+    return [name for name in (FORMAT_FLATGEOBUF, FORMAT_PARQUET) if ogr.GetDriverByName(name) is not None]
+
+
+def format_for_path(path):
+    """Formato correspondente à extensão do arquivo de saída"""
+    for name, extension in FORMAT_EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return name
+    raise Exception(f"Extensão de arquivo não suportada: {path}")
+
+
+def write_stream(path, fields, wkb_type, crs, features, feedback=None, chunk_size=CHUNK_SIZE):
+    """Grava um fluxo de feições em lotes no formato indicado pela extensão do arquivo
+
+    :returns: número de feições gravadas
+    """
+    driver = format_for_path(path)
+    if driver not in available_formats():
+        raise Exception(f"O GDAL desta instalação não possui o driver {driver}")
+
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = driver
+    options.layerOptions = list(FORMAT_LAYER_OPTIONS[driver])
+    if driver == FORMAT_PARQUET:
+        options.layerOptions.append(f"ROW_GROUP_SIZE={chunk_size}")
+
+    writer = QgsVectorFileWriter.create(path, fields, wkb_type, crs,
+                                        QgsCoordinateTransformContext(), options)
+    if writer.hasError() != QgsVectorFileWriter.NoError:
+        raise Exception(f"Erro ao criar {path}: {writer.errorMessage()}")
+
+    written = 0
+    try:
+        features = iter(features)
+        while True:
+            if feedback is not None and feedback.isCanceled():
+                break
+            batch = list(itertools.islice(features, chunk_size))
+            if not batch:
+                break
+            if not writer.addFeatures(batch):
+                raise Exception(f"Erro ao gravar em {path}: {writer.errorMessage()}")
+            written += len(batch)
+    finally:
+        # O arquivo (e o índice espacial do FlatGeobuf) é finalizado ao destruir o writer
+        del writer
+    return written
+
+
+def export_layer(source, fields, wkb_type, crs, path, feedback=None, total=0):
+    """Exporta em fluxo as feições de uma camada (respeitando seu filtro)
+
+    :param source: QgsVectorLayerFeatureSource criada na thread da camada (a
+                   principal); a camada em si não pode ser percorrida na tarefa
+    :param total: número de feições, se conhecido (usado apenas no progresso)
+    """
+    def features():
+        for done, feature in enumerate(source.getFeatures(), 1):
+            if feedback is not None and total and done % 1000 == 0:
+                feedback.setProgress(100.0 * done / total)
+            yield feature
+
+    return write_stream(path, fields, wkb_type, crs, features(), feedback)
+
+
+def export_wfs(service, query, path, feedback=None):
+    """Exporta os alertas do WFS página a página, sem gravar em base intermediária"""
+    params, client_predicates = service.filter_params(query)
+    matches = AlertQuery.feature_filter(client_predicates)
+    is_canceled = feedback.isCanceled if feedback is not None else None
+
+    pages = service.iter_pages(params, is_canceled=is_canceled)
+    first = next(pages, None)
+    if first is None:
+        return 0
+    fields = geojson_fields(first[2])
+
+    def features():
+        for done, (_, page_count, page) in enumerate(itertools.chain([first], pages), 1):
+            if matches is not None:
+                # Filtro local sobre as propriedades GeoJSON, como nas estatísticas
+                page = dict(page, features=[f for f in page.get("features", [])
+                                            if matches(f.get("properties") or {})])
+            yield from geojson_features(page, fields)
+            if feedback is not None:
+                feedback.setProgress(100.0 * done / page_count)
+
+    return write_stream(path, fields, QgsWkbTypes.MultiPolygon,
+                        QgsCoordinateReferenceSystem("EPSG:4326"), features(), feedback)
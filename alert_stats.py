@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Estatísticas de alertas por tipo × mês (× unidade administrativa).
+
+Os alertas são lidos em fluxo, apenas com os atributos necessários (sem
+geometria), das páginas do WFS ou da base local, e agregados em lotes com
+NumPy. A memória usada depende apenas do número de grupos, não de alertas.
+"""
+import csv
+
+import numpy as np
+
+from qgis.core import QgsFeatureRequest
+
+from .core.alert_filters import AlertQuery
+from .alert_store import date_text, DATE_FIELD
+
+TYPE_FIELD = "tipo"
+AREA_FIELD = "area_ha"
+
+# Registros acumulados antes de cada redução com NumPy
+CHUNK_SIZE = 10000
+
+# Rótulos dos grupos sem valor
+NO_DATE = "sem data"
+NO_VALUE = "NULL"
+
+
+def month_of(value):
+    """Mês 'yyyy-MM' de uma data (QDate, QDateTime ou texto)"""
+    text = date_text(value)
+    return text[:7] if text and len(text) >= 7 else NO_DATE
+
+
+def _text(value):
+    if value is None or value == "" or str(value) == "NULL":
+        return NO_VALUE
+    return str(value)
+
+
+def _area(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class AlertAggregator:
+    """Agrupamento em passagem única de contagem e área por tipo, mês e unidade"""
+
+    def __init__(self, by_admin=False, chunk_size=CHUNK_SIZE):
+        self.by_admin = by_admin
+        self.chunk_size = chunk_size
+        self.total = 0
+
+        self._groups = {}
+        self._keys = []
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._areas = np.zeros(0, dtype=np.float64)
+
+        self._pending_groups = []
+        self._pending_areas = []
+
+    def add(self, tipo, date, area, admin=None):
+        """Acrescenta um alerta (os valores são reduzidos em lotes)"""
+        key = (_text(tipo), month_of(date), _text(admin) if self.by_admin else None)
+        index = self._groups.get(key)
+        if index is None:
+            index = self._groups[key] = len(self._keys)
+            self._keys.append(key)
+        self._pending_groups.append(index)
+        self._pending_areas.append(_area(area))
+        if len(self._pending_groups) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Reduz o lote pendente nos acumuladores"""
+        if not self._pending_groups:
+            return
+        size = len(self._keys)
+        if size > len(self._counts):
+            self._counts = np.concatenate([self._counts, np.zeros(size - len(self._counts), dtype=np.int64)])
+            self._areas = np.concatenate([self._areas, np.zeros(size - len(self._areas), dtype=np.float64)])
+
+        groups = np.asarray(self._pending_groups, dtype=np.int64)
+        areas = np.asarray(self._pending_areas, dtype=np.float64)
+        self._counts += np.bincount(groups, minlength=size)
+        self._areas += np.bincount(groups, weights=areas, minlength=size)
+        self.total += len(groups)
+
+        self._pending_groups = []
+        self._pending_areas = []
+
+    def rows(self):
+        """Linhas do resumo ordenadas por mês, tipo e unidade"""
+        self.flush()
+        rows = [
+            {"tipo": key[0], "mes": key[1], "unidade": key[2],
+             "alertas": int(self._counts[i]), "area_ha": float(self._areas[i])}
+            for i, key in enumerate(self._keys)
+        ]
+        rows.sort(key=lambda r: (r["mes"], r["tipo"], r["unidade"] or ""))
+        return rows
+
+    def monthly_areas(self):
+        """Matriz de área (meses × tipos), somando as unidades administrativas
+
+        :returns: (meses, tipos, matriz NumPy)
+        """
+        self.flush()
+        months = sorted({key[1] for key in self._keys})
+        types = sorted({key[0] for key in self._keys})
+        month_index = {m: i for i, m in enumerate(months)}
+        type_index = {t: i for i, t in enumerate(types)}
+
+        matrix = np.zeros((len(months), len(types)), dtype=np.float64)
+        if self._keys:
+            rows = np.fromiter((month_index[k[1]] for k in self._keys), dtype=np.int64, count=len(self._keys))
+            cols = np.fromiter((type_index[k[0]] for k in self._keys), dtype=np.int64, count=len(self._keys))
+            np.add.at(matrix, (rows, cols), self._areas[:len(self._keys)])
+        return months, types, matrix
+
+
+def aggregate_layer(source, fields, admin_field=None, feedback=None, total=None):
+    """Agrega os alertas de uma camada lendo apenas os atributos necessários
+
+    :param source: QgsVectorLayerFeatureSource criada na thread da camada (a
+                   principal); a camada em si não pode ser percorrida na tarefa
+    :param fields: campos da camada
+    :param total: número de feições, se conhecido (usado apenas no progresso)
+    """
+    names = [TYPE_FIELD, DATE_FIELD, AREA_FIELD] + ([admin_field] if admin_field else [])
+    missing = [name for name in names if fields.indexOf(name) < 0]
+    if missing:
+        raise Exception(f"Campos ausentes na camada de alertas: {', '.join(missing)}")
+
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes(names, fields)
+
+    aggregator = AlertAggregator(by_admin=bool(admin_field))
+    for done, feature in enumerate(source.getFeatures(request), 1):
+        if feedback is not None:
+            if feedback.isCanceled():
+                return None
+            if total and done % 1000 == 0:
+                feedback.setProgress(100.0 * done / total)
+        aggregator.add(feature[TYPE_FIELD], feature[DATE_FIELD], feature[AREA_FIELD],
+                       feature[admin_field] if admin_field else None)
+
+    aggregator.flush()
+    return aggregator
+
+
+def aggregate_wfs(service, query, admin_field=None, feedback=None):
+    """Agrega os alertas do WFS página a página, pedindo apenas os atributos (sem geometria)
+
+    Cada alerta é contado uma vez: as páginas repetidas são descartadas pelo id
+    da feição ou, se o servidor não o enviar, pelo identificador do alerta.
+    """
+    params, client_predicates = service.filter_params(query)
+    names = [TYPE_FIELD, DATE_FIELD, AREA_FIELD] + ([admin_field] if admin_field else [])
+    key = service.sort_key()
+    if key and key not in names:
+        names.append(key)
+    params["propertyName"] = ",".join(names)
+    matches = AlertQuery.feature_filter(client_predicates)
+
+    aggregator = AlertAggregator(by_admin=bool(admin_field))
+    is_canceled = feedback.isCanceled if feedback is not None else None
+    done = 0
+    for _, page_count, page in service.iter_pages(params, is_canceled=is_canceled):
+        for feature in page.get("features", []):
+            properties = feature.get("properties") or {}
+            if matches is not None and not matches(properties):
+                continue
+            aggregator.add(properties.get(TYPE_FIELD), properties.get(DATE_FIELD),
+                           properties.get(AREA_FIELD),
+                           properties.get(admin_field) if admin_field else None)
+        done += 1
+        if feedback is not None:
+            feedback.setProgress(100.0 * done / page_count)
+
+    if feedback is not None and feedback.isCanceled():
+        return None
+    aggregator.flush()
+    return aggregator
+
+
+def write_csv(rows, path, by_admin=False):
+    """Grava o resumo em CSV"""
+    columns = ["mes", "tipo"] + (["unidade"] if by_admin else []) + ["alertas", "area_ha"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(dict(row, area_ha=round(row["area_ha"], 2)))
+
+
+def plot_monthly(aggregator, path, colors=None):
+    """Gráfico de barras empilhadas da área mensal por tipo (requer matplotlib)
+
+    :param colors: dicionário tipo -> (r, g, b) em 0-255
+    :returns: caminho da imagem, ou None se o matplotlib não estiver disponível
+    """
+    try:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+    except ImportError:
+        print("matplotlib não disponível; gráfico das estatísticas não gerado")
+        return None
+
+    months, types, matrix = aggregator.monthly_areas()
+    if not months:
+        return None
+
+    figure = Figure(figsize=(9, 4.5), dpi=100)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot(111)
+    positions = np.arange(len(months))
+    bottom = np.zeros(len(months))
+    for column, tipo in enumerate(types):
+        color = None
+        if colors and tipo in colors:
+            color = tuple(c / 255.0 for c in colors[tipo])
+        axes.bar(positions, matrix[:, column], bottom=bottom, label=tipo, color=color)
+        bottom += matrix[:, column]
+
+    axes.set_xticks(positions)
+    axes.set_xticklabels(months, rotation=45, ha="right", fontsize=8)
+    axes.set_ylabel("Área (ha)")
+    axes.set_title("Área de alertas por mês e tipo")
+    axes.legend(fontsize=7)
+    figure.tight_layout()
+    figure.savefig(path)
+    return path
@@ -0,0 +1,552 @@
+# -*- coding: utf-8 -*-
+"""
+Base local (GeoPackage) com uma cópia dos alertas do serviço SCCON.
+
+A sincronização é incremental: a base guarda a maior data 'dat_depois' já
+recebida (marca d'água) e, a cada sincronização, baixa apenas os alertas a
+partir dessa data, atualizando os que já existiam pela chave do alerta.
+"""
+import os
+import json
+import math
+import sqlite3
+import hashlib
+import itertools
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from qgis.PyQt.QtCore import QDate, QDateTime, QVariant
+from qgis.core import (QgsApplication, QgsVectorLayer, QgsVectorFileWriter,
+                       QgsFeature, QgsField, QgsFields, QgsFeatureRequest,
+                       QgsCoordinateTransformContext, QgsWkbTypes, QgsJsonUtils,
+                       QgsCoordinateReferenceSystem, QgsGeometry)
+
+from .core.alert_filters import AlertQuery
+
+# Tabela de alertas e tabela de controle da sincronização dentro do GeoPackage
+ALERTS_TABLE = "alerts"
+STATE_TABLE = "brmais_sync_state"
+
+# Campo com a chave estável de cada alerta
+KEY_FIELD = "sccon_key"
+# Campo com o id da feição no WFS (membro "id" do GeoJSON)
+WFS_ID_FIELD = "wfs_id"
+# Campos do serviço candidatos a identificador do alerta, em ordem de preferência
+KEY_FIELD_CANDIDATES = (WFS_ID_FIELD, "id", "alert_id", "cod_alerta", "gid")
+
+# Campo de data usado como marca d'água
+DATE_FIELD = "dat_depois"
+
+# Dias re-baixados antes da marca d'água, para capturar alertas alterados
+OVERLAP_DAYS = 1
+
+# Coluna de geometria criada pelo QgsVectorFileWriter no GeoPackage
+GEOMETRY_COLUMN = "geom"
+
+# Campos com índice de atributo na base local
+INDEXED_FIELDS = (KEY_FIELD, DATE_FIELD, "tipo", "area_ha")
+
+# Índices compostos para os filtros mais comuns (tipo e período)
+COMPOSITE_INDEXES = (("tipo", DATE_FIELD),)
+
+# Quantidade de feições gravadas por lote
+BATCH_SIZE = 500
+
+# Níveis de geometria simplificada: (tabela, tolerância em graus,
+# escala mínima (mais afastada, 0 = sem limite), escala máxima (mais próxima))
+SIMPLIFIED_LEVELS = (
+    ("alerts_s1", 0.0003, 1000000, 250000),
+    ("alerts_s2", 0.002, 5000000, 1000000),
+    ("alerts_s3", 0.01, 0, 5000000),
+)
+
+# Escala a partir da qual (mais próxima) a geometria completa é desenhada
+FULL_GEOMETRY_MIN_SCALE = 250000
+
+# Campos copiados para as tabelas simplificadas (estilo e filtros)
+SIMPLIFIED_FIELDS = (KEY_FIELD, DATE_FIELD, "tipo", "area_ha")
+
+# Lado (graus) das células que registram onde houve alertas novos ou alterados
+DIRTY_CELL_DEGREES = 1.0
+
+
+def default_store_path():
+    """Caminho padrão do GeoPackage de alertas no perfil do usuário"""
+    return os.path.join(QgsApplication.qgisSettingsDirPath(), "brmais", "alertas_sccon.gpkg")
+
+
+def date_text(value):
+    """Converte o valor de uma data (QDate, QDateTime ou texto) para 'yyyy-MM-dd'"""
+    if value is None or value == QVariant():
+        return None
+    if isinstance(value, QDateTime):
+        return value.date().toString("yyyy-MM-dd")
+    if isinstance(value, QDate):
+        return value.toString("yyyy-MM-dd")
+    text = str(value)
+    return text[:10] if text else None
+
+
+def sql_literal(value):
+    """Escapa um valor de texto para uso em SQL"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def local_filter(date_start=None, date_end=None, area_min=None, alert_type=None, bbox=None,
+                 table=ALERTS_TABLE):
+    """Monta o filtro SQL (subset string) para consultar a base local
+
+    O recorte espacial (bbox) usa o índice R-tree do GeoPackage.
+    """
+    clauses = []
+    if bbox:
+        xmin, ymin, xmax, ymax = (float(v) for v in bbox)
+        clauses.append(
+            f'"fid" IN (SELECT id FROM rtree_{table}_{GEOMETRY_COLUMN} '
+            f'WHERE maxx >= {xmin} AND minx <= {xmax} AND maxy >= {ymin} AND miny <= {ymax})'
+        )
+    if area_min:
+        clauses.append(f'"area_ha" > {float(area_min)}')
+    if date_start and date_end:
+        clauses.append(f'"{DATE_FIELD}" BETWEEN {sql_literal(date_start)} AND {sql_literal(date_end)}')
+    if alert_type and alert_type != "Todos":
+        clauses.append(f'"tipo" = {sql_literal(alert_type)}')
+    return " AND ".join(clauses)
+
+
+def simplify_geometry(geometry, tolerance):
+    """Simplifica uma geometria sem deixá-la vazia (alertas pequenos viram o retângulo envolvente)"""
+    simplified = geometry.simplify(tolerance)
+    if simplified.isNull() or simplified.isEmpty():
+        simplified = QgsGeometry.fromRect(geometry.boundingBox())
+    simplified.convertToMultiType()
+    return simplified
+
+
+def geojson_fields(page):
+    """Deduz os campos a partir de uma página GeoJSON do WFS"""
+    fields = QgsJsonUtils.stringToFields(json.dumps(page))
+    if fields.indexOf(WFS_ID_FIELD) < 0:
+        fields.append(QgsField(WFS_ID_FIELD, QVariant.String))
+    return fields
+
+
+def geojson_features(page, fields):
+    """Converte uma página GeoJSON do WFS em feições, preservando o id do WFS"""
+    features = QgsJsonUtils.stringToFeatureList(json.dumps(page), fields)
+    id_index = fields.indexOf(WFS_ID_FIELD)
+    for feature, item in zip(features, page.get("features", [])):
+        if item.get("id") is not None:
+            feature.setAttribute(id_index, str(item["id"]))
+    return features
+
+
+class AlertStore:
+    """Espelho local dos alertas SCCON em um GeoPackage"""
+
+    def __init__(self, path=None, simplified=False):
+        """
+        :param simplified: mantém também as tabelas de geometria simplificada (SIMPLIFIED_LEVELS)
+        """
+        self.path = path or default_store_path()
+        self.simplified = simplified
+
+    @property
+    def uri(self):
+        return f"{self.path}|layername={ALERTS_TABLE}"
+
+    def exists(self):
+        """Indica se a base local já foi criada"""
+        return os.path.exists(self.path)
+
+    def layer(self, name="Alertas SCCON (base local)", subset=""):
+        """Abre a tabela de alertas da base local, opcionalmente filtrada
+
+        Os índices são garantidos ao final de cada gravação (write_features),
+        não a cada abertura: bases de versões anteriores os ganham na próxima
+        sincronização.
+        """
+        layer = QgsVectorLayer(self.uri, name, "ogr")
+        if subset:
+            layer.setSubsetString(subset)
+        return layer
+
+    def has_simplified(self):
+        """Indica se as tabelas de geometria simplificada existem na base"""
+        if not self.exists():
+            return False
+        with self._connect() as conn:
+            tables = {row[0] for row in conn.execute("SELECT table_name FROM gpkg_contents")}
+        return all(level[0] in tables for level in SIMPLIFIED_LEVELS)
+
+    def simplified_layer(self, table, name, subset=""):
+        """Abre uma tabela de geometria simplificada, opcionalmente filtrada"""
+        layer = QgsVectorLayer(f"{self.path}|layername={table}", name, "ogr")
+        if subset:
+            layer.setSubsetString(subset)
+        return layer
+
+    def high_water_mark(self):
+        """Retorna a maior data de alerta já sincronizada, ou None"""
+        return self._read_state("high_water_mark")
+
+    def last_sync(self):
+        """Retorna a data/hora da última sincronização, ou None"""
+        return self._read_state("last_sync")
+
+    def sync(self, service, feedback=None):
+        """Baixa do WFS os alertas novos ou alterados e os grava na base local
+
+        :param service: WfsService do serviço de alertas
+        :param feedback: tarefa (QgsTask) usada para progresso e cancelamento
+        :returns: dicionário com o número de alertas novos e atualizados
+        """
+        hwm = self.high_water_mark()
+        query = None
+        if hwm:
+            since = (datetime.strptime(hwm, "%Y-%m-%d") - timedelta(days=OVERLAP_DAYS)).strftime("%Y-%m-%d")
+            query = AlertQuery(since=since)
+            print(f"Sincronização incremental a partir de {since}")
+        else:
+            print("Sincronização completa (base local vazia)")
+
+        return self.download(service, query, feedback)
+
+    def download(self, service, query=None, feedback=None, tiles=None, feature_filter=None):
+        """Baixa em paralelo as páginas do WFS que atendem à consulta e as grava na base
+
+        :param query: AlertQuery com os filtros enviados ao servidor
+        :param tiles: blocos (xmin, ymin, xmax, ymax) consultados com filtro BBOX
+        :param feature_filter: função que recebe uma QgsFeature e indica se deve ser gravada
+        """
+        is_canceled = feedback.isCanceled if feedback is not None else None
+        query = query or AlertQuery()
+        if tiles:
+            pages = service.iter_tiled_pages(tiles, query, is_canceled=is_canceled)
+            _, client_predicates = service.filter_params(query.with_bbox(tiles[0]))
+        else:
+            params, client_predicates = service.filter_params(query)
+            pages = service.iter_pages(params, is_canceled=is_canceled)
+
+        # Predicados que o servidor não avalia são conferidos antes da gravação
+        client_filter = AlertQuery.feature_filter(client_predicates)
+        if client_filter is not None:
+            if feature_filter is None:
+                feature_filter = client_filter
+            else:
+                spatial_filter = feature_filter
+                feature_filter = lambda f: client_filter(f) and spatial_filter(f)
+
+        return self.write_geojson_pages(pages, feedback, feature_filter)
+
+    def write_geojson_pages(self, pages, feedback=None, feature_filter=None):
+        """Grava na base um fluxo de páginas GeoJSON (índice, total de páginas, página)"""
+        pages = iter(pages)
+        first = next(pages, None)
+        if first is None:
+            return {"new": 0, "updated": 0, "high_water_mark": self.high_water_mark()}
+
+        fields = geojson_fields(first[2])
+
+        def features():
+            for done, (_, page_count, page) in enumerate(itertools.chain([first], pages), 1):
+                for feature in geojson_features(page, fields):
+                    if feature_filter is None or feature_filter(feature):
+                        yield feature
+                if feedback is not None:
+                    feedback.setProgress(100.0 * done / page_count)
+
+        return self.write_features(fields, QgsWkbTypes.MultiPolygon,
+                                   QgsCoordinateReferenceSystem("EPSG:4326"),
+                                   features(), feedback)
+
+    def write_features(self, fields, wkb_type, crs, features, feedback=None):
+        """Grava (inserindo ou atualizando) um fluxo de feições na base local"""
+        source_key = next((f for f in KEY_FIELD_CANDIDATES if fields.indexOf(f) >= 0), None)
+
+        layer = self._open_or_create(fields, wkb_type, crs)
+        provider = layer.dataProvider()
+        target_fields = layer.fields()
+        levels = self._open_simplified_layers(layer, feedback) if self.simplified else []
+
+        counts = {"new": 0, "updated": 0}
+        hwm = self.high_water_mark()
+        batch = []
+        touched = set()
+
+        for feature in features:
+            if feedback is not None and feedback.isCanceled():
+                break
+
+            key = self._feature_key(feature, source_key)
+            out = QgsFeature(target_fields)
+            out.setGeometry(feature.geometry())
+            for field in fields:
+                index = target_fields.indexOf(field.name())
+                if index >= 0:
+                    out.setAttribute(index, feature[field.name()])
+            out.setAttribute(target_fields.indexOf(KEY_FIELD), key)
+            batch.append(out)
+            if feature.hasGeometry():
+                touched.update(self._cells(feature.geometry().boundingBox()))
+
+            value = date_text(feature[DATE_FIELD]) if fields.indexOf(DATE_FIELD) >= 0 else None
+            if value and (hwm is None or value > hwm):
+                hwm = value
+
+            if len(batch) >= BATCH_SIZE:
+                self._upsert(layer, batch, counts, touched)
+                self._upsert_simplified(levels, batch)
+                batch = []
+
+        if batch:
+            self._upsert(layer, batch, counts, touched)
+            self._upsert_simplified(levels, batch)
+
+        del provider
+        del layer
+        del levels
+
+        if hwm:
+            self._write_state("high_water_mark", hwm)
+        self._write_state("last_sync", datetime.now().isoformat(timespec="seconds"))
+        if touched:
+            self._write_state("dirty_cells", json.dumps(sorted(touched | self.dirty_cells())))
+        self.ensure_indexes(analyze=True)
+
+        counts["high_water_mark"] = hwm
+        return counts
+
+    def dirty_cells(self):
+        """Células (x, y) de DIRTY_CELL_DEGREES graus com alertas gravados desde a última limpeza"""
+        text = self._read_state("dirty_cells")
+        return {tuple(cell) for cell in json.loads(text)} if text else set()
+
+    def clear_dirty_cells(self, cells=None):
+        """Limpa as células informadas (ou todas) após o processamento dos derivados"""
+        remaining = self.dirty_cells() - set(cells) if cells is not None else set()
+        self._write_state("dirty_cells", json.dumps(sorted(remaining)))
+
+    @staticmethod
+    def _cells(bbox):
+        x0 = int(math.floor(bbox.xMinimum() / DIRTY_CELL_DEGREES))
+        x1 = int(math.floor(bbox.xMaximum() / DIRTY_CELL_DEGREES))
+        y0 = int(math.floor(bbox.yMinimum() / DIRTY_CELL_DEGREES))
+        y1 = int(math.floor(bbox.yMaximum() / DIRTY_CELL_DEGREES))
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def _feature_key(self, feature, source_key):
+        """Chave estável do alerta: campo identificador ou hash de geometria e atributos"""
+        if source_key:
+            value = feature[source_key]
+            if value is not None and value != QVariant():
+                return str(value)
+        digest = hashlib.sha1()
+        digest.update(bytes(feature.geometry().asWkb()))
+        digest.update(repr(feature.attributes()).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _upsert(self, layer, batch, counts, touched=None):
+        """Remove as versões antigas das chaves do lote e insere o lote
+
+        :param touched: conjunto que recebe as células das geometrias antigas,
+                        para que os tiles de onde o alerta saiu também sejam refeitos
+        """
+        keys = [f[KEY_FIELD] for f in batch]
+        in_list = ",".join(sql_literal(k) for k in keys)
+        request = QgsFeatureRequest().setFilterExpression(f'"{KEY_FIELD}" IN ({in_list})')
+        request.setSubsetOfAttributes([KEY_FIELD], layer.fields())
+        existing = []
+        for feature in layer.getFeatures(request):
+            existing.append(feature.id())
+            if touched is not None and feature.hasGeometry():
+                touched.update(self._cells(feature.geometry().boundingBox()))
+
+        provider = layer.dataProvider()
+        if existing:
+            provider.deleteFeatures(existing)
+        provider.addFeatures(batch)
+
+        counts["updated"] += len(existing)
+        counts["new"] += len(batch) - len(existing)
+
+    def _open_simplified_layers(self, source_layer, feedback=None):
+        """Abre as tabelas simplificadas, criando e preenchendo as que ainda não existem
+
+        :returns: lista de (tolerância, camada)
+        """
+        with self._connect() as conn:
+            tables = {row[0] for row in conn.execute("SELECT table_name FROM gpkg_contents")}
+
+        level_fields = QgsFields()
+        for name in SIMPLIFIED_FIELDS:
+            index = source_layer.fields().indexOf(name)
+            if index >= 0:
+                level_fields.append(source_layer.fields().at(index))
+
+        levels = []
+        for table, tolerance, _, _ in SIMPLIFIED_LEVELS:
+            created = table not in tables
+            if created:
+                options = QgsVectorFileWriter.SaveVectorOptions()
+                options.driverName = "GPKG"
+                options.layerName = table
+                options.actionOnExistingFile = QgsVectorFileWriter.CreateOrOverwriteLayer
+                options.layerOptions = ["SPATIAL_INDEX=YES"]
+                writer = QgsVectorFileWriter.create(
+                    self.path, level_fields, QgsWkbTypes.MultiPolygon, source_layer.crs(),
+                    QgsCoordinateTransformContext(), options
+                )
+                if writer.hasError() != QgsVectorFileWriter.NoError:
+                    raise Exception(f"Erro ao criar a tabela simplificada {table}: {writer.errorMessage()}")
+                del writer
+
+            layer = QgsVectorLayer(f"{self.path}|layername={table}", table, "ogr")
+            if not layer.isValid():
+                raise Exception(f"Não foi possível abrir a tabela simplificada {table}")
+            levels.append((tolerance, layer))
+            if created:
+                # Índice da chave antes de qualquer atualização na tabela nova
+                self.ensure_indexes()
+
+            if created and source_layer.featureCount() > 0:
+                # Base criada antes dos níveis simplificados: preencher a partir da tabela completa
+                print(f"Gerando a tabela simplificada {table} a partir dos alertas existentes")
+                batch = []
+                for feature in source_layer.getFeatures():
+                    if feedback is not None and feedback.isCanceled():
+                        break
+                    batch.append(feature)
+                    if len(batch) >= BATCH_SIZE:
+                        self._upsert_simplified([levels[-1]], batch)
+                        batch = []
+                if batch:
+                    self._upsert_simplified([levels[-1]], batch)
+
+        return levels
+
+    def _upsert_simplified(self, levels, batch):
+        """Grava as versões simplificadas de um lote de alertas em cada nível"""
+        for tolerance, layer in levels:
+            target_fields = layer.fields()
+            simplified = []
+            for feature in batch:
+                out = QgsFeature(target_fields)
+                if feature.hasGeometry():
+                    out.setGeometry(simplify_geometry(feature.geometry(), tolerance))
+                for field in target_fields:
+                    out.setAttribute(field.name(), feature[field.name()])
+                simplified.append(out)
+            self._upsert(layer, simplified, {"new": 0, "updated": 0})
+
+    def _open_or_create(self, fields, wkb_type, crs):
+        """Abre a tabela de alertas, criando o GeoPackage na primeira sincronização"""
+        if not self.exists():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+            store_fields = QgsFields()
+            store_fields.append(QgsField(KEY_FIELD, QVariant.String))
+            for field in fields:
+                # A coluna 'fid' é reservada pelo GeoPackage
+                if field.name().lower() != "fid":
+                    store_fields.append(field)
+
+            options = QgsVectorFileWriter.SaveVectorOptions()
+            options.driverName = "GPKG"
+            options.layerName = ALERTS_TABLE
+            options.layerOptions = ["SPATIAL_INDEX=YES"]
+            writer = QgsVectorFileWriter.create(
+                self.path, store_fields, QgsWkbTypes.multiType(wkb_type), crs,
+                QgsCoordinateTransformContext(), options
+            )
+            if writer.hasError() != QgsVectorFileWriter.NoError:
+                raise Exception(f"Erro ao criar a base local: {writer.errorMessage()}")
+            del writer
+
+            self._create_state_table()
+            # O índice da chave é usado pelas atualizações já durante a gravação
+            self.ensure_indexes()
+
+        layer = QgsVectorLayer(self.uri, "alerts_store", "ogr")
+        if not layer.isValid():
+            raise Exception(f"Não foi possível abrir a base local: {self.path}")
+        return layer
+
+    @contextmanager
+    def _connect(self):
+        """Conexão SQLite com a base: confirma a transação ao final do bloco e sempre fecha
+
+        O 'with' de sqlite3.Connection só confirma ou desfaz a transação; a
+        conexão (e o arquivo) ficaria aberta até a coleta de lixo.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def ensure_indexes(self, analyze=False):
+        """Garante os índices de atributo e o índice espacial (R-tree) das tabelas de alertas
+
+        :param analyze: atualiza as estatísticas do SQLite (após gravações em lote)
+        :returns: nomes dos índices criados
+        """
+        if not self.exists():
+            return []
+
+        created = []
+        missing_rtree = []
+        with self._connect() as conn:
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+            # Tabela completa e, quando existirem, as tabelas simplificadas
+            tables = [ALERTS_TABLE] + [level[0] for level in SIMPLIFIED_LEVELS if level[0] in existing]
+            indexes = [(field,) for field in INDEXED_FIELDS] + list(COMPOSITE_INDEXES)
+
+            for table in tables:
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if not columns:
+                    continue
+                for index_fields in indexes:
+                    name = f"idx_{table}_" + "_".join(index_fields)
+                    if name in existing or not all(field in columns for field in index_fields):
+                        continue
+                    column_list = ", ".join(f'"{field}"' for field in index_fields)
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column_list})')
+                    created.append(name)
+
+                if f"rtree_{table}_{GEOMETRY_COLUMN}" not in existing:
+                    missing_rtree.append(table)
+
+        for table in missing_rtree:
+            # O provedor OGR cria a R-tree e os gatilhos do GeoPackage
+            layer = QgsVectorLayer(f"{self.path}|layername={table}", table, "ogr")
+            if layer.isValid() and layer.dataProvider().createSpatialIndex():
+                created.append(f"rtree_{table}_{GEOMETRY_COLUMN}")
+            del layer
+
+        if created or analyze:
+            with self._connect() as conn:
+                conn.execute("ANALYZE")
+        if created:
+            print(f"Índices criados na base de alertas: {created}")
+        return created
+
+    def _create_state_table(self):
+        with self._connect() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _read_state(self, key):
+        if not self.exists():
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(f"SELECT value FROM {STATE_TABLE} WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def _write_state(self, key, value):
+        self._create_state_table()
+        with self._connect() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO {STATE_TABLE} (key, value) VALUES (?, ?)", (key, value))
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de tiles vetoriais (MBTiles) dos alertas da base local.
+
+A pirâmide é gerada com QgsVectorTileWriter a partir da tabela de alertas do
+GeoPackage. Após cada sincronização, apenas os tiles das células onde houve
+alertas novos ou alterados são gerados de novo (em um MBTiles temporário) e
+copiados para o cache.
+"""
+import os
+import tempfile
+
+from qgis.core import (QgsCoordinateReferenceSystem, QgsCoordinateTransform,
+                       QgsFeedback, QgsProject, QgsRectangle, QgsVectorTileLayer,
+                       QgsVectorTileWriter)
+
+from .alert_store import DIRTY_CELL_DEGREES
+from .core.mbtiles import merge_tiles
+
+# Nome da camada dentro dos tiles
+TILE_LAYER_NAME = "alerts"
+
+# Níveis de zoom gerados (Amazônia Legal inteira até escala de município)
+MIN_ZOOM = 3
+MAX_ZOOM = 12
+
+# Abaixo deste zoom os tiles cobrem muitas células: gerados uma única vez por atualização
+PER_CELL_MIN_ZOOM = 6
+
+# Limite de latitude da projeção Web Mercator
+MAX_LATITUDE = 85.0
+
+
+def default_tiles_path(store):
+    """Caminho do cache MBTiles ao lado do GeoPackage da base"""
+    return os.path.splitext(store.path)[0] + ".mbtiles"
+
+
+def cell_extent(cell):
+    """Extensão de uma célula (x, y) da base local em EPSG:4326"""
+    x, y = cell
+    return QgsRectangle(x * DIRTY_CELL_DEGREES,
+                        max(-MAX_LATITUDE, y * DIRTY_CELL_DEGREES),
+                        (x + 1) * DIRTY_CELL_DEGREES,
+                        min(MAX_LATITUDE, (y + 1) * DIRTY_CELL_DEGREES))
+
+
+def to_web_mercator(extent):
+    """Converte uma extensão de EPSG:4326 para EPSG:3857 (CRS da matriz de tiles)"""
+    transform = QgsCoordinateTransform(
+        QgsCoordinateReferenceSystem("EPSG:4326"),
+        QgsCoordinateReferenceSystem("EPSG:3857"),
+        QgsProject.instance()
+    )
+    return transform.transformBoundingBox(extent)
+
+
+def write_tiles(layer, path, extent, min_zoom, max_zoom, feedback=None):
+    """Grava em um MBTiles os tiles da camada que cruzam a extensão (EPSG:3857)"""
+    writer = QgsVectorTileWriter()
+    writer.setDestinationUri(f"type=mbtiles&url={path}")
+    writer.setMinZoom(min_zoom)
+    writer.setMaxZoom(max_zoom)
+    writer.setExtent(extent)
+    writer.setTransformContext(QgsProject.instance().transformContext())
+
+    tile_layer = QgsVectorTileWriter.Layer(layer)
+    tile_layer.setLayerName(TILE_LAYER_NAME)
+    writer.setLayers([tile_layer])
+
+    if not writer.writeTiles(feedback):
+        raise Exception(f"Erro ao gerar os tiles vetoriais: {writer.errorMessage()}")
+
+
+class AlertTileCache:
+    """Pirâmide MBTiles dos alertas de uma AlertStore, atualizada de forma incremental"""
+
+    def __init__(self, store, path=None):
+        self.store = store
+        self.path = path or default_tiles_path(store)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def update(self, task=None):
+        """Gera a pirâmide completa ou apenas os tiles das células alteradas
+
+        :param task: QgsTask usada para progresso e cancelamento
+        :returns: dicionário com o modo ('full', 'delta' ou 'none') e o número de células
+        """
+        layer = self.store.layer("alerts_tiles")
+        if not layer.isValid():
+            raise Exception(f"Não foi possível abrir a base local: {self.store.path}")
+
+        feedback = QgsFeedback()
+        if task is not None:
+            feedback.progressChanged.connect(task.setProgress)
+
+        cells = self.store.dirty_cells()
+        if not self.exists():
+            extent = to_web_mercator(layer.extent())
+            write_tiles(layer, self.path, extent, MIN_ZOOM, MAX_ZOOM, feedback)
+            self.store.clear_dirty_cells()
+            return {"mode": "full", "cells": 0}
+
+        if not cells:
+            return {"mode": "none", "cells": 0}
+
+        # Níveis baixos: uma única geração sobre a extensão de todas as células alteradas
+        union = QgsRectangle(cell_extent(next(iter(cells))))
+        for cell in cells:
+            union.combineExtentWith(cell_extent(cell))
+        runs = [(to_web_mercator(union), MIN_ZOOM, PER_CELL_MIN_ZOOM - 1)]
+        # Níveis altos: apenas os tiles de cada célula alterada
+        runs += [(to_web_mercator(cell_extent(cell)), PER_CELL_MIN_ZOOM, MAX_ZOOM) for cell in cells]
+
+        for extent, min_zoom, max_zoom in runs:
+            if task is not None and task.isCanceled():
+                return None
+            delta_path = os.path.join(tempfile.gettempdir(), f"alerts_delta_{os.getpid()}.mbtiles")
+            if os.path.exists(delta_path):
+                os.remove(delta_path)
+            try:
+                write_tiles(layer, delta_path, extent, min_zoom, max_zoom, feedback)
+                merge_tiles(delta_path, self.path,
+                            (extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()),
+                            min_zoom, max_zoom)
+            finally:
+                if os.path.exists(delta_path):
+                    os.remove(delta_path)
+
+        self.store.clear_dirty_cells(cells)
+        return {"mode": "delta", "cells": len(cells)}
+
+    def layer(self, name="Alertas SCCON (tiles vetoriais)"):
+        """Camada de tiles vetoriais do cache"""
+        return QgsVectorTileLayer(f"type=mbtiles&url={self.path}", name)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Geometria da área de interesse (AOI) usada nas pesquisas da Planet.
+
+Une as feições (selecionadas) de uma camada de polígonos, reprojeta para
+EPSG:4326 e simplifica o resultado até o limite de vértices aceito pelo
+GeometryFilter da quick-search.
+"""
+import json
+
+from qgis.core import (QgsGeometry, QgsCoordinateReferenceSystem, QgsCoordinateTransform,
+                       QgsProject)
+
+from .core.planet import MAX_SEARCH_VERTICES
+from .core.profiling import timed, PHASE_GEOMETRY
+
+WGS84 = QgsCoordinateReferenceSystem("EPSG:4326")
+
+# Casas decimais das coordenadas enviadas à API (~0,1 m)
+JSON_PRECISION = 6
+
+
+def vertex_count(geometry):
+    """Número de vértices de uma geometria"""
+    return sum(1 for _ in geometry.vertices())
+
+
+def simplify_to_vertex_limit(geometry, max_vertices=MAX_SEARCH_VERTICES):
+    """Simplifica a geometria até que tenha no máximo max_vertices vértices
+
+    A geometria é expandida pela mesma tolerância da simplificação, de modo
+    que o resultado continue contendo a área original (nenhuma cena que toca
+    a AOI deixa de ser encontrada).
+    """
+    if vertex_count(geometry) <= max_vertices:
+        return geometry
+    bbox = geometry.boundingBox()
+    tolerance = max(bbox.width(), bbox.height()) / 10000.0
+    while True:
+        simplified = geometry.buffer(tolerance, 2).simplify(tolerance)
+        if not simplified.isEmpty() and vertex_count(simplified) <= max_vertices:
+            return simplified
+        tolerance *= 2
+
+
+@timed(PHASE_GEOMETRY)
+def layer_aoi_geometry(layer, transform_context=None):
+    """União das feições selecionadas (ou de todas, sem seleção) da camada em EPSG:4326
+
+    :returns: QgsGeometry, ou None se a camada não tiver polígonos
+    """
+    features = layer.selectedFeatures() if layer.selectedFeatureCount() else layer.getFeatures()
+    geometries = [f.geometry() for f in features if f.hasGeometry()]
+    if not geometries:
+        return None
+    geometry = QgsGeometry.unaryUnion(geometries)
+    if layer.crs() != WGS84:
+        context = transform_context or QgsProject.instance().transformContext()
+        geometry.transform(QgsCoordinateTransform(layer.crs(), WGS84, context))
+    return geometry
+
+
+@timed(PHASE_GEOMETRY)
+def search_geometry(geometry, max_vertices=MAX_SEARCH_VERTICES):
+    """Geometria GeoJSON (EPSG:4326) para o GeometryFilter da pesquisa"""
+    geometry = simplify_to_vertex_limit(geometry, max_vertices)
+    return json.loads(geometry.asJson(JSON_PRECISION))
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks do plugin com servidores simulados da Planet e do WFS SCCON (ver run.py)"""
@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP local que imita as APIs da Planet e o WFS de alertas SCCON.
+
+Endpoints emulados:
+- POST /data/v1/quick-search e GET /data/v1/searches/<id>/<página>: pesquisa
+  paginada por '_links._next', com respostas 429 (Retry-After) periódicas;
+- GET /basemaps/v1/mosaics, /basemaps/v1/mosaics/<id>/quads e os downloads
+  dos quads;
+- GET /basemaps/v1/planet-tiles/<mosaico>/gmap/z/x/y.png e
+  /data/v1/<tipo>/<cena>/z/x/y.png: tiles;
+- GET /wfs: GetCapabilities, DescribeFeatureType e GetFeature (hits e
+  páginas GeoJSON com startIndex/count) do typename 'alerts'.
+
+A latência de cada resposta, os tamanhos (cenas, alertas, vértices, bytes dos
+tiles e quads) e a frequência dos 429 são configuráveis em MockConfig. As
+respostas são determinísticas (mesma configuração, mesmos dados). Os filtros
+do GetFeature não são avaliados: o WFS devolve sempre todos os alertas.
+"""
+import json
+import math
+import random
+import struct
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class MockConfig:
+    """Parâmetros do servidor simulado"""
+
+    def __init__(self, latency=0.05, scenes=1000, alerts=5000, alert_vertices=24,
+                 footprint_vertices=8, throttle_every=3, retry_after=0,
+                 tile_bytes=20000, quad_bytes=256 * 1024, quads_per_mosaic=4, seed=42):
+        """
+        :param latency: atraso (s) de cada resposta
+        :param scenes: cenas devolvidas por pesquisa
+        :param alerts: alertas publicados no WFS
+        :param throttle_every: a cada N requisições da API Data, uma resposta 429 (0 desliga)
+        :param retry_after: valor (s) do cabeçalho Retry-After dos 429
+        """
+        self.latency = latency
+        self.scenes = scenes
+        self.alerts = alerts
+        self.alert_vertices = alert_vertices
+        self.footprint_vertices = footprint_vertices
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.tile_bytes = tile_bytes
+        self.quad_bytes = quad_bytes
+        self.quads_per_mosaic = quads_per_mosaic
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _png(size):
+    """PNG 256x256 válido, completado com um bloco auxiliar até 'size' bytes"""
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+    header = chunk(b"IHDR", struct.pack(">IIBBBBB", 256, 256, 8, 2, 0, 0, 0))
+    pixels = chunk(b"IDAT", zlib.compress(b"".join(b"\x00" + b"\x40\x80\x40" * 256 for _ in range(256))))
+    png = b"\x89PNG\r\n\x1a\n" + header + pixels
+    padding = max(0, size - len(png) - 24)
+    return png + chunk(b"zPAD", b"\x00" * padding) + chunk(b"IEND", b"")
+
+
+def _polygon(rng, cx, cy, rx, ry, vertices, jitter=0.15):
+    """Anel fechado aproximadamente elíptico em torno de (cx, cy)"""
+    ring = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        scale = 1.0 + rng.uniform(-jitter, jitter)
+        ring.append([round(cx + rx * scale * math.cos(angle), 6), round(cy + ry * scale * math.sin(angle), 6)])
+    ring.append(ring[0])
+    return ring
+
+
+def _filter_parts(filter_json):
+    """Retângulo, período e limite de nuvens de um filtro AndFilter"""
+    bbox, start, end, cloud = (-50.0, -10.0, -49.0, -9.0), date(2024, 1, 1), date(2024, 1, 31), 1.0
+    for part in filter_json.get("config", []):
+        if part.get("type") == "GeometryFilter":
+            coords = json.dumps(part["config"]["coordinates"])
+            values = [float(v) for v in coords.replace("[", " ").replace("]", " ").replace(",", " ").split()]
+            xs, ys = values[0::2], values[1::2]
+            bbox = (min(xs), min(ys), max(xs), max(ys))
+        elif part.get("type") == "DateRangeFilter":
+            start = date.fromisoformat(part["config"]["gte"][:10])
+            end = date.fromisoformat(part["config"]["lte"][:10])
+        elif part.get("type") == "RangeFilter" and part.get("field_name") == "cloud_cover":
+            cloud = part["config"].get("lt", 1.0)
+    return bbox, start, end, cloud
+
+
+class MockState:
+    """Dados gerados e contadores de requisições do servidor"""
+
+    ALERT_TYPES = ("Cicatriz de Queimadas", "Desmatamento - Corte Raso",
+                   "Desmatamento - Degradacao", "Desmatamento - Degradacao - Corte Seletivo")
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.searches = {}
+        self.tile = _png(config.tile_bytes)
+        self.quad = b"\x00" * config.quad_bytes
+        self._alerts = None
+        self.reset_counters()
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.throttled = 0
+            self.bytes_sent = 0
+            self._data_requests = 0
+
+    def counters(self):
+        with self.lock:
+            return {"requests": self.requests, "throttled": self.throttled, "bytes_sent": self.bytes_sent}
+
+    def should_throttle(self):
+        """Indica se a requisição à API Data recebe um 429"""
+        with self.lock:
+            self._data_requests += 1
+            every = self.config.throttle_every
+            if every and self._data_requests % every == 0:
+                self.throttled += 1
+                return True
+            return False
+
+    def scene(self, search, index):
+        """Cena 'index' de uma pesquisa"""
+        bbox, start, end, cloud_limit = search
+        rng = random.Random(self.config.seed * 1000003 + index)
+        days = max((end - start).days, 0)
+        acquired = start + timedelta(days=rng.randint(0, days))
+        cx = rng.uniform(bbox[0], bbox[2])
+        cy = rng.uniform(bbox[1], bbox[3])
+        return {
+            "type": "Feature",
+            "id": f"{acquired:%Y%m%d}_{index:06d}_mock",
+            "geometry": {"type": "Polygon", "coordinates": [
+                _polygon(rng, cx, cy, 0.12, 0.06, self.config.footprint_vertices, 0.02)
+            ]},
+            "properties": {
+                "acquired": f"{acquired:%Y-%m-%d}T{rng.randint(10, 15):02d}:{rng.randint(0, 59):02d}:00.000Z",
+                "cloud_cover": round(rng.uniform(0, min(cloud_limit, 1.0)), 2),
+                "item_type": "PSScene",
+            },
+        }
+
+    def alerts(self):
+        """Alertas publicados no WFS (gerados uma única vez)"""
+        with self.lock:
+            if self._alerts is None:
+                rng = random.Random(self.config.seed)
+                alerts = []
+                for i in range(self.config.alerts):
+                    cx, cy = rng.uniform(-60.0, -45.0), rng.uniform(-12.0, -2.0)
+                    day = date(2023, 1, 1) + timedelta(days=rng.randint(0, 600))
+                    alerts.append({
+                        "type": "Feature",
+                        "id": f"alerts.{i + 1}",
+                        "geometry": {"type": "MultiPolygon", "coordinates": [[
+                            _polygon(rng, cx, cy, 0.004, 0.003, self.config.alert_vertices)
+                        ]]},
+                        "properties": {
+                            "area_ha": round(rng.uniform(1, 500), 2),
+                            "dat_antes": (day - timedelta(days=30)).isoformat(),
+                            "dat_depois": day.isoformat(),
+                            "tipo": self.ALERT_TYPES[i % len(self.ALERT_TYPES)],
+                        },
+                    })
+                self._alerts = alerts
+            return self._alerts
+
+
+CAPABILITIES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<wfs:WFS_Capabilities version="1.1.0" xmlns:wfs="http://www.opengis.net/wfs"
+    xmlns:ogc="http://www.opengis.net/ogc" xmlns:ows="http://www.opengis.net/ows">
+  <ows:OperationsMetadata>
+    <ows:Operation name="GetFeature">
+      <ows:Parameter name="outputFormat"><ows:Value>application/json</ows:Value></ows:Parameter>
+    </ows:Operation>
+  </ows:OperationsMetadata>
+  <wfs:FeatureTypeList>
+    <wfs:FeatureType><wfs:Name>sccon:alerts</wfs:Name></wfs:FeatureType>
+  </wfs:FeatureTypeList>
+  <ogc:Filter_Capabilities>
+    <ogc:Spatial_Capabilities><ogc:SpatialOperators>
+      <ogc:SpatialOperator name="BBOX"/>
+    </ogc:SpatialOperators></ogc:Spatial_Capabilities>
+    <ogc:Scalar_Capabilities><ogc:LogicalOperators/><ogc:ComparisonOperators>
+      <ogc:ComparisonOperator>GreaterThan</ogc:ComparisonOperator>
+      <ogc:ComparisonOperator>GreaterThanEqualTo</ogc:ComparisonOperator>
+      <ogc:ComparisonOperator>EqualTo</ogc:ComparisonOperator>
+      <ogc:ComparisonOperator>Between</ogc:ComparisonOperator>
+    </ogc:ComparisonOperators></ogc:Scalar_Capabilities>
+  </ogc:Filter_Capabilities>
+</wfs:WFS_Capabilities>"""
+
+DESCRIBE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:gml="http://www.opengis.net/gml">
+  <xsd:complexType name="alertsType"><xsd:sequence>
+    <xsd:element name="geom" type="gml:MultiSurfacePropertyType"/>
+    <xsd:element name="area_ha" type="xsd:double"/>
+    <xsd:element name="dat_antes" type="xsd:date"/>
+    <xsd:element name="dat_depois" type="xsd:date"/>
+    <xsd:element name="tipo" type="xsd:string"/>
+  </xsd:sequence></xsd:complexType>
+</xsd:schema>"""
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Trata as requisições conforme o caminho"""
+
+    protocol_version = "HTTP/1.1"
+    # Cabeçalhos e corpo são gravados separadamente: sem o Nagle, sem atraso do ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        time.sleep(self.state.config.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.state.lock:
+            self.state.requests += 1
+            self.state.bytes_sent += len(body)
+
+    def _throttled(self):
+        if self.state.should_throttle():
+            self._send(429, {"message": "Too Many Requests"},
+                       headers={"Retry-After": str(self.state.config.retry_after)})
+            return True
+        return False
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b"{}"
+        if url.path != "/data/v1/quick-search":
+            return self._send(404, {"message": "not found"})
+        if self._throttled():
+            return
+        page_size = int(parse_qs(url.query).get("_page_size", ["250"])[0])
+        search = _filter_parts(json.loads(body).get("filter", {}))
+        with self.state.lock:
+            search_id = f"s{len(self.state.searches) + 1}"
+            self.state.searches[search_id] = (search, page_size)
+        self._search_page(search_id, 0)
+
+    def _search_page(self, search_id, page):
+        search, page_size = self.state.searches[search_id]
+        total = self.state.config.scenes
+        first = page * page_size
+        features = [self.state.scene(search, i) for i in range(first, min(first + page_size, total))]
+        links = {}
+        if first + page_size < total:
+            host = self.headers.get("Host")
+            links["_next"] = f"http://{host}/data/v1/searches/{search_id}/{page + 1}"
+        self._send(200, {"type": "FeatureCollection", "features": features, "_links": links})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        query = {k.lower(): v[0] for k, v in parse_qs(url.query).items()}
+        host = self.headers.get("Host")
+
+        if url.path.startswith("/data/v1/searches/") and len(parts) == 5:
+            if self._throttled():
+                return
+            if parts[3] not in self.state.searches:
+                return self._send(404, {"message": "search not found"})
+            return self._search_page(parts[3], int(parts[4]))
+
+        if url.path == "/basemaps/v1/mosaics":
+            name = query.get("name__is") or query.get("name__contains") or "global_monthly_2024_01_mosaic"
+            return self._send(200, {"mosaics": [{"id": name, "name": name}], "_links": {}})
+
+        if url.path.startswith("/basemaps/v1/mosaics/") and parts[-1] == "quads":
+            mosaic_id = parts[3]
+            items = [{
+                "id": f"{i}-{mosaic_id[-12:]}",
+                "_links": {"download": f"http://{host}/quads/{mosaic_id}/{i}/full"},
+            } for i in range(self.state.config.quads_per_mosaic)]
+            return self._send(200, {"items": items, "_links": {}})
+
+        if parts[0] == "quads":
+            return self._send(200, self.state.quad, "image/tiff")
+
+        if url.path.endswith(".png") and ("planet-tiles" in parts or parts[:2] == ["data", "v1"]):
+            return self._send(200, self.state.tile, "image/png")
+
+        if parts[0] == "wfs":
+            return self._wfs(query)
+
+        self._send(404, {"message": "not found"})
+
+    def _wfs(self, query):
+        request = query.get("request", "").lower()
+        if request == "getcapabilities":
+            return self._send(200, CAPABILITIES, "text/xml")
+        if request == "describefeaturetype":
+            return self._send(200, DESCRIBE, "text/xml")
+        if request != "getfeature":
+            return self._send(400, b"<ExceptionReport/>", "text/xml")
+
+        alerts = self.state.alerts()
+        if query.get("resulttype") == "hits":
+            body = (f'<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs" '
+                    f'numberOfFeatures="{len(alerts)}"/>').encode("utf-8")
+            return self._send(200, body, "text/xml")
+
+        start = int(query.get("startindex", 0))
+        count = int(query.get("count") or query.get("maxfeatures") or 1000)
+        page = alerts[start:start + count]
+        self._send(200, {"type": "FeatureCollection", "features": page,
+                         "totalFeatures": len(alerts), "numberReturned": len(page)})
+
+
+class MockServer:
+    """Servidor simulado em uma thread, usado como gerenciador de contexto"""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = MockState(self.config)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    @property
+    def data_api_url(self):
+        return f"{self.url}/data/v1"
+
+    @property
+    def basemaps_api_url(self):
+        return f"{self.url}/basemaps/v1"
+
+    @property
+    def wfs_url(self):
+        return f"{self.url}/wfs"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Executa os cenários de benchmark contra o servidor simulado e grava o
+resultado no histórico (JSON), comparando com a execução anterior de mesma
+configuração.
+
+Uso, a partir da pasta do plugin:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --scenario search --scenario alerts --latency 0.1 --repeat 5
+
+Os cenários que usam o QGIS (footprints, styling, alert_store) exigem o
+Python do QGIS; nos demais ambientes são ignorados.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from .mock_server import MockConfig, MockServer
+from .scenarios import SCENARIOS, PLUGIN_DIR
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.json")
+
+# Variação (fração da mediana anterior) a partir da qual o resultado é destacado
+REGRESSION_THRESHOLD = 0.10
+
+
+def start_qgis():
+    """Inicializa o QGIS sem interface, se disponível
+
+    :returns: a QgsApplication, ou None se o QGIS não puder ser importado
+    """
+    try:
+        from qgis.core import QgsApplication
+    except ImportError:
+        return None
+    app = QgsApplication([], False)
+    app.initQgis()
+    return app
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PLUGIN_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_scenario(scenario, server, repeat):
+    """Executa um cenário 'repeat' vezes e resume tempos, requisições e métricas"""
+    scenario.setup()
+    timings = []
+    metrics = {}
+    counters = {}
+    try:
+        for _ in range(repeat):
+            server.state.reset_counters()
+            started = time.perf_counter()
+            metrics = scenario.run()
+            timings.append(time.perf_counter() - started)
+            counters = server.state.counters()
+    finally:
+        scenario.teardown()
+    return dict({
+        "median_s": round(statistics.median(timings), 4),
+        "min_s": round(min(timings), 4),
+        "max_s": round(max(timings), 4),
+        "runs": len(timings),
+    }, **counters, **metrics)
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def previous_run(history, config):
+    """Última execução com a mesma configuração do servidor"""
+    for entry in reversed(history):
+        if entry.get("config") == config:
+            return entry
+    return None
+
+
+def report(results, previous):
+    """Tabela com os tempos e a variação em relação à execução anterior"""
+    print(f"{'cenário':<12} {'mediana (s)':>12} {'mín (s)':>9} {'req.':>6} {'429':>5}  variação")
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:<12} {'—':>12} {'':>9} {'':>6} {'':>5}  {result['skipped']}")
+            continue
+        change = ""
+        before = (previous or {}).get("results", {}).get(name, {}).get("median_s")
+        if before:
+            delta = (result["median_s"] - before) / before
+            change = f"{delta:+.1%}"
+            if delta > REGRESSION_THRESHOLD:
+                change += "  <-- regressão"
+        print(f"{name:<12} {result['median_s']:>12.3f} {result['min_s']:>9.3f} "
+              f"{result.get('requests', 0):>6} {result.get('throttled', 0):>5}  {change}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do plugin Brasil MAIS com servidores simulados")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="cenário a executar (pode ser repetido; padrão: todos)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições de cada cenário")
+    parser.add_argument("--latency", type=float, default=0.05, help="latência (s) de cada resposta")
+    parser.add_argument("--scenes", type=int, default=1000, help="cenas por pesquisa")
+    parser.add_argument("--alerts", type=int, default=5000, help="alertas no WFS")
+    parser.add_argument("--throttle-every", type=int, default=3,
+                        help="uma resposta 429 a cada N requisições da API Data (0 desliga)")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="arquivo JSON do histórico")
+    parser.add_argument("--no-save", action="store_true", help="não gravar no histórico")
+    parser.add_argument("--label", default="", help="rótulo da execução no histórico")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(latency=args.latency, scenes=args.scenes, alerts=args.alerts,
+                        throttle_every=args.throttle_every)
+    qgis_app = start_qgis()
+
+    results = {}
+    with MockServer(config) as server:
+        for name in args.scenario or list(SCENARIOS):
+            scenario = SCENARIOS[name](server)
+            if scenario.needs_qgis and qgis_app is None:
+                results[name] = {"skipped": "ignorado (QGIS indisponível)"}
+                continue
+            print(f"{name}: {scenario.description}...", flush=True)
+            results[name] = run_scenario(scenario, server, args.repeat)
+
+    history = load_history(args.history)
+    report(results, previous_run(history, config.as_dict()))
+
+    if not args.no_save:
+        history.append({
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "label": args.label,
+            "python": sys.version.split()[0],
+            "qgis": qgis_app is not None,
+            "config": config.as_dict(),
+            "repeat": args.repeat,
+            "results": {name: result for name, result in results.items() if "skipped" not in result},
+        })
+        with open(args.history, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=2, ensure_ascii=False)
+        print(f"Histórico: {args.history}")
+
+    if qgis_app is not None:
+        qgis_app.exitQgis()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
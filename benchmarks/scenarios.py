@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Cenários de benchmark executados contra o servidor simulado.
+
+Cada cenário prepara seus dados em setup() (fora da medição), executa a
+operação medida em run() e devolve métricas próprias (cenas, tiles etc.).
+Os cenários marcados com needs_qgis usam a API do QGIS e só rodam quando ela
+está disponível (ex.: com o Python do QGIS).
+"""
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+# Pasta do plugin; o plugin é importado como pacote a partir da pasta acima dela
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.dirname(PLUGIN_DIR) not in sys.path:
+    sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+
+API_KEY = "mock-api-key"
+
+# Área, período e meses usados nos cenários
+BBOX = (-55.0, -10.0, -54.0, -9.0)
+START_DATE = date(2024, 1, 1)
+END_DATE = date(2024, 3, 31)
+MONTHS = 6
+
+# Grade de tiles (lado) carregada por mosaico e downloads simultâneos
+TILE_GRID = 6
+TILE_WORKERS = 8
+
+
+def plugin_module(name):
+    """Importa um módulo do plugin (ex.: 'core.planet') pelo nome do pacote do plugin"""
+    return importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.{name}")
+
+
+class Scenario:
+    """Base dos cenários"""
+
+    name = ""
+    description = ""
+    needs_qgis = False
+
+    def __init__(self, server):
+        self.server = server
+
+    def setup(self):
+        """Preparação não medida"""
+
+    def run(self):
+        """Operação medida; devolve um dicionário de métricas"""
+        raise NotImplementedError
+
+    def teardown(self):
+        """Limpeza ao final das repetições"""
+
+    def planet_client(self):
+        planet = plugin_module("core.planet")
+        return planet.PlanetClient(API_KEY, data_api_url=self.server.data_api_url,
+                                   basemaps_api_url=self.server.basemaps_api_url)
+
+    def search_payload(self):
+        planet = plugin_module("core.planet")
+        return planet.search_payload(planet.search_filter(planet.bbox_geometry(BBOX), START_DATE, END_DATE, 100))
+
+
+class SearchScenario(Scenario):
+    name = "search"
+    description = "Quick-search paginada (com 429) até a última página"
+
+    def run(self):
+        features = self.planet_client().search(self.search_payload())
+        return {"scenes": len(features)}
+
+
+class MonthlyScenario(Scenario):
+    name = "monthly"
+    description = "Mosaicos mensais: busca por nome, quads da área e uma grade de tiles por mês"
+
+    def setup(self):
+        self.folder = tempfile.mkdtemp(prefix="brmais_bench_")
+
+    def run(self):
+        planet = plugin_module("core.planet")
+        tiles = plugin_module("core.tiles")
+        http = plugin_module("core.http")
+        client = self.planet_client()
+
+        shutil.rmtree(self.folder, ignore_errors=True)
+        months = list(tiles.month_range(date(2023, 1, 1), date(2023, MONTHS, 1)))
+        quads = 0
+        tile_urls = []
+        for year, month in months:
+            mosaic_id = tiles.monthly_mosaic_id(year, month)
+            quads += len(planet.download_mosaic_quads(client, mosaic_id, BBOX, os.path.join(self.folder, mosaic_id)))
+            tile_urls += [f"{self.server.url}/basemaps/v1/planet-tiles/{mosaic_id}/gmap/10/{300 + x}/{500 + y}.png"
+                          for x in range(TILE_GRID) for y in range(TILE_GRID)]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=TILE_WORKERS) as executor:
+            sizes = list(executor.map(lambda url: len(http.send("GET", url).content), tile_urls))
+        elapsed = time.perf_counter() - started
+        return {
+            "mosaics": len(months),
+            "quads": quads,
+            "tiles": len(sizes),
+            "tiles_per_s": round(len(sizes) / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def teardown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+class AlertsScenario(Scenario):
+    name = "alerts"
+    description = "Contagem e download paralelo de todas as páginas do WFS de alertas"
+
+    def run(self):
+        sccon_wfs = plugin_module("core.sccon_wfs")
+        service = sccon_wfs.WfsService(self.server.wfs_url, "mock", "mock")
+        count = sum(len(page.get("features", [])) for _, _, page in service.iter_pages())
+        return {"alerts": count}
+
+
+class FootprintsScenario(Scenario):
+    name = "footprints"
+    description = "Camadas de footprints por data a partir das páginas da pesquisa"
+    needs_qgis = True
+
+    def setup(self):
+        self.pages = list(self.planet_client().iter_search_pages(self.search_payload()))
+        self.layer_ids = []
+
+    def run(self):
+        from qgis.core import QgsProject
+        search_layers = plugin_module("search_layers")
+        layer_registry = plugin_module("layer_registry")
+
+        self._remove_layers()
+        layers = search_layers.FootprintLayers(layer_registry.LayerRegistry(QgsProject.instance()),
+                                               "benchmark_footprints", {})
+        for page in self.pages:
+            layers.add_page(page)
+        self.layer_ids = layers.layer_ids
+        return {"scenes": layers.scene_count, "layers": len(layers.layers)}
+
+    def _remove_layers(self):
+        from qgis.core import QgsProject
+        project = QgsProject.instance()
+        project.removeMapLayers(self.layer_ids)
+        root = project.layerTreeRoot()
+        group = root.findGroup("benchmark_footprints")
+        if group is not None:
+            root.removeChildNode(group)
+        self.layer_ids = []
+
+    def teardown(self):
+        self._remove_layers()
+
+
+class StylingScenario(Scenario):
+    name = "styling"
+    description = "Estilo categorizado dos alertas e rampas dos índices, com renderização do mapa"
+    needs_qgis = True
+
+    IMAGE_SIZE = (1024, 768)
+
+    def setup(self):
+        import json
+        from qgis.core import QgsVectorLayer, QgsJsonUtils
+        sccon_wfs = plugin_module("core.sccon_wfs")
+        service = sccon_wfs.WfsService(self.server.wfs_url, "mock", "mock")
+        page = service.get_page(0, 2000)
+        fields = QgsJsonUtils.stringToFields(json.dumps(page))
+        self.layer = QgsVectorLayer("MultiPolygon?crs=EPSG:4326", "benchmark_alerts", "memory")
+        self.layer.dataProvider().addAttributes(fields.toList())
+        self.layer.updateFields()
+        self.layer.dataProvider().addFeatures(QgsJsonUtils.stringToFeatureList(json.dumps(page), fields))
+        self.layer.updateExtents()
+
+    def run(self):
+        from qgis.PyQt.QtCore import QSize
+        from qgis.core import (QgsCategorizedSymbolRenderer, QgsColorRampShader, QgsMapSettings,
+                               QgsMapRendererSequentialJob)
+        from qgis.PyQt.QtGui import QColor
+        plugin = plugin_module("Prog_BRMAIS_plugin")
+        indices = plugin_module("core.indices")
+
+        categorized = QgsCategorizedSymbolRenderer("tipo")
+        for value in plugin.ALERT_TYPE_COLORS:
+            categorized.addCategory(plugin.alert_category(value))
+        self.layer.setRenderer(categorized)
+
+        shaders = 0
+        for index_name in indices.INDEX_COLOR_RAMPS:
+            items = [QgsColorRampShader.ColorRampItem(value, QColor(*rgb), label)
+                     for value, rgb, label in indices.color_ramp(index_name)]
+            shader = QgsColorRampShader()
+            shader.setColorRampItemList(items)
+            shaders += 1
+
+        settings = QgsMapSettings()
+        settings.setLayers([self.layer])
+        settings.setExtent(self.layer.extent())
+        settings.setOutputSize(QSize(*self.IMAGE_SIZE))
+        job = QgsMapRendererSequentialJob(settings)
+        job.start()
+        job.waitForFinished()
+        return {"features": self.layer.featureCount(), "ramps": shaders}
+
+
+class AlertStoreScenario(Scenario):
+    name = "alert_store"
+    description = "Sincronização completa do WFS para a base local (GeoPackage)"
+    needs_qgis = True
+
+    def setup(self):
+        self.folder = tempfile.mkdtemp(prefix="brmais_bench_")
+
+    def run(self):
+        alert_store = plugin_module("alert_store")
+        sccon_wfs = plugin_module("core.sccon_wfs")
+        path = os.path.join(self.folder, f"alertas_{time.time_ns()}.gpkg")
+        store = alert_store.AlertStore(path, simplified=True)
+        result = store.sync(sccon_wfs.WfsService(self.server.wfs_url, "mock", "mock"))
+        return {"new": result["new"], "updated": result["updated"]}
+
+    def teardown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (SearchScenario, FootprintsScenario, MonthlyScenario, StylingScenario,
+                     AlertsScenario, AlertStoreScenario)
+}
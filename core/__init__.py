@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Núcleo do plugin sem dependência do Qt/QGIS.
+
+Clientes HTTP da Planet e do WFS SCCON, filtros de pesquisa e de alertas,
+nomes de mosaicos e URIs de tiles, índices espectrais, seleção de cobertura,
+execução em lote por área de interesse e manutenção do cache MBTiles.
+Pode ser usado em threads, processos de trabalho e scripts.
+"""
+from .alert_filters import AlertQuery
+from .batch import run_batch, write_summary
+from .coverage import greedy_cover, popcount
+from .indices import color_ramp, proc_param, compute_index
+from .mbtiles import merge_tiles
+from .planet import (PlanetClient, PlanetError, PlanetAuthError, bbox_geometry,
+                     search_filter, search_payload, group_by_date, download_mosaic_quads)
+from .sccon_wfs import WfsService, WfsError, WfsAuthError, split_bbox, run_windowed
+from .tiles import (month_range, shift_month, monthly_mosaic_id, index_mosaic_ids,
+                    before_after_mosaics, mosaic_xyz_uri, index_xyz_uri, item_xyz_uri)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Construção dos filtros das consultas de alertas SCCON.
+
+Os filtros são gerados como OGC Filter (Filter Encoding 1.1 / FES 2.0), com
+os valores escapados, e conferidos contra os operadores anunciados no
+GetCapabilities; os predicados não anunciados são avaliados localmente. CQL
+só é usado quando configurado explicitamente.
+Este módulo não depende do Qt/QGIS.
+"""
+from xml.sax.saxutils import escape
+
+# Operadores (nome do Filter Capabilities) e nomes alternativos equivalentes
+OPERATOR_ALIASES = {
+    "GreaterThan": ("GreaterThan",),
+    "GreaterThanOrEqualTo": ("GreaterThanOrEqualTo", "GreaterThanEqualTo"),
+    "EqualTo": ("EqualTo",),
+    "Between": ("Between",),
+    "BBOX": ("BBOX",),
+}
+
+OGC_NS = "http://www.opengis.net/ogc"
+GML_NS = "http://www.opengis.net/gml"
+FES_NS = "http://www.opengis.net/fes/2.0"
+GML32_NS = "http://www.opengis.net/gml/3.2"
+
+
+def cql_literal(value):
+    """Literal CQL: números sem aspas, textos com aspas simples escapadas"""
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _date_text(value):
+    """Data de um atributo como texto 'yyyy-MM-dd' (aceita QDate/QDateTime)"""
+    if value is None:
+        return None
+    if hasattr(value, "toString"):
+        if hasattr(value, "date"):
+            value = value.date()
+        return value.toString("yyyy-MM-dd")
+    return str(value)[:10]
+
+
+def _feature_value(feature, name):
+    """Valor de um atributo de uma feição (dicionário de propriedades ou QgsFeature)
+
+    Atributos ausentes e nulos (NULL do QGIS, que não é None) resultam em None.
+    """
+    if isinstance(feature, dict):
+        value = feature.get(name)
+    else:
+        value = feature[name]
+    if value is None or (hasattr(value, "isNull") and value.isNull()):
+        return None
+    return value
+
+
+class AlertQuery:
+    """Critérios de uma consulta de alertas"""
+
+    def __init__(self, area_min=None, date_start=None, date_end=None,
+                 alert_type=None, since=None, bbox=None):
+        """
+        :param since: data mínima de 'dat_depois' (sincronização incremental)
+        :param bbox: recorte (xmin, ymin, xmax, ymax) em EPSG:4326
+        """
+        self.area_min = area_min
+        self.date_start = date_start
+        self.date_end = date_end
+        self.alert_type = alert_type
+        self.since = since
+        self.bbox = bbox
+
+    def with_bbox(self, bbox):
+        """Cópia da consulta com outro recorte espacial"""
+        return AlertQuery(self.area_min, self.date_start, self.date_end,
+                          self.alert_type, self.since, bbox)
+
+    def predicates(self):
+        """Lista de predicados (operador, propriedade, valores...)"""
+        predicates = []
+        if self.bbox:
+            predicates.append(("BBOX", None, tuple(float(v) for v in self.bbox)))
+        if self.area_min is not None:
+            predicates.append(("GreaterThan", "area_ha", float(self.area_min)))
+        if self.date_start and self.date_end:
+            predicates.append(("Between", "dat_depois", str(self.date_start), str(self.date_end)))
+        if self.since:
+            predicates.append(("GreaterThanOrEqualTo", "dat_depois", str(self.since)))
+        if self.alert_type and self.alert_type != "Todos":
+            predicates.append(("EqualTo", "tipo", str(self.alert_type)))
+        return predicates
+
+    def to_cql(self, geometry_name="geom", predicates=None):
+        """Filtro CQL/ECQL equivalente"""
+        clauses = []
+        for predicate in self.predicates() if predicates is None else predicates:
+            operator, prop = predicate[0], predicate[1]
+            if operator == "BBOX":
+                xmin, ymin, xmax, ymax = predicate[2]
+                clauses.append(f"BBOX({geometry_name},{xmin!r},{ymin!r},{xmax!r},{ymax!r},'EPSG:4326')")
+            elif operator == "Between":
+                clauses.append(f"{prop} BETWEEN {cql_literal(predicate[2])} AND {cql_literal(predicate[3])}")
+            else:
+                symbol = {"GreaterThan": ">", "GreaterThanOrEqualTo": ">=", "EqualTo": "="}[operator]
+                clauses.append(f"{prop} {symbol} {cql_literal(predicate[2])}")
+        return " AND ".join(clauses)
+
+    def to_expression(self):
+        """Expressão QGIS equivalente (subset de camadas do provedor WFS)"""
+        clauses = []
+        for predicate in self.predicates():
+            operator, prop = predicate[0], predicate[1]
+            if operator == "BBOX":
+                xmin, ymin, xmax, ymax = predicate[2]
+                wkt = (f"POLYGON(({xmin!r} {ymin!r},{xmax!r} {ymin!r},{xmax!r} {ymax!r},"
+                       f"{xmin!r} {ymax!r},{xmin!r} {ymin!r}))")
+                clauses.append(f"intersects_bbox($geometry, geom_from_wkt('{wkt}'))")
+            elif operator == "Between":
+                clauses.append(f'"{prop}" >= {cql_literal(predicate[2])} AND "{prop}" <= {cql_literal(predicate[3])}')
+            else:
+                symbol = {"GreaterThan": ">", "GreaterThanOrEqualTo": ">=", "EqualTo": "="}[operator]
+                clauses.append(f'"{prop}" {symbol} {cql_literal(predicate[2])}')
+        return " AND ".join(clauses)
+
+    def to_fes(self, version="1.1.0", geometry_name="geom", predicates=None):
+        """Filtro XML (OGC Filter 1.1 para WFS 1.x, FES 2.0 para WFS 2.0)"""
+        fes2 = str(version).startswith("2")
+        p = "fes" if fes2 else "ogc"
+        prop_tag = "ValueReference" if fes2 else "PropertyName"
+
+        def prop(name):
+            return f"<{p}:{prop_tag}>{escape(name)}</{p}:{prop_tag}>"
+
+        def literal(value):
+            return f"<{p}:Literal>{escape(str(value))}</{p}:Literal>"
+
+        parts = []
+        for predicate in self.predicates() if predicates is None else predicates:
+            operator, name = predicate[0], predicate[1]
+            if operator == "BBOX":
+                xmin, ymin, xmax, ymax = predicate[2]
+                if fes2:
+                    # EPSG:4326 em URN usa a ordem latitude/longitude
+                    envelope = (f'<gml:Envelope srsName="urn:ogc:def:crs:EPSG::4326">'
+                                f'<gml:lowerCorner>{ymin} {xmin}</gml:lowerCorner>'
+                                f'<gml:upperCorner>{ymax} {xmax}</gml:upperCorner></gml:Envelope>')
+                else:
+                    envelope = (f'<gml:Envelope srsName="EPSG:4326">'
+                                f'<gml:lowerCorner>{xmin} {ymin}</gml:lowerCorner>'
+                                f'<gml:upperCorner>{xmax} {ymax}</gml:upperCorner></gml:Envelope>')
+                parts.append(f"<{p}:BBOX>{prop(geometry_name)}{envelope}</{p}:BBOX>")
+            elif operator == "Between":
+                parts.append(
+                    f"<{p}:PropertyIsBetween>{prop(name)}"
+                    f"<{p}:LowerBoundary>{literal(predicate[2])}</{p}:LowerBoundary>"
+                    f"<{p}:UpperBoundary>{literal(predicate[3])}</{p}:UpperBoundary>"
+                    f"</{p}:PropertyIsBetween>"
+                )
+            else:
+                tag = f"PropertyIs{operator}"
+                parts.append(f"<{p}:{tag}>{prop(name)}{literal(predicate[2])}</{p}:{tag}>")
+
+        if not parts:
+            return ""
+        body = parts[0] if len(parts) == 1 else f"<{p}:And>{''.join(parts)}</{p}:And>"
+        if fes2:
+            namespaces = f'xmlns:fes="{FES_NS}" xmlns:gml="{GML32_NS}"'
+        else:
+            namespaces = f'xmlns:ogc="{OGC_NS}" xmlns:gml="{GML_NS}"'
+        return f"<{p}:Filter {namespaces}>{body}</{p}:Filter>"
+
+    def split_by_capabilities(self, caps):
+        """Separa os predicados que o servidor anuncia suportar dos demais"""
+        supported = caps.get("operators", set())
+        server, client = [], []
+        for predicate in self.predicates():
+            aliases = OPERATOR_ALIASES.get(predicate[0], (predicate[0],))
+            if any(alias in supported for alias in aliases):
+                server.append(predicate)
+            else:
+                client.append(predicate)
+        return server, client
+
+    def server_params(self, caps, version="1.1.0", geometry_name="geom", use_cql=False):
+        """Parâmetros de GetFeature com o filtro avaliado no servidor
+
+        Os predicados cujos operadores são anunciados no GetCapabilities vão
+        como OGC Filter; os restantes são devolvidos para avaliação local.
+        Com use_cql, o filtro inteiro vai como CQL_FILTER (GeoServer).
+
+        :returns: (parâmetros da requisição, predicados a avaliar localmente)
+        """
+        if not self.predicates():
+            return {}, []
+
+        server, client = self.split_by_capabilities(caps)
+        if not client:
+            return {"FILTER": self.to_fes(version, geometry_name)}, []
+        if use_cql:
+            return {"CQL_FILTER": self.to_cql(geometry_name)}, []
+
+        print(f"Predicados não suportados pelo servidor (avaliados localmente): {client}")
+        if not server:
+            return {}, client
+        return {"FILTER": self.to_fes(version, geometry_name, server)}, client
+
+    @staticmethod
+    def feature_filter(predicates):
+        """Função que avalia localmente, em uma feição, os predicados de atributo
+
+        Predicados espaciais (BBOX) não são avaliados aqui.
+        """
+        attribute_predicates = [p for p in predicates if p[0] != "BBOX"]
+        if not attribute_predicates:
+            return None
+
+        def matches(feature):
+            for predicate in attribute_predicates:
+                operator, name = predicate[0], predicate[1]
+                value = _feature_value(feature, name)
+                if value is None:
+                    return False
+                if name == "dat_depois":
+                    value = _date_text(value)
+                if operator == "GreaterThan" and not float(value) > predicate[2]:
+                    return False
+                if operator == "GreaterThanOrEqualTo" and not value >= predicate[2]:
+                    return False
+                if operator == "EqualTo" and value != predicate[2]:
+                    return False
+                if operator == "Between" and not predicate[2] <= value <= predicate[3]:
+                    return False
+            return True
+
+        return matches
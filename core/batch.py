@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Execução em lote por área de interesse (AOI), em um pool de processos.
+
+Para cada AOI: pesquisa das cenas diárias, seleção da cobertura mínima de
+cada data e, opcionalmente, download dos alertas SCCON da área. Cada AOI gera
+seus próprios arquivos de resultado e uma linha no resumo (CSV) com os tempos
+de cada etapa. Os processos compartilham os limites de requisições
+simultâneas por host (core.http) e recebem o cache de capabilities do WFS já
+preenchido pelo processo principal.
+Este módulo não depende do Qt/QGIS.
+"""
+import csv
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from .alert_filters import AlertQuery
+from .coverage import (geojson_polygons, sample_polygons, polygons_bounds, point_in_polygons,
+                       ring_mask, greedy_cover, popcount, DEFAULT_TARGET)
+from .http import set_host_slots
+from .planet import (PlanetClient, DATA_API_URL, search_filter, search_payload,
+                     group_by_date, footprint_ring)
+from .sccon_wfs import WfsService, split_bbox, seed_capabilities
+
+# Processos de trabalho padrão
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# Requisições simultâneas por host somando todos os processos
+HOST_CONCURRENCY = 4
+
+# Intervalo (s) entre as verificações de cancelamento enquanto as AOIs são processadas
+CANCEL_POLL_INTERVAL = 0.5
+
+# Resolução da grade de amostragem da cobertura (pontos por eixo)
+BATCH_GRID_SIZE = 48
+
+# Colunas do resumo
+SUMMARY_FIELDS = ["aoi", "cenas", "datas", "melhor_data", "cobertura_pct", "cenas_selecionadas",
+                  "alertas", "tempo_pesquisa_s", "tempo_cobertura_s", "tempo_alertas_s",
+                  "tempo_total_s", "erro"]
+
+
+def safe_name(name):
+    """Nome de AOI utilizável como nome de arquivo"""
+    return re.sub(r"[^\w\-]+", "_", str(name)).strip("_") or "aoi"
+
+
+@contextmanager
+def _timer(timings, stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - started
+
+
+def date_coverage(geometry, scenes, grid_size=BATCH_GRID_SIZE, target=DEFAULT_TARGET):
+    """Cobertura mínima da AOI pelas cenas de cada data
+
+    :param geometry: geometria GeoJSON da AOI (EPSG:4326)
+    :returns: lista de dicionários por data, com o percentual coberto e as cenas escolhidas
+    """
+    points = sample_polygons(geojson_polygons(geometry), grid_size)
+    total = len(points)
+    results = []
+    for date_text, features in group_by_date(scenes).items():
+        candidates = []
+        for feature in features:
+            ring = footprint_ring(feature)
+            if ring:
+                cloud = (feature.get('properties', {}).get('cloud_cover') or 0) * 100.0
+                candidates.append((feature.get('id'), ring_mask(ring, points), cloud))
+        selected, covered = greedy_cover(candidates, total, target)
+        results.append({
+            "data": date_text,
+            "cenas": len(features),
+            "cobertura_pct": 100.0 * popcount(covered) / total if total else 0.0,
+            "selecionadas": selected,
+        })
+    return results
+
+
+def download_alerts(aoi, sccon, path):
+    """Baixa os alertas SCCON que tocam a AOI e os grava em GeoJSON
+
+    A consulta usa o retângulo da AOI; um alerta é mantido se algum vértice
+    dele estiver dentro do polígono da AOI.
+    :returns: número de alertas gravados
+    """
+    polygons = geojson_polygons(aoi["geometry"])
+    bbox = polygons_bounds(polygons)
+    service = WfsService(sccon["url"], sccon["username"], sccon["password"],
+                         geometry_name=sccon.get("geometry_name"), use_cql=sccon.get("use_cql", False))
+    query = AlertQuery(since=sccon.get("since"), bbox=bbox)
+    _, client_predicates = service.filter_params(query)
+    client_filter = AlertQuery.feature_filter(client_predicates)
+
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        for _, _, page in service.iter_tiled_pages(split_bbox(bbox), query):
+            for feature in page.get("features", []):
+                properties = feature.get("properties") or {}
+                if client_filter is not None and not client_filter(properties):
+                    continue
+                alert_polygons = geojson_polygons(feature.get("geometry") or {})
+                if not any(point_in_polygons(x, y, polygons)
+                           for rings in alert_polygons for x, y in rings[0]):
+                    continue
+                f.write((",\n" if count else "") + json.dumps(feature))
+                count += 1
+        f.write("\n]}\n")
+    return count
+
+
+def run_aoi(aoi, options):
+    """Processa uma AOI (executado em um processo de trabalho)
+
+    :param aoi: dicionário com "name" e "geometry" (GeoJSON em EPSG:4326)
+    :param options: dicionário com api_key, start_date, end_date, cloud, folder e,
+                    opcionalmente, sccon (url, username, password, geometry_name, since)
+    :returns: linha do resumo (SUMMARY_FIELDS)
+    """
+    name = safe_name(aoi["name"])
+    timings = {}
+    summary = dict.fromkeys(SUMMARY_FIELDS, "")
+    summary["aoi"] = aoi["name"]
+    started = time.perf_counter()
+    try:
+        with _timer(timings, "pesquisa"):
+            client = PlanetClient(options["api_key"])
+            payload = search_payload(search_filter(aoi["geometry"], options["start_date"],
+                                                   options["end_date"], options.get("cloud", 100)))
+            scenes = client.search(payload)
+
+        with _timer(timings, "cobertura"):
+            dates = date_coverage(aoi["geometry"], scenes, options.get("grid_size", BATCH_GRID_SIZE))
+
+        alerts = None
+        if options.get("sccon"):
+            with _timer(timings, "alertas"):
+                alerts = download_alerts(aoi, options["sccon"],
+                                         os.path.join(options["folder"], f"{name}_alertas.geojson"))
+
+        with open(os.path.join(options["folder"], f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "aoi": aoi["name"],
+                "geometria": aoi["geometry"],
+                "cobertura_por_data": dates,
+                "cenas": {"type": "FeatureCollection", "features": scenes},
+            }, f)
+
+        best = max(dates, key=lambda d: (round(d["cobertura_pct"], 1), -len(d["selecionadas"])), default=None)
+        summary.update({
+            "cenas": len(scenes),
+            "datas": len(dates),
+            "melhor_data": best["data"] if best else "",
+            "cobertura_pct": round(best["cobertura_pct"], 1) if best else 0.0,
+            "cenas_selecionadas": len(best["selecionadas"]) if best else 0,
+            "alertas": alerts if alerts is not None else "",
+        })
+    except Exception as e:
+        summary["erro"] = str(e)
+
+    for stage in ("pesquisa", "cobertura", "alertas"):
+        if stage in timings:
+            summary[f"tempo_{stage}_s"] = round(timings[stage], 2)
+    summary["tempo_total_s"] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+def _init_worker(slots, capabilities):
+    """Inicialização de cada processo: limites por host e cache de capabilities"""
+    set_host_slots(slots)
+    seed_capabilities(capabilities)
+
+
+def _python_executable():
+    """Interpretador para os processos de trabalho
+
+    Dentro do QGIS, sys.executable é o próprio executável do QGIS.
+    """
+    names = ("python.exe", "pythonw.exe") if os.name == "nt" else ("python3", "python")
+    folders = (sys.exec_prefix, os.path.join(sys.exec_prefix, "bin"))
+    for folder in folders:
+        for name in names:
+            path = os.path.join(folder, name)
+            if os.path.exists(path):
+                return path
+    return sys.executable
+
+
+def run_batch(aois, options, max_workers=DEFAULT_WORKERS, capabilities=None,
+              is_canceled=None, on_result=None):
+    """Processa as AOIs em paralelo em um pool de processos
+
+    :param capabilities: cache de capabilities do WFS (sccon_wfs.cached_capabilities)
+    :param on_result: função chamada com (AOIs concluídas, total, linha do resumo)
+    :returns: linhas do resumo, na ordem das AOIs (as interrompidas por cancelamento ficam de fora)
+    """
+    os.makedirs(options["folder"], exist_ok=True)
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(_python_executable())
+
+    hosts = {urlparse(DATA_API_URL).hostname}
+    if options.get("sccon"):
+        hosts.add(urlparse(options["sccon"]["url"]).hostname)
+    slots = {host: context.BoundedSemaphore(HOST_CONCURRENCY) for host in hosts}
+
+    summaries = [None] * len(aois)
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(slots, capabilities or {}))
+    canceled = False
+    try:
+        futures = {executor.submit(run_aoi, aoi, options): i for i, aoi in enumerate(aois)}
+        pending = set(futures)
+        done = 0
+        while pending:
+            finished, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    # Ex.: BrokenProcessPool, se um processo de trabalho morrer
+                    summary = dict.fromkeys(SUMMARY_FIELDS, "")
+                    summary.update(aoi=aois[index]["name"], erro=str(e) or type(e).__name__)
+                summaries[index] = summary
+                done += 1
+                if on_result is not None:
+                    on_result(done, len(aois), summary)
+            if is_canceled is not None and is_canceled():
+                canceled = True
+                break
+    finally:
+        if canceled:
+            # AOIs ainda na fila são descartadas e as em andamento não são esperadas
+            for future in futures:
+                future.cancel()
+        executor.shutdown(wait=not canceled)
+    return [summary for summary in summaries if summary is not None]
+
+
+def write_summary(summaries, path):
+    """Grava o resumo por AOI em CSV"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    return path
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Seleção gulosa de cenas que cobrem a área de interesse (set cover ponderado).
+
+Cada cena é representada pelo bitset dos pontos de amostragem da AOI que ela
+cobre; a montagem dos bitsets a partir das geometrias fica em coverage.py.
+"""
+
+# Peso da cobertura de nuvens no custo de cada cena (custo = 1 + peso * nuvens)
+CLOUD_WEIGHT = 1.0
+
+# Cobertura alvo (fração da AOI) a partir da qual a seleção é interrompida
+DEFAULT_TARGET = 0.99
+
+
+def popcount(mask):
+    """Conta os bits ligados de um inteiro usado como bitset"""
+    return bin(mask).count("1")
+
+
+def greedy_cover(candidates, total_cells, target=DEFAULT_TARGET,
+                 cloud_weight=CLOUD_WEIGHT):
+    """Seleciona um conjunto quase mínimo de cenas que cobre a AOI
+
+    :param candidates: lista de tuplas (chave, bitset, nuvens 0-100)
+    :param total_cells: número de pontos de amostragem da AOI
+    :returns: (lista de chaves selecionadas, bitset coberto)
+    """
+    if total_cells <= 0:
+        return [], 0
+
+    remaining = [c for c in candidates if c[1]]
+    selected = []
+    covered = 0
+
+    while remaining and popcount(covered) < target * total_cells:
+        best = None
+        best_score = 0.0
+        for candidate in remaining:
+            key, mask, cloud = candidate
+            gain = popcount(mask & ~covered)
+            if not gain:
+                continue
+            cost = 1.0 + cloud_weight * (cloud or 0) / 100.0
+            score = gain / cost
+            if score > best_score:
+                best, best_score = candidate, score
+
+        if best is None:
+            break
+
+        selected.append(best[0])
+        covered |= best[1]
+        remaining.remove(best)
+
+    return selected, covered
+
+
+def geojson_polygons(geometry):
+    """Polígonos (lista de anéis de (x, y)) de uma geometria GeoJSON Polygon/MultiPolygon"""
+    if geometry.get("type") == "Polygon":
+        parts = [geometry.get("coordinates", [])]
+    elif geometry.get("type") == "MultiPolygon":
+        parts = geometry.get("coordinates", [])
+    else:
+        return []
+    return [[[(pt[0], pt[1]) for pt in ring] for ring in part] for part in parts if part]
+
+
+def point_in_ring(x, y, ring):
+    """Teste de ponto em anel pelo número de cruzamentos (ray casting)"""
+    inside = False
+    x1, y1 = ring[-1]
+    for x2, y2 in ring:
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def point_in_polygons(x, y, polygons):
+    """Indica se o ponto está em algum dos polígonos (fora dos seus buracos)"""
+    for rings in polygons:
+        if point_in_ring(x, y, rings[0]) and not any(point_in_ring(x, y, hole) for hole in rings[1:]):
+            return True
+    return False
+
+
+def polygons_bounds(polygons):
+    """Retângulo (xmin, ymin, xmax, ymax) que envolve os polígonos"""
+    xs = [x for rings in polygons for x, _ in rings[0]]
+    ys = [y for rings in polygons for _, y in rings[0]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def sample_polygons(polygons, grid_size=64):
+    """Pontos de amostragem (centros de célula de uma grade) contidos nos polígonos
+
+    Equivale ao sample_aoi de coverage.py, sem depender do QGIS.
+    """
+    if not polygons:
+        return []
+    xmin, ymin, xmax, ymax = polygons_bounds(polygons)
+    dx = (xmax - xmin) / grid_size
+    dy = (ymax - ymin) / grid_size
+    if dx <= 0 or dy <= 0:
+        return []
+
+    points = []
+    for row in range(grid_size):
+        y = ymin + (row + 0.5) * dy
+        for col in range(grid_size):
+            x = xmin + (col + 0.5) * dx
+            if point_in_polygons(x, y, polygons):
+                points.append((x, y))
+    return points
+
+
+def ring_mask(ring, points):
+    """Bitset dos pontos cobertos por um footprint (anel externo)"""
+    xs = [x for x, _ in ring]
+    ys = [y for _, y in ring]
+    xmin, xmax, ymin, ymax = min(xs), max(xs), min(ys), max(ys)
+    mask = 0
+    for bit, (x, y) in enumerate(points):
+        if xmin <= x <= xmax and ymin <= y <= ymax and point_in_ring(x, y, ring):
+            mask |= 1 << bit
+    return mask
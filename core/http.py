@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Sessão HTTP compartilhada e requisições com novas tentativas.
+
+Usada pelos clientes da Planet e do WFS SCCON, na thread da interface, em
+tarefas ou em processos de trabalho (cada processo tem a sua sessão).
+"""
+import time
+import threading
+from contextlib import nullcontext
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .profiling import timed, PHASE_HTTP
+
+# Conexões mantidas abertas por host
+POOL_MAXSIZE = 8
+
+MAX_RETRIES = 3
+RETRY_BACKOFF = 2.0
+
+# Códigos HTTP que justificam uma nova tentativa
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+# Funções chamadas com as medidas de cada requisição (telemetria)
+_listeners = []
+
+# Semáforos que limitam as requisições simultâneas por host (podem ser
+# compartilhados entre processos de trabalho)
+_host_slots = {}
+
+
+def get_session():
+    """Sessão HTTP compartilhada, com pool de conexões reaproveitadas"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def add_listener(listener):
+    """Registra uma função chamada, após cada requisição, com um dicionário de medidas
+
+    O dicionário tem method, url (com os parâmetros da consulta), status (0 em
+    falha de rede), bytes, latency (s, incluindo as novas tentativas), retries
+    e error. A função pode ser chamada de qualquer thread.
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    """Remove uma função registrada com add_listener"""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _notify(method, url, started, attempt, response=None, error=None, stream=False):
+    if not _listeners:
+        return
+    size = 0
+    if response is not None:
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit():
+            size = int(length)
+        elif not stream:
+            size = len(response.content)
+    record = {
+        "method": method,
+        "url": response.url if response is not None else url,
+        "status": response.status_code if response is not None else 0,
+        "bytes": size,
+        "latency": time.perf_counter() - started,
+        "retries": attempt,
+        "error": error or "",
+    }
+    for listener in list(_listeners):
+        try:
+            listener(record)
+        except Exception as e:
+            print(f"Erro ao registrar a telemetria da requisição: {str(e)}")
+
+
+def set_host_slots(slots):
+    """Define os limites de requisições simultâneas por host
+
+    :param slots: dicionário {host: semáforo}; os semáforos podem ser de
+                  threading ou de multiprocessing (compartilhados entre processos)
+    """
+    _host_slots.clear()
+    _host_slots.update(slots)
+
+
+def retry_delay(response, attempt, backoff=RETRY_BACKOFF):
+    """Espera antes da próxima tentativa (respeita o cabeçalho Retry-After)"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+    return backoff * (2 ** attempt)
+
+
+@timed(PHASE_HTTP)
+def send(method, url, max_retries=MAX_RETRIES, retry_status=RETRY_STATUS, **kwargs):
+    """Requisição com novas tentativas para falhas transitórias
+
+    :returns: a resposta da última tentativa, qualquer que seja o status
+    :raises requests.RequestException: se a última tentativa falhar na rede
+    """
+    slot = _host_slots.get(urlparse(url).hostname)
+    started = time.perf_counter()
+    for attempt in range(max_retries + 1):
+        response = None
+        try:
+            with slot if slot is not None else nullcontext():
+                response = get_session().request(method, url, **kwargs)
+            if response.status_code not in retry_status or attempt == max_retries:
+                _notify(method, url, started, attempt, response, stream=kwargs.get("stream", False))
+                return response
+        except requests.RequestException as e:
+            if attempt == max_retries:
+                _notify(method, url, started, attempt, error=str(e))
+                raise
+        time.sleep(retry_delay(response, attempt))
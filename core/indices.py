@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Índices espectrais dos mosaicos da Planet: parâmetro de processamento do
+servidor de tiles, paleta de cores e fórmula de cada índice.
+
+As fórmulas usam apenas operadores aritméticos, de modo que funcionam tanto
+com números quanto com arrays NumPy (banda a banda).
+"""
+
+# Parâmetro "proc" do servidor de tiles para cada índice
+INDEX_PROC_PARAMS = {
+    "NDVI": "ndvi",
+    "NDWI": "ndwi",
+    "MSAVI2": "msavi2",
+    "VARI": "vari",
+    "MTVI2": "mtvi2",
+    "CIR": "cir",
+}
+
+DEFAULT_PROC_PARAM = "ndvi"
+
+# Paletas: lista de (valor, (r, g, b), rótulo), interpoladas entre os valores
+INDEX_COLOR_RAMPS = {
+    "NDVI": [
+        (-1, (0, 0, 128), 'Água/Sombra'),
+        (-0.5, (0, 0, 255), 'Água'),
+        (0, (128, 128, 128), 'Nuvem/Solo'),
+        (0.2, (240, 240, 170), 'Solo/Urbano'),
+        (0.4, (150, 200, 0), 'Vegetação esparsa'),
+        (0.6, (50, 180, 50), 'Vegetação moderada'),
+        (0.8, (0, 100, 0), 'Vegetação densa'),
+        (1.0, (0, 50, 0), 'Vegetação muito densa'),
+    ],
+    "NDWI": [
+        (-1, (240, 240, 170), 'Vegetação densa'),
+        (-0.5, (190, 210, 255), 'Vegetação/Solo úmido'),
+        (0, (120, 170, 255), 'Umidade moderada'),
+        (0.3, (30, 90, 180), 'Água rasa'),
+        (0.5, (0, 0, 128), 'Água profunda'),
+        (1.0, (0, 0, 0), 'Água muito profunda'),
+    ],
+    "MSAVI2": [
+        (-1, (128, 128, 128), 'Não vegetação'),
+        (0, (210, 180, 140), 'Solo exposto'),
+        (0.2, (230, 230, 120), 'Vegetação muito esparsa'),
+        (0.4, (173, 223, 107), 'Vegetação esparsa'),
+        (0.6, (63, 191, 63), 'Vegetação moderada'),
+        (0.8, (0, 128, 0), 'Vegetação densa'),
+        (1.0, (0, 64, 0), 'Vegetação muito densa'),
+    ],
+    "VARI": [
+        (-1, (0, 0, 100), 'Valor mínimo'),
+        (-0.5, (140, 140, 140), 'Não vegetação/Sombra'),
+        (0, (200, 200, 160), 'Solo exposto'),
+        (0.2, (245, 245, 122), 'Vegetação estressada'),
+        (0.4, (170, 240, 110), 'Vegetação moderada'),
+        (0.6, (50, 220, 50), 'Vegetação saudável'),
+        (1.0, (0, 180, 0), 'Vegetação muito saudável'),
+    ],
+    "MTVI2": [
+        (0, (128, 128, 128), 'Não vegetação'),
+        (0.2, (200, 200, 100), 'Vegetação mínima'),
+        (0.4, (160, 220, 60), 'Vegetação esparsa'),
+        (0.6, (80, 200, 40), 'Vegetação moderada'),
+        (0.8, (20, 160, 20), 'Vegetação densa'),
+        (1.0, (0, 100, 0), 'Vegetação muito densa'),
+    ],
+    # CIR é uma composição de bandas: paleta que destaca a vegetação em vermelho
+    "CIR": [
+        (-1, (0, 0, 0), 'Valor mínimo'),
+        (0, (0, 0, 128), 'Água'),
+        (0.3, (128, 128, 128), 'Urbano/Solo'),
+        (0.6, (200, 100, 100), 'Vegetação esparsa'),
+        (1.0, (255, 0, 0), 'Vegetação densa'),
+    ],
+}
+
+# Escala de cinza para índices não reconhecidos
+DEFAULT_COLOR_RAMP = [
+    (-1, (0, 0, 0), 'Mínimo'),
+    (0, (128, 128, 128), 'Médio'),
+    (1, (255, 255, 255), 'Máximo'),
+]
+
+
+def proc_param(index_name):
+    """Parâmetro de processamento do servidor de tiles para o índice"""
+    return INDEX_PROC_PARAMS.get(index_name, DEFAULT_PROC_PARAM)
+
+
+def color_ramp(index_name):
+    """Paleta de cores do índice"""
+    return INDEX_COLOR_RAMPS.get(index_name, DEFAULT_COLOR_RAMP)
+
+
+# Ordem das bandas dos mosaicos analíticos normalizados (refletância × 10000)
+BAND_ORDER = ("blue", "green", "red", "nir")
+REFLECTANCE_SCALE = 10000.0
+
+
+def _ndvi(blue, green, red, nir):
+    return (nir - red) / (nir + red)
+
+
+def _ndwi(blue, green, red, nir):
+    return (green - nir) / (green + nir)
+
+
+def _msavi2(blue, green, red, nir):
+    return (2 * nir + 1 - ((2 * nir + 1) ** 2 - 8 * (nir - red)) ** 0.5) / 2
+
+
+def _vari(blue, green, red, nir):
+    return (green - red) / (green + red - blue)
+
+
+def _mtvi2(blue, green, red, nir):
+    numerator = 1.5 * (1.2 * (nir - green) - 2.5 * (red - green))
+    return numerator / ((2 * nir + 1) ** 2 - (6 * nir - 5 * red ** 0.5) - 0.5) ** 0.5
+
+
+# Índices calculáveis a partir das bandas (CIR é uma composição, não um índice)
+INDEX_FORMULAS = {
+    "NDVI": _ndvi,
+    "NDWI": _ndwi,
+    "MSAVI2": _msavi2,
+    "VARI": _vari,
+    "MTVI2": _mtvi2,
+}
+
+
+def compute_index(index_name, blue, green, red, nir, scale=REFLECTANCE_SCALE):
+    """Calcula um índice espectral a partir das bandas (valores ou arrays)
+
+    As bandas são convertidas para refletância (0-1) dividindo-se por scale.
+    """
+    formula = INDEX_FORMULAS.get(index_name)
+    if formula is None:
+        raise ValueError(f"Índice sem fórmula de cálculo: {index_name}")
+    return formula(blue / scale, green / scale, red / scale, nir / scale)
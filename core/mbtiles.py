@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Manutenção de arquivos MBTiles (SQLite) sem dependência do QGIS.
+
+Os tiles de um MBTiles gerado para uma extensão (delta) substituem os do
+cache; as linhas seguem o esquema TMS (contadas a partir do sul).
+"""
+import math
+import sqlite3
+from contextlib import closing
+
+# Metade da largura do mundo em EPSG:3857 (origem da matriz de tiles)
+WEB_MERCATOR_HALF = 20037508.342789244
+
+
+def tile_range(extent, zoom):
+    """Colunas e linhas (esquema TMS do MBTiles) dos tiles inteiramente refeitos para a extensão
+
+    :param extent: (xmin, ymin, xmax, ymax) em EPSG:3857
+    :returns: (col0, col1, row0, row1), inclusivos
+    """
+    xmin, ymin, xmax, ymax = extent
+    size = 2 * WEB_MERCATOR_HALF / (1 << zoom)
+    last = (1 << zoom) - 1
+    # Tiles apenas tocados na borda não entram (o escritor pode não refazê-los)
+    col0 = max(0, int(math.floor((xmin + WEB_MERCATOR_HALF) / size)))
+    col1 = min(last, int(math.ceil((xmax + WEB_MERCATOR_HALF) / size)) - 1)
+    row0 = max(0, int(math.floor((ymin + WEB_MERCATOR_HALF) / size)))
+    row1 = min(last, int(math.ceil((ymax + WEB_MERCATOR_HALF) / size)) - 1)
+    return col0, col1, row0, row1
+
+
+def read_bounds(conn, schema="main"):
+    """Extensão (lon/lat) registrada nos metadados de um MBTiles, ou None"""
+    row = conn.execute(f"SELECT value FROM {schema}.metadata WHERE name = 'bounds'").fetchone()
+    if not row or not row[0]:
+        return None
+    try:
+        return tuple(float(v) for v in row[0].split(","))
+    except ValueError:
+        return None
+
+
+def merge_tiles(source_path, target_path, extent=None, min_zoom=None, max_zoom=None):
+    """Copia (substituindo) os tiles de um MBTiles para outro
+
+    Se a extensão regenerada for informada, os tiles dela que não vieram no
+    delta (alertas que saíram do tile) são removidos do destino. Os metadados
+    'bounds' e 'center' do destino são ampliados para incluir o delta.
+
+    :param extent: (xmin, ymin, xmax, ymax) em EPSG:3857 usada na geração do delta
+    :returns: número de tiles copiados
+    """
+    with closing(sqlite3.connect(target_path, timeout=30)) as conn:
+        conn.execute("ATTACH DATABASE ? AS delta", (source_path,))
+        count = conn.execute("SELECT COUNT(*) FROM delta.tiles").fetchone()[0]
+        if extent is not None:
+            for zoom in range(min_zoom, max_zoom + 1):
+                col0, col1, row0, row1 = tile_range(extent, zoom)
+                conn.execute(
+                    "DELETE FROM tiles WHERE zoom_level = ? AND tile_column BETWEEN ? AND ? "
+                    "AND tile_row BETWEEN ? AND ?", (zoom, col0, col1, row0, row1)
+                )
+        conn.execute(
+            "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) "
+            "SELECT zoom_level, tile_column, tile_row, tile_data FROM delta.tiles"
+        )
+
+        bounds, delta_bounds = read_bounds(conn), read_bounds(conn, "delta")
+        if delta_bounds is not None:
+            if bounds is not None:
+                delta_bounds = (min(bounds[0], delta_bounds[0]), min(bounds[1], delta_bounds[1]),
+                                max(bounds[2], delta_bounds[2]), max(bounds[3], delta_bounds[3]))
+            row = conn.execute("SELECT value FROM metadata WHERE name = 'center'").fetchone()
+            parts = row[0].split(",") if row and row[0] else []
+            zoom = parts[2] if len(parts) > 2 else "0"
+            center = ((delta_bounds[0] + delta_bounds[2]) / 2, (delta_bounds[1] + delta_bounds[3]) / 2)
+            for name, value in (("bounds", ",".join(str(v) for v in delta_bounds)),
+                                ("center", f"{center[0]},{center[1]},{zoom}")):
+                conn.execute("DELETE FROM metadata WHERE name = ?", (name,))
+                conn.execute("INSERT INTO metadata (name, value) VALUES (?, ?)", (name, value))
+        conn.commit()
+        conn.execute("DETACH DATABASE delta")
+    return count
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Cliente das APIs Data e Basemaps da Planet e montagem dos filtros de pesquisa.
+
+Não depende do Qt/QGIS: as pesquisas podem ser feitas em threads, processos
+de trabalho ou scripts.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .http import send
+from .profiling import span, PHASE_PARSE
+
+DATA_API_URL = "https://api.planet.com/data/v1"
+BASEMAPS_API_URL = "https://api.planet.com/basemaps/v1"
+
+DEFAULT_ITEM_TYPES = ("PSScene",)
+DEFAULT_TIMEOUT = 60
+
+# Itens por página da quick-search (máximo aceito pela API)
+SEARCH_PAGE_SIZE = 250
+
+# Número máximo de vértices da geometria do GeometryFilter
+MAX_SEARCH_VERTICES = 1500
+
+# Downloads simultâneos de quads e tamanho dos blocos gravados
+DOWNLOAD_WORKERS = 4
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class PlanetError(Exception):
+    """Erro retornado pelas APIs da Planet"""
+
+
+class PlanetAuthError(PlanetError):
+    """API Key recusada pela Planet"""
+
+
+def bbox_geometry(bbox):
+    """Polígono GeoJSON de um retângulo (min_lon, min_lat, max_lon, max_lat)"""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return {
+        "type": "Polygon",
+        "coordinates": [[
+            [min_lon, min_lat],
+            [max_lon, min_lat],
+            [max_lon, max_lat],
+            [min_lon, max_lat],
+            [min_lon, min_lat]
+        ]]
+    }
+
+
+def search_filter(geometry, start_date, end_date, cloud_percent=100):
+    """Filtro AndFilter de geometria, período de aquisição e cobertura de nuvens
+
+    :param start_date: data inicial (date), incluída desde 00:00:00
+    :param end_date: data final (date), incluída até 23:59:59
+    """
+    return {
+        "type": "AndFilter",
+        "config": [
+            {
+                "type": "GeometryFilter",
+                "field_name": "geometry",
+                "config": geometry
+            },
+            {
+                "type": "DateRangeFilter",
+                "field_name": "acquired",
+                "config": {
+                    "gte": start_date.strftime("%Y-%m-%dT00:00:00Z"),
+                    "lte": end_date.strftime("%Y-%m-%dT23:59:59Z")
+                }
+            },
+            {
+                "type": "RangeFilter",
+                "field_name": "cloud_cover",
+                "config": {
+                    "lt": cloud_percent / 100.0
+                }
+            }
+        ]
+    }
+
+
+def search_payload(filter_json, item_types=DEFAULT_ITEM_TYPES):
+    """Corpo da requisição quick-search"""
+    return {
+        "item_types": list(item_types),
+        "filter": filter_json
+    }
+
+
+def acquired_date(feature):
+    """Data 'yyyy-MM-dd' de aquisição de uma cena"""
+    acquired = feature.get('properties', {}).get('acquired', '')
+    return acquired.split('T')[0] if 'T' in acquired else acquired
+
+
+def acquired_time(acquired):
+    """Hora 'HH:MM' de um instante de aquisição ISO 8601"""
+    if 'T' not in acquired:
+        return ""
+    time_part = acquired.split('T')[1]
+    return time_part.split('Z')[0][:5] if 'Z' in time_part else time_part[:5]
+
+
+def group_by_date(features):
+    """Agrupa as cenas por data de aquisição, em ordem cronológica"""
+    groups = {}
+    for feature in features:
+        groups.setdefault(acquired_date(feature), []).append(feature)
+    return dict(sorted(groups.items()))
+
+
+def footprint_ring(feature):
+    """Anel externo do footprint de uma cena, ou do seu bbox se não houver polígono
+
+    :returns: lista de (x, y), ou None se a cena não tiver geometria válida
+    """
+    geom = feature.get('geometry') or {}
+    coords = geom.get('coordinates', [])
+    if geom.get('type') == 'Polygon' and coords:
+        return [(pt[0], pt[1]) for pt in coords[0]]
+    bbox = feature.get('properties', {}).get('bbox', [])
+    if len(bbox) == 4:
+        x_min, y_min, x_max, y_max = bbox
+        return [(x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max), (x_min, y_min)]
+    return None
+
+
+class PlanetClient:
+    """Acesso HTTP às APIs Data e Basemaps com uma API Key"""
+
+    def __init__(self, api_key, timeout=DEFAULT_TIMEOUT, data_api_url=DATA_API_URL,
+                 basemaps_api_url=BASEMAPS_API_URL):
+        """
+        :param data_api_url: raiz da API Data (outro servidor, ex.: nos benchmarks)
+        :param basemaps_api_url: raiz da API Basemaps
+        """
+        self.api_key = api_key
+        self.auth = (api_key, '')
+        self.timeout = timeout
+        self.data_api_url = data_api_url
+        self.basemaps_api_url = basemaps_api_url
+
+    def _request(self, method, url, **kwargs):
+        response = send(method, url, auth=self.auth, timeout=self.timeout, **kwargs)
+        if response.status_code in (401, 403):
+            raise PlanetAuthError(f"API Key recusada (HTTP {response.status_code}): {response.text[:300]}")
+        if response.status_code != 200:
+            raise PlanetError(f"Erro na API: {response.status_code} - {response.text[:300]}")
+        with span(PHASE_PARSE):
+            return response.json()
+
+    def validate(self):
+        """Indica se a API Key é aceita pela API Basemaps"""
+        try:
+            self._request("GET", f"{self.basemaps_api_url}/mosaics")
+        except PlanetAuthError:
+            return False
+        return True
+
+    def _iter_links(self, method, url, key, **kwargs):
+        """Percorre uma listagem paginada pelos links '_next'"""
+        page = self._request(method, url, **kwargs)
+        while True:
+            yield page.get(key, [])
+            next_url = page.get('_links', {}).get('_next')
+            if not next_url:
+                return
+            page = self._request("GET", next_url)
+
+    def mosaics(self, name_contains=None):
+        """Mosaicos do Basemaps disponíveis para a conta"""
+        params = {"name__contains": name_contains} if name_contains else None
+        for page in self._iter_links("GET", f"{self.basemaps_api_url}/mosaics", 'mosaics', params=params):
+            yield from page
+
+    def mosaic_by_name(self, name):
+        """Mosaico do Basemaps com o nome exato, ou None se não existir"""
+        page = self._request("GET", f"{self.basemaps_api_url}/mosaics", params={"name__is": name})
+        mosaics = page.get('mosaics', [])
+        return mosaics[0] if mosaics else None
+
+    def mosaic_quads(self, mosaic_id, bbox):
+        """Quads de um mosaico que cruzam um retângulo (min_lon, min_lat, max_lon, max_lat)"""
+        params = {"bbox": ",".join(str(v) for v in bbox)}
+        url = f"{self.basemaps_api_url}/mosaics/{mosaic_id}/quads"
+        for page in self._iter_links("GET", url, 'items', params=params):
+            yield from page
+
+    def iter_search_pages(self, payload, page_size=SEARCH_PAGE_SIZE, is_canceled=None):
+        """Executa uma quick-search, entregando as cenas página a página
+
+        :param is_canceled: função sem argumentos que indica cancelamento
+        """
+        url = f"{self.data_api_url}/quick-search"
+        for features in self._iter_links("POST", url, 'features',
+                                         params={"_page_size": page_size}, json=payload):
+            yield features
+            if is_canceled is not None and is_canceled():
+                return
+
+    def search(self, payload, page_size=SEARCH_PAGE_SIZE, is_canceled=None):
+        """Todas as cenas de uma quick-search"""
+        return [feature for page in self.iter_search_pages(payload, page_size, is_canceled)
+                for feature in page]
+
+    def get_item(self, item_type, item_id):
+        """Detalhes de uma cena"""
+        return self._request("GET", f"{self.data_api_url}/item-types/{item_type}/items/{item_id}")
+
+    def download(self, url, path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        """Baixa um arquivo (quad, asset) em blocos, sem carregá-lo na memória"""
+        response = send("GET", url, auth=self.auth, timeout=self.timeout, stream=True)
+        if response.status_code != 200:
+            raise PlanetError(f"Erro ao baixar {url}: HTTP {response.status_code}")
+        partial = path + ".part"
+        with open(partial, "wb") as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+        os.replace(partial, path)
+        return path
+
+
+def download_mosaic_quads(client, mosaic_name, bbox, folder, max_workers=DOWNLOAD_WORKERS,
+                          is_canceled=None, on_progress=None):
+    """Baixa os quads de um mosaico que cruzam um retângulo em EPSG:4326
+
+    Quads já baixados (mesmo arquivo no destino) não são baixados de novo.
+
+    :param on_progress: função chamada com (quads concluídos, total de quads)
+    :returns: lista com os caminhos dos arquivos GeoTIFF
+    :raises PlanetError: se o mosaico não existir ou não estiver disponível para a conta
+    """
+    mosaic = client.mosaic_by_name(mosaic_name)
+    if mosaic is None:
+        raise PlanetError(f"Mosaico não encontrado: {mosaic_name}")
+
+    os.makedirs(folder, exist_ok=True)
+    downloads = []
+    for quad in client.mosaic_quads(mosaic["id"], bbox):
+        url = quad.get('_links', {}).get('download')
+        if url:
+            downloads.append((url, os.path.join(folder, f"{quad['id']}.tif")))
+
+    # Separa os quads já baixados antes de iniciar os downloads, para que um
+    # arquivo gravado por um download em andamento não seja contado duas vezes
+    paths = [path for _, path in downloads if os.path.exists(path)]
+    missing = [(url, path) for url, path in downloads if not os.path.exists(path)]
+    done = len(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(client.download, url, path) for url, path in missing]
+        for future in as_completed(futures):
+            if is_canceled is not None and is_canceled():
+                for pending in futures:
+                    pending.cancel()
+                break
+            paths.append(future.result())
+            done += 1
+            if on_progress is not None:
+                on_progress(done, len(downloads))
+    return paths
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Sessões de perfilamento das ações do plugin.
+
+Uma sessão junta os perfis cProfile da ação (thread principal e threads dos
+jobs que ela dispara) e o tempo de parede gasto em cada fase (HTTP,
+interpretação das respostas, geometria, criação de camadas, estilo), medido
+com span() nos pontos do código correspondentes. Sem sessão ativa, span()
+apenas verifica uma variável global.
+Este módulo não depende do Qt/QGIS.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Fases medidas com span()
+PHASE_HTTP = "http"
+PHASE_PARSE = "interpretação"
+PHASE_GEOMETRY = "geometria"
+PHASE_LAYERS = "camadas"
+PHASE_STYLE = "estilo"
+
+PHASES = (PHASE_HTTP, PHASE_PARSE, PHASE_GEOMETRY, PHASE_LAYERS, PHASE_STYLE)
+
+# Funções listadas no resumo
+TOP_FUNCTIONS = 30
+
+_session = None
+
+
+def current_session():
+    """Sessão ativa, ou None"""
+    return _session
+
+
+@contextmanager
+def span(phase):
+    """Mede o tempo de parede de um trecho na fase indicada da sessão ativa"""
+    session = _session
+    if session is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        session.add_span(phase, time.perf_counter() - started)
+
+
+def timed(phase):
+    """Decorador que mede cada chamada da função como um span da fase"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(phase):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProfileSession:
+    """Perfis cProfile e tempos por fase de uma ação"""
+
+    def __init__(self, action):
+        self.action = action
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.jobs = 0
+        self.on_idle = None
+        self._pending = 0
+        self._spans = {}
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def hold(self, job=False):
+        """Marca o início de um trabalho da ação (ela mesma ou um job)"""
+        with self._lock:
+            self._pending += 1
+            if job:
+                self.jobs += 1
+
+    def release(self):
+        """Marca o fim de um trabalho; sem pendências, chama on_idle(sessão)"""
+        with self._lock:
+            self._pending -= 1
+            idle = self._pending == 0
+        if idle and self.on_idle is not None:
+            self.on_idle(self)
+
+    def add_span(self, phase, seconds):
+        with self._lock:
+            total, count = self._spans.get(phase, (0.0, 0))
+            self._spans[phase] = (total + seconds, count + 1)
+
+    def add_profile(self, profile):
+        """Acrescenta o perfil (já desativado) de uma thread da ação"""
+        with self._lock:
+            self._profiles.append(profile)
+
+    @contextmanager
+    def profile_thread(self):
+        """Perfila a thread atual (ex.: a de um job) durante o bloco
+
+        A partir do Python 3.12 o cProfile usa sys.monitoring: só um perfil pode
+        estar ativo no processo, e o da thread principal já registra todas as
+        threads. Nas versões anteriores, se outro profiler estiver ativo na
+        thread, o bloco é executado sem perfil.
+        """
+        profile = None
+        if sys.version_info < (3, 12):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                print(f"Perfil da thread indisponível: {str(e)}")
+                profile = None
+        if profile is None:
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.add_profile(profile)
+
+    def spans(self):
+        """Fases medidas: {fase: (segundos, chamadas)}"""
+        with self._lock:
+            return dict(self._spans)
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def stats(self):
+        """pstats.Stats com os perfis de todas as threads, ou None"""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def summary(self):
+        """Resumo em texto: duração, fases e funções mais custosas"""
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        lines = [
+            f"Ação: {self.action}",
+            f"Início: {self.started_at.isoformat(timespec='seconds')}",
+            f"Duração: {elapsed:.3f} s ({self.jobs} jobs)",
+            "",
+            "Fases (tempo de parede, somado entre threads):",
+            f"  {'fase':<16} {'chamadas':>9} {'total (s)':>10} {'% da ação':>10}",
+        ]
+        spans = self.spans()
+        for phase in list(PHASES) + sorted(set(spans) - set(PHASES)):
+            if phase in spans:
+                total, count = spans[phase]
+                share = 100.0 * total / elapsed if elapsed else 0.0
+                lines.append(f"  {phase:<16} {count:>9} {total:>10.3f} {share:>9.1f}%")
+
+        stats = self.stats()
+        if stats is not None:
+            for key, title in (("cumulative", "tempo acumulado"), ("tottime", "tempo próprio")):
+                stats.stream = io.StringIO()
+                stats.sort_stats(key).print_stats(TOP_FUNCTIONS)
+                lines += ["", f"Funções mais custosas ({title}):", stats.stream.getvalue().strip()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory):
+        """Grava o perfil (.prof, para pstats/snakeviz) e o resumo (.txt)
+
+        :returns: caminho do resumo
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = re.sub(r"\W+", "_", self.action)
+        base = os.path.join(directory, f"{self.started_at:%Y%m%d_%H%M%S}_{name}")
+        stats = self.stats()
+        if stats is not None:
+            stats.dump_stats(base + ".prof")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(self.summary())
+        return base + ".txt"
+
+
+def start_session(action):
+    """Inicia e torna ativa a sessão de uma ação"""
+    global _session
+    _session = ProfileSession(action)
+    return _session
+
+
+def end_session(session):
+    """Encerra a sessão, se for a ativa"""
+    global _session
+    session.finish()
+    if _session is session:
+        _session = None
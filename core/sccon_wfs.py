@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""
+Cliente WFS do serviço de alertas SCCON.
+
+Faz a contagem prévia (resultType=hits) e baixa as páginas (startIndex/count)
+em paralelo, com um pool de threads limitado e novas tentativas por página.
+As páginas são pedidas em ordem estável (sortBy no identificador do alerta,
+quando o typename tem um) e as feições repetidas entre páginas são removidas.
+Este módulo não depende do Qt/QGIS.
+"""
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .http import send
+from .profiling import span, timed, PHASE_PARSE
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT = 60
+PROBE_TIMEOUT = 15
+
+# Recorte espacial: tamanho mínimo dos blocos (graus) e número máximo de blocos
+DEFAULT_TILE_SIZE = 0.5
+MAX_TILES = 64
+
+# Propriedades candidatas a identificador do alerta (ordem das páginas), em ordem de preferência
+SORT_KEY_CANDIDATES = ("id", "alert_id", "cod_alerta", "gid")
+
+# Capabilities já interpretados, por (url, usuário)
+_capabilities_cache = {}
+
+
+def split_bbox(bbox, tile_size=DEFAULT_TILE_SIZE, max_tiles=MAX_TILES):
+    """Divide um retângulo (xmin, ymin, xmax, ymax) em blocos regulares
+
+    O tamanho do bloco cresce quando necessário para não passar de max_tiles.
+    """
+    xmin, ymin, xmax, ymax = bbox
+    width, height = xmax - xmin, ymax - ymin
+    if width <= 0 or height <= 0:
+        return []
+
+    per_axis = max(1, int(max_tiles ** 0.5))
+    size = max(tile_size, width / per_axis, height / per_axis)
+    cols = max(1, int(-(-width // size)))
+    rows = max(1, int(-(-height // size)))
+    step_x, step_y = width / cols, height / rows
+
+    return [
+        (xmin + c * step_x, ymin + r * step_y,
+         xmin + (c + 1) * step_x, ymin + (r + 1) * step_y)
+        for r in range(rows) for c in range(cols)
+    ]
+
+
+def run_windowed(executor, calls, window, is_canceled=None):
+    """Executa as chamadas no pool mantendo no máximo 'window' em andamento
+
+    Os resultados são entregues à medida que ficam prontos e deixam de ser
+    referenciados após a entrega, limitando a memória usada.
+    :param calls: lista de tuplas (função, argumentos)
+    :returns: gerador de tuplas (índice da chamada, resultado)
+    """
+    pending = {}
+    next_call = 0
+    try:
+        while next_call < len(calls) or pending:
+            while next_call < len(calls) and len(pending) < window:
+                function, args = calls[next_call]
+                pending[executor.submit(function, *args)] = next_call
+                next_call += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                if is_canceled is not None and is_canceled():
+                    return
+                # Cada página já faz suas próprias novas tentativas
+                yield index, future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def cached_capabilities():
+    """Cópia do cache de capabilities, para repassá-lo a processos de trabalho"""
+    return dict(_capabilities_cache)
+
+
+def seed_capabilities(cache):
+    """Preenche o cache de capabilities (em um processo de trabalho)"""
+    _capabilities_cache.update(cache)
+
+
+def deduplicate(pages, key_property=None):
+    """Remove das páginas as feições já entregues (mesmo id do WFS)
+
+    :param key_property: propriedade usada como id quando a feição não traz o membro "id"
+    """
+    seen = set()
+    for page_index, page_count, page in pages:
+        unique = []
+        for feature in page.get("features", []):
+            feature_id = feature.get("id")
+            if feature_id is None and key_property:
+                feature_id = (feature.get("properties") or {}).get(key_property)
+            if feature_id is not None:
+                if feature_id in seen:
+                    continue
+                seen.add(feature_id)
+            unique.append(feature)
+        yield page_index, page_count, dict(page, features=unique)
+
+
+def _local_name(tag):
+    """Nome do elemento XML sem o namespace"""
+    return tag.rsplit("}", 1)[-1]
+
+
+@timed(PHASE_PARSE)
+def parse_capabilities(content):
+    """Interpreta o documento GetCapabilities do WFS
+
+    O suporte a CQL_FILTER (extensão do GeoServer) não é anunciado no
+    documento; ele só é usado quando configurado (WfsService(use_cql=True)).
+
+    :returns: dicionário com versão, typenames, formatos de saída e
+              operadores de filtro suportados
+    """
+    root = ET.fromstring(content)
+    caps = {
+        "version": root.attrib.get("version"),
+        "feature_types": [],
+        "output_formats": set(),
+        "operators": set(),
+    }
+
+    for element in root.iter():
+        name = _local_name(element.tag)
+        if name == "FeatureType":
+            for child in element:
+                if _local_name(child.tag) == "Name" and child.text:
+                    caps["feature_types"].append(child.text.strip())
+        elif name == "Parameter" and element.attrib.get("name", "").lower() == "outputformat":
+            for value in element.iter():
+                if _local_name(value.tag) == "Value" and value.text:
+                    caps["output_formats"].add(value.text.strip())
+        elif name in ("ComparisonOperator", "SpatialOperator", "LogicalOperator"):
+            operator = element.attrib.get("name") or (element.text or "")
+            operator = operator.strip()
+            if operator.startswith("PropertyIs"):
+                operator = operator[len("PropertyIs"):]
+            if operator:
+                caps["operators"].add(operator)
+        elif name == "Logical_Operators":
+            caps["operators"].update(("And", "Or", "Not"))
+
+    return caps
+
+
+class WfsError(Exception):
+    """Erro retornado pelo serviço WFS"""
+
+
+class WfsAuthError(WfsError):
+    """Credenciais recusadas pelo serviço WFS"""
+
+
+class WfsService:
+    """Acesso direto (HTTP) ao typename de alertas do WFS SCCON"""
+
+    def __init__(self, url, username, password, typename="alerts",
+                 version="1.1.0", timeout=DEFAULT_TIMEOUT, geometry_name=None, use_cql=False):
+        """
+        :param geometry_name: nome da geometria, se já conhecido (evita o DescribeFeatureType)
+        :param use_cql: envia CQL_FILTER quando o servidor não anuncia algum operador
+                        (apenas para servidores sabidamente GeoServer)
+        """
+        self.url = url
+        self.auth = (username, password) if username else None
+        self.typename = typename
+        self.version = version
+        self.timeout = timeout
+        self.use_cql = use_cql
+
+        self._geometry_name = geometry_name
+        self._properties = None
+
+    def _params(self, extra=None):
+        params = {
+            "service": "WFS",
+            "version": self.version,
+            "request": "GetFeature",
+            "typeName": self.typename,
+            "srsName": "EPSG:4326",
+        }
+        # O serviço SCCON identifica o usuário também pelo parâmetro userToken
+        if self.auth and "userToken=" not in self.url:
+            params["userToken"] = self.auth[0]
+        if extra:
+            params.update(extra)
+        return params
+
+    def _get(self, params):
+        """GET com novas tentativas para falhas transitórias"""
+        response = send("GET", self.url, params=params, auth=self.auth, timeout=self.timeout)
+        if response.status_code != 200:
+            raise WfsError(f"HTTP {response.status_code}: {response.text[:300]}")
+        return response
+
+    def capabilities(self, refresh=False):
+        """GetCapabilities autenticado, interpretado e guardado em cache"""
+        key = (self.url, self.auth[0] if self.auth else None)
+        if not refresh and key in _capabilities_cache:
+            return _capabilities_cache[key]
+
+        params = {"service": "WFS", "request": "GetCapabilities", "version": self.version}
+        if self.auth and "userToken=" not in self.url:
+            params["userToken"] = self.auth[0]
+        response = send("GET", self.url, max_retries=0, params=params, auth=self.auth, timeout=PROBE_TIMEOUT)
+        if response.status_code in (401, 403):
+            raise WfsAuthError(f"Acesso negado (HTTP {response.status_code}). Verifique usuário e senha.")
+        if response.status_code != 200:
+            raise WfsError(f"HTTP {response.status_code}: {response.text[:300]}")
+
+        try:
+            caps = parse_capabilities(response.content)
+        except ET.ParseError:
+            raise WfsError(f"Resposta GetCapabilities inválida: {response.text[:300]}")
+        if not caps["feature_types"] and b"ExceptionReport" in response.content:
+            raise WfsError(f"Erro do serviço: {response.text[:300]}")
+
+        _capabilities_cache[key] = caps
+        return caps
+
+    def probe(self):
+        """Testa a conexão com uma única requisição GetCapabilities
+
+        :returns: capabilities interpretados (também guardados em cache)
+        """
+        caps = self.capabilities(refresh=True)
+        names = [name.split(":")[-1] for name in caps["feature_types"]]
+        if self.typename.split(":")[-1] not in names:
+            raise WfsError(f"O serviço não publica o typename '{self.typename}'.")
+        return caps
+
+    def properties(self):
+        """Nomes das propriedades do typename (DescribeFeatureType, guardado na instância)"""
+        if self._properties is None:
+            params = self._params()
+            params["request"] = "DescribeFeatureType"
+            params.pop("srsName", None)
+            response = self._get(params)
+
+            with span(PHASE_PARSE):
+                root = ET.fromstring(response.content)
+            properties = []
+            for element in root.iter("{http://www.w3.org/2001/XMLSchema}element"):
+                name = element.attrib.get("name")
+                if not name or element.attrib.get("substitutionGroup"):
+                    continue
+                properties.append(name)
+                if self._geometry_name is None and element.attrib.get("type", "").startswith("gml:"):
+                    self._geometry_name = name
+            self._properties = properties
+        return self._properties
+
+    def geometry_name(self):
+        """Nome da propriedade de geometria do typename (DescribeFeatureType)"""
+        if self._geometry_name is None:
+            self.properties()
+            if self._geometry_name is None:
+                self._geometry_name = "geom"
+        return self._geometry_name
+
+    def sort_key(self):
+        """Propriedade usada para ordenar as páginas (identificador do alerta), ou None"""
+        try:
+            properties = self.properties()
+        except (WfsError, ET.ParseError) as e:
+            print(f"DescribeFeatureType indisponível; páginas sem ordenação: {str(e)}")
+            return None
+        return next((name for name in SORT_KEY_CANDIDATES if name in properties), None)
+
+    def _sorted(self, params):
+        """Parâmetros com sortBy, para que startIndex/count percorram uma ordem estável"""
+        params = dict(params or {})
+        if "sortBy" not in params:
+            key = self.sort_key()
+            if key:
+                params["sortBy"] = key
+        return params
+
+    def filter_params(self, query):
+        """Parâmetros de filtro de uma AlertQuery, conforme os capabilities do servidor
+
+        :returns: (parâmetros da requisição, predicados a avaliar localmente)
+        """
+        if query is None or not query.predicates():
+            return {}, []
+        geometry_name = self.geometry_name() if query.bbox else "geom"
+        return query.server_params(self.capabilities(), self.version, geometry_name, self.use_cql)
+
+    def hits(self, extra_params=None):
+        """Retorna o número de feições que atendem ao filtro (resultType=hits)"""
+        params = self._params(extra_params)
+        params["resultType"] = "hits"
+        response = self._get(params)
+
+        with span(PHASE_PARSE):
+            root = ET.fromstring(response.content)
+        for attribute in ("numberMatched", "numberOfFeatures"):
+            value = root.attrib.get(attribute)
+            if value is not None and value != "unknown":
+                return int(value)
+        raise WfsError(f"Resposta de contagem inesperada: {response.text[:300]}")
+
+    def get_page(self, start_index, count, extra_params=None):
+        """Baixa uma página de feições em GeoJSON"""
+        params = self._params(extra_params)
+        params.update({
+            "outputFormat": "application/json",
+            "startIndex": start_index,
+            "maxFeatures": count,
+            "count": count,
+        })
+        response = self._get(params)
+        try:
+            with span(PHASE_PARSE):
+                return response.json()
+        except ValueError:
+            raise WfsError(f"Resposta GeoJSON inválida: {response.text[:300]}")
+
+    def iter_pages(self, extra_params=None, page_size=DEFAULT_PAGE_SIZE,
+                   max_workers=DEFAULT_MAX_WORKERS, total=None, is_canceled=None):
+        """Baixa todas as páginas em paralelo, entregando-as à medida que chegam
+
+        :param total: número de feições, se já conhecido (evita nova contagem)
+        :param is_canceled: função sem argumentos que indica cancelamento
+        :returns: gerador de tuplas (índice da página, total de páginas, GeoJSON)
+        """
+        if total is None:
+            total = self.hits(extra_params)
+        page_count = (total + page_size - 1) // page_size
+        if not page_count:
+            return
+
+        key = self.sort_key()
+        page_params = self._sorted(extra_params)
+        calls = [(self.get_page, (page * page_size, page_size, page_params)) for page in range(page_count)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            def pages():
+                for page, result in run_windowed(executor, calls, max_workers * 2, is_canceled):
+                    yield page, page_count, result
+
+            # Sem ordenação garantida pelo servidor, uma feição pode aparecer em duas páginas
+            yield from deduplicate(pages(), key)
+
+    def distinct_values(self, name, query=None, is_canceled=None):
+        """Valores distintos de uma propriedade nos alertas que atendem à consulta
+
+        Baixa apenas a propriedade (propertyName, sem geometria), a chave usada
+        na remoção das feições repetidas entre páginas e as propriedades dos
+        predicados avaliados localmente.
+        :param query: AlertQuery da camada (filtros enviados ao servidor)
+        """
+        params, client_predicates = self.filter_params(query)
+        matches = query.feature_filter(client_predicates) if client_predicates else None
+        names = [name] + [predicate[1] for predicate in client_predicates if predicate[1]]
+        key = self.sort_key()
+        if key:
+            names.append(key)
+        params["propertyName"] = ",".join(dict.fromkeys(names))
+
+        values = set()
+        for _, _, page in self.iter_pages(params, is_canceled=is_canceled):
+            for feature in page.get("features", []):
+                properties = feature.get("properties") or {}
+                if matches is None or matches(properties):
+                    values.add(properties.get(name))
+        return values
+
+    def iter_tiled_pages(self, tiles, query, page_size=DEFAULT_PAGE_SIZE,
+                         max_workers=DEFAULT_MAX_WORKERS, is_canceled=None):
+        """Consulta em paralelo cada bloco com filtro BBOX, sem repetir feições
+
+        As feições que cruzam mais de um bloco são entregues uma única vez.
+        :param query: AlertQuery aplicada a cada bloco
+        :returns: gerador de tuplas (índice da página, total de páginas, GeoJSON)
+        """
+        tile_params = [self._sorted(self.filter_params(query.with_bbox(tile))[0]) for tile in tiles]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            counts = list(executor.map(self.hits, tile_params))
+
+            calls = [
+                (self.get_page, (start, page_size, params))
+                for params, count in zip(tile_params, counts)
+                for start in range(0, count, page_size)
+            ]
+            if not calls:
+                return
+
+            def pages():
+                for done, (_, result) in enumerate(run_windowed(executor, calls, max_workers * 2, is_canceled)):
+                    yield done, len(calls), result
+
+            yield from deduplicate(pages())
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Agregação das medidas de telemetria de rede: nomes de endpoint, tiles e
+percentis de latência.
+Este módulo não depende do Qt/QGIS.
+"""
+import math
+from urllib.parse import urlparse, parse_qsl
+
+# Extensões que identificam requisições de tiles
+TILE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".pbf", ".mvt")
+
+
+def _generic_segment(segment):
+    """Indica se um trecho do caminho é um identificador (ids, datas, z/x/y)"""
+    stem = segment.rsplit(".", 1)[0]
+    return stem.isdigit() or sum(c.isdigit() for c in segment) >= 3 or len(segment) > 24
+
+
+def endpoint_name(url):
+    """Nome do endpoint de uma URL: host e caminho com os identificadores generalizados
+
+    Nas requisições WFS, acrescenta a operação (request) e o resultType=hits.
+    """
+    parsed = urlparse(url)
+    segments = ["{id}" if _generic_segment(seg) else seg for seg in parsed.path.split("/") if seg]
+    name = f"{parsed.hostname}/{'/'.join(segments)}"
+    query = {key.lower(): value for key, value in parse_qsl(parsed.query)}
+    if "request" in query:
+        name += f" {query['request']}"
+        if query.get("resulttype", "").lower() == "hits":
+            name += " (hits)"
+    return name
+
+
+def is_tile(url):
+    """Indica se a URL é de um tile (imagem ou tile vetorial)"""
+    parsed = urlparse(url)
+    return parsed.path.lower().endswith(TILE_EXTENSIONS) or "/gmap/" in parsed.path
+
+
+def percentile(values, fraction):
+    """Percentil (posto mais próximo) de uma lista de valores"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(fraction * len(ordered)))) - 1]
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Nomes de mosaicos e URIs de tiles da Planet (Basemaps e cenas PSScene).
+
+As URIs XYZ seguem o formato do provedor "wms" do QGIS; os XML GDAL_WMS são
+devolvidos como texto, para serem gravados por quem os usa.
+"""
+from datetime import date
+
+TILES_URL = "https://tiles.planet.com"
+
+# Limites de zoom das camadas XYZ
+MIN_ZOOM = 0
+MAX_ZOOM = 18
+
+# Tempo limite (s) padrão das requisições feitas pelo GDAL_WMS
+DEFAULT_XML_TIMEOUT = 120
+
+
+def month_range(start_date, end_date):
+    """Pares (ano, mês) de start_date a end_date, inclusive"""
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def shift_month(year, month, delta):
+    """Soma delta meses a (ano, mês)"""
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def monthly_mosaic_id(year, month):
+    """ID do mosaico mensal global da Planet"""
+    return f"global_monthly_{year}_{month:02d}_mosaic"
+
+
+def index_mosaic_ids(year, month):
+    """IDs candidatos do mosaico analítico normalizado (usado nos índices espectrais)
+
+    O formato com hífen é tentado primeiro; o com underscores é o alternativo.
+    """
+    return [
+        f"planet_medres_normalized_analytic_{year}-{month:02d}_mosaic",
+        f"planet_medres_normalized_analytic_{year}_{month:02d}_mosaic",
+    ]
+
+
+def before_after_mosaics(date_text, today=None):
+    """IDs dos mosaicos antes e depois de uma data 'yyyy-MM-dd'
+
+    O mosaico "depois" é o do mês seguinte; se ele ainda não foi publicado,
+    usa-se o do próprio mês do alerta.
+    """
+    today = today or date.today()
+    year, month = int(date_text[:4]), int(date_text[5:7])
+    before = shift_month(year, month, -1)
+    after = shift_month(year, month, 1)
+    last_published = shift_month(today.year, today.month, -1)
+    if after > last_published:
+        after = (year, month)
+    return monthly_mosaic_id(*before), monthly_mosaic_id(*after)
+
+
+def mosaic_xyz_uri(mosaic_id, api_key):
+    """URI XYZ de um mosaico do Basemaps"""
+    return (
+        f"type=xyz&url={TILES_URL}/basemaps/v1/"
+        f"planet-tiles/{mosaic_id}/gmap/{{z}}/{{x}}/{{y}}.png"
+        f"?api_key={api_key}"
+        f"&zmin={MIN_ZOOM}&zmax={MAX_ZOOM}"
+    )
+
+
+def index_xyz_uri(mosaic_id, proc, api_key):
+    """URI XYZ de um mosaico do Basemaps processado com um índice espectral"""
+    return (
+        f"type=xyz&"
+        f"url={TILES_URL}/basemaps/v1/planet-tiles/{mosaic_id}/gmap/{{z}}/{{x}}/{{y}}.png?proc={proc}&"
+        f"username={api_key}&"
+        f"password=&"
+        f"zmin={MIN_ZOOM}&"
+        f"zmax={MAX_ZOOM}"
+    )
+
+
+def item_xyz_uri(item_id, api_key, item_type="PSScene"):
+    """URI XYZ de uma cena"""
+    return f"type=xyz&url={TILES_URL}/data/v1/{item_type}/{item_id}/{{z}}/{{x}}/{{y}}.png?api_key={api_key}"
+
+
+def _tms_wms_xml(server_url, timeout):
+    return f"""<GDAL_WMS>
+            <Service name="TMS">
+                <ServerUrl>{server_url}</ServerUrl>
+            </Service>
+            <DataWindow>
+                <UpperLeftX>-20037508.34</UpperLeftX>
+                <UpperLeftY>20037508.34</UpperLeftY>
+                <LowerRightX>20037508.34</LowerRightX>
+                <LowerRightY>-20037508.34</LowerRightY>
+                <TileLevel>{MAX_ZOOM}</TileLevel>
+                <TileCountX>1</TileCountX>
+                <TileCountY>1</TileCountY>
+                <YOrigin>top</YOrigin>
+            </DataWindow>
+            <Projection>EPSG:3857</Projection>
+            <BlockSizeX>256</BlockSizeX>
+            <BlockSizeY>256</BlockSizeY>
+            <BandsCount>3</BandsCount>
+            <DataType>Byte</DataType>
+            <ZeroBlockHttpCodes>400,404,403,500,503</ZeroBlockHttpCodes>
+            <ZeroBlockOnServerException>true</ZeroBlockOnServerException>
+            <Timeout>{timeout}</Timeout>
+            <MaxConnections>10</MaxConnections>
+            <Cache/>
+        </GDAL_WMS>"""
+
+
+def item_wms_xml(item_id, api_key, timeout=DEFAULT_XML_TIMEOUT, item_type="PSScene"):
+    """XML GDAL_WMS de uma cena"""
+    return _tms_wms_xml(
+        f"{TILES_URL}/data/v1/{item_type}/{item_id}/${{z}}/${{x}}/${{inverted_y}}.png?api_key={api_key}",
+        timeout
+    )
+
+
+def mosaic_wms_xml(mosaic_id, api_key, timeout=5):
+    """XML GDAL_WMS de um mosaico do Basemaps"""
+    return _tms_wms_xml(
+        f"{TILES_URL}/basemaps/v1/planet-tiles/{mosaic_id}/gmap/${{z}}/${{x}}/${{inverted_y}}.png?api_key={api_key}",
+        timeout
+    )
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Cálculo de cobertura da área de interesse (AOI) pelas cenas diárias.
+
+A AOI é amostrada em uma grade regular de pontos; cada cena passa a ser
+representada pelo conjunto (bitset) de pontos que ela cobre. A seleção de
+cenas é feita pelo set cover guloso de core.coverage.
+"""
+from collections import defaultdict
+
+from qgis.core import (QgsGeometry, QgsPointXY, QgsRectangle,
+                       QgsSpatialIndex, QgsFeatureRequest)
+
+from .core.coverage import greedy_cover, popcount, DEFAULT_TARGET
+from .core.profiling import timed, PHASE_GEOMETRY
+
+# Resolução padrão da grade de amostragem (pontos por eixo)
+DEFAULT_GRID_SIZE = 64
+
+
+def sample_aoi(aoi_geom, grid_size=DEFAULT_GRID_SIZE):
+    """Gera os pontos de amostragem (centros de célula) contidos na AOI"""
+    bbox = aoi_geom.boundingBox()
+    dx = bbox.width() / grid_size
+    dy = bbox.height() / grid_size
+    if dx <= 0 or dy <= 0:
+        return []
+
+    engine = QgsGeometry.createGeometryEngine(aoi_geom.constGet())
+    engine.prepareGeometry()
+
+    points = []
+    for row in range(grid_size):
+        y = bbox.yMinimum() + (row + 0.5) * dy
+        for col in range(grid_size):
+            x = bbox.xMinimum() + (col + 0.5) * dx
+            point = QgsGeometry.fromPointXY(QgsPointXY(x, y))
+            if engine.contains(point.constGet()):
+                points.append(QgsPointXY(x, y))
+    return points
+
+
+def footprint_masks(source, fields, points, cloud_field="nuvens", key_field="item_id",
+                    feedback=None):
+    """Calcula o bitset de pontos da AOI cobertos por cada feição da camada
+
+    Usa um índice espacial sobre os footprints para testar apenas as cenas
+    cujo retângulo envolvente contém o ponto. source pode ser a camada ou uma
+    QgsVectorLayerFeatureSource (leitura fora da thread principal).
+    """
+    if not points:
+        return []
+
+    extent = QgsRectangle()
+    extent.setMinimal()
+    for point in points:
+        extent.combineExtentWith(point.x(), point.y())
+
+    request = QgsFeatureRequest().setFilterRect(extent)
+    features = {f.id(): f for f in source.getFeatures(request)}
+    if not features:
+        return []
+
+    index = QgsSpatialIndex()
+    engines = {}
+    for fid, feature in features.items():
+        index.addFeature(feature)
+        engine = QgsGeometry.createGeometryEngine(feature.geometry().constGet())
+        engine.prepareGeometry()
+        engines[fid] = engine
+
+    masks = defaultdict(int)
+    for bit, point in enumerate(points):
+        if feedback is not None and feedback.isCanceled():
+            return []
+        point_geom = QgsGeometry.fromPointXY(point)
+        for fid in index.intersects(QgsRectangle(point, point)):
+            if engines[fid].contains(point_geom.constGet()):
+                masks[fid] |= 1 << bit
+
+    field_names = fields.names()
+    candidates = []
+    for fid, mask in masks.items():
+        feature = features[fid]
+        cloud = feature[cloud_field] if cloud_field in field_names else 0
+        key = feature[key_field] if key_field in field_names else fid
+        candidates.append((fid, mask, cloud or 0, key))
+    return candidates
+
+
+@timed(PHASE_GEOMETRY)
+def solve_layer_coverage(source, fields, aoi_geom, grid_size=DEFAULT_GRID_SIZE,
+                         target=DEFAULT_TARGET, feedback=None):
+    """Calcula a cobertura da AOI por uma camada de footprints (uma data)
+
+    :returns: dicionário com o percentual de cobertura total disponível,
+              o percentual coberto pela seleção e os ids das feições escolhidas
+    """
+    points = sample_aoi(aoi_geom, grid_size)
+    total = len(points)
+    candidates = footprint_masks(source, fields, points, feedback=feedback)
+
+    available = 0
+    for _, mask, _, _ in candidates:
+        available |= mask
+
+    selected, covered = greedy_cover(
+        [(fid, mask, cloud) for fid, mask, cloud, _ in candidates],
+        total, target
+    )
+
+    keys = {fid: key for fid, _, _, key in candidates}
+    return {
+        "available_pct": 100.0 * popcount(available) / total if total else 0.0,
+        "covered_pct": 100.0 * popcount(covered) / total if total else 0.0,
+        "feature_ids": selected,
+        "item_ids": [keys[fid] for fid in selected],
+        "candidates": len(candidates),
+    }
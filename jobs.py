@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+Execução das ações demoradas do plugin como jobs sobre o QgsTaskManager.
+
+Cada job pertence a um serviço (tiles da Planet, API da Planet, SCCON, base
+local) e o JobManager limita quantos jobs de cada serviço rodam ao mesmo
+tempo; os excedentes ficam na fila. Os jobs podem ser cancelados, reportam o
+progresso de suas etapas e ficam registrados no histórico exibido no painel
+"Tarefas Brasil MAIS".
+"""
+import time
+import traceback
+from collections import deque
+from contextlib import nullcontext
+
+from qgis.PyQt.QtCore import QObject, pyqtSignal
+from qgis.PyQt.QtWidgets import (QDialog, QDockWidget, QWidget, QVBoxLayout, QHBoxLayout,
+                                 QTableWidget, QTableWidgetItem, QPushButton,
+                                 QHeaderView, QAbstractItemView)
+from qgis.core import QgsApplication, QgsTask
+
+from .core.profiling import current_session
+
+# Serviços e número máximo de jobs simultâneos em cada um
+SERVICE_PLANET_TILES = "planet_tiles"
+SERVICE_PLANET_API = "planet_api"
+SERVICE_SCCON = "sccon"
+SERVICE_LOCAL = "local"
+
+SERVICE_LIMITS = {
+    SERVICE_PLANET_TILES: 2,
+    SERVICE_PLANET_API: 2,
+    SERVICE_SCCON: 2,
+    SERVICE_LOCAL: 1,
+}
+
+SERVICE_LABELS = {
+    SERVICE_PLANET_TILES: "Planet (tiles)",
+    SERVICE_PLANET_API: "Planet (API)",
+    SERVICE_SCCON: "SCCON",
+    SERVICE_LOCAL: "Base local",
+}
+
+# Estados de um job
+STATUS_QUEUED = "Na fila"
+STATUS_RUNNING = "Executando"
+STATUS_DONE = "Concluído"
+STATUS_FAILED = "Erro"
+STATUS_CANCELED = "Cancelado"
+
+# Jobs concluídos mantidos no histórico
+HISTORY_SIZE = 100
+
+
+class JobCanceled(Exception):
+    """Job cancelado antes de concluir"""
+
+
+class JobContext:
+    """Progresso e cancelamento de um job (ou de uma etapa dele)
+
+    Expõe isCanceled() e setProgress() como um QgsFeedback, de modo que pode
+    ser passado às funções que recebem a tarefa como feedback.
+    """
+
+    def __init__(self, task, start=0.0, span=100.0):
+        self.task = task
+        self.start = start
+        self.span = span
+
+    def isCanceled(self):
+        return self.task.isCanceled()
+
+    def setProgress(self, value):
+        """Progresso (0-100) da etapa, convertido para o progresso total do job"""
+        value = min(max(float(value), 0.0), 100.0)
+        self.task.setProgress(self.start + self.span * value / 100.0)
+
+    def set_stage(self, text):
+        """Descrição da etapa em andamento, exibida no painel de tarefas"""
+        self.task.stage = text
+
+    def sub(self, start, end):
+        """Contexto de uma etapa que ocupa a faixa [start, end] do progresso desta"""
+        return JobContext(self.task,
+                          self.start + self.span * start / 100.0,
+                          self.span * (end - start) / 100.0)
+
+    def steps(self, items):
+        """Percorre os itens dando a cada um um contexto com sua fração do progresso"""
+        items = list(items)
+        for i, item in enumerate(items):
+            if self.isCanceled():
+                return
+            yield item, self.sub(100.0 * i / len(items), 100.0 * (i + 1) / len(items))
+        self.setProgress(100)
+
+    def publish(self, value):
+        """Entrega um resultado parcial (ex.: uma página) à thread principal"""
+        self.task.partialResult.emit(value)
+
+    def wait(self, seconds):
+        """Pausa a thread do job, interrompida se ele for cancelado"""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if self.isCanceled():
+                return
+            time.sleep(0.05)
+
+
+class Job(QgsTask):
+    """QgsTask que executa uma função fn(context) e entrega o resultado na thread principal"""
+
+    # Resultados parciais publicados pelo job (JobContext.publish)
+    partialResult = pyqtSignal(object)
+
+    def __init__(self, description, fn, on_finished=None, flags=QgsTask.CanCancel, on_partial=None):
+        """
+        :param on_finished: função chamada com (exception, result), como em QgsTask.fromFunction
+        :param on_partial: função chamada na thread principal com cada resultado parcial
+        """
+        super().__init__(description, flags)
+        self.fn = fn
+        self.on_finished = on_finished
+        if on_partial is not None:
+            self.partialResult.connect(on_partial)
+        self.result = None
+        self.exception = None
+        self.stage = ""
+        # Sessão de perfilamento da ação que criou o job: a thread do job também é perfilada
+        self.profile_session = current_session()
+
+    def run(self):
+        session = self.profile_session
+        try:
+            with session.profile_thread() if session is not None else nullcontext():
+                self.result = self.fn(JobContext(self))
+            return True
+        except Exception as e:
+            self.exception = e
+            print(f"Erro na tarefa '{self.description()}': {str(e)}")
+            print(traceback.format_exc())
+            return False
+
+    def finished(self, result):
+        if not result and self.exception is None:
+            self.exception = JobCanceled(f"Tarefa cancelada: {self.description()}")
+        if self.on_finished:
+            self.on_finished(self.exception, self.result)
+
+
+class JobEntry:
+    """Registro de um job no histórico"""
+
+    def __init__(self, task, service):
+        self.task = task
+        self.service = service
+        self.description = task.description()
+        self.status = STATUS_QUEUED
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = ""
+        # Sessão de perfilamento que espera a tarefa terminar
+        self.profile_session = current_session()
+
+    @property
+    def active(self):
+        return self.status in (STATUS_QUEUED, STATUS_RUNNING)
+
+    def duration(self):
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobManager(QObject):
+    """Fila de jobs por serviço sobre o QgsTaskManager, com histórico"""
+
+    jobsChanged = pyqtSignal()
+
+    def __init__(self, limits=None, parent=None):
+        super().__init__(parent)
+        self.limits = dict(SERVICE_LIMITS, **(limits or {}))
+        self._queues = {}
+        self._running = {}
+        self._entries = deque(maxlen=HISTORY_SIZE)
+
+    def submit(self, description, fn, service, on_finished=None, on_partial=None):
+        """Cria e enfileira um Job que executa fn(context)
+
+        :param on_partial: recebe, na thread principal, o que o job publicar com context.publish
+        :returns: o Job criado (uma QgsTask)
+        """
+        return self.submit_task(Job(description, fn, on_finished, on_partial=on_partial), service)
+
+    def submit_task(self, task, service):
+        """Enfileira uma QgsTask já criada no limite de concorrência do serviço"""
+        entry = JobEntry(task, service)
+        task.job_entry = entry
+        if entry.profile_session is not None:
+            entry.profile_session.hold(job=True)
+        task.progressChanged.connect(lambda _: self.jobsChanged.emit())
+        task.taskCompleted.connect(lambda: self._task_done(entry, STATUS_DONE))
+        task.taskTerminated.connect(lambda: self._task_done(entry, STATUS_FAILED))
+
+        self._entries.appendleft(entry)
+        self._queues.setdefault(service, deque()).append(entry)
+        self._start_queued(service)
+        self.jobsChanged.emit()
+        return task
+
+    def cancel(self, task):
+        """Cancela um job em execução ou o retira da fila"""
+        entry = getattr(task, "job_entry", None)
+        if entry is None or not entry.active:
+            return
+        queue = self._queues.get(entry.service, deque())
+        if entry in queue:
+            queue.remove(entry)
+            entry.status = STATUS_CANCELED
+            entry.finished_at = time.time()
+            task.cancel()
+            # O job nunca chegou ao QgsTaskManager: finalizar aqui
+            task.finished(False)
+            task.job_entry = None
+            entry.task = None
+            self.jobsChanged.emit()
+            self._release_profile(entry)
+        else:
+            task.cancel()
+
+    def cancel_all(self):
+        """Cancela todos os jobs ativos (ao descarregar o plugin)"""
+        for entry in list(self._entries):
+            if entry.active:
+                self.cancel(entry.task)
+
+    def running(self, service=None):
+        """Número de jobs em execução (de um serviço ou no total)"""
+        if service is not None:
+            return self._running.get(service, 0)
+        return sum(self._running.values())
+
+    def entries(self):
+        """Jobs do histórico, do mais recente para o mais antigo"""
+        return list(self._entries)
+
+    def clear_history(self):
+        """Remove do histórico os jobs já encerrados"""
+        active = [entry for entry in self._entries if entry.active]
+        self._entries.clear()
+        self._entries.extend(active)
+        self.jobsChanged.emit()
+
+    def _start_queued(self, service):
+        queue = self._queues.get(service)
+        limit = self.limits.get(service, 1)
+        while queue and self._running.get(service, 0) < limit:
+            entry = queue.popleft()
+            entry.status = STATUS_RUNNING
+            entry.started_at = time.time()
+            self._running[service] = self._running.get(service, 0) + 1
+            QgsApplication.taskManager().addTask(entry.task)
+
+    def _task_done(self, entry, status):
+        if not entry.active:
+            return
+        exception = getattr(entry.task, "exception", None)
+        if entry.task.isCanceled() or isinstance(exception, JobCanceled):
+            status = STATUS_CANCELED
+        elif exception is not None:
+            entry.error = str(exception)
+        entry.status = status
+        entry.finished_at = time.time()
+        # A tarefa é destruída pelo QgsTaskManager: o histórico guarda apenas o registro
+        entry.task.job_entry = None
+        entry.task = None
+        self._running[entry.service] = max(0, self._running.get(entry.service, 0) - 1)
+        self._start_queued(entry.service)
+        self.jobsChanged.emit()
+        self._release_profile(entry)
+
+    def _release_profile(self, entry):
+        session, entry.profile_session = entry.profile_session, None
+        if session is not None:
+            session.release()
+
+
+class JobHistoryWidget(QWidget):
+    """Tabela com os jobs em execução, na fila e concluídos"""
+
+    COLUMNS = ["Tarefa", "Serviço", "Estado", "Progresso", "Duração"]
+
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.cancelButton = QPushButton("Cancelar")
+        self.cancelButton.clicked.connect(self.cancel_selected)
+        self.clearButton = QPushButton("Limpar histórico")
+        self.clearButton.clicked.connect(self.manager.clear_history)
+        buttons.addStretch()
+        buttons.addWidget(self.cancelButton)
+        buttons.addWidget(self.clearButton)
+        layout.addLayout(buttons)
+
+        self.manager.jobsChanged.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        """Atualiza a tabela a partir do histórico do gerenciador"""
+        entries = self.manager.entries()
+        self.table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            description = entry.description
+            stage = getattr(entry.task, "stage", "") if entry.active else ""
+            if stage:
+                description = f"{description} — {stage}"
+            if entry.status == STATUS_RUNNING:
+                progress = f"{entry.task.progress():.0f}%"
+            elif entry.status == STATUS_DONE:
+                progress = "100%"
+            else:
+                progress = ""
+            duration = entry.duration()
+            values = [
+                description,
+                SERVICE_LABELS.get(entry.service, entry.service),
+                entry.status,
+                progress,
+                f"{duration:.1f} s" if duration is not None else "",
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 2 and entry.error:
+                    item.setToolTip(entry.error)
+                self.table.setItem(row, column, item)
+
+    def cancel_selected(self):
+        """Cancela os jobs ativos selecionados na tabela"""
+        entries = self.manager.entries()
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for row in sorted(rows):
+            if row < len(entries) and entries[row].active:
+                self.manager.cancel(entries[row].task)
+
+
+class JobHistoryDock(QDockWidget):
+    """Painel "Tarefas Brasil MAIS" da janela principal"""
+
+    def __init__(self, manager, parent=None):
+        super().__init__("Tarefas Brasil MAIS", parent)
+        self.setObjectName("BrasilMaisJobs")
+        self.setWidget(JobHistoryWidget(manager))
+
+
+class JobHistoryDialog(QDialog):
+    """Janela não modal com o histórico de jobs, aberta a partir do diálogo do plugin"""
+
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Tarefas Brasil MAIS")
+        self.resize(640, 320)
+        layout = QVBoxLayout(self)
+        layout.addWidget(JobHistoryWidget(manager))
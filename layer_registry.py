@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Registro das camadas criadas pelo plugin.
+
+Cada camada é identificada pelo seu id e guarda o papel (footprints, cena,
+mosaico, alertas), os parâmetros usados para criá-la e metadados por feição.
+O registro é gravado nas propriedades do projeto e restaurado ao abri-lo;
+as gravações são agrupadas (ex.: uma por pesquisa, não uma por página).
+"""
+import json
+from collections import defaultdict
+
+from qgis.PyQt.QtCore import QTimer
+from qgis.core import QgsProject
+
+# Papéis das camadas
+ROLE_FOOTPRINTS = "footprints"
+ROLE_SCENE = "scene"
+ROLE_MOSAIC = "mosaic"
+ROLE_INDEX_MOSAIC = "index_mosaic"
+ROLE_ALERTS = "alerts"
+
+# Chaves usadas nas propriedades do projeto
+PROJECT_SCOPE = "brmais_plugin"
+PROJECT_KEY = "layer_registry"
+
+# Intervalo (ms) em que as alterações são agrupadas antes de gravar no projeto
+SAVE_DELAY = 1000
+
+
+class LayerRegistry:
+    """Registro de camadas do plugin indexado pelo id da camada"""
+
+    def __init__(self, project=None):
+        self.project = project or QgsProject.instance()
+        self._entries = {}
+        self._by_role = defaultdict(set)
+
+        self._save_timer = QTimer()
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(SAVE_DELAY)
+        self._save_timer.timeout.connect(self.save)
+
+        self.project.layersRemoved.connect(self._on_layers_removed)
+        self.project.readProject.connect(self.load)
+        self.project.cleared.connect(self.clear)
+        # Alterações ainda agrupadas precisam entrar no arquivo do projeto salvo
+        self.project.writeProject.connect(self.flush)
+
+        self.load()
+
+    def disconnect(self):
+        """Desconecta os sinais do projeto (chamado ao descarregar o plugin)"""
+        self.flush()
+        try:
+            self.project.layersRemoved.disconnect(self._on_layers_removed)
+            self.project.readProject.disconnect(self.load)
+            self.project.cleared.disconnect(self.clear)
+            self.project.writeProject.disconnect(self.flush)
+        except (TypeError, RuntimeError):
+            pass
+
+    def register(self, layer, role, params=None, features=None):
+        """Registra uma camada com seu papel, parâmetros e metadados por feição"""
+        layer_id = layer.id()
+        self._discard(layer_id)
+        self._entries[layer_id] = {
+            "role": role,
+            "params": dict(params or {}),
+            "features": dict(features or {}),
+        }
+        self._by_role[role].add(layer_id)
+        self._schedule_save()
+
+    def add_features(self, layer_id, features):
+        """Acrescenta metadados por feição a uma camada já registrada"""
+        entry = self._entries.get(layer_id)
+        if entry:
+            entry["features"].update(features)
+            self._schedule_save()
+
+    def unregister(self, layer_id):
+        """Remove uma camada do registro"""
+        if self._discard(layer_id):
+            self._schedule_save()
+
+    def entry(self, layer_id):
+        """Retorna a entrada de uma camada ou None"""
+        return self._entries.get(layer_id)
+
+    def role(self, layer_id):
+        """Retorna o papel de uma camada ou None se ela não for do plugin"""
+        entry = self._entries.get(layer_id)
+        return entry["role"] if entry else None
+
+    def params(self, layer_id):
+        """Retorna os parâmetros de criação de uma camada"""
+        entry = self._entries.get(layer_id)
+        return entry["params"] if entry else {}
+
+    def feature_metadata(self, layer_id, key):
+        """Retorna os metadados de uma feição (ex.: pelo item_id da cena)"""
+        entry = self._entries.get(layer_id)
+        if not entry:
+            return {}
+        return entry["features"].get(str(key), {})
+
+    def layer_ids(self, role):
+        """Retorna os ids das camadas registradas com o papel informado"""
+        return list(self._by_role.get(role, ()))
+
+    def layers(self, role):
+        """Retorna as camadas do projeto registradas com o papel informado"""
+        layers = []
+        for layer_id in self.layer_ids(role):
+            layer = self.project.mapLayer(layer_id)
+            if layer is not None:
+                layers.append(layer)
+        return layers
+
+    def clear(self):
+        """Esvazia o registro (sem gravar no projeto)"""
+        # Alterações pendentes pertencem ao projeto anterior
+        self._save_timer.stop()
+        self._entries = {}
+        self._by_role = defaultdict(set)
+
+    def load(self, *args):
+        """Restaura o registro a partir das propriedades do projeto"""
+        self.clear()
+        text, ok = self.project.readEntry(PROJECT_SCOPE, PROJECT_KEY, "")
+        if not ok or not text:
+            return
+
+        try:
+            entries = json.loads(text)
+        except ValueError:
+            print("Registro de camadas do plugin inválido no projeto; ignorando")
+            return
+
+        for layer_id, entry in entries.items():
+            # Ignorar camadas que não existem mais no projeto
+            if self.project.mapLayer(layer_id) is None:
+                continue
+            self._entries[layer_id] = entry
+            self._by_role[entry.get("role")].add(layer_id)
+
+    def save(self):
+        """Grava o registro nas propriedades do projeto"""
+        self._save_timer.stop()
+        self.project.writeEntry(PROJECT_SCOPE, PROJECT_KEY, json.dumps(self._entries))
+
+    def flush(self, *args):
+        """Grava imediatamente as alterações ainda agrupadas (também ao salvar o projeto)"""
+        if self._save_timer.isActive():
+            self.save()
+
+    def _schedule_save(self):
+        if not self._save_timer.isActive():
+            self._save_timer.start()
+
+    def _discard(self, layer_id):
+        entry = self._entries.pop(layer_id, None)
+        if entry is None:
+            return False
+        self._by_role[entry["role"]].discard(layer_id)
+        return True
+
+    def _on_layers_removed(self, layer_ids):
+        changed = False
+        for layer_id in layer_ids:
+            changed = self._discard(layer_id) or changed
+        if changed:
+            self._schedule_save()
@@ -0,0 +1,459 @@
+# -*- coding: utf-8 -*-
+"""
+Provedor Processing "Brasil MAIS".
+
+Expõe as ações do plugin como algoritmos para o modo em lote, o modelador e o
+qgis_process: mosaicos mensais da AOI, pesquisa de cenas diárias,
+sincronização dos alertas SCCON e cálculo de índices espectrais. Todos usam
+o núcleo (core) compartilhado com o diálogo. As credenciais, quando não
+informadas, são lidas das configurações salvas pelo plugin.
+"""
+import os
+from datetime import datetime
+
+from qgis.PyQt.QtCore import QSettings, QVariant
+from qgis.PyQt.QtGui import QIcon
+from qgis.core import (QgsProcessingProvider, QgsProcessingAlgorithm, QgsProcessingException,
+                       QgsProcessingParameterExtent, QgsProcessingParameterString,
+                       QgsProcessingParameterNumber, QgsProcessingParameterEnum,
+                       QgsProcessingParameterFeatureSink, QgsProcessingParameterFolderDestination,
+                       QgsProcessingParameterFeatureSource, QgsProcessingParameterField,
+                       QgsProcessingParameterBoolean, QgsProcessingOutputFile, QgsCoordinateTransform,
+                       QgsProcessingParameterFileDestination, QgsProcessingParameterRasterDestination,
+                       QgsProcessingOutputNumber, QgsProcessing, QgsCoordinateReferenceSystem,
+                       QgsFeature, QgsFeatureSink, QgsField, QgsFields, QgsGeometry, QgsPointXY,
+                       QgsWkbTypes)
+
+from .alert_store import AlertStore, default_store_path
+from .aoi import search_geometry
+from .core.indices import INDEX_FORMULAS, compute_index
+from .core.planet import (PlanetClient, bbox_geometry, search_filter, search_payload,
+                          acquired_date, acquired_time, footprint_ring, download_mosaic_quads)
+from .core.batch import run_batch, write_summary, DEFAULT_WORKERS
+from .core.sccon_wfs import WfsService, cached_capabilities
+from .core.tiles import month_range, monthly_mosaic_id, index_mosaic_ids
+
+PROVIDER_ID = "brasilmais"
+
+WGS84 = QgsCoordinateReferenceSystem("EPSG:4326")
+
+# Valor sem dado dos rasters de índice
+INDEX_NODATA = -9999.0
+
+
+def parse_date(text, name):
+    """Data 'yyyy-MM-dd' (ou 'yyyy-MM', primeiro dia do mês) de um parâmetro"""
+    for date_format in ("%Y-%m-%d", "%Y-%m"):
+        try:
+            return datetime.strptime(text.strip(), date_format).date()
+        except ValueError:
+            continue
+    raise QgsProcessingException(f"Data inválida em {name}: '{text}' (use aaaa-mm-dd)")
+
+
+class BrasilMaisProvider(QgsProcessingProvider):
+    """Provedor Processing do plugin"""
+
+    def id(self):
+        return PROVIDER_ID
+
+    def name(self):
+        return "Brasil MAIS"
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), "icon.png"))
+
+    def loadAlgorithms(self):
+        for algorithm in (MonthlyMosaicsAlgorithm(), DailySearchAlgorithm(),
+                          AlertSyncAlgorithm(), SpectralIndexAlgorithm(), BatchAoiAlgorithm()):
+            self.addAlgorithm(algorithm)
+
+
+class BrasilMaisAlgorithm(QgsProcessingAlgorithm):
+    """Base dos algoritmos: nome, grupo e parâmetros de credenciais"""
+
+    API_KEY = "API_KEY"
+    EXTENT = "EXTENT"
+    URL = "URL"
+    USERNAME = "USERNAME"
+    PASSWORD = "PASSWORD"
+
+    def createInstance(self):
+        return type(self)()
+
+    def displayName(self):
+        return self.tr(self.__class__.DISPLAY_NAME)
+
+    def group(self):
+        return self.tr(self.__class__.GROUP)
+
+    def groupId(self):
+        return self.__class__.GROUP.lower()
+
+    def shortHelpString(self):
+        return self.tr(self.__class__.__doc__ or "")
+
+    def add_api_key_parameter(self):
+        self.addParameter(QgsProcessingParameterString(
+            self.API_KEY, self.tr("API Key da Planet (vazio: a salva no plugin)"), optional=True
+        ))
+
+    def add_extent_parameter(self):
+        self.addParameter(QgsProcessingParameterExtent(self.EXTENT, self.tr("Área de interesse")))
+
+    def add_sccon_parameters(self):
+        self.addParameter(QgsProcessingParameterString(
+            self.URL, self.tr("URL do WFS SCCON (vazio: a salva no plugin)"), optional=True
+        ))
+        self.addParameter(QgsProcessingParameterString(self.USERNAME, self.tr("Usuário"), optional=True))
+        self.addParameter(QgsProcessingParameterString(self.PASSWORD, self.tr("Senha"), optional=True))
+
+    def sccon_credentials(self, parameters, context):
+        """(url, usuário, senha) informados ou salvos na conexão do plugin"""
+        settings = QSettings()
+        return tuple(
+            self.parameterAsString(parameters, name, context) or settings.value(f"sccon_plugin/{key}", "")
+            for name, key in ((self.URL, "url"), (self.USERNAME, "username"), (self.PASSWORD, "password"))
+        )
+
+    def sccon_service(self, url, username, password):
+        """Cliente WFS SCCON; CQL apenas se configurado no plugin (sccon_plugin/use_cql)"""
+        return WfsService(url, username, password,
+                          use_cql=QSettings().value("sccon_plugin/use_cql", False, type=bool))
+
+    def planet_client(self, parameters, context):
+        api_key = (self.parameterAsString(parameters, self.API_KEY, context)
+                   or QSettings().value("planet_plugin/api_key", ""))
+        if not api_key:
+            raise QgsProcessingException("Informe a API Key da Planet ou salve-a no plugin.")
+        return PlanetClient(api_key)
+
+    def extent_bbox(self, parameters, context):
+        """Extensão informada, em EPSG:4326, como (xmin, ymin, xmax, ymax)"""
+        rect = self.parameterAsExtent(parameters, self.EXTENT, context, WGS84)
+        if rect.isEmpty():
+            raise QgsProcessingException("A área de interesse está vazia.")
+        return (rect.xMinimum(), rect.yMinimum(), rect.xMaximum(), rect.yMaximum())
+
+
+class MonthlyMosaicsAlgorithm(BrasilMaisAlgorithm):
+    """Baixa os quads dos mosaicos mensais globais que cobrem a área e monta um VRT por mês."""
+
+    DISPLAY_NAME = "Mosaicos mensais da área"
+    GROUP = "Planet"
+
+    START = "START"
+    END = "END"
+    OUTPUT = "OUTPUT"
+    QUADS = "QUADS"
+
+    def name(self):
+        return "monthlymosaics"
+
+    def initAlgorithm(self, config=None):
+        self.add_extent_parameter()
+        self.addParameter(QgsProcessingParameterString(self.START, self.tr("Mês inicial (aaaa-mm)")))
+        self.addParameter(QgsProcessingParameterString(self.END, self.tr("Mês final (aaaa-mm)")))
+        self.add_api_key_parameter()
+        self.addParameter(QgsProcessingParameterFolderDestination(self.OUTPUT, self.tr("Pasta de saída")))
+        self.addOutput(QgsProcessingOutputNumber(self.QUADS, self.tr("Quads baixados")))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        from osgeo import gdal
+
+        client = self.planet_client(parameters, context)
+        bbox = self.extent_bbox(parameters, context)
+        start = parse_date(self.parameterAsString(parameters, self.START, context), self.START)
+        end = parse_date(self.parameterAsString(parameters, self.END, context), self.END)
+        folder = self.parameterAsString(parameters, self.OUTPUT, context)
+
+        months = list(month_range(start, end))
+        total_quads = 0
+        for i, (year, month) in enumerate(months):
+            if feedback.isCanceled():
+                break
+            mosaic_name = monthly_mosaic_id(year, month)
+            feedback.pushInfo(f"{mosaic_name}")
+
+            def progress(done, total, i=i):
+                feedback.setProgress(100.0 * (i + done / max(total, 1)) / len(months))
+
+            paths = download_mosaic_quads(client, mosaic_name, bbox, os.path.join(folder, mosaic_name),
+                                          is_canceled=feedback.isCanceled, on_progress=progress)
+            total_quads += len(paths)
+            if paths:
+                gdal.BuildVRT(os.path.join(folder, f"{mosaic_name}.vrt"), paths)
+
+        return {self.OUTPUT: folder, self.QUADS: total_quads}
+
+
+class DailySearchAlgorithm(BrasilMaisAlgorithm):
+    """Pesquisa as cenas diárias (PSScene) da área e grava seus footprints."""
+
+    DISPLAY_NAME = "Pesquisa de cenas diárias"
+    GROUP = "Planet"
+
+    START = "START"
+    END = "END"
+    CLOUD = "CLOUD"
+    OUTPUT = "OUTPUT"
+
+    def name(self):
+        return "dailysearch"
+
+    def initAlgorithm(self, config=None):
+        self.add_extent_parameter()
+        self.addParameter(QgsProcessingParameterString(self.START, self.tr("Data inicial (aaaa-mm-dd)")))
+        self.addParameter(QgsProcessingParameterString(self.END, self.tr("Data final (aaaa-mm-dd)")))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.CLOUD, self.tr("Cobertura máxima de nuvens (%)"),
+            QgsProcessingParameterNumber.Integer, 100, minValue=0, maxValue=100
+        ))
+        self.add_api_key_parameter()
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, self.tr("Footprints"), QgsProcessing.TypeVectorPolygon
+        ))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        client = self.planet_client(parameters, context)
+        bbox = self.extent_bbox(parameters, context)
+        start = parse_date(self.parameterAsString(parameters, self.START, context), self.START)
+        end = parse_date(self.parameterAsString(parameters, self.END, context), self.END)
+        cloud = self.parameterAsInt(parameters, self.CLOUD, context)
+
+        fields = QgsFields()
+        fields.append(QgsField("item_id", QVariant.String))
+        fields.append(QgsField("data", QVariant.String))
+        fields.append(QgsField("hora", QVariant.String))
+        fields.append(QgsField("nuvens", QVariant.Double))
+        sink, dest_id = self.parameterAsSink(parameters, self.OUTPUT, context, fields,
+                                             QgsWkbTypes.Polygon, WGS84)
+
+        payload = search_payload(search_filter(bbox_geometry(bbox), start, end, cloud))
+        count = 0
+        for page in client.iter_search_pages(payload, is_canceled=feedback.isCanceled):
+            for scene in page:
+                ring = footprint_ring(scene)
+                if ring is None:
+                    continue
+                properties = scene.get('properties', {})
+                feature = QgsFeature(fields)
+                feature.setGeometry(QgsGeometry.fromPolygonXY([[QgsPointXY(x, y) for x, y in ring]]))
+                feature.setAttributes([
+                    scene.get('id', ''),
+                    acquired_date(scene),
+                    acquired_time(properties.get('acquired', '')),
+                    (properties.get('cloud_cover') or 0) * 100.0,
+                ])
+                sink.addFeature(feature, QgsFeatureSink.FastInsert)
+                count += 1
+            feedback.pushInfo(f"{count} cenas encontradas")
+
+        return {self.OUTPUT: dest_id}
+
+
+class AlertSyncAlgorithm(BrasilMaisAlgorithm):
+    """Sincroniza a base local (GeoPackage) com os alertas novos ou alterados do WFS SCCON."""
+
+    DISPLAY_NAME = "Sincronizar alertas SCCON"
+    GROUP = "SCCON"
+
+    STORE = "STORE"
+    NEW = "NEW"
+    UPDATED = "UPDATED"
+
+    def name(self):
+        return "alertsync"
+
+    def initAlgorithm(self, config=None):
+        self.add_sccon_parameters()
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.STORE, self.tr("Base local"), "GeoPackage (*.gpkg)", defaultValue=default_store_path()
+        ))
+        self.addOutput(QgsProcessingOutputNumber(self.NEW, self.tr("Alertas novos")))
+        self.addOutput(QgsProcessingOutputNumber(self.UPDATED, self.tr("Alertas atualizados")))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        url, username, password = self.sccon_credentials(parameters, context)
+        if not url:
+            raise QgsProcessingException("Informe a URL do WFS ou salve a conexão no plugin.")
+
+        path = self.parameterAsFileOutput(parameters, self.STORE, context)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        store = AlertStore(path, simplified=True)
+        result = store.sync(self.sccon_service(url, username, password), feedback=feedback)
+        feedback.pushInfo(f"Alertas novos: {result['new']}, atualizados: {result['updated']}")
+        return {self.STORE: path, self.NEW: result["new"], self.UPDATED: result["updated"]}
+
+
+class SpectralIndexAlgorithm(BrasilMaisAlgorithm):
+    """Calcula um índice espectral da área a partir dos quads do mosaico analítico normalizado do mês."""
+
+    DISPLAY_NAME = "Índice espectral da área"
+    GROUP = "Planet"
+
+    MONTH = "MONTH"
+    INDEX = "INDEX"
+    OUTPUT = "OUTPUT"
+
+    INDEXES = list(INDEX_FORMULAS)
+
+    def name(self):
+        return "spectralindex"
+
+    def initAlgorithm(self, config=None):
+        self.add_extent_parameter()
+        self.addParameter(QgsProcessingParameterString(self.MONTH, self.tr("Mês (aaaa-mm)")))
+        self.addParameter(QgsProcessingParameterEnum(self.INDEX, self.tr("Índice"), options=self.INDEXES))
+        self.add_api_key_parameter()
+        self.addParameter(QgsProcessingParameterRasterDestination(self.OUTPUT, self.tr("Índice calculado")))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        import tempfile
+        import numpy as np
+        from osgeo import gdal
+
+        client = self.planet_client(parameters, context)
+        bbox = self.extent_bbox(parameters, context)
+        month = parse_date(self.parameterAsString(parameters, self.MONTH, context), self.MONTH)
+        index_name = self.INDEXES[self.parameterAsEnum(parameters, self.INDEX, context)]
+        output = self.parameterAsOutputLayer(parameters, self.OUTPUT, context)
+
+        folder = os.path.join(tempfile.gettempdir(), "brmais_quads")
+        paths = []
+        for mosaic_name in index_mosaic_ids(month.year, month.month):
+            if client.mosaic_by_name(mosaic_name) is None:
+                continue
+            feedback.pushInfo(f"Mosaico: {mosaic_name}")
+            paths = download_mosaic_quads(
+                client, mosaic_name, bbox, os.path.join(folder, mosaic_name),
+                is_canceled=feedback.isCanceled,
+                on_progress=lambda done, total: feedback.setProgress(80.0 * done / max(total, 1))
+            )
+            break
+        if not paths:
+            raise QgsProcessingException(f"Nenhum mosaico analítico disponível para {month:%Y-%m}.")
+        if feedback.isCanceled():
+            return {}
+
+        # Recorte da área em EPSG:4326 a partir do mosaico virtual dos quads
+        vrt = gdal.Warp("", gdal.BuildVRT("", paths), format="VRT", dstSRS="EPSG:4326",
+                        outputBounds=bbox)
+        blue, green, red, nir = (vrt.GetRasterBand(b).ReadAsArray().astype("float64") for b in range(1, 5))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = compute_index(index_name, blue, green, red, nir)
+        values[~np.isfinite(values) | ((blue + green + red + nir) == 0)] = INDEX_NODATA
+        feedback.setProgress(90)
+
+        driver = gdal.GetDriverByName("GTiff")
+        target = driver.Create(output, vrt.RasterXSize, vrt.RasterYSize, 1, gdal.GDT_Float32,
+                               ["COMPRESS=DEFLATE", "TILED=YES"])
+        target.SetGeoTransform(vrt.GetGeoTransform())
+        target.SetProjection(vrt.GetProjection())
+        band = target.GetRasterBand(1)
+        band.SetNoDataValue(INDEX_NODATA)
+        band.WriteArray(values.astype("float32"))
+        target.FlushCache()
+        target = None
+
+        return {self.OUTPUT: output}
+
+
+class BatchAoiAlgorithm(BrasilMaisAlgorithm):
+    """Para cada polígono da camada (ex.: municípios), pesquisa as cenas diárias, seleciona a cobertura mínima de cada data e baixa os alertas SCCON da área, em processos paralelos. Grava um arquivo de resultado por AOI e um resumo (CSV) com os tempos de cada etapa."""
+
+    DISPLAY_NAME = "Lote de áreas de interesse"
+    GROUP = "Lote"
+
+    INPUT = "INPUT"
+    NAME_FIELD = "NAME_FIELD"
+    START = "START"
+    END = "END"
+    CLOUD = "CLOUD"
+    ALERTS = "ALERTS"
+    WORKERS = "WORKERS"
+    OUTPUT = "OUTPUT"
+    SUMMARY = "SUMMARY"
+
+    def name(self):
+        return "batchaois"
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT, self.tr("Áreas de interesse"), [QgsProcessing.TypeVectorPolygon]
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.NAME_FIELD, self.tr("Campo com o nome da área"), parentLayerParameterName=self.INPUT,
+            optional=True
+        ))
+        self.addParameter(QgsProcessingParameterString(self.START, self.tr("Data inicial (aaaa-mm-dd)")))
+        self.addParameter(QgsProcessingParameterString(self.END, self.tr("Data final (aaaa-mm-dd)")))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.CLOUD, self.tr("Cobertura máxima de nuvens (%)"),
+            QgsProcessingParameterNumber.Integer, 100, minValue=0, maxValue=100
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(self.ALERTS, self.tr("Baixar alertas SCCON"), True))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.WORKERS, self.tr("Processos em paralelo"),
+            QgsProcessingParameterNumber.Integer, DEFAULT_WORKERS, minValue=1, maxValue=32
+        ))
+        self.add_api_key_parameter()
+        self.add_sccon_parameters()
+        self.addParameter(QgsProcessingParameterFolderDestination(self.OUTPUT, self.tr("Pasta de resultados")))
+        self.addOutput(QgsProcessingOutputFile(self.SUMMARY, self.tr("Resumo por área")))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        name_field = self.parameterAsString(parameters, self.NAME_FIELD, context)
+        folder = self.parameterAsString(parameters, self.OUTPUT, context)
+        client = self.planet_client(parameters, context)
+
+        options = {
+            "api_key": client.api_key,
+            "start_date": parse_date(self.parameterAsString(parameters, self.START, context), self.START),
+            "end_date": parse_date(self.parameterAsString(parameters, self.END, context), self.END),
+            "cloud": self.parameterAsInt(parameters, self.CLOUD, context),
+            "folder": folder,
+        }
+
+        capabilities = {}
+        if self.parameterAsBool(parameters, self.ALERTS, context):
+            url, username, password = self.sccon_credentials(parameters, context)
+            if not url:
+                raise QgsProcessingException("Informe a URL do WFS ou salve a conexão no plugin.")
+            # Capabilities e nome da geometria consultados uma única vez para todos os processos
+            service = self.sccon_service(url, username, password)
+            service.probe()
+            options["sccon"] = {"url": url, "username": username, "password": password,
+                                "geometry_name": service.geometry_name(), "use_cql": service.use_cql}
+            capabilities = cached_capabilities()
+
+        transform = QgsCoordinateTransform(source.sourceCrs(), WGS84, context.transformContext())
+        aois = []
+        for feature in source.getFeatures():
+            geometry = feature.geometry()
+            if geometry.isEmpty():
+                continue
+            geometry.transform(transform)
+            name = feature[name_field] if name_field else f"aoi_{feature.id()}"
+            aois.append({"name": str(name), "geometry": search_geometry(geometry)})
+        if not aois:
+            raise QgsProcessingException("A camada não tem polígonos.")
+
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+        feedback.pushInfo(f"{len(aois)} áreas, {workers} processos")
+
+        def on_result(done, total, summary):
+            feedback.setProgress(100.0 * done / total)
+            if summary["erro"]:
+                feedback.reportError(f"{summary['aoi']}: {summary['erro']}")
+            else:
+                feedback.pushInfo(
+                    f"{summary['aoi']}: {summary['cenas']} cenas, melhor data {summary['melhor_data']} "
+                    f"({summary['cobertura_pct']}%), {summary['tempo_total_s']} s"
+                )
+
+        summaries = run_batch(aois, options, workers, capabilities,
+                              is_canceled=feedback.isCanceled, on_result=on_result)
+        summary_path = write_summary(summaries, os.path.join(folder, "resumo.csv"))
+        return {self.OUTPUT: folder, self.SUMMARY: summary_path}
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Modo de perfilamento das ações do plugin.
+
+Com o modo ativado, cada ação do diálogo marcada com @profiled abre uma
+sessão (core.profiling): a thread principal é perfilada com cProfile desde a
+ação até o término dos jobs que ela disparou (inclusive os callbacks que
+criam e estilizam as camadas), e cada job perfila a sua própria thread. Ao
+final, o perfil (.prof) e um resumo com as fases e as funções mais custosas
+(.txt) são gravados na pasta de perfis, para anexar a chamados.
+"""
+import cProfile
+import functools
+import inspect
+import os
+
+from qgis.PyQt.QtCore import QUrl
+from qgis.PyQt.QtGui import QDesktopServices, QFont
+from qgis.PyQt.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QCheckBox, QLabel, QListWidget,
+                                 QPlainTextEdit, QPushButton, QSplitter)
+from qgis.core import Qgis, QgsApplication
+
+from .core.profiling import current_session, start_session, end_session
+
+
+def default_profile_dir():
+    """Pasta padrão dos perfis, na pasta de configurações do perfil do QGIS"""
+    return os.path.join(QgsApplication.qgisSettingsDirPath(), "brmais", "perfis")
+
+
+def profiled(method):
+    """Decorador das ações do diálogo: perfila a ação se o modo estiver ativo
+
+    Os argumentos excedentes dos sinais (ex.: 'checked' do clicked) são
+    descartados, como faz o PyQt ao conectar o método diretamente.
+    """
+    parameters = list(inspect.signature(method).parameters.values())[1:]
+    variadic = any(p.kind == inspect.Parameter.VAR_POSITIONAL for p in parameters)
+    positional = sum(1 for p in parameters
+                     if p.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD))
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not variadic:
+            args = args[:positional]
+        profiler = getattr(self.plugin, "profiler", None)
+        if profiler is None or not profiler.enabled:
+            return method(self, *args, **kwargs)
+        return profiler.run(method.__name__, method, self, *args, **kwargs)
+    return wrapper
+
+
+class Profiler:
+    """Liga/desliga o modo de perfilamento e grava as sessões das ações"""
+
+    def __init__(self, settings, iface=None):
+        self.settings = settings
+        self.iface = iface
+        self.enabled = settings.value("brmais/profiling", False, type=bool)
+        self.directory = settings.value("brmais/profile_dir", "") or default_profile_dir()
+        self._session = None
+        self._profile = None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.settings.setValue("brmais/profiling", enabled)
+
+    @property
+    def active(self):
+        """Indica se há uma ação sendo perfilada"""
+        return self._session is not None
+
+    def run(self, action, fn, *args, **kwargs):
+        """Executa a ação numa sessão de perfilamento
+
+        Se já houver uma sessão ativa (ação chamada por outra, ou jobs da
+        anterior ainda em andamento), a ação é incluída nela.
+        """
+        if current_session() is not None:
+            return fn(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Outro profiler já ativo na thread principal
+            print(f"Perfilamento de '{action}' indisponível: {str(e)}")
+            return fn(*args, **kwargs)
+        session = start_session(action)
+        session.on_idle = self._session_done
+        session.hold()
+        self._session = session
+        self._profile = profile
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            # A sessão termina quando a ação e todos os seus jobs tiverem terminado
+            session.release()
+
+    def finish(self):
+        """Encerra a sessão ativa sem esperar os jobs pendentes"""
+        if self._session is not None:
+            self._session_done(self._session)
+
+    def _session_done(self, session):
+        if session is not self._session:
+            return
+        self._profile.disable()
+        session.add_profile(self._profile)
+        end_session(session)
+        self._session = None
+        self._profile = None
+        try:
+            path = session.write(self.directory)
+        except OSError as e:
+            print(f"Erro ao gravar o perfil de '{session.action}': {str(e)}")
+            return
+        print(f"Perfil de '{session.action}' ({session.elapsed:.2f} s) gravado em {path}")
+        if self.iface is not None:
+            self.iface.messageBar().pushMessage(
+                "Perfilamento", f"'{session.action}' levou {session.elapsed:.2f} s. Resumo: {path}",
+                level=Qgis.Info, duration=8
+            )
+
+    def summaries(self):
+        """Resumos gravados na pasta de perfis, do mais recente para o mais antigo"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted((name for name in os.listdir(self.directory) if name.endswith(".txt")), reverse=True)
+
+
+class ProfileDialog(QDialog):
+    """Ativa o modo de perfilamento e exibe os resumos das ações perfiladas"""
+
+    def __init__(self, profiler, parent=None):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.setWindowTitle("Perfilamento Brasil MAIS")
+        self.resize(900, 600)
+
+        layout = QVBoxLayout(self)
+        self.enabledCheckBox = QCheckBox("Perfilar as ações do plugin (cProfile e tempos por fase)")
+        self.enabledCheckBox.setChecked(profiler.enabled)
+        self.enabledCheckBox.toggled.connect(profiler.set_enabled)
+        layout.addWidget(self.enabledCheckBox)
+        layout.addWidget(QLabel(f"Pasta dos perfis: {profiler.directory}"))
+
+        splitter = QSplitter()
+        self.list = QListWidget()
+        self.list.currentTextChanged.connect(self.show_summary)
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text.setFont(QFont("monospace"))
+        splitter.addWidget(self.list)
+        splitter.addWidget(self.text)
+        splitter.setSizes([250, 650])
+        layout.addWidget(splitter)
+
+        buttons = QHBoxLayout()
+        self.finishButton = QPushButton("Encerrar perfil em andamento")
+        self.finishButton.clicked.connect(self.finish)
+        refresh_button = QPushButton("Atualizar")
+        refresh_button.clicked.connect(self.refresh)
+        folder_button = QPushButton("Abrir pasta")
+        folder_button.clicked.connect(self.open_folder)
+        close_button = QPushButton("Fechar")
+        close_button.clicked.connect(self.accept)
+        buttons.addWidget(self.finishButton)
+        buttons.addStretch()
+        buttons.addWidget(refresh_button)
+        buttons.addWidget(folder_button)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def refresh(self):
+        self.finishButton.setEnabled(self.profiler.active)
+        self.list.clear()
+        self.list.addItems(self.profiler.summaries())
+        if self.list.count():
+            self.list.setCurrentRow(0)
+        else:
+            self.text.setPlainText("Nenhuma ação perfilada. Ative o modo e execute uma ação do plugin.")
+
+    def show_summary(self, name):
+        if not name:
+            return
+        with open(os.path.join(self.profiler.directory, name), encoding="utf-8") as f:
+            self.text.setPlainText(f.read())
+
+    def finish(self):
+        self.profiler.finish()
+        self.refresh()
+
+    def open_folder(self):
+        os.makedirs(self.profiler.directory, exist_ok=True)
+        QDesktopServices.openUrl(QUrl.fromLocalFile(self.profiler.directory))
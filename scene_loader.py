@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Carregamento concorrente das cenas diárias (PSScene) selecionadas.
+
+As camadas são validadas e criadas em um pool de threads limitado dentro de
+uma QgsTask e adicionadas ao projeto de uma só vez, dentro de um grupo próprio.
+"""
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from qgis.core import QgsApplication, QgsProject, QgsRasterLayer, QgsTask
+
+from .core.tiles import item_xyz_uri, item_wms_xml, DEFAULT_XML_TIMEOUT
+from .core.profiling import span, timed, PHASE_LAYERS
+
+# Políticas de fallback aplicadas individualmente a cada cena
+FALLBACK_XML = "xml"    # tenta XYZ e, se inválida, GDAL_WMS XML
+FALLBACK_NONE = "none"  # apenas XYZ
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def write_item_wms_xml(item_id, api_key, timeout=DEFAULT_XML_TIMEOUT):
+    """Grava um XML GDAL_WMS para a cena e retorna o caminho do arquivo"""
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xml', delete=False)
+    temp_file.write(item_wms_xml(item_id, api_key, timeout).encode('utf-8'))
+    temp_file.close()
+
+    return temp_file.name
+
+
+class SceneLoadTask(QgsTask):
+    """Tarefa que cria as camadas das cenas em paralelo e as adiciona em lote"""
+
+    def __init__(self, scenes, api_key, group_name, fallback=FALLBACK_XML,
+                 max_workers=DEFAULT_MAX_WORKERS, on_finished=None):
+        """
+        :param scenes: lista de dicionários com 'item_id' e 'layer_name'
+        :param on_finished: função chamada (na thread principal) com a tarefa concluída
+        """
+        super().__init__(f"Carregando {len(scenes)} imagens diárias", QgsTask.CanCancel)
+        self.scenes = scenes
+        self.api_key = api_key
+        self.group_name = group_name
+        self.fallback = fallback
+        self.max_workers = max_workers
+        self.on_finished = on_finished
+
+        self.loaded = []
+        self.failures = []
+        self.was_canceled = False
+
+    @timed(PHASE_LAYERS)
+    def _build_layer(self, scene):
+        """Cria e valida a camada de uma cena, aplicando a política de fallback"""
+        if self.isCanceled():
+            return None, "cancelado"
+
+        item_id = scene["item_id"]
+        layer_name = scene["layer_name"]
+        main_thread = QgsApplication.instance().thread()
+
+        layer = QgsRasterLayer(item_xyz_uri(item_id, self.api_key), layer_name, "wms")
+        if layer.isValid():
+            layer.moveToThread(main_thread)
+            return layer, None
+
+        error_msg = layer.error().message() if hasattr(layer, 'error') else "Erro desconhecido"
+        fallback = scene.get("fallback", self.fallback)
+        if fallback != FALLBACK_XML or self.isCanceled():
+            return None, error_msg
+
+        print(f"Tentando abordagem XML para a imagem {item_id}...")
+        xml_file = write_item_wms_xml(item_id, self.api_key)
+        layer = QgsRasterLayer(xml_file, layer_name + " (XML)", "gdal")
+        if layer.isValid():
+            layer.moveToThread(main_thread)
+            return layer, None
+
+        xml_error = layer.error().message() if hasattr(layer, 'error') else "Erro desconhecido"
+        return None, f"{error_msg} / XML: {xml_error}"
+
+    def run(self):
+        """Executa a criação das camadas em um pool de threads limitado"""
+        total = len(self.scenes)
+        if not total:
+            return True
+
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._build_layer, scene): scene for scene in self.scenes}
+            for future in as_completed(futures):
+                scene = futures[future]
+                try:
+                    layer, error = future.result()
+                except Exception as e:
+                    layer, error = None, str(e)
+
+                if layer is not None:
+                    self.loaded.append((scene, layer))
+                else:
+                    self.failures.append((scene["item_id"], error))
+                    print(f"Falha ao carregar a imagem {scene['item_id']}: {error}")
+
+                done += 1
+                self.setProgress(100.0 * done / total)
+
+        self.was_canceled = self.isCanceled()
+        return True
+
+    @property
+    def layers(self):
+        """Camadas criadas com sucesso"""
+        return [layer for _, layer in self.loaded]
+
+    def finished(self, result):
+        """Adiciona as camadas criadas ao projeto em um único lote"""
+        if self.loaded:
+            # Manter a ordem da seleção original
+            order = {id(scene): i for i, scene in enumerate(self.scenes)}
+            self.loaded.sort(key=lambda pair: order.get(id(pair[0]), 0))
+
+            with span(PHASE_LAYERS):
+                root = QgsProject.instance().layerTreeRoot()
+                group = root.insertGroup(0, self.group_name)
+                QgsProject.instance().addMapLayers(self.layers, False)
+                for layer in self.layers:
+                    group.addLayer(layer)
+
+        if self.on_finished:
+            self.on_finished(self)
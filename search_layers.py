@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Camadas de footprints da pesquisa de imagens diárias, uma por data.
+
+As páginas da quick-search são acrescentadas à medida que chegam: as datas
+novas ganham uma camada (na posição cronológica dentro do grupo) e as datas
+já existentes recebem apenas as feições novas, sem recriar as camadas.
+"""
+from datetime import datetime
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (QgsProject, QgsVectorLayer, QgsFeature, QgsGeometry, QgsField,
+                       QgsFields, QgsFillSymbol, QgsPointXY)
+
+from .core.planet import group_by_date, acquired_time, footprint_ring
+from .layer_registry import ROLE_FOOTPRINTS
+from .core.profiling import timed, PHASE_LAYERS
+
+
+def footprint_fields():
+    """Campos das camadas de footprints"""
+    fields = QgsFields()
+    fields.append(QgsField("id", QVariant.String))
+    fields.append(QgsField("hora", QVariant.String))
+    fields.append(QgsField("nuvens", QVariant.Double))
+    fields.append(QgsField("item_id", QVariant.String))
+    return fields
+
+
+def display_date(date_str):
+    """Data 'yyyy-MM-dd' no formato 'dd/MM/yyyy'"""
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d').strftime('%d/%m/%Y')
+    except ValueError:
+        return date_str
+
+
+class FootprintLayers:
+    """Grupo de camadas de footprints de uma pesquisa, preenchido página a página"""
+
+    def __init__(self, registry, group_name, params):
+        """
+        :param registry: LayerRegistry do plugin
+        :param params: parâmetros da pesquisa gravados no registro de cada camada
+        """
+        self.registry = registry
+        self.group_name = group_name
+        self.params = params
+        self.fields = footprint_fields()
+        self.group = None
+        self.layers = {}
+        self.scene_count = 0
+
+    @property
+    def layer_ids(self):
+        """IDs das camadas, em ordem cronológica"""
+        return [self.layers[date_str].id() for date_str in sorted(self.layers)]
+
+    @timed(PHASE_LAYERS)
+    def add_page(self, features):
+        """Acrescenta as cenas de uma página às camadas das suas datas
+
+        :returns: número de cenas acrescentadas
+        """
+        added = 0
+        for date_str, date_features in group_by_date(features).items():
+            layer = self.layers.get(date_str) or self._create_layer(date_str)
+            qgs_features, metadata = self._features(layer, date_str, date_features)
+            if not qgs_features:
+                continue
+            layer.dataProvider().addFeatures(qgs_features)
+            layer.updateExtents()
+            layer.triggerRepaint()
+            self.registry.add_features(layer.id(), metadata)
+            added += len(qgs_features)
+        self.scene_count += added
+        return added
+
+    def _features(self, layer, date_str, date_features):
+        """Feições QGIS e metadados por cena das cenas de uma data"""
+        qgs_features = []
+        metadata = {}
+        number = layer.featureCount()
+        for feature in date_features:
+            item_id = feature.get('id', '')
+            properties = feature.get('properties', {})
+            acquired = properties.get('acquired', '')
+            cloud = (properties.get('cloud_cover') or 0) * 100.0
+            time_str = acquired_time(acquired)
+
+            # Footprint da imagem (ou seu bbox, na falta do polígono)
+            ring = footprint_ring(feature)
+            if ring is None:
+                print(f"Sem geometria válida para a imagem {item_id}")
+                continue
+
+            number += 1
+            qgs_feat = QgsFeature(self.fields)
+            qgs_feat.setGeometry(QgsGeometry.fromPolygonXY([[QgsPointXY(x, y) for x, y in ring]]))
+            qgs_feat.setAttributes([f"Imagem-{number}", time_str, cloud, item_id])
+            qgs_features.append(qgs_feat)
+
+            # Metadados da cena para o registro de camadas
+            metadata[item_id] = {
+                "date": date_str,
+                "display_date": display_date(date_str),
+                "hora": time_str,
+                "acquired": acquired,
+                "cloud_cover": cloud,
+            }
+        return qgs_features, metadata
+
+    def _create_layer(self, date_str):
+        """Cria a camada de uma data e a insere no grupo na posição cronológica"""
+        if self.group is None:
+            root = QgsProject.instance().layerTreeRoot()
+            self.group = root.insertGroup(0, self.group_name)
+
+        layer = QgsVectorLayer("Polygon?crs=EPSG:4326", f"Planet_Imagens_{display_date(date_str)}", "memory")
+        layer.dataProvider().addAttributes(self.fields.toList())
+        layer.updateFields()
+
+        # Vermelho semitransparente
+        symbol = QgsFillSymbol.createSimple({
+            'color': '255,0,0,30',
+            'outline_color': '255,0,0,255',
+            'outline_width': '0.5'
+        })
+        layer.renderer().setSymbol(symbol)
+
+        position = sum(1 for existing in self.layers if existing < date_str)
+        QgsProject.instance().addMapLayer(layer, False)
+        self.group.insertLayer(position, layer)
+
+        self.registry.register(layer, ROLE_FOOTPRINTS, params=dict(self.params, date=date_str))
+        self.layers[date_str] = layer
+        return layer
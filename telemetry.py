@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+Telemetria das requisições de rede do plugin e das suas camadas.
+
+Registra endpoint, status, bytes, latência e novas tentativas de cada
+requisição, vindas de duas fontes:
+- a sessão HTTP compartilhada do núcleo (core.http), usada pelos clientes da
+  Planet e do WFS SCCON;
+- o QgsNetworkAccessManager, por onde passam as requisições das camadas
+  (tiles XYZ, WFS do QGIS), filtradas pelos hosts do plugin.
+As medidas são agregadas por endpoint (p50/p95) e por vazão de tiles no
+painel "Telemetria de rede" e, opcionalmente, gravadas em um log JSONL.
+As requisições feitas pelo próprio GDAL (camadas GDAL_WMS) não passam por
+nenhuma das duas fontes e não são registradas.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+from qgis.PyQt.QtCore import Qt, QTimer
+from qgis.PyQt.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+from qgis.PyQt.QtWidgets import (QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                                 QTableWidget, QTableWidgetItem, QPushButton, QCheckBox,
+                                 QHeaderView, QAbstractItemView)
+from qgis.core import (QgsApplication, QgsNetworkAccessManager, QgsNetworkRequestParameters,
+                       QgsNetworkReplyContent)
+
+from .core import http
+from .core.telemetry import endpoint_name, is_tile, percentile
+
+# Hosts (sufixos) cujas requisições do QgsNetworkAccessManager são registradas
+DEFAULT_HOSTS = ("planet.com",)
+
+# Latências guardadas por endpoint para os percentis
+LATENCY_SAMPLES = 1000
+
+# Janela (s) da vazão de tiles
+THROUGHPUT_WINDOW = 60
+
+# Intervalo (ms) de atualização do painel
+REFRESH_INTERVAL = 1000
+
+# Métodos HTTP das operações do QNetworkAccessManager
+OPERATION_METHODS = {
+    QNetworkAccessManager.HeadOperation: "HEAD",
+    QNetworkAccessManager.GetOperation: "GET",
+    QNetworkAccessManager.PutOperation: "PUT",
+    QNetworkAccessManager.PostOperation: "POST",
+    QNetworkAccessManager.DeleteOperation: "DELETE",
+}
+
+
+def default_log_path():
+    """Caminho padrão do log JSONL, na pasta de configurações do perfil do QGIS"""
+    return os.path.join(QgsApplication.qgisSettingsDirPath(), "brmais", "telemetria.jsonl")
+
+
+class Telemetry:
+    """Coleta e agrega as medidas das requisições (pode ser chamada de qualquer thread)"""
+
+    def __init__(self, hosts=DEFAULT_HOSTS):
+        self.hosts = set(hosts)
+        self._lock = threading.Lock()
+        self._log = None
+        self.log_path = None
+        self._pending = {}
+        self._received = {}
+        self._connected = False
+        self.clear()
+
+    def clear(self):
+        """Descarta as medidas agregadas"""
+        with self._lock:
+            self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+            self._totals = defaultdict(lambda: {"count": 0, "errors": 0, "bytes": 0, "retries": 0})
+            self._tiles = deque()
+
+    def watch_url(self, url):
+        """Inclui o host de uma URL (ex.: WFS SCCON) entre os registrados"""
+        host = urlparse(url or "").hostname
+        if host:
+            self.hosts.add(host)
+
+    def _watched(self, url):
+        host = urlparse(url).hostname or ""
+        return any(host == watched or host.endswith("." + watched) for watched in self.hosts)
+
+    def start(self):
+        """Conecta às fontes de medidas (core.http e QgsNetworkAccessManager)"""
+        if self._connected:
+            return
+        http.add_listener(self.on_http_request)
+        manager = QgsNetworkAccessManager.instance()
+        manager.requestAboutToBeCreated[QgsNetworkRequestParameters].connect(self._request_created)
+        manager.downloadProgress.connect(self._download_progress)
+        manager.finished[QgsNetworkReplyContent].connect(self._request_finished)
+        self._connected = True
+
+    def stop(self):
+        """Desconecta das fontes de medidas e fecha o log"""
+        if self._connected:
+            http.remove_listener(self.on_http_request)
+            manager = QgsNetworkAccessManager.instance()
+            manager.requestAboutToBeCreated[QgsNetworkRequestParameters].disconnect(self._request_created)
+            manager.downloadProgress.disconnect(self._download_progress)
+            manager.finished[QgsNetworkReplyContent].disconnect(self._request_finished)
+            self._connected = False
+        self.set_log_path(None)
+
+    def set_log_path(self, path):
+        """Ativa (com um caminho) ou desativa (None) o log JSONL"""
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            self.log_path = path
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._log = open(path, "a", encoding="utf-8")
+
+    def on_http_request(self, measure):
+        """Medidas de uma requisição feita pela sessão do núcleo (core.http)"""
+        self.record("requests", measure["method"], measure["url"], measure["status"], measure["bytes"],
+                    measure["latency"], measure["retries"], measure["error"])
+
+    def _request_created(self, parameters):
+        url = parameters.request().url().toString()
+        if self._watched(url):
+            self._pending[parameters.requestId()] = (time.perf_counter(), url, parameters.operation())
+
+    def _download_progress(self, request_id, received, total):
+        if request_id in self._pending:
+            self._received[request_id] = received
+
+    def _request_finished(self, reply):
+        started = self._pending.pop(reply.requestId(), None)
+        if started is None:
+            return
+        started_at, url, operation = started
+        size = self._received.pop(reply.requestId(), 0)
+        if not size:
+            length = bytes(reply.rawHeader(b"Content-Length")).decode() if reply.hasRawHeader(b"Content-Length") else ""
+            size = int(length) if length.isdigit() else 0
+        status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute) or 0
+        error = reply.errorString() if reply.error() != QNetworkReply.NoError else ""
+        method = OPERATION_METHODS.get(operation, "GET")
+        self.record("qgis", method, url, int(status), size, time.perf_counter() - started_at, 0, error)
+
+    def record(self, source, method, url, status, size, latency, retries=0, error=""):
+        """Registra as medidas de uma requisição"""
+        endpoint = endpoint_name(url)
+        tile = is_tile(url)
+        now = time.time()
+        with self._lock:
+            totals = self._totals[endpoint]
+            totals["count"] += 1
+            totals["bytes"] += size
+            totals["retries"] += retries
+            if error or not status or status >= 400:
+                totals["errors"] += 1
+            self._latencies[endpoint].append(latency)
+            if tile:
+                self._tiles.append((now, size))
+            if self._log is not None:
+                parsed = urlparse(url)
+                # Sem a consulta: as URLs de tiles e do WFS levam a API Key / token
+                self._log.write(json.dumps({
+                    "time": round(now, 3),
+                    "source": source,
+                    "method": method,
+                    "endpoint": endpoint,
+                    "url": f"{parsed.scheme}://{parsed.netloc}{parsed.path}",
+                    "status": status,
+                    "bytes": size,
+                    "latency_ms": round(latency * 1000, 1),
+                    "retries": retries,
+                    "tile": tile,
+                    "error": error,
+                }, ensure_ascii=False) + "\n")
+                self._log.flush()
+
+    def summary(self):
+        """Medidas agregadas por endpoint, do mais requisitado para o menos"""
+        with self._lock:
+            rows = []
+            for endpoint, totals in self._totals.items():
+                latencies = list(self._latencies[endpoint])
+                rows.append(dict(totals, endpoint=endpoint,
+                                 p50_ms=percentile(latencies, 0.50) * 1000,
+                                 p95_ms=percentile(latencies, 0.95) * 1000))
+        return sorted(rows, key=lambda row: row["count"], reverse=True)
+
+    def tile_throughput(self, window=THROUGHPUT_WINDOW):
+        """(tiles/s, bytes/s) dos tiles recebidos na janela mais recente"""
+        limit = time.time() - window
+        with self._lock:
+            while self._tiles and self._tiles[0][0] < limit:
+                self._tiles.popleft()
+            if not self._tiles:
+                return 0.0, 0.0
+            elapsed = max(time.time() - self._tiles[0][0], 1.0)
+            return len(self._tiles) / elapsed, sum(size for _, size in self._tiles) / elapsed
+
+
+class TelemetryWidget(QWidget):
+    """Tabela de medidas por endpoint, vazão de tiles e controle do log"""
+
+    COLUMNS = ["Endpoint", "Req.", "Erros", "p50 (ms)", "p95 (ms)", "MB", "Novas tentativas"]
+
+    def __init__(self, telemetry, settings, parent=None):
+        super().__init__(parent)
+        self.telemetry = telemetry
+        self.settings = settings
+
+        layout = QVBoxLayout(self)
+        self.throughputLabel = QLabel()
+        layout.addWidget(self.throughputLabel)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.logCheckBox = QCheckBox("Gravar log JSONL")
+        self.logCheckBox.setToolTip(default_log_path())
+        self.logCheckBox.setChecked(bool(telemetry.log_path))
+        self.logCheckBox.toggled.connect(self.toggle_log)
+        self.clearButton = QPushButton("Limpar")
+        self.clearButton.clicked.connect(self.clear)
+        buttons.addWidget(self.logCheckBox)
+        buttons.addStretch()
+        buttons.addWidget(self.clearButton)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def showEvent(self, event):
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def toggle_log(self, checked):
+        self.telemetry.set_log_path(default_log_path() if checked else None)
+        self.settings.setValue("brmais/telemetry_log", checked)
+
+    def clear(self):
+        self.telemetry.clear()
+        self.refresh()
+
+    def refresh(self):
+        """Atualiza a tabela e a vazão de tiles"""
+        tiles_per_s, bytes_per_s = self.telemetry.tile_throughput()
+        self.throughputLabel.setText(
+            f"Tiles (últimos {THROUGHPUT_WINDOW} s): {tiles_per_s:.1f}/s, {bytes_per_s / 1024:.0f} KB/s"
+        )
+        rows = self.telemetry.summary()
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            cells = [
+                values["endpoint"],
+                str(values["count"]),
+                str(values["errors"]),
+                f"{values['p50_ms']:.0f}",
+                f"{values['p95_ms']:.0f}",
+                f"{values['bytes'] / 1048576:.2f}",
+                str(values["retries"]),
+            ]
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+
+class TelemetryDock(QDockWidget):
+    """Painel "Telemetria de rede" da janela principal"""
+
+    def __init__(self, telemetry, settings, parent=None):
+        super().__init__("Telemetria de rede", parent)
+        self.setObjectName("BrasilMaisTelemetry")
+        self.setWidget(TelemetryWidget(telemetry, settings))
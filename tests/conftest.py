@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Os testes cobrem os módulos sem dependência do Qt/QGIS (pacote core e
+auxiliares); a pasta do plugin entra no sys.path para importá-los como
+'core.<módulo>'.
+
+Os módulos da raiz do plugin (base local, exportação, estatísticas...) usam
+imports relativos e o PyQGIS: são importados como parte do pacote do plugin
+pela fixture plugin_module, e os testes são pulados quando o QGIS não está
+instalado.
+"""
+import importlib
+import os
+import sys
+
+import pytest
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PLUGIN_DIR not in sys.path:
+    sys.path.insert(0, PLUGIN_DIR)
+
+
+@pytest.fixture(scope="session")
+def qgis_app():
+    """QgsApplication sem interface gráfica (provedores, timers, QgsProject)"""
+    pytest.importorskip("qgis.core")
+    from qgis.testing import start_app
+    return start_app()
+
+
+@pytest.fixture(scope="session")
+def plugin_module(qgis_app):
+    """Importa um módulo da raiz do plugin pelo nome (ex.: 'alert_store')"""
+    parent = os.path.dirname(PLUGIN_DIR)
+    if parent not in sys.path:
+        sys.path.append(parent)
+    package = os.path.basename(PLUGIN_DIR)
+    return lambda name: importlib.import_module(f"{package}.{name}")
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+
+@pytest.fixture
+def chips_module(plugin_module):
+    return plugin_module("alert_chips")
+
+
+def test_world_file_references_the_pixel_centers(chips_module, tmp_path):
+    from qgis.core import QgsRectangle
+
+    path = tmp_path / "recorte.pgw"
+    chips_module.write_world_file(str(path), QgsRectangle(1000, 2000, 1512, 2256), 256, 128)
+
+    values = [float(line) for line in path.read_text().splitlines()]
+    assert values == [2.0, 0.0, 0.0, -2.0, 1001.0, 2255.0]
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+
+@pytest.fixture
+def export_module(plugin_module):
+    return plugin_module("alert_export")
+
+
+class Canceled:
+    def isCanceled(self):
+        return True
+
+
+def points(count):
+    from qgis.PyQt.QtCore import QVariant
+    from qgis.core import QgsFeature, QgsField, QgsFields, QgsGeometry, QgsPointXY
+
+    fields = QgsFields()
+    fields.append(QgsField("n", QVariant.Int))
+
+    def features():
+        for n in range(count):
+            feature = QgsFeature(fields)
+            feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(-50 + n * 0.01, -10)))
+            feature.setAttributes([n])
+            yield feature
+    return fields, features()
+
+
+def test_format_for_path(export_module):
+    assert export_module.format_for_path("/tmp/alertas.FGB") == export_module.FORMAT_FLATGEOBUF
+    assert export_module.format_for_path("alertas.parquet") == export_module.FORMAT_PARQUET
+    with pytest.raises(Exception):
+        export_module.format_for_path("alertas.shp")
+
+
+@pytest.mark.parametrize("extension", [".fgb", ".parquet"])
+def test_write_stream_writes_every_chunk(export_module, tmp_path, extension):
+    from qgis.core import QgsCoordinateReferenceSystem, QgsVectorLayer, QgsWkbTypes
+
+    driver = export_module.format_for_path(extension)
+    if driver not in export_module.available_formats():
+        pytest.skip(f"GDAL sem o driver {driver}")
+
+    path = str(tmp_path / f"saida{extension}")
+    fields, features = points(25)
+    written = export_module.write_stream(path, fields, QgsWkbTypes.Point,
+                                         QgsCoordinateReferenceSystem("EPSG:4326"),
+                                         features, chunk_size=10)
+    assert written == 25
+
+    layer = QgsVectorLayer(path, "saida", "ogr")
+    assert layer.isValid()
+    assert sorted(f["n"] for f in layer.getFeatures()) == list(range(25))
+
+
+def test_write_stream_stops_when_canceled(export_module, tmp_path):
+    from qgis.core import QgsCoordinateReferenceSystem, QgsWkbTypes
+
+    if export_module.FORMAT_FLATGEOBUF not in export_module.available_formats():
+        pytest.skip("GDAL sem o driver FlatGeobuf")
+
+    fields, features = points(5)
+    written = export_module.write_stream(str(tmp_path / "saida.fgb"), fields, QgsWkbTypes.Point,
+                                         QgsCoordinateReferenceSystem("EPSG:4326"),
+                                         features, feedback=Canceled())
+    assert written == 0
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from core.alert_filters import AlertQuery
+
+
+class Null:
+    """Equivalente ao NULL do QGIS: um valor nulo que não é None"""
+
+    def isNull(self):
+        return True
+
+    def __gt__(self, other):
+        raise TypeError("NULL não é comparável")
+
+    __ge__ = __lt__ = __le__ = __gt__
+
+    def __float__(self):
+        raise TypeError("NULL não é número")
+
+
+class Feature:
+    """Acesso a atributos por nome, como uma QgsFeature"""
+
+    def __init__(self, **attributes):
+        self.attributes = attributes
+
+    def __getitem__(self, name):
+        return self.attributes[name]
+
+
+def query_filter(**kwargs):
+    return AlertQuery.feature_filter(AlertQuery(**kwargs).predicates())
+
+
+def test_feature_filter_none_without_attribute_predicates():
+    assert query_filter() is None
+    assert query_filter(bbox=(0, 0, 1, 1)) is None
+
+
+def test_feature_filter_on_property_dicts():
+    matches = query_filter(area_min=5, date_start="2024-01-01", date_end="2024-01-31", alert_type="Desmatamento")
+    alert = {"area_ha": 6.5, "dat_depois": "2024-01-15T00:00:00Z", "tipo": "Desmatamento"}
+    assert matches(alert)
+    assert not matches(dict(alert, area_ha=4.0))
+    assert not matches(dict(alert, dat_depois="2024-02-01"))
+    assert not matches(dict(alert, tipo="Queimada"))
+
+
+def test_feature_filter_missing_and_null_values_do_not_match():
+    matches = query_filter(area_min=5, since="2024-01-01")
+    assert not matches({"dat_depois": "2024-03-01"})
+    assert not matches(Feature(area_ha=Null(), dat_depois="2024-03-01"))
+    assert not matches(Feature(area_ha=10.0, dat_depois=Null()))
+    assert matches(Feature(area_ha=10.0, dat_depois="2024-03-01"))
+
+
+def test_server_params_sends_supported_predicates_as_fes():
+    query = AlertQuery(area_min=5, alert_type="Desmatamento")
+    caps = {"operators": {"GreaterThan", "EqualTo"}}
+    params, client = query.server_params(caps)
+    assert client == []
+    assert params["FILTER"].startswith("<ogc:Filter ")
+    assert "<ogc:PropertyIsGreaterThan><ogc:PropertyName>area_ha</ogc:PropertyName>" in params["FILTER"]
+
+
+def test_server_params_evaluates_unsupported_predicates_locally():
+    query = AlertQuery(area_min=5, date_start="2024-01-01", date_end="2024-01-31")
+    params, client = query.server_params({"operators": {"GreaterThan"}}, version="2.0.0")
+    assert client == [("Between", "dat_depois", "2024-01-01", "2024-01-31")]
+    assert "CQL_FILTER" not in params
+    assert "<fes:PropertyIsGreaterThan>" in params["FILTER"]
+    assert "PropertyIsBetween" not in params["FILTER"]
+
+    params, client = query.server_params({"operators": set()})
+    assert params == {}
+    assert [p[0] for p in client] == ["GreaterThan", "Between"]
+
+
+def test_server_params_uses_cql_only_when_configured():
+    query = AlertQuery(alert_type="O'Neil")
+    params, client = query.server_params({"operators": set()}, use_cql=True)
+    assert params == {"CQL_FILTER": "tipo = 'O''Neil'"}
+    assert client == []
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def stats_module(plugin_module):
+    return plugin_module("alert_stats")
+
+
+class FakeService:
+    def __init__(self, pages):
+        self.pages = pages
+        self.params = None
+
+    def filter_params(self, query):
+        return {}, []
+
+    def sort_key(self):
+        return "id"
+
+    def iter_pages(self, params, is_canceled=None):
+        self.params = params
+        for index, page in enumerate(self.pages):
+            yield index, len(self.pages), page
+
+
+def properties(tipo, date, area, municipio=None):
+    return {"properties": {"tipo": tipo, "dat_depois": date, "area_ha": area, "municipio": municipio}}
+
+
+def test_aggregator_groups_by_type_and_month_across_chunks(stats_module):
+    aggregator = stats_module.AlertAggregator(chunk_size=2)
+    aggregator.add("DESMATAMENTO", "2024-01-05", 10.0)
+    aggregator.add("DESMATAMENTO", "2024-01-20T10:00:00", "2.5")
+    aggregator.add("DEGRADACAO", "2024-02-01", None)
+    aggregator.add(None, "", 1.0)
+    aggregator.add("DESMATAMENTO", "2024-02-03", 4.0)
+
+    rows = aggregator.rows()
+    assert aggregator.total == 5
+    assert [(r["mes"], r["tipo"], r["alertas"], r["area_ha"]) for r in rows] == [
+        ("2024-01", "DESMATAMENTO", 2, 12.5),
+        ("2024-02", "DEGRADACAO", 1, 0.0),
+        ("2024-02", "DESMATAMENTO", 1, 4.0),
+        (stats_module.NO_DATE, stats_module.NO_VALUE, 1, 1.0),
+    ]
+
+
+def test_monthly_areas_sums_the_admin_units(stats_module):
+    aggregator = stats_module.AlertAggregator(by_admin=True)
+    aggregator.add("DESMATAMENTO", "2024-01-05", 10.0, "Altamira")
+    aggregator.add("DESMATAMENTO", "2024-01-06", 5.0, "Novo Progresso")
+    aggregator.add("DEGRADACAO", "2024-03-01", 2.0, "Altamira")
+
+    assert len(aggregator.rows()) == 3
+    months, types, matrix = aggregator.monthly_areas()
+    assert months == ["2024-01", "2024-03"]
+    assert types == ["DEGRADACAO", "DESMATAMENTO"]
+    assert np.array_equal(matrix, np.array([[0.0, 15.0], [2.0, 0.0]]))
+
+
+def test_aggregate_wfs_requests_only_the_needed_properties(stats_module, tmp_path):
+    service = FakeService([
+        {"features": [properties("DESMATAMENTO", "2024-01-05", 10.0, "Altamira"),
+                      properties("DESMATAMENTO", "2024-01-07", 1.0, "Altamira")]},
+        {"features": [properties("DEGRADACAO", "2024-01-09", 3.0, "Altamira")]},
+    ])
+    aggregator = stats_module.aggregate_wfs(service, None, admin_field="municipio")
+
+    assert service.params["propertyName"] == "tipo,dat_depois,area_ha,municipio,id"
+    assert aggregator.total == 3
+
+    path = tmp_path / "estatisticas.csv"
+    stats_module.write_csv(aggregator.rows(), str(path), by_admin=True)
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        "mes,tipo,unidade,alertas,area_ha",
+        "2024-01,DEGRADACAO,Altamira,1,3.0",
+        "2024-01,DESMATAMENTO,Altamira,2,11.0",
+    ]
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+
+@pytest.fixture
+def store_module(plugin_module):
+    return plugin_module("alert_store")
+
+
+def alert_fields():
+    from qgis.PyQt.QtCore import QVariant
+    from qgis.core import QgsField, QgsFields
+
+    fields = QgsFields()
+    for name, kind in (("id", QVariant.String), ("dat_depois", QVariant.String),
+                       ("tipo", QVariant.String), ("area_ha", QVariant.Double)):
+        fields.append(QgsField(name, kind))
+    return fields
+
+
+def alert(fields, alert_id, date, xmin, ymin, size=0.5, tipo="DESMATAMENTO", area=10.0):
+    from qgis.core import QgsFeature, QgsGeometry
+
+    feature = QgsFeature(fields)
+    xmax, ymax = xmin + size, ymin + size
+    feature.setGeometry(QgsGeometry.fromWkt(
+        f"MultiPolygon((({xmin} {ymin}, {xmax} {ymin}, {xmax} {ymax}, {xmin} {ymax}, {xmin} {ymin})))"
+    ))
+    feature.setAttributes([alert_id, date, tipo, area])
+    return feature
+
+
+def write(store, features):
+    from qgis.core import QgsCoordinateReferenceSystem, QgsWkbTypes
+
+    fields = alert_fields()
+    return store.write_features(fields, QgsWkbTypes.MultiPolygon,
+                                QgsCoordinateReferenceSystem("EPSG:4326"),
+                                [make(fields) for make in features])
+
+
+def test_write_features_upserts_by_key_and_tracks_high_water_mark(store_module, tmp_path):
+    store = store_module.AlertStore(str(tmp_path / "alertas.gpkg"))
+    assert store.high_water_mark() is None
+
+    counts = write(store, [
+        lambda f: alert(f, "1", "2024-01-01", -50.2, -10.2),
+        lambda f: alert(f, "2", "2024-01-03", -50.2, -10.2),
+    ])
+    assert (counts["new"], counts["updated"]) == (2, 0)
+    assert store.high_water_mark() == "2024-01-03"
+    assert store.last_sync() is not None
+
+    # Alerta 1 alterado, alerta 3 novo e com data anterior à marca d'água
+    counts = write(store, [
+        lambda f: alert(f, "1", "2024-01-02", -50.2, -10.2, area=20.0),
+        lambda f: alert(f, "3", "2023-12-31", -50.2, -10.2),
+    ])
+    assert (counts["new"], counts["updated"]) == (1, 1)
+    assert store.high_water_mark() == "2024-01-03"
+
+    layer = store.layer()
+    assert layer.featureCount() == 3
+    areas = {f[store_module.KEY_FIELD]: f["area_ha"] for f in layer.getFeatures()}
+    assert areas == {"1": 20.0, "2": 10.0, "3": 10.0}
+
+
+def test_local_filter_restricts_the_store_layer(store_module, tmp_path):
+    store = store_module.AlertStore(str(tmp_path / "alertas.gpkg"))
+    write(store, [
+        lambda f: alert(f, "1", "2024-01-01", -50.2, -10.2, tipo="DESMATAMENTO", area=5.0),
+        lambda f: alert(f, "2", "2024-02-01", -50.2, -10.2, tipo="DEGRADACAO", area=50.0),
+        lambda f: alert(f, "3", "2024-02-01", -40.2, -10.2, tipo="DEGRADACAO", area=50.0),
+    ])
+
+    subset = store_module.local_filter("2024-01-15", "2024-03-01", 10, "DEGRADACAO",
+                                       bbox=(-51, -11, -49, -9))
+    keys = [f[store_module.KEY_FIELD] for f in store.layer("filtrada", subset).getFeatures()]
+    assert keys == ["2"]
+
+
+def test_write_features_keeps_attribute_and_spatial_indexes(store_module, tmp_path):
+    import sqlite3
+
+    store = store_module.AlertStore(str(tmp_path / "alertas.gpkg"))
+    write(store, [lambda f: alert(f, "1", "2024-01-01", -50.2, -10.2)])
+
+    with sqlite3.connect(store.path) as conn:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    assert {"idx_alerts_sccon_key", "idx_alerts_dat_depois", "idx_alerts_tipo",
+            "idx_alerts_area_ha", "idx_alerts_tipo_dat_depois", "rtree_alerts_geom"} <= names
+    # Já existentes: nada a criar
+    assert store.ensure_indexes() == []
+
+
+def test_simplified_levels_follow_the_full_table(store_module, tmp_path):
+    store = store_module.AlertStore(str(tmp_path / "alertas.gpkg"), simplified=True)
+    assert not store.has_simplified()
+
+    write(store, [
+        lambda f: alert(f, "1", "2024-01-01", -50.2, -10.2),
+        # Menor que todas as tolerâncias: não pode sumir das tabelas simplificadas
+        lambda f: alert(f, "2", "2024-01-01", -50.2, -10.2, size=0.0001),
+    ])
+    write(store, [lambda f: alert(f, "1", "2024-01-02", -50.2, -10.2, area=20.0)])
+    assert store.has_simplified()
+
+    for table, _, _, _ in store_module.SIMPLIFIED_LEVELS:
+        features = list(store.simplified_layer(table, table).getFeatures())
+        assert sorted(f[store_module.KEY_FIELD] for f in features) == ["1", "2"]
+        assert all(f.hasGeometry() and not f.geometry().isEmpty() for f in features)
+        assert {f[store_module.KEY_FIELD]: f["area_ha"] for f in features}["1"] == 20.0
+
+
+def test_simplify_geometry_never_returns_an_empty_geometry(store_module):
+    from qgis.core import QgsGeometry, QgsWkbTypes
+
+    tiny = QgsGeometry.fromWkt("Polygon((0 0, 0.0001 0, 0.0001 0.0001, 0 0.0001, 0 0))")
+    simplified = store_module.simplify_geometry(tiny, 0.01)
+    assert not simplified.isEmpty()
+    assert QgsWkbTypes.isMultiType(simplified.wkbType())
+
+
+def test_dirty_cells_include_where_an_updated_alert_was(store_module, tmp_path):
+    store = store_module.AlertStore(str(tmp_path / "alertas.gpkg"))
+    write(store, [lambda f: alert(f, "1", "2024-01-01", -50.8, -10.8)])
+    assert store.dirty_cells() == {(-51, -11)}
+    store.clear_dirty_cells()
+
+    # O alerta mudou de célula: a antiga também precisa ter os tiles refeitos
+    write(store, [lambda f: alert(f, "1", "2024-01-02", -48.8, -10.8)])
+    assert store.dirty_cells() == {(-51, -11), (-49, -11)}
+
+    store.clear_dirty_cells([(-51, -11)])
+    assert store.dirty_cells() == {(-49, -11)}
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import core.batch
+from core.batch import date_coverage, run_batch, safe_name
+
+AOI = {"type": "Polygon", "coordinates": [[[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]]}
+
+
+def scene(scene_id, acquired, xmin, xmax, cloud=0.0):
+    ring = [[xmin, 0], [xmax, 0], [xmax, 10], [xmin, 10], [xmin, 0]]
+    return {"id": scene_id, "geometry": {"type": "Polygon", "coordinates": [ring]},
+            "properties": {"acquired": acquired, "cloud_cover": cloud}}
+
+
+def test_date_coverage_per_date():
+    scenes = [
+        scene("a", "2024-01-02T13:00:00Z", 0, 5),
+        scene("b", "2024-01-02T13:01:00Z", 5, 10),
+        scene("c", "2024-01-02T13:02:00Z", 0, 10, cloud=0.9),
+        scene("d", "2024-01-05T13:00:00Z", 0, 5),
+    ]
+    results = date_coverage(AOI, scenes, grid_size=10)
+    assert [r["data"] for r in results] == ["2024-01-02", "2024-01-05"]
+
+    first, second = results
+    assert first["cenas"] == 3
+    assert first["cobertura_pct"] == 100.0
+    assert first["selecionadas"] == ["c"]
+    assert second["cobertura_pct"] == 50.0
+    assert second["selecionadas"] == ["d"]
+
+
+def test_safe_name():
+    assert safe_name("Terra Indígena / Norte") == "Terra_Indígena_Norte"
+    assert safe_name("///") == "aoi"
+
+
+def test_date_coverage_accepts_null_cloud_cover():
+    null_cloud = scene("a", "2024-01-02T13:00:00Z", 0, 10)
+    null_cloud["properties"]["cloud_cover"] = None
+    assert date_coverage(AOI, [null_cloud], grid_size=10)[0]["selecionadas"] == ["a"]
+
+
+class FakeExecutor:
+    """Pool sem processos: a AOI "quebrada" falha como um processo morto, "lenta" nunca termina"""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.futures = []
+        self.shutdown_wait = None
+        FakeExecutor.instances.append(self)
+
+    def submit(self, fn, aoi, options):
+        future = Future()
+        if aoi["name"] == "quebrada":
+            future.set_exception(BrokenProcessPool("processo encerrado"))
+        elif aoi["name"] != "lenta":
+            future.set_result({"aoi": aoi["name"], "erro": ""})
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True):
+        self.shutdown_wait = wait
+
+
+def run_fake_batch(monkeypatch, tmp_path, names, is_canceled=None):
+    FakeExecutor.instances.clear()
+    monkeypatch.setattr(core.batch, "ProcessPoolExecutor", FakeExecutor)
+    monkeypatch.setattr(core.batch, "CANCEL_POLL_INTERVAL", 0.01)
+    aois = [{"name": name, "geometry": AOI} for name in names]
+    return run_batch(aois, {"folder": str(tmp_path)}, is_canceled=is_canceled), FakeExecutor.instances[0]
+
+
+def test_run_batch_records_worker_failures(monkeypatch, tmp_path):
+    summaries, executor = run_fake_batch(monkeypatch, tmp_path, ["a", "quebrada", "b"])
+    assert [s["aoi"] for s in summaries] == ["a", "quebrada", "b"]
+    assert summaries[1]["erro"] == "processo encerrado"
+    assert executor.shutdown_wait is True
+
+
+def test_run_batch_cancel_does_not_wait_for_running_aois(monkeypatch, tmp_path):
+    summaries, executor = run_fake_batch(monkeypatch, tmp_path, ["a", "lenta"], is_canceled=lambda: True)
+    assert [s["aoi"] for s in summaries] == ["a"]
+    assert executor.shutdown_wait is False
+    assert executor.futures[1].cancelled()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from core.coverage import greedy_cover, point_in_polygons, ring_mask, sample_polygons
+
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+
+
+def test_greedy_cover_prefers_fewer_clearer_scenes():
+    candidates = [
+        ("left", 0b0011, 0),
+        ("right", 0b1100, 0),
+        ("all_cloudy", 0b1111, 100),
+        ("empty", 0, 0),
+    ]
+    # A cena inteira com 100% de nuvens custa 4 (score 1); as metades limpas têm score 2
+    selected, covered = greedy_cover(candidates, 4, cloud_weight=3.0)
+    assert selected == ["left", "right"]
+    assert covered == 0b1111
+
+
+def test_greedy_cover_stops_at_target():
+    candidates = [("a", 0b0111, 0), ("b", 0b1000, 0)]
+    assert greedy_cover(candidates, 4, target=0.75) == (["a"], 0b0111)
+    assert greedy_cover(candidates, 0) == ([], 0)
+
+
+def test_sample_polygons_and_ring_mask():
+    hole = [(4, 4), (6, 4), (6, 6), (4, 6), (4, 4)]
+    points = sample_polygons([[SQUARE, hole]], grid_size=10)
+    assert len(points) == 96
+    assert not point_in_polygons(5, 5, [[SQUARE, hole]])
+
+    left = [(0, 0), (5, 0), (5, 10), (0, 10), (0, 0)]
+    mask = ring_mask(left, points)
+    assert bin(mask).count("1") == len([p for p in points if p[0] < 5])
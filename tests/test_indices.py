@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from core.indices import DEFAULT_PROC_PARAM, color_ramp, compute_index, proc_param
+
+
+def test_proc_param_and_color_ramp_defaults():
+    assert proc_param("NDWI") == "ndwi"
+    assert proc_param("XYZ") == DEFAULT_PROC_PARAM
+    assert color_ramp("NDVI")[0][0] == -1
+    assert color_ramp("XYZ")[-1][1] == (255, 255, 255)
+
+
+def test_compute_index_scales_reflectance():
+    # red = 0.1, nir = 0.5
+    assert compute_index("NDVI", 0, 0, 1000, 5000) == pytest.approx(0.4 / 0.6)
+    assert compute_index("NDWI", 0, 3000, 0, 1000) == pytest.approx(0.5)
+
+
+def test_compute_index_rejects_composites():
+    with pytest.raises(ValueError):
+        compute_index("CIR", 1, 1, 1, 1)
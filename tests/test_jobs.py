@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+
+@pytest.fixture
+def jobs_module(plugin_module):
+    return plugin_module("jobs")
+
+
+class FakeTask:
+    def __init__(self, cancel_after=None):
+        self.progress = []
+        self.stage = None
+        self.cancel_after = cancel_after
+
+    def isCanceled(self):
+        return self.cancel_after is not None and len(self.progress) >= self.cancel_after
+
+    def setProgress(self, value):
+        self.progress.append(value)
+
+
+def test_context_maps_stage_progress_to_the_job(jobs_module):
+    task = FakeTask()
+    context = jobs_module.JobContext(task).sub(50, 100)
+
+    context.setProgress(50)
+    context.sub(0, 50).setProgress(100)
+    context.setProgress(150)
+    assert task.progress == [75.0, 75.0, 100.0]
+
+
+def test_steps_split_the_progress_and_stop_when_canceled(jobs_module):
+    task = FakeTask()
+    done = []
+    for item, step in jobs_module.JobContext(task).steps(["a", "b"]):
+        step.setProgress(100)
+        done.append(item)
+    assert done == ["a", "b"]
+    assert task.progress == [50.0, 100.0, 100.0]
+
+    # Cancelada após o progresso da primeira etapa
+    task = FakeTask(cancel_after=1)
+    done = []
+    for item, step in jobs_module.JobContext(task).steps(["a", "b"]):
+        step.setProgress(100)
+        done.append(item)
+    assert done == ["a"]
+    assert task.progress == [50.0]
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+
+@pytest.fixture
+def registry_module(plugin_module):
+    return plugin_module("layer_registry")
+
+
+@pytest.fixture
+def project(qgis_app):
+    from qgis.core import QgsProject
+    return QgsProject()
+
+
+def memory_layer(project, name):
+    from qgis.core import QgsVectorLayer
+
+    layer = QgsVectorLayer("Polygon?crs=EPSG:4326", name, "memory")
+    project.addMapLayer(layer)
+    return layer
+
+
+def stored(project, registry_module):
+    text, _ = project.readEntry(registry_module.PROJECT_SCOPE, registry_module.PROJECT_KEY, "")
+    return json.loads(text) if text else {}
+
+
+def test_register_is_batched_and_flushed(registry_module, project):
+    layer = memory_layer(project, "Planet_Imagens_2024-01-02")
+    registry = registry_module.LayerRegistry(project)
+
+    registry.register(layer, registry_module.ROLE_FOOTPRINTS, {"date": "2024-01-02"})
+    registry.add_features(layer.id(), {"item-1": {"cloud": 0.1}})
+    # Gravação agrupada: ainda não está no projeto
+    assert stored(project, registry_module) == {}
+
+    registry.flush()
+    entry = stored(project, registry_module)[layer.id()]
+    assert entry["role"] == registry_module.ROLE_FOOTPRINTS
+    assert entry["params"] == {"date": "2024-01-02"}
+    assert registry.feature_metadata(layer.id(), "item-1") == {"cloud": 0.1}
+    registry.disconnect()
+
+
+def test_pending_changes_are_written_with_the_project(registry_module, project, tmp_path):
+    from qgis.core import QgsProject
+
+    layer = memory_layer(project, "Alertas SCCON")
+    registry = registry_module.LayerRegistry(project)
+    registry.register(layer, registry_module.ROLE_ALERTS, {"tipo": "DESMATAMENTO"})
+
+    path = str(tmp_path / "projeto.qgz")
+    assert project.write(path)
+    registry.disconnect()
+
+    reopened = QgsProject()
+    assert reopened.read(path)
+    assert stored(reopened, registry_module)[layer.id()]["params"] == {"tipo": "DESMATAMENTO"}
+
+
+def test_load_skips_missing_layers_and_removal_unregisters(registry_module, project):
+    kept = memory_layer(project, "mosaico")
+    removed = memory_layer(project, "cena")
+    registry = registry_module.LayerRegistry(project)
+    registry.register(kept, registry_module.ROLE_MOSAIC)
+    registry.register(removed, registry_module.ROLE_SCENE)
+    registry.save()
+    registry.disconnect()
+
+    removed_id = removed.id()
+    project.removeMapLayer(removed_id)
+    restored = registry_module.LayerRegistry(project)
+    assert restored.role(kept.id()) == registry_module.ROLE_MOSAIC
+    assert restored.role(removed_id) is None
+    assert restored.layers(registry_module.ROLE_MOSAIC) == [kept]
+
+    project.removeMapLayer(kept.id())
+    assert restored.layer_ids(registry_module.ROLE_MOSAIC) == []
+    restored.disconnect()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+from contextlib import closing
+
+from core.mbtiles import WEB_MERCATOR_HALF, merge_tiles, tile_range
+
+H = WEB_MERCATOR_HALF
+
+
+def mbtiles(path, tiles, bounds=None, center=None):
+    with closing(sqlite3.connect(str(path))) as conn:
+        conn.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+        conn.execute("CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, "
+                     "tile_data BLOB)")
+        conn.execute("CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)")
+        conn.executemany("INSERT INTO tiles VALUES (?, ?, ?, ?)", tiles)
+        for name, value in (("bounds", bounds), ("center", center)):
+            if value is not None:
+                conn.execute("INSERT INTO metadata VALUES (?, ?)", (name, value))
+        conn.commit()
+    return str(path)
+
+
+def read(path):
+    with closing(sqlite3.connect(path)) as conn:
+        tiles = {row[:3]: row[3] for row in conn.execute("SELECT * FROM tiles")}
+        metadata = dict(conn.execute("SELECT name, value FROM metadata"))
+    return tiles, metadata
+
+
+def test_tile_range_excludes_tiles_only_touched_on_the_edge():
+    assert tile_range((-H, -H, H, H), 1) == (0, 1, 0, 1)
+    # Quadrante nordeste: termina exatamente na borda do tile (1, 1) no zoom 1
+    assert tile_range((0, 0, H, H), 1) == (1, 1, 1, 1)
+    assert tile_range((0, 0, 1, 1), 2) == (2, 2, 2, 2)
+
+
+def test_merge_tiles_replaces_drops_stale_and_widens_bounds(tmp_path):
+    target = mbtiles(tmp_path / "cache.mbtiles",
+                     [(1, 0, 1, b"noroeste"), (1, 1, 0, b"sudeste antigo"), (1, 1, 1, b"nordeste antigo")],
+                     bounds="-60.0,-10.0,-50.0,0.0", center="-55.0,-5.0,6")
+    # Delta do leste (x >= 0): o alerta saiu do tile sudeste, que não veio no delta
+    delta = mbtiles(tmp_path / "delta.mbtiles", [(1, 1, 1, b"nordeste novo")],
+                    bounds="0.0,-20.0,10.0,10.0")
+
+    assert merge_tiles(delta, target, (0, -H, H, H), 1, 1) == 1
+
+    tiles, metadata = read(target)
+    assert tiles == {(1, 0, 1): b"noroeste", (1, 1, 1): b"nordeste novo"}
+    assert metadata["bounds"] == "-60.0,-20.0,10.0,10.0"
+    assert metadata["center"] == "-25.0,-5.0,6"
+
+
+def test_merge_tiles_without_extent_only_replaces(tmp_path):
+    target = mbtiles(tmp_path / "cache.mbtiles", [(1, 0, 0, b"a"), (1, 1, 1, b"b")])
+    delta = mbtiles(tmp_path / "delta.mbtiles", [(1, 1, 1, b"c")])
+
+    merge_tiles(delta, target)
+
+    tiles, metadata = read(target)
+    assert tiles == {(1, 0, 0): b"a", (1, 1, 1): b"c"}
+    assert "bounds" not in metadata
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import os
+
+from core.planet import download_mosaic_quads
+
+
+class QuadClient:
+    """Cliente falso: três quads, cada download grava o arquivo de destino"""
+
+    def __init__(self):
+        self.downloaded = []
+
+    def mosaic_by_name(self, name):
+        return {"id": "m1", "name": name}
+
+    def mosaic_quads(self, mosaic_id, bbox):
+        return [{"id": f"q{i}", "_links": {"download": f"https://quads/q{i}"}} for i in range(3)]
+
+    def download(self, url, path):
+        self.downloaded.append(url)
+        with open(path, "wb") as f:
+            f.write(b"tif")
+        return path
+
+
+def test_download_mosaic_quads_skips_existing_and_counts_once(tmp_path):
+    with open(tmp_path / "q0.tif", "wb") as f:
+        f.write(b"tif")
+    client = QuadClient()
+    progress = []
+
+    paths = download_mosaic_quads(client, "global_monthly_2024_01_mosaic", (0, 0, 1, 1), str(tmp_path),
+                                  on_progress=lambda done, total: progress.append((done, total)))
+
+    assert sorted(client.downloaded) == ["https://quads/q1", "https://quads/q2"]
+    assert sorted(os.path.basename(p) for p in paths) == ["q0.tif", "q1.tif", "q2.tif"]
+    assert progress[-1] == (3, 3)
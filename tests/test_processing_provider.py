@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture
+def provider_module(plugin_module):
+    return plugin_module("processing_provider")
+
+
+def test_parse_date_accepts_days_and_months(provider_module):
+    assert provider_module.parse_date(" 2024-03-15 ", "DATA") == date(2024, 3, 15)
+    assert provider_module.parse_date("2024-03", "DATA") == date(2024, 3, 1)
+
+
+def test_parse_date_rejects_other_formats(provider_module):
+    from qgis.core import QgsProcessingException
+
+    with pytest.raises(QgsProcessingException):
+        provider_module.parse_date("15/03/2024", "DATA")
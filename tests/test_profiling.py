@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+
+import core.profiling
+from core.profiling import PHASE_HTTP, ProfileSession, span, start_session, end_session
+
+
+def busy():
+    return sum(i * i for i in range(1000))
+
+
+def test_profile_thread_runs_job_in_worker_thread():
+    session = ProfileSession("teste")
+    results = []
+
+    def job():
+        with session.profile_thread():
+            results.append(busy())
+
+    thread = threading.Thread(target=job)
+    thread.start()
+    thread.join()
+
+    assert results == [busy()]
+    # A partir do 3.12 as threads ficam no perfil da thread principal
+    assert (session.stats() is None) == (sys.version_info >= (3, 12))
+
+
+def test_profile_thread_runs_unprofiled_when_another_profiler_is_active(monkeypatch):
+    class BusyProfile:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(core.profiling.cProfile, "Profile", BusyProfile)
+    session = ProfileSession("teste")
+    with session.profile_thread():
+        value = busy()
+    assert value == busy()
+    assert session.stats() is None
+
+
+def test_spans_are_recorded_only_in_active_session():
+    with span(PHASE_HTTP):
+        pass
+    session = start_session("teste")
+    try:
+        with span(PHASE_HTTP):
+            pass
+    finally:
+        end_session(session)
+    assert session.spans()[PHASE_HTTP][1] == 1
+    assert "Ação: teste" in session.summary()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from core.alert_filters import AlertQuery
+from core.sccon_wfs import WfsService, deduplicate, split_bbox, parse_capabilities
+
+
+def feature(feature_id):
+    return {"type": "Feature", "id": feature_id, "properties": {}}
+
+
+def test_split_bbox_covers_extent():
+    tiles = split_bbox((0.0, 0.0, 1.0, 0.5), tile_size=0.25)
+    assert len(tiles) == 8
+    assert min(t[0] for t in tiles) == 0.0 and max(t[2] for t in tiles) == 1.0
+    assert min(t[1] for t in tiles) == 0.0 and max(t[3] for t in tiles) == 0.5
+
+
+def test_split_bbox_limits_tile_count():
+    assert len(split_bbox((0.0, 0.0, 10.0, 10.0), tile_size=0.1, max_tiles=16)) <= 16
+    assert split_bbox((1.0, 1.0, 1.0, 2.0)) == []
+
+
+def test_deduplicate_drops_repeated_ids():
+    pages = [
+        (0, 2, {"features": [feature("a.1"), feature("a.2")]}),
+        (1, 2, {"features": [feature("a.2"), feature("a.3"), {"properties": {}}]}),
+    ]
+    result = [[f.get("id") for f in page["features"]] for _, _, page in deduplicate(pages)]
+    assert result == [["a.1", "a.2"], ["a.3", None]]
+
+
+def test_deduplicate_falls_back_to_key_property():
+    pages = [
+        (0, 2, {"features": [{"properties": {"id": 7}}, {"properties": {"id": 8}}]}),
+        (1, 2, {"features": [{"properties": {"id": 8}}, {"properties": {"id": 9}}]}),
+    ]
+    result = [[f["properties"]["id"] for f in page["features"]] for _, _, page in deduplicate(pages, "id")]
+    assert result == [[7, 8], [9]]
+
+
+def test_parse_capabilities():
+    content = b"""<wfs:WFS_Capabilities version="1.1.0" xmlns:wfs="http://www.opengis.net/wfs"
+        xmlns:ogc="http://www.opengis.net/ogc">
+      <wfs:FeatureTypeList><wfs:FeatureType><wfs:Name>sccon:alerts</wfs:Name></wfs:FeatureType></wfs:FeatureTypeList>
+      <ogc:Filter_Capabilities><ogc:Scalar_Capabilities><ogc:ComparisonOperators>
+        <ogc:ComparisonOperator>EqualTo</ogc:ComparisonOperator>
+      </ogc:ComparisonOperators></ogc:Scalar_Capabilities></ogc:Filter_Capabilities>
+    </wfs:WFS_Capabilities>"""
+    caps = parse_capabilities(content)
+    assert caps["version"] == "1.1.0"
+    assert caps["feature_types"] == ["sccon:alerts"]
+    assert "EqualTo" in caps["operators"]
+    assert "cql" not in caps
+
+
+class PagedService(WfsService):
+    """Serviço com páginas sobrepostas, como um WFS sem ordem estável"""
+
+    def __init__(self, properties):
+        super().__init__("http://wfs.invalid/wfs", "", "")
+        self._properties = properties
+        self.requested = []
+
+    def hits(self, extra_params=None):
+        return 4
+
+    def get_page(self, start_index, count, extra_params=None):
+        self.requested.append(dict(extra_params or {}))
+        ids = ["a.1", "a.2", "a.3", "a.4", "a.4"][start_index:start_index + count + 1]
+        return {"features": [feature(i) for i in ids]}
+
+
+def test_iter_pages_sorts_by_key_and_deduplicates():
+    service = PagedService(["geom", "id", "tipo"])
+    ids = [f["id"] for _, _, page in service.iter_pages(page_size=2, max_workers=1) for f in page["features"]]
+    assert sorted(ids) == ["a.1", "a.2", "a.3", "a.4"]
+    assert all(params.get("sortBy") == "id" for params in service.requested)
+
+
+def test_iter_pages_without_key_sends_no_sort():
+    service = PagedService(["geom", "tipo"])
+    list(service.iter_pages(page_size=2, max_workers=1))
+    assert all("sortBy" not in params for params in service.requested)
+
+
+class TypedService(PagedService):
+    """Páginas sobrepostas com o atributo 'tipo' preenchido"""
+
+    def get_page(self, start_index, count, extra_params=None):
+        page = super().get_page(start_index, count, extra_params)
+        for f in page["features"]:
+            f["properties"]["tipo"] = "Queimada" if f["id"] == "a.4" else "Desmatamento"
+        return page
+
+
+def test_distinct_values_requests_only_the_property_and_key():
+    service = TypedService(["geom", "id", "tipo"])
+    assert service.distinct_values("tipo") == {"Desmatamento", "Queimada"}
+    assert all(params["propertyName"] == "tipo,id" for params in service.requested)
+
+
+def test_distinct_values_filters_unsupported_predicates_locally():
+    service = TypedService(["geom", "id", "tipo", "area_ha"])
+    service._geometry_name = "geom"
+    service.capabilities = lambda refresh=False: {"operators": set()}
+    values = service.distinct_values("tipo", AlertQuery(alert_type="Queimada"))
+    assert values == {"Queimada"}
+    assert all(params["propertyName"] == "tipo,id" for params in service.requested)
+    assert all("FILTER" not in params for params in service.requested)
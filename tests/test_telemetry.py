@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from core.telemetry import endpoint_name, is_tile, percentile
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([3, 1, 2, 4], 0.50) == 2
+    assert percentile([5, 1, 4, 2, 3], 0.50) == 3
+    assert percentile(list(range(1, 101)), 0.95) == 95
+    assert percentile([7], 0.95) == 7
+
+
+def test_endpoint_name_generalizes_identifiers():
+    url = "https://tiles.planet.com/basemaps/v1/planet-tiles/global_monthly_2024_01_mosaic/gmap/12/1520/2100.png"
+    assert endpoint_name(url) == "tiles.planet.com/basemaps/v1/planet-tiles/{id}/gmap/{id}/{id}/{id}"
+    assert endpoint_name("https://api.planet.com/data/v1/quick-search") == "api.planet.com/data/v1/quick-search"
+
+
+def test_endpoint_name_wfs_operation():
+    url = "https://geo.example.com/wfs?service=WFS&REQUEST=GetFeature&resultType=hits"
+    assert endpoint_name(url) == "geo.example.com/wfs GetFeature (hits)"
+    assert endpoint_name("https://geo.example.com/wfs?request=GetCapabilities") == "geo.example.com/wfs GetCapabilities"
+
+
+def test_is_tile():
+    assert is_tile("https://tiles.planet.com/data/v1/PSScene/abc/10/1/2.png?api_key=x")
+    assert is_tile("https://tiles.planet.com/basemaps/v1/planet-tiles/m/gmap/1/2/3")
+    assert not is_tile("https://api.planet.com/data/v1/quick-search")
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from core.tiles import before_after_mosaics, month_range, monthly_mosaic_id, shift_month
+
+
+def test_month_range_crosses_year():
+    assert list(month_range(date(2023, 11, 15), date(2024, 2, 1))) == [(2023, 11), (2023, 12), (2024, 1), (2024, 2)]
+
+
+def test_shift_month():
+    assert shift_month(2024, 1, -1) == (2023, 12)
+    assert shift_month(2023, 12, 1) == (2024, 1)
+    assert shift_month(2024, 6, 0) == (2024, 6)
+
+
+def test_monthly_mosaic_id():
+    assert monthly_mosaic_id(2024, 3) == "global_monthly_2024_03_mosaic"
+
+
+def test_before_after_mosaics_uses_alert_month_when_next_is_not_published():
+    assert before_after_mosaics("2024-03-10", today=date(2024, 12, 1)) == (
+        "global_monthly_2024_02_mosaic", "global_monthly_2024_04_mosaic")
+    assert before_after_mosaics("2024-03-10", today=date(2024, 4, 5)) == (
+        "global_monthly_2024_02_mosaic", "global_monthly_2024_03_mosaic")